@@ -555,6 +555,12 @@ def init_admin_routes(app, get_db, SessionLocal, parse_and_verify_telegram_init_
                 legacy_cleanup_done = False
                 legacy_list = ['team_player_stats','match_scores','match_player_events','match_lineups','match_stats','match_flags']
                 if not soft_mode:
+                    # Потоковая копия legacy-таблиц до очистки (admin_backups, action=season_rollover)
+                    try:
+                        from app import _stream_admin_backup
+                        _stream_admin_backup('season_rollover', legacy_list, created_by=str(admin_id) if admin_id else None)
+                    except Exception as bk_err:
+                        app.logger.warning(f"season rollover backup failed: {bk_err}")
                     legacy_db = get_db()
                     try:
                         for tbl in legacy_list:
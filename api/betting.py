@@ -6,13 +6,14 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timezone, timedelta
 import os
 
+from config import settings as SETTINGS
+
 betting_bp = Blueprint('betting', __name__, url_prefix='/api/betting')
 
 def init_betting_routes(app, get_db, SessionLocal, User, Bet, parse_and_verify_telegram_init_data, 
                        _build_betting_tours_payload, _snapshot_get, _snapshot_set, _load_all_tours_from_sheet,
-                       BET_MIN_STAKE, BET_MAX_STAKE, BET_DAILY_MAX_STAKE, BET_LOCK_AHEAD_MINUTES,
                        _compute_1x2_odds, _compute_totals_odds, _compute_specials_odds):
-    """Initialize betting routes with dependencies"""
+    """Initialize betting routes with dependencies (лимиты ставок — из SETTINGS, меняются по reload)"""
     
     @betting_bp.route('/tours', methods=['GET'])
     def api_betting_tours():
@@ -58,10 +59,10 @@ def init_betting_routes(app, get_db, SessionLocal, User, Bet, parse_and_verify_t
             except Exception:
                 stake = 0
                 
-            if stake < BET_MIN_STAKE:
-                return jsonify({'error': f'Минимальная ставка {BET_MIN_STAKE}'}), 400
-            if stake > BET_MAX_STAKE:
-                return jsonify({'error': f'Максимальная ставка {BET_MAX_STAKE}'}), 400
+            if stake < SETTINGS.BET_MIN_STAKE:
+                return jsonify({'error': f'Минимальная ставка {SETTINGS.BET_MIN_STAKE}'}), 400
+            if stake > SETTINGS.BET_MAX_STAKE:
+                return jsonify({'error': f'Максимальная ставка {SETTINGS.BET_MAX_STAKE}'}), 400
             
             # Дополнительная логика размещения ставки здесь...
             # (код слишком большой для примера, это концептуальная структура)
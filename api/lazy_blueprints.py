@@ -0,0 +1,109 @@
+"""
+Lazy blueprints for Liga Obninska
+URL rules are registered at startup, view modules are imported on first request
+"""
+import threading
+from flask import Blueprint, current_app
+from werkzeug.utils import import_string
+
+# Таблица маршрутов ленивых blueprint'ов: name -> (module, [(rule, endpoint, methods), ...]).
+# Модуль с view-функциями не импортируется при старте: Werkzeug нужен только сам URL map.
+LAZY_BLUEPRINTS = {
+    'news': ('api.news', [
+        ('/api/admin/news', 'api_admin_news_list', ['GET']),
+        ('/api/admin/news', 'api_admin_news_create', ['POST']),
+        ('/api/admin/news/<int:news_id>', 'api_admin_news_update', ['PUT']),
+        ('/api/admin/news/<int:news_id>', 'api_admin_news_delete', ['DELETE']),
+        ('/api/news', 'api_news_public', ['GET']),
+    ]),
+    'streams': ('api.streams', [
+        ('/api/streams/confirm', 'api_streams_confirm', ['POST']),
+        ('/api/streams/list', 'api_streams_list', ['GET']),
+        ('/api/streams/upcoming', 'api_streams_upcoming', ['GET']),
+        ('/api/streams/set', 'api_streams_set', ['POST']),
+        ('/api/streams/get', 'api_streams_get', ['GET']),
+        ('/api/streams/reset', 'api_streams_reset', ['POST']),
+    ]),
+    'comments': ('api.streams', [
+        ('/api/match/comments/list', 'api_match_comments_list', ['GET']),
+        ('/api/match/comments/add', 'api_match_comments_add', ['POST']),
+    ]),
+}
+
+_BIND_LOCK = threading.Lock()
+
+
+def _bind_dependencies(module):
+    """Внедряет зависимости из app.py (модели, get_db, хелперы) в глобалы view-модуля.
+
+    Модуль перечисляет нужные имена в __lazy_deps__; источник — app.extensions['lazy_deps']
+    (callable, возвращающий globals() app.py, чтобы не импортировать app повторно как модуль).
+    """
+    names = getattr(module, '__lazy_deps__', ())
+    if not names or getattr(module, '_lazy_deps_bound', False):
+        return
+    with _BIND_LOCK:
+        if getattr(module, '_lazy_deps_bound', False):
+            return
+        provider = current_app.extensions.get('lazy_deps')
+        source = provider() if callable(provider) else (provider or {})
+        missing = []
+        for name in names:
+            if name in source:
+                setattr(module, name, source[name])
+            else:
+                missing.append(name)
+        if missing:
+            current_app.logger.warning(f"lazy blueprint {module.__name__}: missing deps {missing}")
+        module._lazy_deps_bound = True
+
+
+class LazyView:
+    """View-прокси: импортирует модуль и резолвит функцию при первом вызове"""
+
+    def __init__(self, import_name: str, func_name: str):
+        self.import_name = import_name
+        self.func_name = func_name
+        self.__name__ = func_name
+        self.__doc__ = f"lazy view {import_name}:{func_name}"
+        self._view = None
+
+    def resolve(self):
+        if self._view is None:
+            module = import_string(self.import_name)
+            _bind_dependencies(module)
+            self._view = getattr(module, self.func_name)
+        return self._view
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+
+def register_lazy_blueprint(app, name: str):
+    """Регистрирует blueprint из LAZY_BLUEPRINTS без импорта его модуля"""
+    import_name, rules = LAZY_BLUEPRINTS[name]
+    bp = Blueprint(name, import_name)
+    for rule, endpoint, methods in rules:
+        bp.add_url_rule(rule, endpoint=endpoint, view_func=LazyView(import_name, endpoint), methods=methods)
+    app.register_blueprint(bp)
+    return bp
+
+
+def init_lazy_blueprints(app, deps_provider, names=None):
+    """Регистрирует все (или выбранные) ленивые blueprint'ы.
+
+    deps_provider: callable без аргументов, возвращающий mapping с зависимостями (обычно globals app.py).
+    LAZY_BLUEPRINTS_PRELOAD=1 — импортировать модули сразу (поведение как до ленивой загрузки).
+    """
+    import os
+    app.extensions['lazy_deps'] = deps_provider
+    registered = []
+    for name in (names or LAZY_BLUEPRINTS.keys()):
+        registered.append(register_lazy_blueprint(app, name))
+    if os.environ.get('LAZY_BLUEPRINTS_PRELOAD', '').lower() in ('1', 'true', 'yes'):
+        with app.app_context():
+            for bp in registered:
+                for endpoint, view in app.view_functions.items():
+                    if endpoint.startswith(bp.name + '.') and isinstance(view, LazyView):
+                        view.resolve()
+    return registered
@@ -3,7 +3,7 @@ Monitoring API routes for Liga Obninska
 Health checks, metrics, and system status endpoints
 """
 from flask import Blueprint, jsonify, request
-from utils.monitoring import performance_metrics, db_monitor, cache_monitor, health_check
+from utils.monitoring import performance_metrics, db_monitor, cache_monitor, health_check, query_profiler
 from utils.decorators import require_admin, rate_limit
 from datetime import datetime, timezone
 import os
@@ -85,6 +85,25 @@ def slow_queries():
         'threshold_ms': 100
     })
 
+@monitoring_bp.route('/metrics/queries', methods=['GET'])
+@require_admin()
+@rate_limit(max_requests=20, time_window=60)
+def query_profile():
+    """Per-request SQL profile: avg/max queries per endpoint, N+1 offenders, recent requests"""
+    try:
+        limit = max(1, min(200, int(request.args.get('limit', '20'))))
+    except (TypeError, ValueError):
+        limit = 20
+    return jsonify(query_profiler.get_report(limit=limit))
+
+@monitoring_bp.route('/metrics/queries/reset', methods=['POST'])
+@require_admin()
+@rate_limit(max_requests=10, time_window=60)
+def query_profile_reset():
+    """Reset SQL profiler aggregates"""
+    query_profiler.reset()
+    return jsonify({'status': 'ok'})
+
 @monitoring_bp.route('/status', methods=['GET'])
 def system_status():
     """Public system status endpoint"""
@@ -0,0 +1,428 @@
+"""
+News API routes for Liga Obninska
+Admin CRUD and public news list (lazy blueprint, see api/lazy_blueprints.py)
+"""
+import os
+from datetime import datetime, timezone
+from flask import request, jsonify, current_app
+
+# Зависимости из app.py, внедряются при первом запросе (api.lazy_blueprints._bind_dependencies)
+__lazy_deps__ = (
+    'News', 'SessionLocal', 'get_db', 'parse_and_verify_telegram_init_data',
+    'manual_log', '_json_response',
+)
+News = None
+SessionLocal = None
+get_db = None
+parse_and_verify_telegram_init_data = None
+manual_log = None
+_json_response = None
+
+
+def _get_news_session():
+    """Возвращает SQLAlchemy session для модели News.
+    1) Пробуем взять advanced db_manager (если новая архитектура активна)
+    2) Иначе fallback на legacy get_db()
+    """
+    try:
+        from database.database_models import db_manager as _adv_db  # type: ignore
+        return _adv_db.get_session()
+    except Exception:
+        return get_db()
+
+
+def api_admin_news_list():
+    """Список новостей (админ)."""
+    try:
+        if News is None:
+            return jsonify({'error': 'Модель новостей недоступна'}), 500
+        parsed = parse_and_verify_telegram_init_data(request.args.get('initData', ''))
+        if not parsed or not parsed.get('user'):
+            return jsonify({'error': 'Недействительные данные'}), 401
+        user_id = str(parsed['user'].get('id'))
+        admin_id = os.environ.get('ADMIN_USER_ID', '')
+        if not admin_id or user_id != admin_id:
+            return jsonify({'error': 'Доступ запрещен'}), 403
+        if not SessionLocal:
+            return jsonify({'error': 'База данных недоступна'}), 500
+
+        db = _get_news_session()
+        try:
+            rows = db.query(News).order_by(News.created_at.desc()).all()
+            return jsonify({'news': [
+                {
+                    'id': r.id,
+                    'title': r.title,
+                    'content': r.content,
+                    'author_id': r.author_id,
+                    'created_at': r.created_at.isoformat() if r.created_at else None,
+                    'updated_at': r.updated_at.isoformat() if r.updated_at else None
+                } for r in rows
+            ]})
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"news list error: {e}")
+        return jsonify({'error': 'Ошибка при получении новостей'}), 500
+
+
+def api_admin_news_create():
+    """Создать новость (админ)."""
+    try:
+        if News is None:
+            manual_log(
+                action="news_create",
+                description="Попытка создания новости - модель недоступна",
+                result_status='error',
+                affected_data={'error': 'News model unavailable'}
+            )
+            return jsonify({'error': 'Модель новостей недоступна'}), 500
+        data = request.get_json() or {}
+        parsed = parse_and_verify_telegram_init_data(data.get('initData', ''))
+        if not parsed or not parsed.get('user'):
+            manual_log(
+                action="news_create",
+                description="Создание новости - неверные данные авторизации",
+                result_status='error',
+                affected_data={'error': 'Invalid auth data'}
+            )
+            return jsonify({'error': 'Недействительные данные'}), 401
+        user_id = str(parsed['user'].get('id'))
+        admin_id = os.environ.get('ADMIN_USER_ID', '')
+        if not admin_id or user_id != admin_id:
+            manual_log(
+                action="news_create",
+                description=f"Создание новости - доступ запрещен для пользователя {user_id}",
+                result_status='error',
+                affected_data={'user_id': user_id, 'admin_required': True}
+            )
+            return jsonify({'error': 'Доступ запрещен'}), 403
+
+        title = (data.get('title') or '').strip()
+        content = (data.get('content') or '').strip()
+        if not title or not content:
+            manual_log(
+                action="news_create",
+                description="Создание новости - пустой заголовок или содержание",
+                result_status='error',
+                affected_data={'title_empty': not title, 'content_empty': not content}
+            )
+            return jsonify({'error': 'Заголовок и содержание обязательны'}), 400
+        if not SessionLocal:
+            manual_log(
+                action="news_create",
+                description="Создание новости - база данных недоступна",
+                result_status='error',
+                affected_data={'error': 'Database unavailable'}
+            )
+            return jsonify({'error': 'База данных недоступна'}), 500
+
+        db = _get_news_session()
+        try:
+            news = News(title=title, content=content, author_id=int(user_id))
+            db.add(news)
+            db.commit()
+
+            # Инвалидация + прогрев
+            try:
+                from optimizations.multilevel_cache import get_cache
+                cache = get_cache()
+                cache.invalidate_pattern('cache:news')
+                try:
+                    latest = db.query(News).order_by(News.created_at.desc()).limit(5).all()
+                    warm_payload = [
+                        {
+                            'id': r.id,
+                            'title': r.title,
+                            'content': r.content,
+                            'created_at': r.created_at.isoformat() if r.created_at else None
+                        } for r in latest
+                    ]
+                    cache.set('news', warm_payload, 'limit:5:offset:0')
+                except Exception:
+                    pass
+            except Exception as _e:
+                current_app.logger.warning(f"news cache invalidate (create) failed: {_e}")
+
+            # Логируем успешное создание новости
+            manual_log(
+                action="news_create",
+                description=f"Создана новость: '{title}' (ID: {news.id})",
+                result_status='success',
+                affected_data={
+                    'news_id': news.id,
+                    'title': title,
+                    'content_length': len(content),
+                    'author_id': user_id
+                }
+            )
+
+            return jsonify({'status': 'success', 'id': news.id, 'title': news.title, 'content': news.content})
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"news create error: {e}")
+        return jsonify({'error': 'Ошибка при создании новости'}), 500
+
+
+def api_admin_news_update(news_id):
+    """Обновить новость (админ)."""
+    try:
+        if News is None:
+            manual_log(
+                action="news_update",
+                description=f"Попытка обновления новости {news_id} - модель недоступна",
+                result_status='error',
+                affected_data={'news_id': news_id, 'error': 'News model unavailable'}
+            )
+            return jsonify({'error': 'Модель новостей недоступна'}), 500
+        data = request.get_json() or {}
+        parsed = parse_and_verify_telegram_init_data(data.get('initData', ''))
+        if not parsed or not parsed.get('user'):
+            manual_log(
+                action="news_update",
+                description=f"Обновление новости {news_id} - неверные данные авторизации",
+                result_status='error',
+                affected_data={'news_id': news_id, 'error': 'Invalid auth data'}
+            )
+            return jsonify({'error': 'Недействительные данные'}), 401
+        user_id = str(parsed['user'].get('id'))
+        admin_id = os.environ.get('ADMIN_USER_ID', '')
+        if not admin_id or user_id != admin_id:
+            manual_log(
+                action="news_update",
+                description=f"Обновление новости {news_id} - доступ запрещен для пользователя {user_id}",
+                result_status='error',
+                affected_data={'news_id': news_id, 'user_id': user_id, 'admin_required': True}
+            )
+            return jsonify({'error': 'Доступ запрещен'}), 403
+        if not SessionLocal:
+            manual_log(
+                action="news_update",
+                description=f"Обновление новости {news_id} - база данных недоступна",
+                result_status='error',
+                affected_data={'news_id': news_id, 'error': 'Database unavailable'}
+            )
+            return jsonify({'error': 'База данных недоступна'}), 500
+
+        db = _get_news_session()
+        try:
+            news = db.query(News).filter(News.id == news_id).first()
+            if not news:
+                manual_log(
+                    action="news_update",
+                    description=f"Обновление новости {news_id} - новость не найдена",
+                    result_status='error',
+                    affected_data={'news_id': news_id, 'error': 'News not found'}
+                )
+                return jsonify({'error': 'Новость не найдена'}), 404
+
+            # Сохраняем старые данные для логирования
+            old_title = news.title
+            old_content = news.content
+
+            title = (data.get('title') or '').strip()
+            content = (data.get('content') or '').strip()
+            if title:
+                news.title = title
+            if content:
+                news.content = content
+            news.updated_at = datetime.now(timezone.utc)
+            db.commit()
+
+            try:
+                from optimizations.multilevel_cache import get_cache
+                cache = get_cache()
+                cache.invalidate_pattern('cache:news')
+                try:
+                    latest = db.query(News).order_by(News.created_at.desc()).limit(5).all()
+                    warm_payload = [
+                        {
+                            'id': r.id,
+                            'title': r.title,
+                            'content': r.content,
+                            'created_at': r.created_at.isoformat() if r.created_at else None
+                        } for r in latest
+                    ]
+                    cache.set('news', warm_payload, 'limit:5:offset:0')
+                except Exception:
+                    pass
+            except Exception as _e:
+                current_app.logger.warning(f"news cache invalidate (update) failed: {_e}")
+
+            # Логируем успешное обновление новости
+            manual_log(
+                action="news_update",
+                description=f"Обновлена новость {news_id}: '{news.title}'",
+                result_status='success',
+                affected_data={
+                    'news_id': news_id,
+                    'changes': {
+                        'title': {'old': old_title, 'new': news.title} if title else None,
+                        'content': {'old_length': len(old_content), 'new_length': len(news.content)} if content else None
+                    },
+                    'updated_by': user_id
+                }
+            )
+
+            return jsonify({'status': 'success', 'id': news.id, 'title': news.title, 'content': news.content})
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"news update error: {e}")
+        return jsonify({'error': 'Ошибка при обновлении новости'}), 500
+
+
+def api_admin_news_delete(news_id):
+    """Удалить новость (админ)."""
+    try:
+        if News is None:
+            manual_log(
+                action="news_delete",
+                description=f"Попытка удаления новости {news_id} - модель недоступна",
+                result_status='error',
+                affected_data={'news_id': news_id, 'error': 'News model unavailable'}
+            )
+            return jsonify({'error': 'Модель новостей недоступна'}), 500
+        parsed = parse_and_verify_telegram_init_data(request.args.get('initData', ''))
+        if not parsed or not parsed.get('user'):
+            manual_log(
+                action="news_delete",
+                description=f"Удаление новости {news_id} - неверные данные авторизации",
+                result_status='error',
+                affected_data={'news_id': news_id, 'error': 'Invalid auth data'}
+            )
+            return jsonify({'error': 'Недействительные данные'}), 401
+        user_id = str(parsed['user'].get('id'))
+        admin_id = os.environ.get('ADMIN_USER_ID', '')
+        if not admin_id or user_id != admin_id:
+            manual_log(
+                action="news_delete",
+                description=f"Удаление новости {news_id} - доступ запрещен для пользователя {user_id}",
+                result_status='error',
+                affected_data={'news_id': news_id, 'user_id': user_id, 'admin_required': True}
+            )
+            return jsonify({'error': 'Доступ запрещен'}), 403
+        if not SessionLocal:
+            manual_log(
+                action="news_delete",
+                description=f"Удаление новости {news_id} - база данных недоступна",
+                result_status='error',
+                affected_data={'news_id': news_id, 'error': 'Database unavailable'}
+            )
+            return jsonify({'error': 'База данных недоступна'}), 500
+
+        db = _get_news_session()
+        try:
+            news = db.query(News).filter(News.id == news_id).first()
+            if not news:
+                manual_log(
+                    action="news_delete",
+                    description=f"Удаление новости {news_id} - новость не найдена",
+                    result_status='error',
+                    affected_data={'news_id': news_id, 'error': 'News not found'}
+                )
+                return jsonify({'error': 'Новость не найдена'}), 404
+            
+            # Сохраняем данные для логирования перед удалением
+            deleted_news_data = {
+                'id': news.id,
+                'title': news.title,
+                'content_length': len(news.content),
+                'author_id': news.author_id,
+                'created_at': news.created_at.isoformat() if news.created_at else None
+            }
+            
+            db.delete(news)
+            db.commit()
+
+            try:
+                from optimizations.multilevel_cache import get_cache
+                cache = get_cache()
+                cache.invalidate_pattern('cache:news')
+                try:
+                    latest = db.query(News).order_by(News.created_at.desc()).limit(5).all()
+                    warm_payload = [
+                        {
+                            'id': r.id,
+                            'title': r.title,
+                            'content': r.content,
+                            'created_at': r.created_at.isoformat() if r.created_at else None
+                        } for r in latest
+                    ]
+                    cache.set('news', warm_payload, 'limit:5:offset:0')
+                except Exception:
+                    pass
+            except Exception as _e:
+                current_app.logger.warning(f"news cache invalidate (delete) failed: {_e}")
+
+            # Логируем успешное удаление новости
+            manual_log(
+                action="news_delete",
+                description=f"Удалена новость {news_id}: '{deleted_news_data['title']}'",
+                result_status='success',
+                affected_data={
+                    'deleted_news': deleted_news_data,
+                    'deleted_by': user_id
+                }
+            )
+
+            return jsonify({'status': 'success'})
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"news delete error: {e}")
+        return jsonify({'error': 'Ошибка при удалении новости'}), 500
+
+
+def api_news_public():
+    """Публичный список новостей (кэш + ETag)."""
+    try:
+        if News is None:
+            return jsonify({'news': []})
+        if not SessionLocal:
+            return jsonify({'error': 'База данных недоступна'}), 500
+        from optimizations.multilevel_cache import get_cache
+        cache = get_cache()
+        limit = min(int(request.args.get('limit', 5)), 50)
+        offset = max(int(request.args.get('offset', 0)), 0)
+
+        def _load():
+            db = _get_news_session()
+            try:
+                q = db.query(News).order_by(News.created_at.desc())
+                if offset:
+                    q = q.offset(offset)
+                q = q.limit(limit)
+                rows = q.all()
+                return [
+                    {
+                        'id': r.id,
+                        'title': r.title,
+                        'content': r.content,
+                        'created_at': r.created_at.isoformat() if r.created_at else None
+                    } for r in rows
+                ]
+            finally:
+                db.close()
+
+        news_list = cache.get('news', identifier=f"limit:{limit}:offset:{offset}", loader_func=_load) or []
+        try:
+            import hashlib as _hl, json as _json
+            _core = _json.dumps(news_list, ensure_ascii=False, sort_keys=True).encode('utf-8')
+            etag = _hl.md5(_core).hexdigest()
+            inm = request.headers.get('If-None-Match')
+            if inm and inm == etag:
+                resp = current_app.response_class(status=304)
+                resp.headers['ETag'] = etag
+                resp.headers['Cache-Control'] = 'public, max-age=120, stale-while-revalidate=60'
+                return resp
+            resp = _json_response({'news': news_list, 'version': etag})
+            resp.headers['ETag'] = etag
+            resp.headers['Cache-Control'] = 'public, max-age=120, stale-while-revalidate=60'
+            return resp
+        except Exception:
+            return _json_response({'news': news_list})
+    except Exception as e:
+        current_app.logger.error(f"public news error: {e}")
+        return jsonify({'error': 'Ошибка при получении новостей'}), 500
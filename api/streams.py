@@ -0,0 +1,682 @@
+"""
+Streams and match comments API routes for Liga Obninska
+VK stream links per match and short-lived live comments (lazy blueprint, see api/lazy_blueprints.py)
+"""
+import os
+import re
+import time
+import hashlib
+from datetime import datetime, timezone, timedelta
+from urllib.parse import parse_qs, urlparse
+from flask import request, jsonify, current_app
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+# Зависимости из app.py, внедряются при первом запросе (api.lazy_blueprints._bind_dependencies)
+__lazy_deps__ = (
+    'MatchStream', 'MatchComment', 'CommentCounter', 'User', 'Snapshot',
+    'SessionLocal', 'get_db', 'parse_and_verify_telegram_init_data',
+    '_rate_limit', '_snapshot_get',
+)
+MatchStream = None
+MatchComment = None
+CommentCounter = None
+User = None
+Snapshot = None
+SessionLocal = None
+get_db = None
+parse_and_verify_telegram_init_data = None
+_rate_limit = None
+_snapshot_get = None
+
+def api_streams_confirm():
+    """Админ подтверждает трансляцию для матча.
+    Поля: initData, home, away, date(YYYY-MM-DD optional), [vkVideoId]|[vkPostUrl]
+    """
+    try:
+        parsed = parse_and_verify_telegram_init_data(request.form.get('initData',''))
+        if not parsed or not parsed.get('user'):
+            return jsonify({'error': 'Недействительные данные'}), 401
+        user_id = str(parsed['user'].get('id'))
+        admin_id = os.environ.get('ADMIN_USER_ID','')
+        if not admin_id or user_id != admin_id:
+            return jsonify({'error': 'forbidden'}), 403
+        def _norm_team(v:str)->str:
+            return ' '.join(v.strip().split()).lower()
+        home_raw = (request.form.get('home') or '').strip()
+        away_raw = (request.form.get('away') or '').strip()
+        home = _norm_team(home_raw)
+        away = _norm_team(away_raw)
+        date_str = (request.form.get('date') or '').strip()  # YYYY-MM-DD
+        vk_id = (request.form.get('vkVideoId') or '').strip()
+        vk_url = (request.form.get('vkPostUrl') or '').strip()
+        # Если прислали embed-ссылку video_ext.php — извлечём oid/id и сохраним как vkVideoId
+        try:
+            if vk_url and 'video_ext.php' in vk_url:
+                u = urlparse(vk_url)
+                q = parse_qs(u.query)
+                oid = (q.get('oid',[None])[0])
+                vid = (q.get('id',[None])[0])
+                if oid and vid:
+                    vk_id = f"{oid}_{vid}"
+                    vk_url = ''
+        except Exception:
+            pass
+        # Также поддержим прямую ссылку вида https://vk.com/video-123456_654321
+        try:
+            if vk_url and '/video' in vk_url:
+                path = urlparse(vk_url).path or ''
+                # /video-123456_654321 или /video123_456
+                import re as _re
+                m = _re.search(r"/video(-?\d+_\d+)", path)
+                if m:
+                    vk_id = m.group(1)
+                    vk_url = ''
+        except Exception:
+            pass
+        if not home or not away:
+            return jsonify({'error': 'home/away обязательны'}), 400
+        if not vk_id and not vk_url:
+            return jsonify({'error': 'нужен vkVideoId или vkPostUrl'}), 400
+        if vk_id and not re.match(r'^-?\d+_\d+$', vk_id):
+            return jsonify({'error': 'vkVideoId должен быть формата oid_id'}), 400
+        if SessionLocal is None:
+            return jsonify({'error': 'БД недоступна'}), 500
+        db: Session = get_db()
+        try:
+            from sqlalchemy import func
+            row = db.query(MatchStream).filter(func.lower(MatchStream.home)==home, func.lower(MatchStream.away)==away, MatchStream.date==(date_str or None)).first()
+            now = datetime.now(timezone.utc)
+            if not row:
+                row = MatchStream(home=home, away=away, date=(date_str or None))
+                db.add(row)
+            row.vk_video_id = vk_id or None
+            row.vk_post_url = vk_url or None
+            row.confirmed_at = now
+            row.updated_at = now
+            db.commit()
+            return jsonify({'status': 'ok', 'home': home_raw, 'away': away_raw, 'date': date_str, 'vkVideoId': row.vk_video_id, 'vkPostUrl': row.vk_post_url})
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"streams/confirm error: {e}")
+        return jsonify({'error': 'Не удалось сохранить трансляцию'}), 500
+
+def api_streams_list():
+    """Возвращает список подтвержденных трансляций (минимальный набор)."""
+    try:
+        if SessionLocal is None:
+            return jsonify({'items': []})
+        db: Session = get_db()
+        try:
+            rows = db.query(MatchStream).all()
+            items = []
+            for r in rows:
+                items.append({'home': r.home, 'away': r.away, 'date': r.date or '', 'vkVideoId': r.vk_video_id or '', 'vkPostUrl': r.vk_post_url or ''})
+            return jsonify({'items': items})
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"streams/list error: {e}")
+        return jsonify({'items': []})
+
+def api_streams_upcoming():
+    """Админ: список матчей рядом со стартом.
+    Параметры:
+      - window_min: показать матчи, которые начнутся в ближайшие N минут (по умолчанию 60, минимум 60, максимум 240)
+      - include_started_min: также включить матчи, которые уже начались за последние N минут (по умолчанию 30)
+    Возвращает: { matches: [{home, away, datetime}] }
+    """
+    try:
+        try:
+            window_min = int(request.args.get('window_min') or '360')
+        except Exception:
+            window_min = 360
+        # Минимум 60 минут, максимум 480 (8 часов)
+        window_min = max(60, min(480, window_min))
+        try:
+            include_started_min = int(request.args.get('include_started_min') or '30')
+        except Exception:
+            include_started_min = 30
+        include_started_min = max(0, min(180, include_started_min))
+        # Сдвиг локального времени расписания относительно системного времени сервера
+        try:
+            tz_min = int(os.environ.get('SCHEDULE_TZ_SHIFT_MIN') or '0')
+        except Exception:
+            tz_min = 0
+        if tz_min == 0:
+            try:
+                tz_h = int(os.environ.get('SCHEDULE_TZ_SHIFT_HOURS') or '0')
+            except Exception:
+                tz_h = 0
+            tz_min = tz_h * 60
+        now = datetime.now() + timedelta(minutes=tz_min)
+        until = now + timedelta(minutes=window_min)
+        since = now - timedelta(minutes=include_started_min)
+        # Достаём расписание из снапшота; если пусто — из таблицы
+        tours = []
+        if SessionLocal is not None:
+            dbx = get_db()
+            try:
+                # Correct signature requires Snapshot model and logger
+                snap = _snapshot_get(dbx, Snapshot, 'schedule', current_app.logger)
+                payload = snap and snap.get('payload')
+                tours = payload and payload.get('tours') or []
+            finally:
+                dbx.close()
+    # Без fallback к Sheets
+        matches = []
+        for t in tours or []:
+            for m in (t.get('matches') or []):
+                try:
+                    dt = None
+                    # 1) Поле datetime (возможны варианты: naive, с суффиксом Z, с явным смещением +hh:mm)
+                    if m.get('datetime'):
+                        raw = str(m['datetime']).strip()
+                        # поддержка ISO c 'Z'
+                        if raw.endswith('Z'):
+                            raw = raw[:-1] + '+00:00'
+                        try:
+                            parsed = datetime.fromisoformat(raw)
+                        except Exception:
+                            parsed = None
+                        if parsed is not None:
+                            # если aware — приводим к локальному наивному времени (UTC + tz_min)
+                            if getattr(parsed, 'tzinfo', None) is not None:
+                                parsed_utc_naive = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+                                dt = parsed_utc_naive + timedelta(minutes=tz_min)
+                            else:
+                                # считаем локальным уже
+                                dt = parsed
+                    # 2) Пара date + time (наивные локальные)
+                    elif m.get('date'):
+                        d = datetime.fromisoformat(str(m['date'])).date()
+                        tm = None
+                        try:
+                            tm = datetime.strptime((m.get('time') or '00:00'), "%H:%M").time()
+                        except Exception:
+                            try:
+                                tm = datetime.strptime((m.get('time') or '00:00:00'), "%H:%M:%S").time()
+                            except Exception:
+                                tm = datetime.min.time()
+                        dt = datetime.combine(d, tm)
+                    if not dt:
+                        continue
+                    # Показываем матчи, которые начнутся в течение окна, а также те, что уже начались не ранее чем include_started_min минут назад
+                    if since <= dt <= until:
+                        matches.append({ 'home': m.get('home',''), 'away': m.get('away',''), 'datetime': dt.isoformat() })
+                except Exception:
+                    continue
+        # Отсортируем по времени начала
+        try:
+            matches.sort(key=lambda x: x.get('datetime') or '')
+        except Exception:
+            pass
+        return jsonify({ 'matches': matches })
+    except Exception as e:
+        current_app.logger.error(f"streams/upcoming error: {e}")
+        return jsonify({ 'matches': [] }), 200
+
+def api_streams_set():
+    """Админский эндпоинт (совместим с фронтом): сохранить ссылку на трансляцию.
+    Поля: initData, home, away, datetime(iso optional), vk (строка: video_ext или прямая ссылка)
+    """
+    try:
+        import re as _re
+        parsed = parse_and_verify_telegram_init_data(request.form.get('initData', ''))
+        if not parsed or not parsed.get('user'):
+            return jsonify({'error': 'Недействительные данные'}), 401
+        user_id = str(parsed['user'].get('id'))
+        admin_id = os.environ.get('ADMIN_USER_ID', '')
+        if not admin_id or user_id != admin_id:
+            return jsonify({'error': 'forbidden'}), 403
+        def _norm_team(v:str)->str:
+            return ' '.join(v.strip().split()).lower()
+        home_raw = (request.form.get('home') or '').strip()
+        away_raw = (request.form.get('away') or '').strip()
+        home = _norm_team(home_raw)
+        away = _norm_team(away_raw)
+        dt_raw = (request.form.get('datetime') or '').strip()
+        # Поддержка ISO форматов с суффиксом Z
+        if dt_raw.endswith('Z'):
+            dt_raw = dt_raw[:-1] + '+00:00'
+        vk_raw = (request.form.get('vk') or '').strip()
+        if not home or not away:
+            return jsonify({'error': 'home/away обязательны'}), 400
+        # Определим дату для ключа
+        date_str = ''
+        try:
+            if dt_raw:
+                # Попробуем разные варианты разделения даты
+                date_str = datetime.fromisoformat(dt_raw).date().isoformat()
+        except Exception:
+            try:
+                date_part = dt_raw.split('T')[0]
+                datetime.fromisoformat(date_part)  # проверка
+                date_str = date_part
+            except Exception:
+                date_str = ''
+        # Разобрать vk_raw в vkVideoId или vkPostUrl
+        vk_id = ''
+        vk_url = ''
+        s = (vk_raw or '').strip()
+        try:
+            # Если админ вставил целиком <iframe ...>, извлечём src
+            if '<iframe' in s.lower():
+                m = _re.search(r"src\s*=\s*['\"]([^'\"]+)['\"]", s, _re.IGNORECASE)
+                if m:
+                    s = m.group(1).strip()
+            # Если где-то в строке встречаются oid и id (даже без корректного URL)
+            m2_oid = _re.search(r"(?:[?&#]|\b)oid=([-\d]+)\b", s)
+            m2_id = _re.search(r"(?:[?&#]|\b)id=(\d+)\b", s)
+            if m2_oid and m2_id:
+                vk_id = f"{m2_oid.group(1)}_{m2_id.group(1)}"
+            else:
+                # Пробуем как URL (vk.com или vkvideo.ru неважно)
+                u = urlparse(s)
+                if 'video_ext.php' in (u.path or ''):
+                    q = parse_qs(u.query)
+                    oid = (q.get('oid', [None])[0])
+                    vid = (q.get('id', [None])[0])
+                    if oid and vid:
+                        vk_id = f"{oid}_{vid}"
+                elif '/video' in (u.path or ''):
+                    m = _re.search(r"/video(-?\d+_\d+)", u.path or '')
+                    if m:
+                        vk_id = m.group(1)
+            # Если так и не получили vk_id, но похоже на ссылку — сохраним как постовую URL
+            if not vk_id:
+                # Принимаем только валидные http(s) ссылки, иначе игнор
+                if s.startswith('http://') or s.startswith('https://'):
+                    vk_url = s
+        except Exception:
+            # Если не смогли распарсить — сохраним как есть, но только если это URL
+            if s.startswith('http://') or s.startswith('https://'):
+                vk_url = s
+        if not vk_id and not vk_url:
+            return jsonify({'error': 'vk ссылка пуста'}), 400
+        if vk_id and not _re.match(r'^-?\d+_\d+$', vk_id):
+            return jsonify({'error': 'vkVideoId должен быть формата oid_id'}), 400
+        if SessionLocal is None:
+            return jsonify({'error': 'БД недоступна'}), 500
+        db: Session = get_db()
+        try:
+            from sqlalchemy import func
+            row = db.query(MatchStream).filter(
+                func.lower(MatchStream.home) == home,
+                func.lower(MatchStream.away) == away,
+                MatchStream.date == (date_str or None)
+            ).first()
+            if not row and not date_str:
+                # Разрешим перезапись самой свежей записи, даже если она без даты, если совпали команды
+                row = db.query(MatchStream).filter(
+                    func.lower(MatchStream.home) == home,
+                    func.lower(MatchStream.away) == away
+                ).order_by(MatchStream.updated_at.desc()).first()
+            now_ts = datetime.now(timezone.utc)
+            prev_id = None
+            prev_url = None
+            if not row:
+                row = MatchStream(home=home, away=away, date=(date_str or None))
+                db.add(row)
+            else:
+                try:
+                    prev_id = row.vk_video_id or None
+                    prev_url = row.vk_post_url or None
+                except Exception:
+                    prev_id = None
+                    prev_url = None
+            row.vk_video_id = vk_id or None
+            row.vk_post_url = vk_url or None
+            row.confirmed_at = now_ts
+            row.updated_at = now_ts
+            db.commit()
+            # Логирование факта сохранения для аудита
+            try:
+                current_app.logger.info(
+                    f"streams/set by admin {user_id}: {home} vs {away} ({date_str or '-'}) -> "
+                    f"vkVideoId={row.vk_video_id or ''} vkPostUrl={row.vk_post_url or ''} "
+                    f"(prev: id={prev_id or ''} url={prev_url or ''})"
+                )
+            except Exception:
+                pass
+            msg = 'Ссылка принята и сохранена'
+            try:
+                current_app.logger.info(f"streams/set saved: home_raw='{home_raw}' away_raw='{away_raw}' norm=('{home}','{away}') date='{date_str}' vk_id='{row.vk_video_id}' vk_url='{row.vk_post_url}'")
+            except Exception:
+                pass
+            return jsonify({
+                'status': 'ok',
+                'message': msg,
+                'home': home_raw,
+                'away': away_raw,
+                'date': date_str,
+                'vkVideoId': row.vk_video_id or '',
+                'vkPostUrl': row.vk_post_url or '',
+                'prev': {'vkVideoId': prev_id or '', 'vkPostUrl': prev_url or ''}
+            })
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"streams/set error: {e}")
+        return jsonify({'error': 'Не удалось сохранить'}), 500
+
+def api_streams_get():
+    """Вернёт ссылку на трансляцию матча.
+
+    Логика:
+    1. Нормализуем названия команд (пробелы + lowercase).
+    2. Сначала отдаём последнюю сохранённую ссылку (если она актуальна <=48ч), БЕЗ проверки окна – чтобы админ сразу видел результат.
+    3. Если явной ссылки нет – сверяемся с расписанием и, если до матча осталось <= window минут, повторно ищем ссылку (на случай несовпадения даты).
+    4. Иначе available=False.
+    """
+    if SessionLocal is None:
+        return jsonify({'available': False})
+
+    # --- Входные параметры ---
+    def _norm_team(v: str) -> str:
+        try:
+            return ' '.join(v.strip().replace('ё','е').split()).lower()
+        except Exception:
+            return (v or '').strip().lower()
+
+    home_raw = (request.args.get('home') or '').strip()
+    away_raw = (request.args.get('away') or '').strip()
+    home = _norm_team(home_raw)
+    away = _norm_team(away_raw)
+    date_str = (request.args.get('date') or '').strip()
+    try:
+        win = int(request.args.get('window') or '60')
+    except Exception:
+        win = 60
+    win = max(10, min(240, win))
+
+    from sqlalchemy import func
+
+    # --- 1. Немедленный возврат сохранённой ссылки ---
+    force_any = (request.args.get('any') == '1')
+    try:
+        db = get_db()
+        try:
+            base_q = db.query(MatchStream).filter(
+                func.lower(MatchStream.home) == home,
+                func.lower(MatchStream.away) == away
+            )
+            row = base_q.filter(MatchStream.date == (date_str or None)).first()
+            if not row:
+                # Берём самую свежую вне зависимости от даты
+                row_latest = base_q.order_by(MatchStream.updated_at.desc()).first()
+                if row_latest:
+                    if force_any:
+                        row = row_latest
+                    else:
+                        try:
+                            if row_latest.updated_at and (datetime.now(timezone.utc) - row_latest.updated_at) <= timedelta(hours=48):
+                                row = row_latest
+                        except Exception:
+                            row = row_latest
+            if row and ((row.vk_video_id and row.vk_video_id.strip()) or (row.vk_post_url and row.vk_post_url.strip())):
+                try:
+                    current_app.logger.info(f"streams/get immediate link id='{row.vk_video_id}' url='{row.vk_post_url}' home='{home}' away='{away}' date='{date_str}' force_any={force_any}")
+                except Exception:
+                    pass
+                return jsonify({'available': True, 'vkVideoId': row.vk_video_id or '', 'vkPostUrl': row.vk_post_url or ''})
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"streams/get immediate lookup error: {e}")
+
+    # --- 2. Загрузка расписания (snapshot only) ---
+    tours = []
+    try:
+        dbs = get_db()
+        try:
+            snap = _snapshot_get(dbs, Snapshot, 'schedule', current_app.logger)
+            payload = snap and snap.get('payload')
+            tours = (payload and payload.get('tours')) or []
+        finally:
+            dbs.close()
+    except Exception:
+        pass
+    # без fallback к Sheets
+
+    # --- 3. Поиск матча в расписании ---
+    start_ts = None
+    if tours:
+        for t in tours:
+            matches = t.get('matches') or []
+            for m in matches:
+                try:
+                    if _norm_team(m.get('home','')) != home or _norm_team(m.get('away','')) != away:
+                        continue
+                    if m.get('datetime'):
+                        dt_obj = datetime.fromisoformat(str(m['datetime']).replace('Z', '+00:00'))
+                    elif m.get('date'):
+                        d_obj = datetime.fromisoformat(str(m['date'])).date()
+                        try:
+                            tm = datetime.strptime((m.get('time') or '00:00'), '%H:%M').time()
+                        except Exception:
+                            tm = datetime.min.time()
+                        dt_obj = datetime.combine(d_obj, tm)
+                    else:
+                        continue
+                    start_ts = int(dt_obj.timestamp() * 1000)
+                    raise StopIteration  # выходим из всех циклов
+                except StopIteration:
+                    break
+                except Exception:
+                    continue
+            if start_ts is not None:
+                break
+
+    # --- 4. Проверка окна ---
+    try:
+        tz_min = int(os.environ.get('SCHEDULE_TZ_SHIFT_MIN') or '0')
+    except Exception:
+        tz_min = 0
+    if tz_min == 0:
+        try:
+            tz_h = int(os.environ.get('SCHEDULE_TZ_SHIFT_HOURS') or '0')
+        except Exception:
+            tz_h = 0
+        tz_min = tz_h * 60
+    now_ms = int((time.time() + tz_min * 60) * 1000)
+    if not start_ts or (start_ts - now_ms) > win * 60 * 1000:
+        return jsonify({'available': False})
+
+    # --- 5. Повторный поиск ссылки в окне ---
+    try:
+        db = get_db()
+        try:
+            row2 = db.query(MatchStream).filter(
+                func.lower(MatchStream.home) == home,
+                func.lower(MatchStream.away) == away,
+                MatchStream.date == (date_str or None)
+            ).first()
+            if not row2 and date_str:
+                row2 = db.query(MatchStream).filter(
+                    func.lower(MatchStream.home) == home,
+                    func.lower(MatchStream.away) == away
+                ).order_by(MatchStream.updated_at.desc()).first()
+            if row2 and ((row2.vk_video_id and row2.vk_video_id.strip()) or (row2.vk_post_url and row2.vk_post_url.strip())):
+                return jsonify({'available': True, 'vkVideoId': row2.vk_video_id or '', 'vkPostUrl': row2.vk_post_url or ''})
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"streams/get window lookup error: {e}")
+    return jsonify({'available': False})
+
+def api_streams_reset():
+    """Админ: сбросить ссылку на трансляцию для конкретного матча (home/away/date)."""
+    try:
+        parsed = parse_and_verify_telegram_init_data(request.form.get('initData',''))
+        if not parsed or not parsed.get('user'):
+            return jsonify({'error': 'Недействительные данные'}), 401
+        user_id = str(parsed['user'].get('id'))
+        admin_id = os.environ.get('ADMIN_USER_ID','')
+        if not admin_id or user_id != admin_id:
+            return jsonify({'error': 'forbidden'}), 403
+        home = (request.form.get('home') or '').strip()
+        away = (request.form.get('away') or '').strip()
+        date_str = (request.form.get('date') or '').strip()
+        if not home or not away:
+            return jsonify({'error': 'home/away обязательны'}), 400
+        if SessionLocal is None:
+            return jsonify({'error': 'БД недоступна'}), 500
+        db: Session = get_db()
+        try:
+            row = db.query(MatchStream).filter(MatchStream.home==home, MatchStream.away==away, MatchStream.date==(date_str or None)).first()
+            if not row and date_str:
+                # поддержка старых записей без даты
+                row = db.query(MatchStream).filter(MatchStream.home==home, MatchStream.away==away).order_by(MatchStream.updated_at.desc()).first()
+            if not row:
+                return jsonify({'error': 'Запись не найдена'}), 404
+            row.vk_video_id = None
+            row.vk_post_url = None
+            row.confirmed_at = None
+            row.updated_at = datetime.now(timezone.utc)
+            db.commit()
+            return jsonify({'status': 'ok'})
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"streams/reset error: {e}")
+        return jsonify({'error': 'Не удалось сбросить ссылку'}), 500
+
+COMMENT_TTL_MINUTES = 60  # хранить комментарии трансляции 60 минут
+COMMENT_RATE_MINUTES = 5
+
+def api_match_comments_list():
+    """Комментарии за последние COMMENT_TTL_MINUTES минут для матча. Параметры: home, away, date?"""
+    try:
+        if SessionLocal is None:
+            return jsonify({'items': []})
+        home = (request.args.get('home') or '').strip()
+        away = (request.args.get('away') or '').strip()
+        date_str = (request.args.get('date') or '').strip()
+        if not home or not away:
+            return jsonify({'items': []})
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=COMMENT_TTL_MINUTES)
+        db: Session = get_db()
+        try:
+            # Берём максимум 100 последних, затем переворачиваем в хронологический порядок
+            q = db.query(MatchComment).filter(
+                MatchComment.home==home,
+                MatchComment.away==away,
+                MatchComment.date==(date_str or None),
+                MatchComment.created_at >= cutoff
+            ).order_by(MatchComment.created_at.desc()).limit(100)
+            rows_desc = q.all()
+            rows = list(reversed(rows_desc))
+            # Избегаем N+1: батч-достаем имена пользователей
+            user_ids = list({int(r.user_id) for r in rows})
+            names_map = {}
+            if user_ids:
+                for u in db.query(User).filter(User.user_id.in_(user_ids)).all():
+                    try:
+                        names_map[int(u.user_id)] = u.display_name or 'User'
+                    except Exception:
+                        pass
+            items = []
+            for r in rows:
+                uid = int(r.user_id)
+                items.append({
+                    'user_id': uid,
+                    'name': names_map.get(uid, 'User'),
+                    'content': r.content,
+                    'created_at': r.created_at.isoformat()
+                })
+            # ETag и Last-Modified
+            last_ts = rows[-1].created_at if rows else None
+            # Версия как md5 по (last_ts + count)
+            version_seed = f"{last_ts.isoformat() if last_ts else ''}:{len(rows)}"
+            etag = hashlib.md5(version_seed.encode('utf-8')).hexdigest()
+            inm = request.headers.get('If-None-Match')
+            ims = request.headers.get('If-Modified-Since')
+            # Сравнение If-None-Match
+            if inm and inm == etag:
+                resp = current_app.response_class(status=304)
+                resp.headers['ETag'] = etag
+                if last_ts:
+                    resp.headers['Last-Modified'] = last_ts.strftime('%a, %d %b %Y %H:%M:%S GMT')
+                resp.headers['Cache-Control'] = 'no-cache'
+                return resp
+            # Сравнение If-Modified-Since
+            if ims and last_ts:
+                try:
+                    # Разбор RFC1123
+                    from email.utils import parsedate_to_datetime
+                    ims_dt = parsedate_to_datetime(ims)
+                    # Приводим к aware UTC
+                    if ims_dt.tzinfo is None:
+                        ims_dt = ims_dt.replace(tzinfo=timezone.utc)
+                    if last_ts <= ims_dt:
+                        resp = current_app.response_class(status=304)
+                        resp.headers['ETag'] = etag
+                        resp.headers['Last-Modified'] = last_ts.strftime('%a, %d %b %Y %H:%M:%S GMT')
+                        resp.headers['Cache-Control'] = 'no-cache'
+                        return resp
+                except Exception:
+                    pass
+            resp = jsonify({'items': items, 'version': etag})
+            resp.headers['ETag'] = etag
+            if last_ts:
+                resp.headers['Last-Modified'] = last_ts.strftime('%a, %d %b %Y %H:%M:%S GMT')
+            resp.headers['Cache-Control'] = 'no-cache'
+            return resp
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"comments/list error: {e}")
+        return jsonify({'items': []})
+
+def api_match_comments_add():
+    """Добавляет комментарий (rate limit: 1 комментарий в 5 минут на пользователя/матч/дату)."""
+    try:
+        # Global anti-spam limiter: не чаще 3 комментариев за 60 секунд на пользователя
+        limited = _rate_limit('comments_add', limit=3, window_sec=60, allow_pseudo=False)
+        if limited is not None:
+            return limited
+        parsed = parse_and_verify_telegram_init_data(request.form.get('initData',''))
+        if not parsed or not parsed.get('user'):
+            return jsonify({'error': 'Недействительные данные'}), 401
+        user_id = int(parsed['user'].get('id'))
+        home = (request.form.get('home') or '').strip()
+        away = (request.form.get('away') or '').strip()
+        date_str = (request.form.get('date') or '').strip()
+        content = (request.form.get('content') or '').strip()
+        if not home or not away or not content:
+            return jsonify({'error': 'Пустой комментарий'}), 400
+        if len(content) > 280:
+            return jsonify({'error': 'Слишком длинный комментарий'}), 400
+        if SessionLocal is None:
+            return jsonify({'error': 'БД недоступна'}), 500
+        db: Session = get_db()
+        try:
+            # rate limit: ищем последний комментарий этого пользователя под этим матчем
+            window_start = datetime.now(timezone.utc) - timedelta(minutes=COMMENT_RATE_MINUTES)
+            recent = db.query(MatchComment).filter(
+                MatchComment.user_id==user_id,
+                MatchComment.home==home,
+                MatchComment.away==away,
+                MatchComment.date==(date_str or None),
+                MatchComment.created_at >= window_start
+            ).order_by(MatchComment.created_at.desc()).first()
+            if recent:
+                return jsonify({'error': f'Можно комментировать раз в {COMMENT_RATE_MINUTES} минут'}), 429
+            row = MatchComment(home=home, away=away, date=(date_str or None), user_id=user_id, content=content)
+            db.add(row)
+            # счетчик достижений
+            cc = db.get(CommentCounter, user_id)
+            if not cc:
+                cc = CommentCounter(user_id=user_id, comments_total=0, updated_at=datetime.now(timezone.utc))
+                db.add(cc)
+            cc.comments_total = int(cc.comments_total or 0) + 1
+            cc.updated_at = datetime.now(timezone.utc)
+            db.commit()
+            return jsonify({'status':'ok', 'created_at': row.created_at.isoformat(), 'comments_total': int(cc.comments_total or 0)})
+        finally:
+            db.close()
+    except Exception as e:
+        current_app.logger.error(f"comments/add error: {e}")
+        return jsonify({'error': 'Не удалось сохранить комментарий'}), 500
@@ -13,9 +13,25 @@ import base64
 from services import (
     snapshot_get as _snapshot_get,
     snapshot_set as _snapshot_set,
+    snapshot_store as _snapshot_store,
+    snapshot_delta as _snapshot_delta,
+    snapshot_version as _snapshot_version,
+    configure_snapshot_deltas as _configure_snapshot_deltas,
+    reset_snapshot_deltas as _reset_snapshot_deltas,
     apply_lineups_to_adv_stats as _apply_lineups_to_adv_stats,
         settle_open_bets as _settle_open_bets_new,
 )
+from services import achievements as _ach_engine
+from services import odds_publish as _odds_pub
+from services import stake_ledger as _stake_ledger
+from services import public_profiles as _public_profiles
+from services import user_profile as _user_profile
+from services import checkin as _checkin
+from services import user_stats as _user_stats
+from services import lineup_import as _lineup_import
+from services import backups as _backups
+from utils.match_status import load_match_states as _load_match_states, invalidate_team_ids as _invalidate_team_ids
+from config import settings as SETTINGS
 
 # Backward compat alias (старое имя использовалось в комментариях / возможных внешних импортерах)
 _settle_open_bets = None  # все вызовы переведены на _settle_open_bets_new
@@ -181,6 +197,11 @@ try:
 except ImportError as e:
     print(f"[WARN] Optimizations not available: {e}")
     OPTIMIZATIONS_AVAILABLE = False
+from optimizations.sync_scheduler import ChangeTracker
+from optimizations.live_registry import LiveMatchRegistry
+from optimizations.log_ingest import ClientLogIngestor, IngestError
+from optimizations.score_coalescer import ScoreCoalescer
+from optimizations.live_table import LiveTableProjection
 # Optional gzip/br compression via flask-compress (lazy/dynamic import to avoid hard dependency in dev)
 Compress = None
 try:
@@ -192,7 +213,7 @@ except Exception:
     Compress = None
 
 from sqlalchemy import (
-    create_engine, Column, Integer, String, Text, DateTime, Date, func, case, and_, or_, Index, text
+    create_engine, Column, Integer, String, Text, DateTime, Date, Float, Boolean, func, case, and_, or_, Index, text
 )
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
@@ -293,6 +314,7 @@ if SECURITY_SYSTEM_AVAILABLE:
         health_check = HealthCheck()
         SecurityMiddleware(app)
         PerformanceMiddleware(app)
+        DatabaseMiddleware(app)
         ErrorHandlingMiddleware(app)
         app.register_blueprint(monitoring_bp, url_prefix='/api/monitoring')
         app.register_blueprint(security_test_bp, url_prefix='/api/security-test')
@@ -474,21 +496,12 @@ def _update_schedule_snapshot_from_matches(db_session, logger):
             # explicit overrides only for finished; 'live' elevates to live
             try:
                 # Determine schedule TZ shift (minutes)
-                try:
-                    tz_m = int(os.environ.get('SCHEDULE_TZ_SHIFT_MIN') or '0')
-                except Exception:
-                    tz_m = 0
+                tz_m = SETTINGS.SCHEDULE_TZ_SHIFT_MIN
                 if tz_m == 0:
-                    try:
-                        tz_hh = int(os.environ.get('SCHEDULE_TZ_SHIFT_HOURS') or '0')
-                    except Exception:
-                        tz_hh = 0
+                    tz_hh = SETTINGS.SCHEDULE_TZ_SHIFT_HOURS
                     tz_m = tz_hh * 60
                 if tz_m == 0:
-                    try:
-                        tz_m = int(os.environ.get('DEFAULT_TZ_MINUTES') or os.environ.get('DEFAULT_TZ_MIN') or '180')
-                    except Exception:
-                        tz_m = 180
+                    tz_m = SETTINGS.DEFAULT_TZ_MINUTES
                 now_local = datetime.now() + timedelta(minutes=tz_m)
             except Exception:
                 now_local = datetime.now()
@@ -502,9 +515,9 @@ def _update_schedule_snapshot_from_matches(db_session, logger):
             try:
                 if (dt - timedelta(minutes=10)) <= now_local < dt:
                     return 'scheduled', True
-                elif dt <= now_local < dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
+                elif dt <= now_local < dt + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
                     return 'live', False
-                elif now_local >= dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
+                elif now_local >= dt + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
                     return 'finished', False
             except Exception:
                 pass
@@ -671,7 +684,7 @@ def _update_schedule_snapshot_from_matches(db_session, logger):
             'updated_at': datetime.now(timezone.utc).isoformat()
         }
         try:
-            _snapshot_set(db_session, Snapshot, 'schedule', payload, logger)
+            return _snapshot_store(db_session, Snapshot, 'schedule', payload, logger)
         except Exception as e:
             logger.warning(f"schedule snapshot set failed: {e}")
     except Exception as e:
@@ -679,6 +692,7 @@ def _update_schedule_snapshot_from_matches(db_session, logger):
             logger.warning(f"update_schedule_snapshot_from_matches error: {e}")
         except Exception:
             pass
+    return 'failed'
 
 # Durable backup helper: write gzipped JSON to admin_backups
 def _write_admin_backup(db_session, action: str, payload: dict, created_by: str = None, metadata: dict = None):
@@ -721,6 +735,30 @@ def _write_admin_backup(db_session, action: str, payload: dict, created_by: str
             pass
         return None
 
+# Потоковая резервная копия таблиц (services/backups.py): gzip/zstd в файл BACKUP_DIR или кусками в admin_backup_chunks
+def _stream_admin_backup(action: str, table_names=None, incremental: bool = False, created_by: str = None):
+    """Копия таблиц приложения перед разрушительной операцией; None — не удалось (операция решает сама).
+    incremental — только строки с updated_at новее прошлой копии того же набора таблиц."""
+    if SessionLocal is None:
+        return None
+    names = set(table_names) if table_names else None
+    tables = [t for t in Base.metadata.sorted_tables if names is None or t.name in names]
+    db = get_db()
+    try:
+        since = _backups.last_backup_started_at(db, [t.name for t in tables]) if incremental else None
+        meta = _backups.write_backup(db, tables, action, codec=SETTINGS.BACKUP_CODEC, since=since,
+                                     backup_dir=SETTINGS.BACKUP_DIR, chunk_bytes=SETTINGS.BACKUP_CHUNK_KB * 1024,
+                                     batch_rows=SETTINGS.BACKUP_BATCH_ROWS, created_by=created_by)
+        db.commit()
+        app.logger.info(f"admin backup {meta['id']} ({action}, {meta['kind']}): {sum(meta['rows'].values())} rows, {meta.get('bytes', 0)} bytes")
+        return meta
+    except Exception as e:
+        db.rollback()
+        app.logger.warning(f"admin stream backup failed ({action}): {e}")
+        return None
+    finally:
+        db.close()
+
 # Регистрация админского API с логированием
 try:
     from api.admin import init_admin_routes
@@ -960,6 +998,10 @@ RANKS_TTL = 600  # 10 минут
 
 # Версия статики для cache-busting на клиентах (мобилки с жёстким кэшем)
 STATIC_VERSION = os.environ.get('STATIC_VERSION') or str(int(time.time()))
+# Хешированные ассеты из static/dist/manifest.json (npm run build) и раздача предсжатых .br/.gz;
+# без сборки asset_url() отдаёт исходные файлы с ?v=STATIC_VERSION
+from utils.assets import init_assets as _init_assets
+_init_assets(app, STATIC_VERSION)
 
 # Командные силы (1..10) для усложнения коэффициентов. Можно переопределить через BET_TEAM_STRENGTHS_JSON.
 # Ключи должны быть нормализованы: нижний регистр, без пробелов и знаков, 'ё' -> 'е'.
@@ -984,33 +1026,36 @@ def _norm_team_key(s: str) -> str:
     except Exception:
         return ''
 
+_TEAM_STRENGTHS_CACHE: dict = {'version': None, 'data': None}
+
 def _load_team_strengths() -> dict[str, float]:
     """Возвращает словарь нормализованное_имя -> сила (1..N, по умолчанию 1..10).
     Разрешает переопределение через переменную окружения BET_TEAM_STRENGTHS_JSON (map name->int/float).
     Имя команды нормализуется тем же способом, что и для таблицы лиги.
+    Словарь собирается один раз на версию реестра настроек (JSON разбирается в SETTINGS).
     """
+    cached = _TEAM_STRENGTHS_CACHE
+    if cached['version'] == SETTINGS.version and cached['data'] is not None:
+        return cached['data']
     strengths = dict(TEAM_STRENGTHS_BASE)
-    raw = os.environ.get('BET_TEAM_STRENGTHS_JSON', '').strip()
-    if raw:
-        try:
-            data = json.loads(raw)
-            if isinstance(data, dict):
-                for k, v in data.items():
-                    nk = _norm_team_key(k)
-                    try:
-                        val = float(v)
-                    except Exception:
-                        continue
-                    # допустим только разумный диапазон 1..20
-                    if nk:
-                        strengths[nk] = max(1.0, min(20.0, val))
-        except Exception as e:
-            app.logger.warning(f"BET_TEAM_STRENGTHS_JSON parse failed: {e}")
+    data = SETTINGS.BET_TEAM_STRENGTHS_JSON
+    if isinstance(data, dict):
+        for k, v in data.items():
+            nk = _norm_team_key(k)
+            try:
+                val = float(v)
+            except Exception:
+                continue
+            # допустим только разумный диапазон 1..20
+            if nk:
+                strengths[nk] = max(1.0, min(20.0, val))
+    _TEAM_STRENGTHS_CACHE.update(version=SETTINGS.version, data=strengths)
     return strengths
 
-# ---------------------- Odds versioning (in-memory) ----------------------
-# Простой счётчик версий коэффициентов по матчу. Инкрементится при админских изменениях,
-# влияющих на коэффициенты (будет расширено в следующих шагах roadmap).
+# ---------------------- Odds versioning / publication ----------------------
+# Версия и готовый payload коэффициентов матча живут в общей таблице odds_snapshots
+# (services/odds_publish.py): одинаковая odds_version на всех воркерах, читатели не пересчитывают.
+# In-memory словарь — только fallback без БД.
 _ODDS_VERSION: dict[tuple[str, str], int] = {}
 
 def _ov_key(home: str, away: str) -> tuple[str, str]:
@@ -1019,15 +1064,124 @@ def _ov_key(home: str, away: str) -> tuple[str, str]:
     except Exception:
         return (str(home), str(away))
 
+_ODDS_CONFIG_HASH: dict = {'version': None, 'hash': ''}
+
+def _odds_config_hash() -> str:
+    # Считается один раз на версию реестра настроек; значения одинаковы на всех воркерах
+    cached = _ODDS_CONFIG_HASH
+    if cached['version'] != SETTINGS.version:
+        cached['hash'] = _odds_pub.config_fingerprint(SETTINGS.to_dict(), TEAM_STRENGTHS_BASE)
+        cached['version'] = SETTINGS.version
+    return cached['hash']
+
 def _get_odds_version(home: str, away: str) -> int:
+    if SessionLocal is not None:
+        db = get_db()
+        try:
+            row = _odds_pub.get_published(db, OddsSnapshot, home, away)
+            return int(row.version) if row else 1
+        except Exception as e:
+            app.logger.warning(f"odds version read failed: {e}")
+        finally:
+            db.close()
     return int(_ODDS_VERSION.get(_ov_key(home, away), 1))
 
 def _bump_odds_version(home: str, away: str) -> int:
+    if SessionLocal is not None:
+        db = get_db()
+        try:
+            return _odds_pub.bump(db, OddsSnapshot, home, away)
+        except Exception as e:
+            db.rollback()
+            app.logger.warning(f"odds version bump failed: {e}")
+        finally:
+            db.close()
     k = _ov_key(home, away)
     cur = int(_ODDS_VERSION.get(k, 1)) + 1
     _ODDS_VERSION[k] = cur
     return cur
 
+_ODDS_ROW_UNSET = object()
+
+def _odds_published(home: str, away: str, date_key: str|None = None, force: bool = False,
+                    row=_ODDS_ROW_UNSET, db: Session|None = None) -> tuple[int, dict]:
+    """Опубликованные коэффициенты матча: (version, {odds, markets}).
+    Пересчёт (_build_odds_fields) — только если строки нет, она stale, сменился конфиг BET_*,
+    истёк ODDS_PUBLISH_MAX_AGE_SEC или force=True (новый голос). row — заранее загруженная строка
+    (пакетное чтение в /api/betting/tours).
+    """
+    if SessionLocal is None:
+        return _get_odds_version(home, away), _build_odds_fields(home, away, date_key)
+    cfg = _odds_config_hash()
+    if not force and row is not _ODDS_ROW_UNSET and _odds_pub.is_fresh(row, cfg, date_key, SETTINGS.ODDS_PUBLISH_MAX_AGE_SEC):
+        return int(row.version), _odds_pub.row_fields(row)
+    own = db is None
+    if own:
+        db = get_db()
+    try:
+        if row is _ODDS_ROW_UNSET:
+            row = _odds_pub.get_published(db, OddsSnapshot, home, away)
+        if not force and _odds_pub.is_fresh(row, cfg, date_key, SETTINGS.ODDS_PUBLISH_MAX_AGE_SEC):
+            return int(row.version), _odds_pub.row_fields(row)
+        fields = _build_odds_fields(home, away, date_key)
+        if not fields:
+            return (int(row.version) if row else 1), (_odds_pub.row_fields(row) if row else {})
+        ver, _changed = _odds_pub.publish(db, OddsSnapshot, home, away, date_key, fields, cfg)
+        return ver, fields
+    except Exception as e:
+        try: db.rollback()
+        except Exception: pass
+        app.logger.warning(f"odds publish failed for {home} vs {away}: {e}")
+        return int(_ODDS_VERSION.get(_ov_key(home, away), 1)), _build_odds_fields(home, away, date_key)
+    finally:
+        if own:
+            db.close()
+
+def _odds_rows_for(matches) -> dict|None:
+    """Пакетно (один запрос) загружает опубликованные коэффициенты для списка матчей; None — не удалось"""
+    if SessionLocal is None:
+        return None
+    db = get_db()
+    try:
+        return _odds_pub.load_published(db, OddsSnapshot, [(m.get('home', ''), m.get('away', '')) for m in (matches or [])])
+    except Exception as e:
+        app.logger.warning(f"odds rows prefetch failed: {e}")
+        return None
+    finally:
+        db.close()
+
+def _match_states_for(matches) -> dict|None:
+    """Пакетно загружает статусы (matches + MatchFlags) для списка матчей; None — не удалось"""
+    if SessionLocal is None:
+        return None
+    db = get_db()
+    try:
+        return _load_match_states(db, [(m.get('home', ''), m.get('away', '')) for m in (matches or [])], MatchFlags)
+    except Exception as e:
+        app.logger.warning(f"match states prefetch failed: {e}")
+        return None
+    finally:
+        db.close()
+
+def _odds_mark_stale(*teams) -> None:
+    """Форма/таблица команд изменилась (матч завершён) — коэффициенты их матчей пересчитаются при чтении"""
+    if cache_manager:
+        for team in teams:
+            try:
+                cache_manager.invalidate('team_form', _norm_team_key(team or ''))
+            except Exception:
+                pass
+    if SessionLocal is None:
+        return
+    db = get_db()
+    try:
+        _odds_pub.mark_stale(db, OddsSnapshot, teams)
+    except Exception as e:
+        db.rollback()
+        app.logger.warning(f"odds mark stale failed: {e}")
+    finally:
+        db.close()
+
 def _pick_match_of_week(tours: list[dict]) -> dict|None:
     """Выбирает ближайший по времени матч с максимальной суммарной силой команд.
     Возвращает {home, away, date, datetime} или None.
@@ -1325,19 +1479,45 @@ def _month_period_start_msk_to_utc(now_utc: datetime|None = None) -> datetime:
         prev_first_msk = datetime(prev_year, prev_month, 1, 3, 0, 0, tzinfo=timezone.utc)
         first_utc = prev_first_msk - timedelta(hours=3)
     return first_utc
-# Betting config
-BET_MIN_STAKE = int(os.environ.get('BET_MIN_STAKE', '10'))
-BET_MAX_STAKE = int(os.environ.get('BET_MAX_STAKE', '10000'))
-BET_DAILY_MAX_STAKE = int(os.environ.get('BET_DAILY_MAX_STAKE', '50000'))
-BET_MARGIN = float(os.environ.get('BET_MARGIN', '0.06'))  # 6% маржа по умолчанию
+# Betting config (BET_MIN_STAKE, BET_MAX_STAKE, BET_DAILY_MAX_STAKE, BET_MARGIN, BET_MATCH_DURATION_MINUTES,
+# BET_LOCK_AHEAD_MINUTES) живёт в реестре SETTINGS (config.py) и меняется по reload — читать SETTINGS.<name>
+# в месте использования, без копий в константы модуля
 _LAST_SETTLE_TS = 0
-BET_MATCH_DURATION_MINUTES = int(os.environ.get('BET_MATCH_DURATION_MINUTES', '120'))  # длительность матча для авторасчёта спецрынков (по умолчанию 2 часа)
-BET_LOCK_AHEAD_MINUTES = int(os.environ.get('BET_LOCK_AHEAD_MINUTES', '5'))  # за сколько минут до начала матча закрывать ставки
+
+def _reload_settings(source: str) -> dict:
+    """Перечитывает реестр настроек. Кеши коэффициентов/сил команд/ETag привязаны к SETTINGS.version
+    и пересобираются сами; опубликованные коэффициенты пересчитаются по смене config_hash."""
+    changed = SETTINGS.reload()
+    if changed:
+        app.logger.info(f"settings reloaded ({source}): v{SETTINGS.version}, changed={changed}")
+    for err in SETTINGS.errors:
+        app.logger.warning(f"settings: invalid value, default used — {err}")
+    return {'version': SETTINGS.version, 'changed': changed, 'errors': list(SETTINGS.errors)}
+
+for _err in SETTINGS.errors:
+    app.logger.warning(f"settings: invalid value, default used — {_err}")
+
+# SIGHUP -> перечитать настройки (только главный поток; на Windows сигнала нет).
+# Сам обработчик ничего не читает и не логирует: сигнал может прийти, пока прерванный код держит
+# блокировку реестра или логгера, — перечитывание уходит в отдельный поток (под gevent — гринлет)
+def _on_sighup(_sig, _frm):
+    threading.Thread(target=_reload_settings, args=('SIGHUP',), name="settings-reload", daemon=True).start()
+
+try:
+    import signal as _signal
+    if hasattr(_signal, 'SIGHUP') and threading.current_thread() is threading.main_thread():
+        _signal.signal(_signal.SIGHUP, _on_sighup)
+except Exception as _e:
+    app.logger.warning(f"SIGHUP handler not installed: {_e}")
 
 
 # Core models used across the app
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        # онлайн за 5/15 минут на дашборде (services/user_stats.online)
+        Index('idx_users_updated_at', 'updated_at'),
+    )
     user_id = Column(Integer, primary_key=True)
     display_name = Column(String(255))
     tg_username = Column(String(255))
@@ -1419,6 +1599,9 @@ def _pseudo_user_id() -> int:
 # --- Bet lock helpers (UTC unification under feature flag) ---
 def _is_feature_enabled(name: str) -> bool:
     try:
+        val = SETTINGS.get(name)
+        if isinstance(val, bool):
+            return val
         return (os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes'))
     except Exception:
         return False
@@ -1431,7 +1614,7 @@ def _convert_local_naive_to_utc(dt):
         return None
     try:
         from zoneinfo import ZoneInfo  # Python 3.9+
-        tz_name = os.environ.get('DEFAULT_TZ', 'Europe/Moscow')
+        tz_name = SETTINGS.DEFAULT_TZ
         if dt.tzinfo is None:
             local_dt = dt.replace(tzinfo=ZoneInfo(tz_name))
         else:
@@ -1439,15 +1622,9 @@ def _convert_local_naive_to_utc(dt):
         return local_dt.astimezone(timezone.utc)
     except Exception:
         # Fallback: use SCHEDULE_TZ_SHIFT_* (minutes/hours)
-        try:
-            tzmin = int(os.environ.get('SCHEDULE_TZ_SHIFT_MIN') or '0')
-        except Exception:
-            tzmin = 0
+        tzmin = SETTINGS.SCHEDULE_TZ_SHIFT_MIN
         if tzmin == 0:
-            try:
-                tzh = int(os.environ.get('SCHEDULE_TZ_SHIFT_HOURS') or '0')
-            except Exception:
-                tzh = 0
+            tzh = SETTINGS.SCHEDULE_TZ_SHIFT_HOURS
             tzmin = tzh * 60
         # Local naive -> UTC: subtract local shift minutes
         try:
@@ -1473,7 +1650,8 @@ def api_betting_place():
     - 1X2: selection in ['home','draw','away']
     - totals: selection in ['over','under'], требуется поле line (например 3.5)
     - penalty/redcard: selection in ['yes','no']
-    Поля: initData, tour, home, away, market, selection, stake, [line]
+    Поля: initData, tour, home, away, market, selection, stake, [line], [odds_version]
+    odds_version — версия коэффициентов, которую видел клиент; при расхождении 409 и актуальные коэффициенты.
     """
     # Rate limit: максимум 5 ставок за 60 секунд на пользователя
     limited = _rate_limit('betting_place', limit=5, window_sec=60, allow_pseudo=False)
@@ -1502,10 +1680,10 @@ def api_betting_place():
         stake = int(request.form.get('stake') or '0')
     except Exception:
         stake = 0
-    if stake < BET_MIN_STAKE:
-        return jsonify({'error': f'Минимальная ставка {BET_MIN_STAKE}'}), 400
-    if stake > BET_MAX_STAKE:
-        return jsonify({'error': f'Максимальная ставка {BET_MAX_STAKE}'}), 400
+    if stake < SETTINGS.BET_MIN_STAKE:
+        return jsonify({'error': f'Минимальная ставка {SETTINGS.BET_MIN_STAKE}'}), 400
+    if stake > SETTINGS.BET_MAX_STAKE:
+        return jsonify({'error': f'Максимальная ставка {SETTINGS.BET_MAX_STAKE}'}), 400
     tour = request.form.get('tour')
     try:
         tour = int(tour) if tour is not None and str(tour).strip() != '' else None
@@ -1529,19 +1707,6 @@ def api_betting_place():
                 dbx.close()
         except Exception:
             tours = []
-    # Если клиент не передал tour, попробуем найти его по расписанию
-    if tour is None:
-        try:
-            for t in tours:
-                for m in t.get('matches', []) or []:
-                    if (m.get('home') == home and m.get('away') == away):
-                        if t.get('tour') is not None:
-                            tour = int(t.get('tour'))
-                        raise StopIteration
-        except StopIteration:
-            pass
-    match_dt = None
-    found = False
 
     def _norm(s: str) -> str:
         try:
@@ -1549,88 +1714,60 @@ def api_betting_place():
         except Exception:
             return (s or '')
 
+    def _match_dt_of(m: dict):
+        try:
+            if m.get('datetime'):
+                return datetime.fromisoformat(m['datetime'])
+            d = None; tm = None
+            if m.get('date'):
+                try:
+                    d = datetime.fromisoformat(str(m['date'])[:10]).date()
+                except Exception:
+                    d = None
+            if m.get('time'):
+                ts = str(m['time']).strip()
+                for fmt in ("%H:%M:%S", "%H:%M"):
+                    try:
+                        tm = datetime.strptime(ts, fmt).time(); break
+                    except Exception:
+                        tm = None
+            if d is not None:
+                return datetime.combine(d, tm or datetime.min.time())
+        except Exception:
+            pass
+        return None
+
     hn = _norm(home)
     an = _norm(away)
 
-    # 1) Пробуем найти в указанном туре (если передан)
+    # Один проход по снапшоту: матч в указанном туре, иначе (тур устарел/не передан) — первый найденный в любом туре
+    hit = None
+    fallback = None
     for t in tours:
-        if tour is not None and t.get('tour') != tour:
-            continue
         for m in t.get('matches', []) or []:
             try:
                 if _norm(m.get('home')) == hn and _norm(m.get('away')) == an:
-                    found = True
-                    # Зафиксируем фактический тур
-                    try:
-                        if t.get('tour') is not None:
-                            tour = int(t.get('tour'))
-                    except Exception:
-                        pass
-                    try:
-                        if m.get('datetime'):
-                            match_dt = datetime.fromisoformat(m['datetime'])
-                        else:
-                            d = None; tm = None
-                            if m.get('date'):
-                                try:
-                                    d = datetime.fromisoformat(str(m['date'])[:10]).date()
-                                except Exception:
-                                    d = None
-                            if m.get('time'):
-                                ts = str(m['time']).strip()
-                                for fmt in ("%H:%M:%S", "%H:%M"):
-                                    try:
-                                        tm = datetime.strptime(ts, fmt).time(); break
-                                    except Exception:
-                                        tm = None
-                            if d is not None:
-                                match_dt = datetime.combine(d, tm or datetime.min.time())
-                    except Exception:
-                        match_dt = None
+                    if tour is None or t.get('tour') == tour:
+                        hit = (t, m)
+                    elif fallback is None:
+                        fallback = (t, m)
                     break
             except Exception:
                 continue
-        if found:
+        if hit:
             break
-
-    # 2) Fallback: если не нашли (например, тур устарел) — ищем по всем турам
-    if not found:
-        for t in tours:
-            for m in t.get('matches', []) or []:
-                try:
-                    if _norm(m.get('home')) == hn and _norm(m.get('away')) == an:
-                        found = True
-                        try:
-                            if t.get('tour') is not None:
-                                tour = int(t.get('tour'))
-                        except Exception:
-                            pass
-                        try:
-                            if m.get('datetime'):
-                                match_dt = datetime.fromisoformat(m['datetime'])
-                            else:
-                                d = None; tm = None
-                                if m.get('date'):
-                                    try:
-                                        d = datetime.fromisoformat(str(m['date'])[:10]).date()
-                                    except Exception:
-                                        d = None
-                                if m.get('time'):
-                                    ts = str(m.get('time')).strip()
-                                    for fmt in ("%H:%M:%S", "%H:%M"):
-                                        try:
-                                            tm = datetime.strptime(ts, fmt).time(); break
-                                        except Exception:
-                                            tm = None
-                                if d is not None:
-                                    match_dt = datetime.combine(d, tm or datetime.min.time())
-                        except Exception:
-                            match_dt = None
-                        break
-                except Exception:
-                    continue
-            if found:
-                break
+    hit = hit or fallback
+    found = hit is not None
+    match_dt = None
+    if found:
+        t, m = hit
+        # Зафиксируем фактический тур
+        try:
+            if t.get('tour') is not None:
+                tour = int(t.get('tour'))
+        except Exception:
+            pass
+        match_dt = _match_dt_of(m)
     if not found:
         return jsonify({'error': 'Матч не найден'}), 404
     if match_dt:
@@ -1639,7 +1776,7 @@ def api_betting_place():
             from utils.betting import BettingCalculator
             match_dt_utc = _convert_local_naive_to_utc(match_dt)
             calc = BettingCalculator()
-            ok, msg = calc.check_bet_timing(match_dt_utc, lock_ahead_minutes=BET_LOCK_AHEAD_MINUTES)
+            ok, msg = calc.check_bet_timing(match_dt_utc, lock_ahead_minutes=SETTINGS.BET_LOCK_AHEAD_MINUTES)
             if not ok:
                 if 'already started' in (msg or ''):
                     return jsonify({'error': 'Ставки на начавшийся матч недоступны', 'locked': True}), 400
@@ -1655,25 +1792,35 @@ def api_betting_place():
         db_user = db.get(User, user_id)
         if not db_user:
             return jsonify({'error': 'Пользователь не найден'}), 404
-        # проверка суточного лимита
-        start_day = datetime.now(timezone.utc).date()
-        start_dt = datetime.combine(start_day, datetime.min.time()).replace(tzinfo=timezone.utc)
-        end_dt = datetime.combine(start_day, datetime.max.time()).replace(tzinfo=timezone.utc)
-        today_sum = db.query(Bet).filter(Bet.user_id==user_id, Bet.placed_at>=start_dt, Bet.placed_at<=end_dt).with_entities(func.coalesce(func.sum(Bet.stake), 0)).scalar() if engine else 0
-        if (today_sum or 0) + stake > BET_DAILY_MAX_STAKE:
-            return jsonify({'error': f'Суточный лимит ставок {BET_DAILY_MAX_STAKE}'}), 400
         if (db_user.credits or 0) < stake:
             return jsonify({'error': 'Недостаточно кредитов'}), 400
-        # коэффициенты на момент ставки
-        if market == '1x2':
-            # вычислим date_key из известной даты матча (если есть)
+        # суточный лимит: условный UPDATE строки user_daily_stake в транзакции ставки
+        # (при любом отказе ниже сессия закрывается без commit — резерв откатывается)
+        if not _stake_ledger.reserve_daily_stake(db, UserDailyStake, Bet, user_id, stake, SETTINGS.BET_DAILY_MAX_STAKE):
+            db.rollback()
+            return jsonify({'error': f'Суточный лимит ставок {SETTINGS.BET_DAILY_MAX_STAKE}'}), 400
+        # вычислим date_key из известной даты матча (если есть)
+        dk = None
+        try:
+            if match_dt:
+                dk = (match_dt.date().isoformat())
+        except Exception:
             dk = None
-            try:
-                if match_dt:
-                    dk = (match_dt.date().isoformat())
-            except Exception:
-                dk = None
-            odds_map = _compute_match_odds(home, away, dk)
+        # коэффициенты на момент ставки — из опубликованного снапшота (одно чтение, без пересчёта)
+        odds_ver, odds_pub = _odds_published(home, away, dk)
+        quoted_ver = (request.form.get('odds_version') or '').strip()
+        if quoted_ver.isdigit() and int(quoted_ver) != int(odds_ver):
+            # Клиент видел другую версию коэффициентов — ставку не принимаем, отдаём актуальные
+            return jsonify({
+                'error': 'Коэффициенты изменились, проверьте ставку',
+                'odds_changed': True,
+                'odds_version': odds_ver,
+                'odds': odds_pub.get('odds') or {},
+                'markets': odds_pub.get('markets') or {}
+            }), 409
+        pub_markets = odds_pub.get('markets') or {}
+        if market == '1x2':
+            odds_map = odds_pub.get('odds') or _compute_match_odds(home, away, dk)
             k = odds_map.get(sel) or 2.00
             selection_to_store = sel
             market_to_store = '1x2'
@@ -1733,7 +1880,11 @@ def api_betting_place():
                 return jsonify({'error': 'Неверная линия тотала'}), 400
             if sel not in ('over','under'):
                 return jsonify({'error': 'Неверный выбор тотала'}), 400
-            odds_map = _compute_totals_odds(home, away, line)
+            odds_map = next((t.get('odds') for t in (pub_markets.get('totals') or [])
+                             if isinstance(t, dict) and t.get('line') == line and t.get('odds')), None)
+            if not odds_map:
+                # линия не из опубликованного набора (динамические линии) — считаем на месте
+                odds_map = _compute_totals_odds(home, away, line)
             k = odds_map.get(sel) or 2.00
             # Короткое кодирование: O35 / U35, O45 / U45, O55 / U55
             line_token = str(line).replace('.5','5').replace('.','')  # 3.5 -> 35
@@ -1745,13 +1896,19 @@ def api_betting_place():
                 selection_to_store = selection_to_store[:8]
         else:
             # спецрынки: пенальти/красная. Простая модель вероятности с поправкой по силам.
-            odds_map = _compute_specials_odds(home, away, market)
+            odds_map = (((pub_markets.get('specials') or {}).get(market) or {}).get('odds')
+                        or _compute_specials_odds(home, away, market))
             k = odds_map.get(sel) or 2.00
             selection_to_store = sel
             market_to_store = market
-        # списываем кредиты
-        db_user.credits = int(db_user.credits or 0) - stake
-        db_user.updated_at = datetime.now(timezone.utc)
+        # списываем кредиты атомарно: параллельные ставки не уведут баланс в минус
+        debited = (db.query(User)
+                     .filter(User.user_id == user_id, User.credits >= stake)
+                     .update({User.credits: User.credits - stake, User.updated_at: datetime.now(timezone.utc)},
+                             synchronize_session=False))
+        if not debited:
+            db.rollback()
+            return jsonify({'error': 'Недостаточно кредитов'}), 400
         # Единый формат хранения коэффициента: строка с 2 знаками, ROUND_HALF_UP
         from decimal import Decimal, ROUND_HALF_UP
         try:
@@ -1774,7 +1931,23 @@ def api_betting_place():
             updated_at=datetime.now(timezone.utc)
         )
         db.add(bet)
+        # Счётчики достижений — в транзакции ставки: строка users уже заблокирована списанием, так что
+        # параллельный backfill_progress (блокирует ту же строку) либо видит ставку, либо её bump попадает
+        # в созданную им строку. SAVEPOINT: сбой прогресса не откатывает ставку
+        first_bet = False
+        try:
+            with db.begin_nested():
+                bumped = _ach_engine.on_bet_placed(db, UserAchievementProgress, user_id, market_to_store, _week_period_start_msk_to_utc())
+                # Первая ставка пользователя — +1 к «со ставками» на дашборде (без строки прогресса — выровняет reconcile)
+                first_bet = bumped and (db.query(UserAchievementProgress.bets_total)
+                                          .filter(UserAchievementProgress.user_id == user_id).scalar() == 1)
+        except Exception as e:
+            app.logger.warning(f"achievements progress (bet placed) failed: {e}")
+        _user_stats_record(db, user_id, bets=1, first_bets=int(first_bet))
         db.commit()
+        _ach_cache_drop(user_id)
+        # Списание кредитов — bulk UPDATE, хук коммита его не видит
+        _user_profile_drop(user_id)
 
         # --- НОВЫЙ КОД: Уведомление через WebSocket ---
         try:
@@ -1782,13 +1955,9 @@ def api_betting_place():
             if ws_manager:
                 # Пересчитываем коэффициенты/рынки после ставки (полный снэпшот)
                 date_key = bet.match_datetime.date().isoformat() if bet.match_datetime else None
-                odds_fields = _build_odds_fields(home, away) or {}
-                # Текущая версия коэффициентов; при ставке можем не повышать версию, но отправим её в payload
-                try:
-                    cur_ver = _get_odds_version(home, away)
-                except Exception:
-                    cur_ver = 0
-                odds_fields['odds_version'] = cur_ver
+                # Ставка коэффициенты не меняет: отправляем уже опубликованный снапшот и его версию
+                odds_fields = dict(odds_pub or {})
+                odds_fields['odds_version'] = odds_ver
                 payload = {
                     'entity': 'odds',
                     'id': { 'home': home, 'away': away, 'date': (date_key or '') },
@@ -2186,11 +2355,196 @@ class UserAchievement(Base):
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+# Счётчики прогресса достижений: обновляются атомарно на событиях (ставка, выигрыш, чек-ин, приглашённый),
+# строка создаётся однократным бэкфиллом из истории (services/achievements.py)
+class UserDailyStake(Base):
+    """Сумма ставок пользователя за UTC-сутки (суточный лимит), см. services/stake_ledger.py"""
+    __tablename__ = 'user_daily_stake'
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    total = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class OddsSnapshot(Base):
+    """Опубликованные коэффициенты матча (общие для всех воркеров), см. services/odds_publish.py"""
+    __tablename__ = 'odds_snapshots'
+    __table_args__ = (
+        Index('ix_odds_snapshots_away', 'away'),
+    )
+    home = Column(String(128), primary_key=True)
+    away = Column(String(128), primary_key=True)
+    date_key = Column(String(10), nullable=True)
+    version = Column(Integer, default=1, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON {odds, markets}
+    payload_hash = Column(String(40), nullable=True)
+    config_hash = Column(String(40), nullable=True)  # отпечаток BET_* на момент расчёта
+    stale = Column(Boolean, default=False, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class UserAchievementProgress(Base):
+    __tablename__ = 'user_achievement_progress'
+    user_id = Column(Integer, primary_key=True)
+    bets_total = Column(Integer, default=0, nullable=False)
+    bets_won = Column(Integer, default=0, nullable=False)
+    max_win_odds = Column(Float, default=0.0, nullable=False)
+    markets_mask = Column(Integer, default=0, nullable=False)  # биты: 1x2=1, totals=2, specials=4
+    weeks_active = Column(Integer, default=0, nullable=False)
+    last_bet_week = Column(DateTime(timezone=True), nullable=True)  # начало недели последней ставки (UTC)
+    invited_count = Column(Integer, default=0, nullable=False)
+    checkins_total = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class UserStats(Base):
+    """Основа счётчиков дашборда пользователей (одна строка id=1, пишет reconcile; см. services/user_stats.py)"""
+    __tablename__ = 'user_stats'
+    id = Column(Integer, primary_key=True)
+    stats_day = Column(Date, nullable=True)  # день суточных счётчиков (UTC)
+    total_users = Column(Integer, default=0, nullable=False)
+    new_today = Column(Integer, default=0, nullable=False)
+    with_bets = Column(Integer, default=0, nullable=False)
+    with_checkins = Column(Integer, default=0, nullable=False)
+    checkins_today = Column(Integer, default=0, nullable=False)
+    bets_today = Column(Integer, default=0, nullable=False)
+    active_1d = Column(Integer, default=0, nullable=False)
+    active_7d = Column(Integer, default=0, nullable=False)
+    active_30d = Column(Integer, default=0, nullable=False)
+    new_30d = Column(Integer, default=0, nullable=False)
+    online_5m = Column(Integer, default=0, nullable=False)
+    online_15m = Column(Integer, default=0, nullable=False)
+    # Суммы user_stats_counters за stats_day на момент reconcile (уже учтены в счётчиках выше)
+    ev_new_users = Column(Integer, default=0, nullable=False)
+    ev_first_bets = Column(Integer, default=0, nullable=False)
+    ev_first_checkins = Column(Integer, default=0, nullable=False)
+    ev_checkins = Column(Integer, default=0, nullable=False)
+    ev_bets = Column(Integer, default=0, nullable=False)
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class UserStatsCounter(Base):
+    """Событийные счётчики дашборда пользователей по дням, шард — user_id % SHARDS (без общей горячей строки)"""
+    __tablename__ = 'user_stats_counters'
+    day = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    new_users = Column(Integer, default=0, nullable=False)
+    first_bets = Column(Integer, default=0, nullable=False)
+    first_checkins = Column(Integer, default=0, nullable=False)
+    checkins = Column(Integer, default=0, nullable=False)
+    bets = Column(Integer, default=0, nullable=False)
+
+class UserStatsDaily(Base):
+    """История счётчиков пользователей по дням (снимок последнего reconcile дня)"""
+    __tablename__ = 'user_stats_daily'
+    day = Column(Date, primary_key=True)
+    total_users = Column(Integer, default=0, nullable=False)
+    new_users = Column(Integer, default=0, nullable=False)
+    active_1d = Column(Integer, default=0, nullable=False)
+    active_7d = Column(Integer, default=0, nullable=False)
+    active_30d = Column(Integer, default=0, nullable=False)
+    with_bets = Column(Integer, default=0, nullable=False)
+    with_checkins = Column(Integer, default=0, nullable=False)
+    checkins = Column(Integer, default=0, nullable=False)
+    bets = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+def _user_stats_record(db, user_id, **deltas):
+    """Событие в шард счётчиков дашборда в транзакции вызывающего (SAVEPOINT: сбой не откатывает событие)"""
+    try:
+        with db.begin_nested():
+            _user_stats.record(db, UserStatsCounter, datetime.now(timezone.utc).date(), int(user_id), **deltas)
+    except Exception as e:
+        app.logger.warning(f"user stats bump failed: {e}")
+
+def _user_stats_reconcile():
+    """Пересчёт счётчиков дашборда и снимок дня в user_stats_daily"""
+    if SessionLocal is None:
+        return None
+    db = get_db()
+    try:
+        counts = _user_stats.reconcile(db, UserStats, UserStatsDaily, UserStatsCounter, User, Bet)
+        db.commit()
+        return counts
+    except Exception as e:
+        db.rollback()
+        app.logger.warning(f"user stats reconcile failed: {e}")
+        return None
+    finally:
+        db.close()
+
+def _user_stats_reconcile_loop(interval_sec: int):
+    """Периодическое выравнивание счётчиков дашборда пользователей"""
+    while True:
+        _user_stats_reconcile()
+        try:
+            time.sleep(interval_sec)
+        except Exception:
+            pass
+
+def _ach_cache_drop(user_id):
+    """Сбрасывает in-memory кэш ответа /api/achievements пользователя (текущий воркер)"""
+    try:
+        globals().get('ACHIEVEMENTS_CACHE', {}).pop(f"ach:{user_id}", None)
+    except Exception:
+        pass
+
+def _ach_progress_on_bet_won(db, bet):
+    """Хук расчёта ставок: выигрыш в счётчики достижений (в транзакции расчёта)"""
+    try:
+        _ach_engine.on_bet_won(db, UserAchievementProgress, bet.user_id, bet.odds)
+    except Exception as e:
+        app.logger.warning(f"achievements progress (bet won) failed: {e}")
+    _ach_cache_drop(bet.user_id)
+
 class Snapshot(Base):
     __tablename__ = 'snapshots'
     key = Column(String(64), primary_key=True)
     payload = Column(Text, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # sha256 содержимого без updated_at (services.snapshots.content_hash): no-op записи и ETag
+    content_hash = Column(String(64), nullable=True)
+
+class SnapshotVersion(Base):
+    """Версия снапшота с логом дельт и нижняя граница лога (base_version), см. services/snapshots.py"""
+    __tablename__ = 'snapshot_versions'
+    key = Column(String(64), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    base_version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class SnapshotDelta(Base):
+    """Append-only лог изменений записей снапшота (тур расписания, строка результата)"""
+    __tablename__ = 'snapshot_deltas'
+    __table_args__ = (
+        Index('ix_snapshot_deltas_key_version', 'snapshot_key', 'version'),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    snapshot_key = Column(String(64), nullable=False)
+    version = Column(Integer, nullable=False)
+    entry_key = Column(Text, nullable=False)
+    entry = Column(Text, nullable=True)  # JSON записи; NULL — запись удалена
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+_configure_snapshot_deltas(SnapshotDelta, SnapshotVersion, retain=SETTINGS.SNAPSHOT_DELTA_RETAIN)
+_public_profiles.configure(max_entries=SETTINGS.PUBLIC_PROFILE_CACHE_MAX, local_ttl=SETTINGS.PUBLIC_PROFILE_LOCAL_TTL)
+
+def _user_profile_drop(user_id):
+    """Сбрасывает кэш DTO /api/user и публичный профиль пользователя"""
+    try:
+        if cache_manager:
+            cache_manager.invalidate('user_profile', str(int(user_id)))
+    except Exception as e:
+        app.logger.warning(f"user profile invalidate failed: {e}")
+    _public_profile_drop(user_id)
+
+# Коммиты users/user_photos/user_prefs/user_limits/referrals сбрасывают кэш профиля (bulk UPDATE — вручную)
+_user_profile.install_invalidation(_user_profile_drop)
+
+def _public_profile_drop(user_id):
+    """Сбрасывает публичный профиль (локальный LRU + общий кэш) после изменения имени/уровня/фото"""
+    try:
+        _public_profiles.invalidate_public_profile(user_id, cache=cache_manager)
+    except Exception as e:
+        app.logger.warning(f"public profile invalidate failed: {e}")
 
 # Ограничения на изменения профиля (одноразовые действия)
 class UserLimits(Base):
@@ -3629,6 +3983,30 @@ def api_admin_get_lineups(match_id: str):
         app.logger.error(f"admin get lineups error: {e}")
         return jsonify({'error': 'internal'}), 500
 
+def _lineups_changed(home: str, away: str, match_id=None):
+    """После commit изменённого состава: сброс кэша деталей матча и одно уведомление lineups_updated
+    с полными деталями (клиенты применяют их без рефетча /api/match-details)"""
+    _details_key = f"{home.strip().lower()}|{away.strip().lower()}"
+    MATCH_DETAILS_CACHE.pop(_details_key, None)
+    _ETAG_HELPER_CACHE.pop(f"match-details:{_details_key}", None)
+    try:
+        ws = app.config.get('websocket_manager')
+        if not ws:
+            return
+        notification_data = {
+            'match_id': match_id,
+            'home': home,
+            'away': away,
+            'updated_at': datetime.utcnow().isoformat()
+        }
+        try:
+            notification_data['details'] = _build_match_details_payload(home, away)
+        except Exception as _det_e:
+            app.logger.warning(f"lineups notify details build failed: {_det_e}")
+        ws.notify_data_change('lineups_updated', notification_data)
+    except Exception as _ws_e:
+        app.logger.warning(f"websocket lineup notify failed: {_ws_e}")
+
 @app.route('/api/admin/match/<match_id>/lineups/save', methods=['POST'])
 @log_match_operation("Сохранение составов команд")
 @require_admin()
@@ -3689,31 +4067,21 @@ def api_admin_save_lineups(match_id: str):
                 """))
             except Exception as _te:
                 app.logger.warning(f"team_roster ensure failed: {_te}")
-            # удаляем прежние (матчевые)
-            db.query(MatchLineupPlayer).filter(MatchLineupPlayer.home==home, MatchLineupPlayer.away==away).delete()
-            def ins(team, arr, pos_label):
-                for p in arr or []:
-                    name = (p.get('name') or '').strip()
-                    if not name:
-                        continue
-                    num = p.get('number')
-                    try:
-                        if num is not None:
-                            num = int(num)
-                    except Exception:
-                        num = None
-                    pos = p.get('position') or 'starting_eleven'
-                    if pos not in ('starting_eleven','substitute'):
-                        # фронт передаёт main/sub -> нормализуем
-                        if pos in ('main', 'start'): pos = 'starting_eleven'
-                        elif pos in ('sub', 'bench'): pos = 'substitute'
-                        else: pos = 'starting_eleven'
-                    row = MatchLineupPlayer(home=home, away=away, team=team, player=name, jersey_number=num, position=('starting_eleven' if pos=='starting_eleven' else 'substitute'))
-                    db.add(row)
-            ins('home', (data.get('home') or {}).get('main'), 'starting_eleven')
-            ins('home', (data.get('home') or {}).get('sub'), 'substitute')
-            ins('away', (data.get('away') or {}).get('main'), 'starting_eleven')
-            ins('away', (data.get('away') or {}).get('sub'), 'substitute')
+            # Состав матча — разница с записанным, bulk-операторами в этой транзакции
+            incoming = {}
+            for side in _lineup_import.SIDES:
+                block = data.get(side) or {}
+                entries = []
+                for group, default_pos in (('main', 'starting_eleven'), ('sub', 'substitute')):
+                    for p in block.get(group) or []:
+                        if not isinstance(p, dict):
+                            p = {'name': p}
+                        e = _lineup_import.make_entry(p.get('name'), p.get('number'), p.get('position') or default_pos,
+                                                      p.get('is_captain') or p.get('captain'))
+                        if e:
+                            entries.append(e)
+                incoming[side] = entries
+            lineup_stats = _lineup_import.apply_lineup(db, MatchLineupPlayer, home, away, incoming, mode='replace')
 
             # --- Sync persistent roster for both real teams (main lineups only) ---
             import re as _re
@@ -3736,15 +4104,15 @@ def api_admin_save_lineups(match_id: str):
                 # load existing
                 existing = db.execute(_sa_text("SELECT id, player FROM team_roster WHERE team=:t ORDER BY id ASC"), {'t': real_team}).fetchall()
                 existing_map = { _key(r.player): r for r in existing }
-                # additions
-                for k,nm in ordered:
-                    if k not in existing_map:
-                        db.execute(_sa_text("INSERT INTO team_roster(team, player) VALUES (:t,:p)"), {'t': real_team, 'p': nm})
-                # deletions (player removed)
+                # additions — одним executemany
+                adds = [{'t': real_team, 'p': nm} for k, nm in ordered if k not in existing_map]
+                if adds:
+                    db.execute(_sa_text("INSERT INTO team_roster(team, player) VALUES (:t,:p)"), adds)
+                # deletions (player removed) — одним executemany
                 new_keys = {k for k,_ in ordered}
-                for k_old, row in existing_map.items():
-                    if k_old not in new_keys:
-                        db.execute(_sa_text("DELETE FROM team_roster WHERE id=:id"), {'id': row.id})
+                gone = [{'id': row.id} for k_old, row in existing_map.items() if k_old not in new_keys]
+                if gone:
+                    db.execute(_sa_text("DELETE FROM team_roster WHERE id=:id"), gone)
             try:
                 sync_team(home, 'home')
                 sync_team(away, 'away')
@@ -3752,21 +4120,9 @@ def api_admin_save_lineups(match_id: str):
                 app.logger.warning(f"team_roster sync failed: {_sr_e}")
 
             db.commit()
-            # WebSocket уведомление о обновлении составов
-            try:
-                if 'websocket_manager' in app.config and app.config['websocket_manager']:
-                    notification_data = {
-                        'match_id': match_id,
-                        'home': home,
-                        'away': away,
-                        'updated_at': datetime.utcnow().isoformat()
-                    }
-                    app.config['websocket_manager'].notify_data_change('lineups_updated', notification_data)
-                    app.logger.info(f"[WebSocket] Sent lineups_updated notification: {home} vs {away}")
-                else:
-                    app.logger.warning("[WebSocket] WebSocket manager not available for lineup notifications")
-            except Exception as _ws_e:
-                app.logger.warning(f"websocket lineup notify failed: {_ws_e}")
+            # Одна инвалидация и одно WS-уведомление на матч (и только если состав изменился)
+            if lineup_stats['changed']:
+                _lineups_changed(home, away, match_id)
             
             # Логирование успешного сохранения составов
             if admin_id:
@@ -3791,7 +4147,7 @@ def api_admin_save_lineups(match_id: str):
                     }
                 )
             
-            return jsonify({'success': True})
+            return jsonify({'success': True, 'lineup': lineup_stats})
         finally:
             db.close()
     except Exception as e:
@@ -4052,6 +4408,14 @@ if engine is not None:
     try:
         Base.metadata.create_all(engine)
         print('[INFO] DB tables ensured')
+        # snapshots.content_hash (миграция 20261019_add_snapshot_content_hash): create_all не добавляет
+        # столбцы в существующую таблицу, а без него падает любое чтение снапшота
+        try:
+            if engine.dialect.name == 'postgresql':
+                with engine.begin() as conn:
+                    conn.execute(text("ALTER TABLE snapshots ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+        except Exception as _ch_err:
+            print(f"[WARN] snapshots.content_hash ensure failed: {_ch_err}")
 
         # Если включён флаг INIT_DATABASE_TABLES, обеспечить создание таблицы user_achievements
         try:
@@ -4328,37 +4692,15 @@ def _estimate_goal_rates(home: str, away: str) -> tuple[float, float]:
     - BET_STR_TOTAL_SCALE (влияние сил на общий тотал, 0.010)
     - BET_MIN_RATE (минимум для lam/mu), BET_MAX_RATE
     """
-    try:
-        base_total = float(os.environ.get('BET_BASE_TOTAL', '4.2'))
-    except Exception:
-        base_total = 4.2
-    try:
-        # Нейтральное поле: дом. преимущество выключено
-        home_adv = float(os.environ.get('BET_HOME_ADV', '0.00'))
-    except Exception:
-        home_adv = 0.00
-    try:
-        share_scale = float(os.environ.get('BET_RANK_SHARE_SCALE', '0.03'))
-    except Exception:
-        share_scale = 0.03
-    try:
-        total_scale = float(os.environ.get('BET_RANK_TOTAL_SCALE', '0.015'))
-    except Exception:
-        total_scale = 0.015
-    try:
-        # Усилим вклад сил, чтобы явный фаворит имел заметно меньший кф
-        str_share_scale = float(os.environ.get('BET_STR_SHARE_SCALE', '0.05'))
-    except Exception:
-        str_share_scale = 0.05
-    try:
-        str_total_scale = float(os.environ.get('BET_STR_TOTAL_SCALE', '0.015'))
-    except Exception:
-        str_total_scale = 0.015
-    try:
-        min_rate = float(os.environ.get('BET_MIN_RATE', '0.15'))
-        max_rate = float(os.environ.get('BET_MAX_RATE', '5.0'))
-    except Exception:
-        min_rate, max_rate = 0.15, 5.0
+    base_total = SETTINGS.BET_BASE_TOTAL
+    # Нейтральное поле: дом. преимущество выключено
+    home_adv = SETTINGS.BET_HOME_ADV
+    share_scale = SETTINGS.BET_RANK_SHARE_SCALE
+    total_scale = SETTINGS.BET_RANK_TOTAL_SCALE
+    # Усилим вклад сил, чтобы явный фаворит имел заметно меньший кф
+    str_share_scale = SETTINGS.BET_STR_SHARE_SCALE
+    str_total_scale = SETTINGS.BET_STR_TOTAL_SCALE
+    min_rate, max_rate = SETTINGS.BET_MIN_RATE, SETTINGS.BET_MAX_RATE
 
     def clamp(x, a, b):
         return max(a, min(b, x))
@@ -4591,44 +4933,17 @@ def _compute_match_odds(home: str, away: str, date_key: str|None = None) -> dict
             return float(q)
         except Exception:
             return float(n)
-    try:
-        rho = float(os.environ.get('BET_DC_RHO', '-0.05'))
-    except Exception:
-        rho = -0.05
-    try:
-        max_goals = int(os.environ.get('BET_MAX_GOALS', '8'))
-    except Exception:
-        max_goals = 8
+    rho = SETTINGS.BET_DC_RHO
+    max_goals = SETTINGS.BET_MAX_GOALS
     # Параметры «заострения» и влияния голосований
-    try:
-        softmax_gamma = float(os.environ.get('BET_SOFTMAX_GAMMA', '1.30'))
-    except Exception:
-        softmax_gamma = 1.30
-    try:
-        fav_target_odds = float(os.environ.get('BET_FAV_TARGET_ODDS', '1.40'))
-    except Exception:
-        fav_target_odds = 1.40
-    try:
-        vote_infl_max = float(os.environ.get('BET_VOTE_INFLUENCE_MAX', '0.15'))  # was 9%, now 15% via env var
-    except Exception:
-        vote_infl_max = 0.15
-    try:
-        fav_pull = float(os.environ.get('BET_FAV_PULL', '0.50'))  # 0..1 — доля подтяжки к таргету (0=нет, 1=жестко)
-    except Exception:
-        fav_pull = 0.50
-    try:
-        softmax_draw_gamma = float(os.environ.get('BET_SOFTMAX_DRAW_GAMMA', '1.00'))  # отдельная гамма для ничьей
-    except Exception:
-        softmax_draw_gamma = 1.00
+    softmax_gamma = SETTINGS.BET_SOFTMAX_GAMMA
+    fav_target_odds = SETTINGS.BET_FAV_TARGET_ODDS
+    vote_infl_max = SETTINGS.BET_VOTE_INFLUENCE_MAX  # was 9%, now 15% via env var
+    fav_pull = SETTINGS.BET_FAV_PULL  # 0..1 — доля подтяжки к таргету (0=нет, 1=жестко)
+    softmax_draw_gamma = SETTINGS.BET_SOFTMAX_DRAW_GAMMA  # отдельная гамма для ничьей
     # Доп. усиление вероятности ничьей для "равных" команд
-    try:
-        draw_boost_max = float(os.environ.get('BET_DRAW_BOOST_MAX', '0.25'))  # максимум увеличения pD при паритете
-    except Exception:
-        draw_boost_max = 0.25
-    try:
-        draw_max_prob = float(os.environ.get('BET_DRAW_MAX_PROB', '0.35'))   # верхняя граница pD после буста
-    except Exception:
-        draw_max_prob = 0.35
+    draw_boost_max = SETTINGS.BET_DRAW_BOOST_MAX  # максимум увеличения pD при паритете
+    draw_max_prob = SETTINGS.BET_DRAW_MAX_PROB   # верхняя граница pD после буста
 
     lam, mu = _estimate_goal_rates(home, away)
     # --- Коррекция по форме ---
@@ -4645,10 +4960,7 @@ def _compute_match_odds(home: str, away: str, date_key: str|None = None) -> dict
 
     # Применим корректировку по форме: усиливаем вероятность победы команды с лучшей формой.
     # Ограничим влияние до ±12% (alpha * diff_index, где diff_index в [-1,1]).
-    try:
-        alpha = float(os.environ.get('BET_FORM_MAX_INFL', '0.12'))  # максимум 12% относительного сдвига
-    except Exception:
-        alpha = 0.12
+    alpha = SETTINGS.BET_FORM_MAX_INFL  # максимум 12% относительного сдвига
     if diff_index and abs(diff_index) > 1e-6 and alpha > 0:
         k = max(-alpha, min(alpha, alpha * diff_index))
         # k>0 => усиливаем хозяев, ослабляем гостей
@@ -4740,7 +5052,7 @@ def _compute_match_odds(home: str, away: str, date_key: str|None = None) -> dict
         pass
 
     # Мягкая подтяжка к целевому кэфу фаворита (например, 1.40), но оставляем "плавающим"
-    overround = 1.0 + BET_MARGIN
+    overround = 1.0 + SETTINGS.BET_MARGIN
     try:
         arr = [pH,pD,pA]
         fav_idx = max(range(3), key=lambda i: arr[i])
@@ -4764,18 +5076,9 @@ def _compute_match_odds(home: str, away: str, date_key: str|None = None) -> dict
         # высокая степень паритета: различие менее ~0.08 абсолютных пунктов
         parity2 = 1.0 - min(1.0, abs(pH - pA) / 0.08)
         if parity2 > 0.8:
-            try:
-                min_odd = float(os.environ.get('BET_PARITY_MIN_ODD', '2.00'))
-            except Exception:
-                min_odd = 2.00
-            try:
-                max_odd = float(os.environ.get('BET_PARITY_MAX_ODD', '2.50'))
-            except Exception:
-                max_odd = 2.50
-            try:
-                mid_odd = float(os.environ.get('BET_PARITY_MID_ODD', '2.20'))
-            except Exception:
-                mid_odd = 2.20
+            min_odd = SETTINGS.BET_PARITY_MIN_ODD
+            max_odd = SETTINGS.BET_PARITY_MAX_ODD
+            mid_odd = SETTINGS.BET_PARITY_MID_ODD
             target_odd = max(min_odd, min(max_odd, ( (1.0/(max(1e-9, pH*overround)) + 1.0/(max(1e-9, pA*overround)) )/2.0 )))
             # Подтягиваем в район середины 2.2 (в пределах [min_odd; max_odd])
             target_odd = max(min_odd, min(max_odd, (target_odd*0.5 + mid_odd*0.5)))
@@ -4818,14 +5121,8 @@ def _compute_totals_odds(home: str, away: str, line: float) -> dict:
             return float(q)
         except Exception:
             return float(n)
-    try:
-        rho = float(os.environ.get('BET_DC_RHO', '-0.05'))
-    except Exception:
-        rho = -0.05
-    try:
-        max_goals = int(os.environ.get('BET_MAX_GOALS', '8'))
-    except Exception:
-        max_goals = 8
+    rho = SETTINGS.BET_DC_RHO
+    max_goals = SETTINGS.BET_MAX_GOALS
     lam, mu = _estimate_goal_rates(home, away)
     _probs, mat = _dc_outcome_probs(lam, mu, rho=rho, max_goals=max_goals)
     try:
@@ -4845,7 +5142,7 @@ def _compute_totals_odds(home: str, away: str, line: float) -> dict:
                 p_over += p
     p_over = min(max(p_over, 0.0001), 0.9999)
     p_under = max(0.0001, min(0.9999, 1.0 - p_over))
-    overround = 1.0 + BET_MARGIN
+    overround = 1.0 + SETTINGS.BET_MARGIN
     def to_odds(p):
         try:
             return _round_odd(1.0 / (p * overround))
@@ -4865,9 +5162,9 @@ def _compute_specials_odds(home: str, away: str, market: str) -> dict:
             return float(n)
     base_yes = 0.30
     if market == 'penalty':
-        base_yes = float(os.environ.get('BET_BASE_PENALTY', '0.35'))
+        base_yes = SETTINGS.BET_BASE_PENALTY
     elif market == 'redcard':
-        base_yes = float(os.environ.get('BET_BASE_REDCARD', '0.22'))
+        base_yes = SETTINGS.BET_BASE_REDCARD
     def norm(s: str) -> str:
         return _norm_team_key(s)
     ranks = _load_league_ranks()
@@ -4880,10 +5177,7 @@ def _compute_specials_odds(home: str, away: str, market: str) -> dict:
         delta = abs(rh - ra)
         adj += min(0.06, delta * 0.004)
     # Поправка от явных сил команд
-    try:
-        str_adj_scale = float(os.environ.get('BET_STR_SPECIALS_SCALE', '0.020'))
-    except Exception:
-        str_adj_scale = 0.020
+    str_adj_scale = SETTINGS.BET_STR_SPECIALS_SCALE
     strengths = _load_team_strengths()
     sh2 = strengths.get(norm(home))
     sa2 = strengths.get(norm(away))
@@ -4901,7 +5195,7 @@ def _compute_specials_odds(home: str, away: str, market: str) -> dict:
         adj += min(0.08, delta_str * str_adj_scale)
     p_yes = max(0.02, min(0.97, base_yes + adj))
     p_no = max(0.02, 1.0 - p_yes)
-    overround = 1.0 + BET_MARGIN
+    overround = 1.0 + SETTINGS.BET_MARGIN
     def to_odds(p):
         try:
             return _round_odd(1.0 / (p * overround))
@@ -5069,11 +5363,7 @@ def _json_response(payload: dict, status: int = 200):
 # ---------------------- ETag JSON Helper ----------------------
 _ETAG_HELPER_CACHE = {}
 _ETAG_HELPER_SWEEP = {'count': 0}
-# Максимальное количество ключей в in-memory ETag-кэше (LRU-подобное вытеснение по старейшему ts)
-try:
-    _ETAG_CACHE_MAX_KEYS = int(os.environ.get('ETAG_CACHE_MAX_KEYS', '256'))
-except Exception:
-    _ETAG_CACHE_MAX_KEYS = 256
+# Максимальное количество ключей в in-memory ETag-кэше — SETTINGS.ETAG_CACHE_MAX_KEYS (вытеснение по старейшему ts)
 # Lightweight ETag metrics (per endpoint_key). Thread-safe via local lock.
 _ETAG_METRICS_LOCK = threading.Lock()
 _ETAG_METRICS = {
@@ -5128,7 +5418,8 @@ def etag_json(endpoint_key: str, builder_func, *, cache_ttl: int = 30, max_age:
     builder_func: callable -> dict (payload без поля version)
     cache_ttl: seconds – держим в памяти результат builder_func
     max_age / swr: значения для Cache-Control
-    core_filter: optional callable(payload)->dict – ядро для расчёта ETag (например, исключить updated_at)
+    core_filter: optional callable(payload)->dict – ядро для расчёта ETag (например, исключить updated_at);
+                 строка используется как ETag без хеширования
     """
     now = time.time()
     client_etag = request.headers.get('If-None-Match')
@@ -5137,7 +5428,7 @@ def etag_json(endpoint_key: str, builder_func, *, cache_ttl: int = 30, max_age:
     if client_etag:
         _etag_metrics_inc(endpoint_key, 'etag_requests', 1)
     ce = _ETAG_HELPER_CACHE.get(endpoint_key)
-    if ce and (now - ce['ts'] < cache_ttl):
+    if ce and (now - ce['ts'] < cache_ttl) and ce.get('sv') == SETTINGS.version:
         _etag_metrics_inc(endpoint_key, 'memory_hits', 1)
         if client_etag and client_etag == ce['etag']:
             resp = flask.make_response('', 304)
@@ -5165,13 +5456,14 @@ def etag_json(endpoint_key: str, builder_func, *, cache_ttl: int = 30, max_age:
     payload = builder_func() or {}
     try:
         core = core_filter(payload) if callable(core_filter) else payload
-        etag = _etag_for_payload(core)
+        # core_filter может вернуть готовый ETag (например, content_hash снапшота)
+        etag = core if isinstance(core, str) else _etag_for_payload(core)
     except Exception:
         etag = hashlib.md5(str(endpoint_key).encode()).hexdigest()
-    _ETAG_HELPER_CACHE[endpoint_key] = {'ts': now, 'payload': payload, 'etag': etag, 'ttl': cache_ttl}
+    _ETAG_HELPER_CACHE[endpoint_key] = {'ts': now, 'payload': payload, 'etag': etag, 'ttl': cache_ttl, 'sv': SETTINGS.version}
     # Ограничение размера кэша: при превышении лимита удаляем самые старые по ts
     try:
-        max_keys = int(_ETAG_CACHE_MAX_KEYS or 256)
+        max_keys = int(SETTINGS.ETAG_CACHE_MAX_KEYS or 256)
         if max_keys > 0 and len(_ETAG_HELPER_CACHE) > max_keys:
             # Собираем пары (key, ts) и удаляем лишние с наименьшим ts
             items = [(k, v.get('ts', 0)) for k, v in _ETAG_HELPER_CACHE.items()]
@@ -6040,6 +6332,70 @@ def _build_results_payload_from_sheet():
 # ---------------------- BACKGROUND SYNC ----------------------
 _BG_THREAD = None
 _LB_PRECOMP_THREAD = None
+_USER_STATS_THREAD = None
+# Грязные флаги доменов sync: коммиты матчей/счетов/ставок/пользователей будят только нужные пересборки
+_SYNC_TRACKER = ChangeTracker(
+    coalesce_sec=SETTINGS.SYNC_COALESCE_SEC,
+    max_delay_sec=SETTINGS.SYNC_MAX_DELAY_SEC,
+    sweep_sec=SETTINGS.SYNC_SWEEP_SEC,
+    # Лидерборды (users пишутся постоянно) — не чаще прежнего периода полного sync
+    min_interval={'leaderboards': SETTINGS.SYNC_INTERVAL_SEC},
+)
+
+def _live_local_now():
+    """Локальное время расписания (то же смещение, что и в /api/match/status/get)"""
+    tz_m = SETTINGS.SCHEDULE_TZ_SHIFT_MIN
+    if tz_m == 0:
+        tz_m = SETTINGS.SCHEDULE_TZ_SHIFT_HOURS * 60
+    if tz_m == 0:
+        tz_m = SETTINGS.DEFAULT_TZ_MINUTES
+    return datetime.now() + timedelta(minutes=tz_m)
+
+def _live_registry_push(transitions):
+    """Переходы реестра live-матчей → WS data_changed (data_type='match_status_change', поток на матч)"""
+    if not websocket_manager:
+        return
+    now_iso = datetime.now(timezone.utc).isoformat()
+    for tr in transitions:
+        try:
+            websocket_manager.notify_data_change('match_status_change', {**tr, 'updated_at': now_iso})
+        except Exception as e:
+            app.logger.warning(f"match_status_change push failed: {e}")
+
+# Live и скоро начинающиеся матчи: окна из betting-tours + ручной live (matches.status)
+_LIVE_REGISTRY = LiveMatchRegistry(
+    _live_local_now,
+    duration_min=SETTINGS.BET_MATCH_DURATION_MINUTES,
+    soon_min=SETTINGS.LIVE_SOON_MIN,
+    on_change=_live_registry_push,
+)
+
+def _live_registry_load():
+    """Перезагрузка реестра: матчи туров из снапшота betting-tours + matches.status='live'"""
+    matches, manual = [], []
+    if SessionLocal is not None:
+        db = get_db()
+        try:
+            snap = _snapshot_get(db, Snapshot, 'betting-tours', app.logger)
+            payload = snap and snap.get('payload')
+            for t in (payload and payload.get('tours') or []):
+                matches.extend(t.get('matches') or [])
+            try:
+                from utils.match_status import list_live_matches
+                manual = list_live_matches(db)
+            except Exception as e:
+                app.logger.warning(f"live registry: list_live_matches failed: {e}")
+        finally:
+            db.close()
+    _LIVE_REGISTRY.duration_min = SETTINGS.BET_MATCH_DURATION_MINUTES
+    _LIVE_REGISTRY.soon_min = SETTINGS.LIVE_SOON_MIN
+    _LIVE_REGISTRY.reload(matches, manual)
+
+def _live_registry_ensure():
+    """Ленивая загрузка и запуск таймера реестра (идемпотентно)"""
+    if _LIVE_REGISTRY.needs_reload():
+        _live_registry_load()
+    _LIVE_REGISTRY.start(_live_registry_load, reload_sec=SETTINGS.LIVE_REGISTRY_RELOAD_SEC)
 
 # Forward declaration for static analyzers; real implementation is defined below
 def _sync_leaderboards():
@@ -6053,20 +6409,26 @@ def _should_start_bg() -> bool:
         return os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
     return True
 
-def _bg_sync_once():
-    """Оптимизированная фоновая синхронизация с использованием новых систем"""
+def _bg_sync_once(domains=None):
+    """Оптимизированная фоновая синхронизация с использованием новых систем.
+    domains — домены из _SYNC_TRACKER (None — все, как страховочный проход)."""
     if SessionLocal is None:
         return
     
     # Используем фоновые задачи для параллельной обработки
     if task_manager:
+        # stats-table deprecated: задача отключена
+        jobs = (
+            ('league-table', "sync_league_table", _sync_league_table, TaskPriority.HIGH),
+            ('schedule', "sync_schedule", _sync_schedule, TaskPriority.HIGH),
+            ('results', "sync_results", _sync_results, TaskPriority.NORMAL),
+            ('betting-tours', "sync_betting_tours", _sync_betting_tours, TaskPriority.NORMAL),
+            ('leaderboards', "sync_leaderboards", _sync_leaderboards, TaskPriority.LOW),
+        )
         # Запускаем синхронизацию разных типов данных параллельно
-        task_manager.submit_task("sync_league_table", _sync_league_table, priority=TaskPriority.HIGH)
-    # stats-table deprecated: задача отключена
-        task_manager.submit_task("sync_schedule", _sync_schedule, priority=TaskPriority.HIGH)
-        task_manager.submit_task("sync_results", _sync_results, priority=TaskPriority.NORMAL)
-        task_manager.submit_task("sync_betting_tours", _sync_betting_tours, priority=TaskPriority.NORMAL)
-        task_manager.submit_task("sync_leaderboards", _sync_leaderboards, priority=TaskPriority.LOW)
+        for domain, task_id, func, prio in jobs:
+            if domains is None or domain in domains:
+                task_manager.submit_task(task_id, func, priority=prio)
     else:
         # Fallback к старой синхронной логике
         _bg_sync_once_legacy()
@@ -6129,13 +6491,18 @@ def _sync_league_table():
         t0 = time.time()
         # DB-only: собираем из БД или оставляем предыдущий снапшот
         league_payload = _build_league_payload_from_db()
-        _snapshot_set(db, Snapshot, 'league-table', league_payload, app.logger)
+        stored = _snapshot_store(db, Snapshot, 'league-table', league_payload, app.logger)
         _metrics_set('last_sync', 'league-table', datetime.now(timezone.utc).isoformat())
         _metrics_set('last_sync_status', 'league-table', 'ok')
         _metrics_set('last_sync_duration_ms', 'league-table', int((time.time()-t0)*1000))
+        if stored == 'unchanged':
+            # Таблица та же: без инвалидации, WS-рассылки и перезаписи league_table
+            _metrics_inc('snapshot_unchanged', 1)
+            return
         # Инвалидируем соответствующий кэш
         if cache_manager:
             cache_manager.invalidate('league_table')
+        _LIVE_TABLE.request_rebuild()
         # Отправляем WebSocket уведомление
         if websocket_manager:
             websocket_manager.notify_data_change('league_table', league_payload)
@@ -6188,21 +6555,16 @@ def _sync_schedule():
     try:
         _metrics_inc('bg_runs_total', 1)
         t0 = time.time()
-        # Пересобираем снапшот расписания из текущей таблицы matches (DB-first, без Sheets)
-        try:
-            _update_schedule_snapshot_from_matches(db, app.logger)
-        except Exception as _ss_err:
-            app.logger.warning(f"Schedule snapshot rebuild in sync failed: {_ss_err}")
-            # Fallback: оставим предыдущий снапшот без изменений
-            try:
-                snap_prev = (_snapshot_get(db, Snapshot, 'schedule', app.logger) or {})
-                schedule_payload = snap_prev.get('payload') or {'tours': []}
-                _snapshot_set(db, Snapshot, 'schedule', schedule_payload, app.logger)
-            except Exception:
-                pass
+        # Пересобираем снапшот расписания из текущей таблицы matches (DB-first, без Sheets).
+        # При сбое предыдущий снапшот остаётся как есть
+        stored = _update_schedule_snapshot_from_matches(db, app.logger)
         _metrics_set('last_sync', 'schedule', datetime.now(timezone.utc).isoformat())
-        _metrics_set('last_sync_status', 'schedule', 'ok')
+        _metrics_set('last_sync_status', 'schedule', 'ok' if stored != 'failed' else 'error')
         _metrics_set('last_sync_duration_ms', 'schedule', int((time.time()-t0)*1000))
+        if stored != 'written':
+            if stored == 'unchanged':
+                _metrics_inc('snapshot_unchanged', 1)
+            return
         if invalidator:
             invalidator.invalidate_for_change('schedule_update', {})
         # Очистим ETag-кэш для schedule, чтобы клиенты получили свежую версию немедленно
@@ -6240,13 +6602,17 @@ def _sync_results():
     try:
         _metrics_inc('bg_runs_total', 1)
         t0 = time.time()
-        # Не читаем Sheets: используем предыдущий снапшот
+        # Не читаем Sheets: используем предыдущий снапшот (обычно no-op по content_hash)
         snap_prev = (_snapshot_get(db, Snapshot, 'results', app.logger) or {})
         results_payload = snap_prev.get('payload') or {'results': []}
-        _snapshot_set(db, Snapshot, 'results', results_payload, app.logger)
+        stored = _snapshot_store(db, Snapshot, 'results', results_payload, app.logger)
         _metrics_set('last_sync', 'results', datetime.now(timezone.utc).isoformat())
         _metrics_set('last_sync_status', 'results', 'ok')
         _metrics_set('last_sync_duration_ms', 'results', int((time.time()-t0)*1000))
+        if stored == 'unchanged':
+            _metrics_inc('snapshot_unchanged', 1)
+            return
+        _LIVE_TABLE.request_rebuild()
         # Централизованная инвалидация results через SmartInvalidator
         if invalidator:
             invalidator.invalidate_for_change('results_update', {})
@@ -6257,6 +6623,9 @@ def _sync_results():
     finally:
         db.close()
 
+# Подпись туров, о которых уже уведомили клиентов (процесс-локально)
+_BETTING_TOURS_PUBLISHED_SIG = None
+
 def _sync_betting_tours():
     """Синхронизация туров ставок"""
     if SessionLocal is None:
@@ -6266,28 +6635,39 @@ def _sync_betting_tours():
         _metrics_inc('bg_runs_total', 1)
         t0 = time.time()
         tours_payload = _build_betting_tours_payload()
-        _snapshot_set(db, Snapshot, 'betting-tours', tours_payload, app.logger)
+        stored = _snapshot_store(db, Snapshot, 'betting-tours', tours_payload, app.logger)
         _metrics_set('last_sync', 'betting-tours', datetime.now(timezone.utc).isoformat())
         _metrics_set('last_sync_status', 'betting-tours', 'ok')
         _metrics_set('last_sync_duration_ms', 'betting-tours', int((time.time()-t0)*1000))
+        if stored == 'unchanged':
+            _metrics_inc('snapshot_unchanged', 1)
+            return
+        # Окна матчей могли сдвинуться — реестр live перечитает туры
+        _LIVE_REGISTRY.request_reload()
         # Централизованная инвалидация betting_tours через SmartInvalidator
         if invalidator:
             invalidator.invalidate_for_change('betting_tours_update', {})
-        # Почистим локальный ETag кэш и нотифицируем predictions_page об обновлении туров
-        try:
-            _ETAG_HELPER_CACHE.pop('betting:tours', None)
-        except Exception:
-            pass
-        try:
-            inv = globals().get('invalidator')
-            if inv is not None:
-                inv.publish_topic('predictions_page', 'topic_update', {
-                    'entity': 'betting_tours',
-                    'reason': 'tours_sync',
-                    'updated_at': datetime.now(timezone.utc).isoformat()
-                }, priority=1)
-        except Exception:
-            pass
+        # Почистим локальный ETag кэш и нотифицируем predictions_page об обновлении туров.
+        # Периодический sync без изменений туров не рассылаем: каждое уведомление — рефетч у всех клиентов
+        global _BETTING_TOURS_PUBLISHED_SIG
+        tours_sig = _etag_for_payload({'tours': tours_payload.get('tours') or []})
+        if tours_sig != _BETTING_TOURS_PUBLISHED_SIG:
+            try:
+                _ETAG_HELPER_CACHE.pop('betting:tours', None)
+            except Exception:
+                pass
+            try:
+                inv = globals().get('invalidator')
+                if inv is not None:
+                    inv.publish_topic('predictions_page', 'topic_update', {
+                        'entity': 'betting_tours',
+                        'reason': 'tours_sync',
+                        'version': tours_sig,
+                        'updated_at': datetime.now(timezone.utc).isoformat()
+                    }, priority=1)
+                _BETTING_TOURS_PUBLISHED_SIG = tours_sig
+            except Exception:
+                pass
     except Exception as e:
         app.logger.warning(f"Betting tours sync failed: {e}")
         _metrics_set('last_sync_status', 'betting-tours', 'error')
@@ -6488,16 +6868,31 @@ def _bg_sync_once_legacy():
         db.close()
 
 def _bg_sync_loop(interval_sec: int):
+    """Событийный цикл: пересобирает домены, помеченные _SYNC_TRACKER (после паузы coalesce),
+    и раз в SYNC_SWEEP_SEC — все. interval_sec — прежний период полного sync: по нему считаются пропуски."""
+    tracker = _SYNC_TRACKER
+    next_tick = time.time() + interval_sec
     while True:
         try:
-            _bg_sync_once()
+            now = time.time()
+            tick = now >= next_tick
+            if tick:
+                next_tick = now + interval_sec
+            domains = tracker.take_due(now, tick=tick)
+            if domains:
+                _bg_sync_once(domains)
         except Exception as e:
             app.logger.warning(f"BG sync loop error: {e}")
             _metrics_inc('bg_runs_errors', 1)
         try:
-            time.sleep(interval_sec)
+            # Настройки могут быть перечитаны без рестарта (SETTINGS reload)
+            tracker.configure(coalesce_sec=SETTINGS.SYNC_COALESCE_SEC,
+                              max_delay_sec=SETTINGS.SYNC_MAX_DELAY_SEC,
+                              sweep_sec=SETTINGS.SYNC_SWEEP_SEC,
+                              min_interval={'leaderboards': interval_sec})
+            tracker.wait(min(tracker.next_due_in(), max(0.0, next_tick - time.time())))
         except Exception:
-            pass
+            time.sleep(1.0)
 
 def init_admin_api(app):
     """Initialize admin API with proper logging integration."""
@@ -6535,31 +6930,47 @@ except Exception:
 def start_background_sync():
     global _BG_THREAD
     global _LB_PRECOMP_THREAD
+    global _USER_STATS_THREAD
     if _BG_THREAD is not None:
         return
     try:
-        enabled = os.environ.get('ENABLE_SCHEDULER', '1') in ('1','true','True')
+        enabled = SETTINGS.ENABLE_SCHEDULER
         if not enabled or SessionLocal is None:
             return
         if not _should_start_bg():
             return
-        interval = int(os.environ.get('SYNC_INTERVAL_SEC', '600'))
+        interval = SETTINGS.SYNC_INTERVAL_SEC
+        try:
+            _SYNC_TRACKER.install()
+        except Exception as e:
+            # Без подписки на коммиты остаётся только страховочный проход
+            app.logger.warning(f"Sync change tracking unavailable: {e}")
         t = threading.Thread(target=_bg_sync_loop, args=(interval,), daemon=True)
         t.start()
         _BG_THREAD = t
-        app.logger.info(f"Background sync started, interval={interval}s")
+        app.logger.info(f"Background sync started, interval={interval}s, sweep={SETTINGS.SYNC_SWEEP_SEC}s")
         # Leaderboards precompute loop (Redis JSON), отдельный короткий цикл
         try:
             if _LB_PRECOMP_THREAD is None:
-                lb_enabled = os.environ.get('LEADER_PRECOMPUTE_ENABLED', '1') in ('1','true','True')
+                lb_enabled = SETTINGS.LEADER_PRECOMPUTE_ENABLED
                 if lb_enabled and cache_manager:
-                    lb_interval = int(os.environ.get('LEADER_PRECOMPUTE_SEC', '60'))
+                    lb_interval = SETTINGS.LEADER_PRECOMPUTE_SEC
                     lt = threading.Thread(target=_leaderboards_precompute_loop, args=(lb_interval,), daemon=True)
                     lt.start()
                     _LB_PRECOMP_THREAD = lt
                     app.logger.info(f"Leaderboards precompute started, interval={lb_interval}s")
         except Exception as e:
             app.logger.warning(f"Failed to start LB precompute: {e}")
+        # Выравнивание счётчиков дашборда пользователей + снимок дня для истории
+        try:
+            if _USER_STATS_THREAD is None:
+                us_interval = max(30, SETTINGS.USER_STATS_RECONCILE_SEC)
+                ut = threading.Thread(target=_user_stats_reconcile_loop, args=(us_interval,), daemon=True)
+                ut.start()
+                _USER_STATS_THREAD = ut
+                app.logger.info(f"User stats reconcile started, interval={us_interval}s")
+        except Exception as e:
+            app.logger.warning(f"Failed to start user stats reconcile: {e}")
     except Exception as e:
         app.logger.warning(f"Failed to start background sync: {e}")
 
@@ -6771,6 +7182,8 @@ def _build_betting_tours_payload():
                 continue
             filtered_matches.append(m)
         t['matches'] = filtered_matches
+        odds_rows = _odds_rows_for(t['matches'])
+        states = _match_states_for(t['matches']) or {}
         for m in t.get('matches', []):
             try:
                 lock = False
@@ -6805,40 +7218,33 @@ def _build_betting_tours_payload():
                 dt_utc = _convert_local_naive_to_utc(dt_local) if dt_local else None
                 if dt_utc is not None:
                     calc = BettingCalculator()
-                    ok, _msg = calc.check_bet_timing(dt_utc, lock_ahead_minutes=BET_LOCK_AHEAD_MINUTES)
+                    ok, _msg = calc.check_bet_timing(dt_utc, lock_ahead_minutes=SETTINGS.BET_LOCK_AHEAD_MINUTES)
                     lock = (not ok)
                 # Если матч помечен как live/finished админом — обязательно закрываем
-                if SessionLocal is not None:
-                    db = get_db()
+                flags_status = (states.get(_ov_key(m.get('home',''), m.get('away',''))) or {}).get('flags_status')
+                if flags_status in ('live','finished'):
+                    # Учитываем статус только относительно даты/времени именно этого матча,
+                    # чтобы не закрывать будущие реванши из-за прошлого статуса тех же команд.
+                    match_dt = None
                     try:
-                        row = db.query(MatchFlags).filter(MatchFlags.home==m.get('home',''), MatchFlags.away==m.get('away','')).first()
-                        if row and row.status in ('live','finished'):
-                            # Учитываем статус только относительно даты/времени именно этого матча,
-                            # чтобы не закрывать будущие реванши из-за прошлого статуса тех же команд.
-                            match_dt = None
-                            try:
-                                if m.get('datetime'):
-                                    match_dt = datetime.fromisoformat(m['datetime'])
-                                elif m.get('date'):
-                                    dd = datetime.fromisoformat(m['date']).date()
-                                    tm = datetime.strptime((m.get('time') or '00:00') or '00:00', '%H:%M').time()
-                                    match_dt = datetime.combine(dd, tm)
-                            except Exception:
-                                match_dt = None
-                            if match_dt is not None:
-                                # Сравнения в UTC
-                                mt_utc = _convert_local_naive_to_utc(match_dt)
-                                if mt_utc is not None:
-                                    if row.status == 'live':
-                                        if mt_utc - timedelta(minutes=10) <= now_utc < mt_utc + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
-                                            lock = True
-                                    elif row.status == 'finished':
-                                        if now_utc >= mt_utc + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
-                                            lock = True
+                        if m.get('datetime'):
+                            match_dt = datetime.fromisoformat(m['datetime'])
+                        elif m.get('date'):
+                            dd = datetime.fromisoformat(m['date']).date()
+                            tm = datetime.strptime((m.get('time') or '00:00') or '00:00', '%H:%M').time()
+                            match_dt = datetime.combine(dd, tm)
                     except Exception:
-                        pass
-                    finally:
-                        db.close()
+                        match_dt = None
+                    if match_dt is not None:
+                        # Сравнения в UTC
+                        mt_utc = _convert_local_naive_to_utc(match_dt)
+                        if mt_utc is not None:
+                            if flags_status == 'live':
+                                if mt_utc - timedelta(minutes=10) <= now_utc < mt_utc + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
+                                    lock = True
+                            elif flags_status == 'finished':
+                                if now_utc >= mt_utc + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
+                                    lock = True
                 m['lock'] = bool(lock)
                 # date_key для влияния голосования
                 dk = None
@@ -6849,43 +7255,35 @@ def _build_betting_tours_payload():
                         dk = datetime.fromisoformat(m['date']).date().isoformat()
                 except Exception:
                     dk = None
-                m['odds'] = _compute_match_odds(m.get('home',''), m.get('away',''), dk)
-                # Динамические линии тоталов на основе формы и ожидаемого тотала
-                totals = []
-                dyn_lines = _dynamic_total_lines(m.get('home',''), m.get('away','')) or [3.5,4.5,5.5]
-                for ln in dyn_lines:
-                    totals.append({'line': ln, 'odds': _compute_totals_odds(m.get('home',''), m.get('away',''), ln)})
-                sp_pen = _compute_specials_odds(m.get('home',''), m.get('away',''), 'penalty')
-                sp_red = _compute_specials_odds(m.get('home',''), m.get('away',''), 'redcard')
-                m['markets'] = {
-                    'totals': totals,
-                    'specials': {
-                        'penalty': { 'available': True, 'odds': sp_pen },
-                        'redcard': { 'available': True, 'odds': sp_red }
-                    }
-                }
-                # Версия коэффициентов на матч для сверки на клиенте
-                m['odds_version'] = _get_odds_version(m.get('home',''), m.get('away',''))
+                # Опубликованные коэффициенты (общие для воркеров): пересчёт только для устаревших строк
+                key = _ov_key(m.get('home',''), m.get('away',''))
+                ver, fields = _odds_published(key[0], key[1], dk,
+                                              row=(odds_rows.get(key) if odds_rows is not None else _ODDS_ROW_UNSET))
+                m['odds'] = fields.get('odds') or _compute_match_odds(key[0], key[1], dk)
+                m['markets'] = fields.get('markets') or {}
+                # Версия коэффициентов на матч для сверки на клиенте (и при ставке)
+                m['odds_version'] = ver
             except Exception:
                 m['lock'] = True
     return { 'tours': tours, 'updated_at': datetime.now(timezone.utc).isoformat() }
 
-def _build_odds_fields(home: str, away: str) -> dict:
+def _build_odds_fields(home: str, away: str, date_key: str|None = None) -> dict:
     """Формирует компактный snapshot коэффициентов/рынков для одного матча.
-    Используется для отправки частичных обновлений через WebSocket (entity='odds').
+    Используется для публикации (odds_snapshots) и частичных обновлений через WebSocket (entity='odds').
 
-    ВАЖНО: учитывает влияние голосований, пытаясь определить date_key матча
-    через _get_match_datetime (если доступно).
+    ВАЖНО: учитывает влияние голосований; если date_key не передан, пытается определить
+    дату матча через _get_match_datetime (если доступно).
     """
     try:
         # Пытаемся определить дату матча, чтобы учесть голосования при расчёте odds
-        dk = None
-        try:
-            dt = _get_match_datetime(home, away)
-            if dt:
-                dk = dt.date().isoformat()
-        except Exception:
-            dk = None
+        dk = date_key or None
+        if dk is None:
+            try:
+                dt = _get_match_datetime(home, away)
+                if dt:
+                    dk = dt.date().isoformat()
+            except Exception:
+                dk = None
         odds_main = _compute_match_odds(home, away, dk)
         totals = []
         dyn_lines = _dynamic_total_lines(home, away) or [3.5,4.5,5.5]
@@ -7013,6 +7411,7 @@ def api_match_status_set():
             _snapshot_set(db, Snapshot, 'betting-tours', payload, app.logger)
         except Exception as e:
             app.logger.warning(f"Failed to build betting tours payload: {e}")
+        _LIVE_REGISTRY.request_reload()
         if status == 'finished':
             try:
                 # Инициализация fallback'ов (реальные функции могут быть ниже по файлу)
@@ -7055,9 +7454,10 @@ def api_match_status_set():
                         _get_match_result,
                         _get_match_total_goals,
                         _get_special_result,
-                        BET_MATCH_DURATION_MINUTES,
+                        SETTINGS.BET_MATCH_DURATION_MINUTES,
                         datetime.now(timezone.utc),
-                        app.logger
+                        app.logger,
+                        on_won=_ach_progress_on_bet_won
                     ),
                     build_schedule_payload=_build_schedule_payload_from_sheet,
                     build_league_payload=_build_league_payload_from_db,
@@ -7069,6 +7469,8 @@ def api_match_status_set():
                     app.logger.error(f"Failed to finalize match via status/set: {e}")
                 except Exception:
                     pass
+            # Форма команд изменилась — их коэффициенты пересчитаются при следующем чтении
+            _odds_mark_stale(home, away)
         # Логирование успешной смены статуса
         try:
             admin_id_int = int(admin_id)
@@ -7248,6 +7650,7 @@ def api_admin_teams_create():
         
         db.add(team)
         db.commit()
+        _invalidate_team_ids()
         db.refresh(team)
         
         # Логируем действие
@@ -7354,6 +7757,7 @@ def api_admin_teams_update(team_id):
             team.city = (data['city'] or '').strip()
         
         db.commit()
+        _invalidate_team_ids()
         
         # Логируем действие
         try:
@@ -7411,6 +7815,7 @@ def api_admin_teams_delete(team_id):
         # Soft delete - помечаем как неактивную
         team.is_active = False
         db.commit()
+        _invalidate_team_ids()
         
         # Логируем действие
         try:
@@ -8420,22 +8825,13 @@ def api_match_status_get():
     # Определяем локальное смещение расписания (минуты).
     # Если переменные окружения не заданы, используем безопасный дефолт +180 (МСК),
     # чтобы избежать системных UTC-серверов без смещения.
-    try:
-        tz_m = int(os.environ.get('SCHEDULE_TZ_SHIFT_MIN') or '0')
-    except Exception:
-        tz_m = 0
+    tz_m = SETTINGS.SCHEDULE_TZ_SHIFT_MIN
     if tz_m == 0:
-        try:
-            tz_hh = int(os.environ.get('SCHEDULE_TZ_SHIFT_HOURS') or '0')
-        except Exception:
-            tz_hh = 0
+        tz_hh = SETTINGS.SCHEDULE_TZ_SHIFT_HOURS
         tz_m = tz_hh * 60
     if tz_m == 0:
         # Дополнительные fallback-переменные, если основные не заданы
-        try:
-            tz_m = int(os.environ.get('DEFAULT_TZ_MINUTES') or os.environ.get('DEFAULT_TZ_MIN') or '180')
-        except Exception:
-            tz_m = 180
+        tz_m = SETTINGS.DEFAULT_TZ_MINUTES
     now = datetime.now() + timedelta(minutes=tz_m)
 
     # Локальный хелпер, чтобы навесить no-store заголовки на ответы статуса
@@ -8447,61 +8843,48 @@ def api_match_status_get():
         except Exception:
             pass
         return resp
+    # Явный статус из основной таблицы matches — не более одного запроса за вызов
+    _explicit = {}
+    def _explicit_status():
+        if 'st' not in _explicit:
+            st = None
+            if SessionLocal is not None:
+                try:
+                    db = get_db()
+                    try:
+                        st = (_load_match_states(db, [(home, away)]).get((home, away)) or {}).get('status')
+                    finally:
+                        db.close()
+                except Exception:
+                    st = None
+            _explicit['st'] = st
+        return _explicit['st']
     if not dt:
         # Fallback на явный статус из основной таблицы matches, если нет расписания
-        if SessionLocal is not None:
-            try:
-                db = get_db()
-                try:
-                    from utils.match_status import get_match_status_by_names
-                    st = get_match_status_by_names(db, home, away)
-                    if st in ('live','finished'):
-                        return _nostore({'status': st, 'soon': False, 'live_started_at': '' if st!='live' else (datetime.now(timezone.utc)).isoformat()})
-                finally:
-                    db.close()
-            except Exception:
-                pass
+        st = _explicit_status()
+        if st in ('live','finished'):
+            return _nostore({'status': st, 'soon': False, 'live_started_at': '' if st!='live' else (datetime.now(timezone.utc)).isoformat()})
         return _nostore({'status':'scheduled', 'soon': False, 'live_started_at': ''})
     # Приоритет явного статуса 'finished' из matches, если он установлен для найденной пары
-    if SessionLocal is not None:
-        try:
-            db = get_db()
-            try:
-                from utils.match_status import get_match_status_by_names
-                st = get_match_status_by_names(db, home, away)
-                if st == 'finished':
-                    return _nostore({'status':'finished', 'soon': False, 'live_started_at': ''})
-            finally:
-                db.close()
-        except Exception:
-            pass
+    if _explicit_status() == 'finished':
+        return _nostore({'status':'finished', 'soon': False, 'live_started_at': ''})
     status = None
     soon = False
     live_started_at = ''
     if (dt - timedelta(minutes=10)) <= now < dt:
         status = 'scheduled'
         soon = True
-    elif dt <= now < dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
+    elif dt <= now < dt + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
         status = 'live'
         live_started_at = dt.isoformat()
-    elif now >= dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
+    elif now >= dt + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
         status = 'finished'
         live_started_at = dt.isoformat()
     if status is not None:
         return _nostore({'status': status, 'soon': bool(soon), 'live_started_at': live_started_at})
     # Если dt есть, но мы не попали в окна — проверим явный статус live в matches для этой пары
-    if SessionLocal is not None:
-        try:
-            db = get_db()
-            try:
-                from utils.match_status import get_match_status_by_names
-                st = get_match_status_by_names(db, home, away)
-                if st == 'live':
-                    return _nostore({'status':'live', 'soon': False, 'live_started_at': dt.isoformat()})
-            finally:
-                db.close()
-        except Exception:
-            pass
+    if _explicit_status() == 'live':
+        return _nostore({'status':'live', 'soon': False, 'live_started_at': dt.isoformat()})
     return _nostore({'status':'scheduled', 'soon': False, 'live_started_at': ''})
 
 @app.route('/api/match/status/set-live', methods=['POST'])
@@ -8552,6 +8935,9 @@ def api_match_status_set_live():
                 ok, err = set_match_status_by_names(db, home, away, 'live', mirror_to_flags=True)
                 if not ok and err:
                     app.logger.warning(f"set-live: failed to set matches.status: {err}")
+                if ok:
+                    # Сразу в реестр live: клиенты получат match_status_change без ожидания опроса
+                    _LIVE_REGISTRY.set_manual(home, away, 'live')
             except Exception as _e:
                 try: app.logger.warning(f"set-live: helper error: {_e}")
                 except Exception: pass
@@ -8565,62 +8951,26 @@ def api_match_status_set_live():
 @app.route('/api/match/status/live', methods=['GET'])
 @rate_limit(max_requests=int(os.environ.get('RL_MATCH_STATUS_LIVE_RPM', '12')), time_window=60, per='ip')
 def api_match_status_live():
-    """Список live-матчей по расписанию (без ручных флагов)."""
-    items = []
-    # Используем то же локальное смещение, что и в /api/match/status/get
-    try:
-        tz_m = int(os.environ.get('SCHEDULE_TZ_SHIFT_MIN') or '0')
-    except Exception:
-        tz_m = 0
-    if tz_m == 0:
-        try:
-            tz_hh = int(os.environ.get('SCHEDULE_TZ_SHIFT_HOURS') or '0')
-        except Exception:
-            tz_hh = 0
-        tz_m = tz_hh * 60
-    if tz_m == 0:
-        try:
-            tz_m = int(os.environ.get('DEFAULT_TZ_MINUTES') or os.environ.get('DEFAULT_TZ_MIN') or '180')
-        except Exception:
-            tz_m = 180
-    now = datetime.now() + timedelta(minutes=tz_m)
-    if SessionLocal is not None:
-        db = get_db()
-        try:
-            snap = _snapshot_get(db, Snapshot, 'betting-tours', app.logger)
-            payload = snap and snap.get('payload')
-            tours = payload and payload.get('tours') or []
-            for t in tours:
-                for m in (t.get('matches') or []):
-                    dt_str = m.get('datetime')
-                    if not dt_str:
-                        continue
-                    try:
-                        dtm = datetime.fromisoformat(dt_str)
-                    except Exception:
-                        continue
-                    if dtm <= now < dtm + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
-                        items.append({ 'home': m.get('home',''), 'away': m.get('away',''), 'live_started_at': dtm.isoformat() })
-            # Дополнительно включаем матчи, помеченные как live в основной таблице matches
-            try:
-                from utils.match_status import list_live_matches
-                seen = {(it.get('home',''), it.get('away','')) for it in items}
-                for h, a, live_iso in list_live_matches(db):
-                    key = (h or '', a or '')
-                    if key not in seen:
-                        items.append({'home': key[0], 'away': key[1], 'live_started_at': live_iso or (datetime.now(timezone.utc)).isoformat()})
-                        seen.add(key)
-            except Exception:
-                pass
-        finally:
-            db.close()
-    # Для обратной совместимости клиент может ожидать поле live_matches
-    resp = _json_response({'items': items, 'live_matches': items, 'updated_at': datetime.now(timezone.utc).isoformat()})
+    """Список live-матчей по расписанию и ручному live (matches.status) из _LIVE_REGISTRY:
+    O(live) без чтения снапшота; окна матчей переключает таймер реестра, переходы уходят в WS
+    (match_status_change). soon — матчи, начинающиеся в ближайшие LIVE_SOON_MIN минут."""
     try:
-        resp.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate'
-        resp.headers['Pragma'] = 'no-cache'
-    except Exception:
-        pass
+        _live_registry_ensure()
+    except Exception as e:
+        app.logger.warning(f"live registry load failed: {e}")
+    snap = _LIVE_REGISTRY.read()
+    etag = snap['etag']
+    if etag and request.headers.get('If-None-Match') == etag:
+        resp = flask.make_response('', 304)
+    else:
+        items = snap['live']
+        # Для обратной совместимости клиент может ожидать поле live_matches
+        resp = _json_response({'items': items, 'live_matches': items, 'soon': snap['soon'],
+                               'updated_at': snap['updated_at'] or datetime.now(timezone.utc).isoformat()})
+    if etag:
+        resp.headers['ETag'] = etag
+    # Кэшировать можно, но только с ревалидацией: статус меняется по таймеру/админу
+    resp.headers['Cache-Control'] = 'no-cache'
     return resp
 
 @app.route('/api/leaderboard/top-predictors')
@@ -9120,9 +9470,9 @@ def index():
         websockets_enabled=ws_enabled,
         ws_topic_subs=ws_topic_subs,
         ws_topic_scheme=str(app.config.get('WS_TOPIC_SCHEME','no_date')),
-        bet_min=app.config.get('BET_MIN_STAKE', 10),
-        bet_max=app.config.get('BET_MAX_STAKE', 5000),
-        bet_daily=app.config.get('BET_DAILY_MAX_STAKE', 50000),
+        bet_min=SETTINGS.BET_MIN_STAKE,
+        bet_max=SETTINGS.BET_MAX_STAKE,
+        bet_daily=SETTINGS.BET_DAILY_MAX_STAKE,
     )
 
 @app.route('/api/user', methods=['POST'])
@@ -9142,75 +9492,87 @@ def get_user():
             user_data = parsed['user']
         if SessionLocal is None:
             return jsonify({'error': 'БД недоступна'}), 500
-        db: Session = get_db()
-        try:
-            db_user = db.get(User, int(user_data['id']))
-            now = datetime.now(timezone.utc)
-            if not db_user:
-                db_user = User(user_id=int(user_data['id']), display_name=user_data.get('first_name') or 'User', tg_username=user_data.get('username') or '', credits=1000, xp=0, level=1, consecutive_days=0, last_checkin_date=None, badge_tier=0, created_at=now, updated_at=now)
-                db.add(db_user)
-                try:
-                    raw = parsed.get('raw') or {}
-                    start_param = raw.get('start_param',[None])[0] if isinstance(raw.get('start_param'), list) else None
-                except Exception:
-                    start_param = None
-                try:
-                    code = _generate_ref_code(int(user_data['id']))
-                    referrer_id=None
-                    if start_param and start_param!=code:
-                        existing = db.query(Referral).filter(Referral.referral_code==start_param).first()
-                        if existing and existing.user_id!=int(user_data['id']):
-                            referrer_id=existing.user_id
-                    db.add(Referral(user_id=int(user_data['id']), referral_code=code, referrer_id=referrer_id))
-                except Exception as re:
-                    app.logger.warning(f"Create referral row failed: {re}")
-            else:
-                db_user.updated_at = now
-            db.commit(); db.refresh(db_user)
-        finally:
-            db.close()
-        # mirror photo (берём photo_url из g.auth_data, а при отсутствии — из parsed)
+        uid = int(user_data['id'])
+        # photo_url из валидированных данных (@require_telegram_auth кладёт их в g.auth_data), иначе из parsed
+        photo_url = None
         try:
+            if hasattr(flask.g, 'auth_data') and isinstance(getattr(flask.g, 'auth_data', None), dict):
+                photo_url = (flask.g.auth_data.get('user') or {}).get('photo_url') or None
+        except Exception:
             photo_url = None
+        if not photo_url:
             try:
-                # При использовании @require_telegram_auth() валидированные данные лежат в g.auth_data
-                if hasattr(flask.g, 'auth_data') and isinstance(getattr(flask.g, 'auth_data', None), dict):
-                    photo_url = (flask.g.auth_data.get('user') or {}).get('photo_url') or None
+                photo_url = (parsed.get('user') or {}).get('photo_url') if isinstance(parsed, dict) else None
             except Exception:
                 photo_url = None
-            if not photo_url:
-                try:
-                    photo_url = (parsed.get('user') or {}).get('photo_url') if isinstance(parsed, dict) else None
-                except Exception:
-                    photo_url = None
 
-            if photo_url and SessionLocal is not None:
-                dbp = get_db()
-                try:
-                    r = dbp.get(UserPhoto, int(user_data['id']))
-                    nnow = datetime.now(timezone.utc)
-                    if r:
-                        if r.photo_url != photo_url:
-                            r.photo_url = photo_url
-                            r.updated_at = nnow
-                            dbp.commit()
-                    else:
-                        dbp.add(UserPhoto(user_id=int(user_data['id']), photo_url=photo_url, updated_at=nnow))
-                        dbp.commit()
-                finally:
-                    dbp.close()
-        except Exception as pe:
-            app.logger.warning(f"Mirror user photo failed: {pe}")
-        fav=''
-        if SessionLocal is not None:
-            dbf=get_db();
-            try:
-                pref=dbf.get(UserPref, int(user_data['id'])); fav=(pref.favorite_team or '') if pref else ''
-            finally:
-                dbf.close()
-        u=serialize_user(db_user); u['favorite_team']=fav
-        resp = _json_response(u)
+        dto = None
+        try:
+            dto = cache_manager.get('user_profile', str(uid)) if cache_manager else None
+        except Exception:
+            dto = None
+        if dto is not None and photo_url and dto.get('photo_url') != photo_url:
+            dto = None  # фото в Telegram сменилось — зеркалируем ниже
+        now = datetime.now(timezone.utc)
+        # Одна сессия на всё: last-seen, создание пользователя, зеркало фото, чтение частей профиля
+        db: Session = get_db()
+        try:
+            # last-seen (онлайн в админке) — bulk UPDATE не чаще раза в минуту и не сбрасывает кэш профиля
+            touched = (db.query(User)
+                         .filter(User.user_id == uid, or_(User.updated_at.is_(None), User.updated_at < now - timedelta(seconds=60)))
+                         .update({User.updated_at: now}, synchronize_session=False))
+            if dto is None:
+                parts = _user_profile.load_profile_parts(db, uid, User, UserPhoto, UserPref, UserLimits, Referral)
+                if parts is None:
+                    db_user = User(user_id=uid, display_name=user_data.get('first_name') or 'User', tg_username=user_data.get('username') or '', credits=1000, xp=0, level=1, consecutive_days=0, last_checkin_date=None, badge_tier=0, created_at=now, updated_at=now)
+                    db.add(db_user)
+                    _user_stats_record(db, uid, new_users=1)
+                    referral = None
+                    try:
+                        raw = parsed.get('raw') or {}
+                        start_param = raw.get('start_param',[None])[0] if isinstance(raw.get('start_param'), list) else None
+                    except Exception:
+                        start_param = None
+                    try:
+                        code = _generate_ref_code(uid)
+                        referrer_id=None
+                        if start_param and start_param!=code:
+                            existing = db.query(Referral).filter(Referral.referral_code==start_param).first()
+                            if existing and existing.user_id!=uid:
+                                referrer_id=existing.user_id
+                        referral = Referral(user_id=uid, referral_code=code, referrer_id=referrer_id)
+                        db.add(referral)
+                    except Exception as re:
+                        app.logger.warning(f"Create referral row failed: {re}")
+                    parts = (db_user, None, None, None, referral)
+                db_user, photo, pref, limits, referral = parts
+                # mirror photo
+                if photo_url and (photo is None or photo.photo_url != photo_url):
+                    if photo is None:
+                        photo = UserPhoto(user_id=uid)
+                        db.add(photo)
+                    photo.photo_url = photo_url
+                    photo.updated_at = now
+                # DTO — до commit: после него объекты истекли бы и перечитывались отдельными SELECT
+                db.flush()
+                dto = _user_profile.compose_profile(serialize_user(db_user), photo, pref, limits, referral)
+                db.commit()
+                if cache_manager:
+                    cache_manager.set('user_profile', dto, str(uid))
+            elif touched:
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        etag = _user_profile.profile_etag(dto)
+        if request.headers.get('If-None-Match') == etag:
+            resp = flask.make_response('', 304)
+        else:
+            resp = _json_response(dto)
         try:
+            resp.headers['ETag'] = etag
             # Профиль персональный — запрещаем кэширование прокси/браузером
             resp.headers['Cache-Control'] = 'no-store, private, max-age=0'
             # Для прозрачности вариаций по init-data (если когда-либо будет GET)
@@ -9239,11 +9601,12 @@ def api_user_avatars():
         return _json_response({'avatars': {}})
     db: Session = get_db()
     try:
-        rows = db.query(UserPhoto).filter(UserPhoto.user_id.in_(ids)).all()
+        # Общий сервис профилей: LRU -> MGET в Redis -> один IN-запрос только для промахов
+        profiles = _public_profiles.get_public_profiles(db, ids[:200], User, UserPhoto, cache=cache_manager)
         out = {}
-        for r in rows:
-            if r.photo_url:
-                out[str(int(r.user_id))] = { 'avatar_url': r.photo_url }
+        for uid, p in profiles.items():
+            if p.get('photo_url'):
+                out[str(uid)] = { 'avatar_url': p['photo_url'] }
         resp = _json_response({'avatars': out})
         resp.headers['Cache-Control'] = 'public, max-age=3600'
         return resp
@@ -9431,6 +9794,7 @@ def update_name():
             db.refresh(db_user)
         finally:
             db.close()
+        _public_profile_drop(user_id)
 
         # Ранее зеркалировались изменения имени в Google Sheets (удалено)
 
@@ -9454,7 +9818,10 @@ def daily_checkin():
 
         if SessionLocal is None:
             return jsonify({'error': 'БД недоступна'}), 500
-        else:
+        today = datetime.now(timezone.utc).date()
+
+        # Если только статус (GET) — отдать через helper
+        if request.method == 'GET':
             db: Session = get_db()
             try:
                 db_user = db.get(User, int(user_id))
@@ -9463,16 +9830,10 @@ def daily_checkin():
                 user = serialize_user(db_user)
             finally:
                 db.close()
-
-        # Проверка даты чекина
-        today = datetime.now(timezone.utc).date()
-        try:
-            last_checkin = datetime.fromisoformat(user['last_checkin_date']).date() if user['last_checkin_date'] else None
-        except Exception:
-            last_checkin = None
-
-        # Если только статус (GET) — отдать через helper
-        if request.method == 'GET':
+            try:
+                last_checkin = datetime.fromisoformat(user['last_checkin_date']).date() if user['last_checkin_date'] else None
+            except Exception:
+                last_checkin = None
             def build_status():
                 return {
                     'status': 'already_checked' if last_checkin == today else 'available',
@@ -9485,65 +9846,46 @@ def daily_checkin():
                 }
             return etag_json(f"checkin:{user_id}", build_status, cache_ttl=30, max_age=30, swr=30)
 
-        if last_checkin == today:
-            # Повторный POST в тот же день — отдаём статус, не меняем данные
-            return jsonify({'status':'already_checked','message':'Уже получено сегодня'}), 200
-
-        # Расчет дня цикла
-        cycle_day = (user['consecutive_days'] % 7) + 1
-        if last_checkin and (today - last_checkin).days > 1:
-            # Пропуск дня - сброс цикла
-            cycle_day = 1
-            new_consecutive = 1
-        else:
-            new_consecutive = user['consecutive_days'] + 1
-
-        # Начисление наград
-        xp_reward = 10 * cycle_day
-        credits_reward = 50 * cycle_day
-
-        # Обновление данных
-        new_xp = int(user['xp']) + xp_reward
-        new_credits = int(user['credits']) + credits_reward
-
-        # Расчет уровня (прогресс внутри текущего уровня)
-        new_level = int(user['level'])
-        while new_xp >= new_level * 100:
-            new_xp -= new_level * 100
-            new_level += 1
-
-        if SessionLocal is None:
-            return jsonify({'error': 'БД недоступна'}), 500
-        else:
-            # Обновляем в БД
-            db: Session = get_db()
-            try:
-                db_user = db.get(User, int(user_id))
-                if not db_user:
+        # POST: один условный UPDATE (серия/награда/уровень в SQL) + счётчики достижений в той же транзакции
+        db: Session = get_db()
+        try:
+            result = _checkin.apply_checkin(db, User, int(user_id), today)
+            if result is None:
+                exists = db.query(User.user_id).filter(User.user_id == int(user_id)).first()
+                db.rollback()
+                if not exists:
                     return jsonify({'error': 'Пользователь не найден'}), 404
-                # Защитный guard: запрещаем регресс уровня/XP из-за любых рассинхронов
-                prev_level = int(db_user.level or 1)
-                prev_xp = int(db_user.xp or 0)
-                if new_level < prev_level:
-                    app.logger.warning(f"Monotonic guard: attempted level decrease for user {user_id}: {prev_level}->{new_level}; keeping {prev_level}")
-                    new_level = prev_level
-                    # при сохранённом уровне — не снижать XP в полосе
-                    new_xp = max(new_xp, prev_xp)
-                elif new_level == prev_level and new_xp < prev_xp:
-                    app.logger.warning(f"Monotonic guard: attempted xp decrease for user {user_id} at level {prev_level}: {prev_xp}->{new_xp}; keeping {prev_xp}")
-                    new_xp = prev_xp
-
-                db_user.last_checkin_date = today
-                db_user.consecutive_days = new_consecutive
-                db_user.xp = new_xp
-                db_user.credits = new_credits
-                db_user.level = new_level
-                db_user.updated_at = datetime.now(timezone.utc)
-                db.commit()
-                db.refresh(db_user)
-            finally:
-                db.close()
-            # Ранее зеркалировались изменения прогресса в Google Sheets (удалено)
+                # Повторный POST в тот же день (в т.ч. параллельный) — отдаём статус, не меняем данные
+                return jsonify({'status':'already_checked','message':'Уже получено сегодня'}), 200
+            # Счётчики достижений: чек-ин и (при переходе уровня) засчитанный приглашённый у реферера.
+            # SAVEPOINT: сбой прогресса не откатывает сам чек-ин
+            first_checkin = False
+            try:
+                with db.begin_nested():
+                    bumped = _ach_engine.on_checkin(db, UserAchievementProgress, user_id)
+                    _ach_engine.on_level_changed(db, UserAchievementProgress, Referral, user_id, result['prev_level'], result['level'])
+                    # Первый чек-ин пользователя: серия с 1 и счётчик прогресса стал 1 (без строки прогресса — выровняет reconcile)
+                    if bumped and result['consecutive_days'] == 1:
+                        first_checkin = (db.query(UserAchievementProgress.checkins_total)
+                                           .filter(UserAchievementProgress.user_id == int(user_id)).scalar() == 1)
+            except Exception as e:
+                app.logger.warning(f"achievements progress (checkin) failed: {e}")
+            _user_stats_record(db, user_id, checkins=1, first_checkins=int(first_checkin))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        _ach_cache_drop(user_id)
+        # UPDATE без ORM-объекта — кэш профиля сбрасываем явно
+        _user_profile_drop(user_id)
+        cycle_day = result['cycle_day']
+        xp_reward = result['xp_reward']
+        credits_reward = result['credits_reward']
+        new_consecutive = result['consecutive_days']
+        new_level = result['level']
+        # Ранее зеркалировались изменения прогресса в Google Sheets (удалено)
 
         # Инвалидируем кэш статуса чек-ина в helper
         _ETAG_HELPER_CACHE.pop(f"checkin:{user_id}", None)
@@ -9599,10 +9941,7 @@ def get_achievements():
         client_etag = request.headers.get('If-None-Match')
         ce = ACHIEVEMENTS_CACHE.get(cache_key)
         # Общий TTL для payload достижений (персональных): по умолчанию 300с, настраивается ACH_CACHE_TTL
-        try:
-            _ach_ttl = int(os.environ.get('ACH_CACHE_TTL', '300'))
-        except Exception:
-            _ach_ttl = 300
+        _ach_ttl = SETTINGS.ACH_CACHE_TTL
         if ce and (now_ts - ce.get('ts',0) < _ach_ttl):
             # Быстрый ответ из кэша / условный 304
             if client_etag and client_etag == ce.get('etag'):
@@ -9615,23 +9954,13 @@ def get_achievements():
             resp.headers['Cache-Control'] = 'private, max-age=60, stale-while-revalidate=300'
             return resp
 
-        # User fetch (DB only)
+        # Одна строка на пользователя: User + UserAchievement + счётчики прогресса (services/achievements.py)
         if SessionLocal is None:
             return jsonify({'error': 'БД недоступна'}), 500
-        else:
-            db = get_db();
-            try:
-                db_user, db = _db_retry_read(db, lambda s: s.get(User, int(user_id)), attempts=2, backoff_base=0.1, label='ach:user')
-                if not db_user:
-                    return jsonify({'error': 'Пользователь не найден'}), 404
-                user = serialize_user(db_user)
-            finally:
-                db.close()
 
         # Targets & thresholds
-        groups = ['streak','credits','level','invited','betcount','betwins','bigodds','markets','weeks']
         streak_targets = ACHIEVEMENT_TARGETS['streak']; credits_targets = ACHIEVEMENT_TARGETS['credits']; level_targets = ACHIEVEMENT_TARGETS['level']; invited_targets = ACHIEVEMENT_TARGETS['invited']; betcount_targets = ACHIEVEMENT_TARGETS['betcount']; betwins_targets = ACHIEVEMENT_TARGETS['betwins']; bigodds_targets = ACHIEVEMENT_TARGETS['bigodds']; markets_targets = ACHIEVEMENT_TARGETS['markets']; weeks_targets = ACHIEVEMENT_TARGETS['weeks']
-        streak_thresholds = _thresholds_from_targets(streak_targets); credits_thresholds=_thresholds_from_targets(credits_targets); level_thresholds=_thresholds_from_targets(level_targets); invited_thresholds=_thresholds_from_targets(invited_targets); betcount_thresholds=_thresholds_from_targets(betcount_targets); betwins_thresholds=_thresholds_from_targets(betwins_targets); bigodds_thresholds=_thresholds_from_targets(bigodds_targets); markets_thresholds=_thresholds_from_targets(markets_targets); weeks_thresholds=_thresholds_from_targets(weeks_targets)
+        thresholds = {grp: _thresholds_from_targets(targets) for grp, targets in ACHIEVEMENT_TARGETS.items()}
 
         def _next_target_by_value(value, targets_list):
             for t in targets_list:
@@ -9639,210 +9968,65 @@ def get_achievements():
                     return t
             return None
 
-        streak_tier = compute_tier(user['consecutive_days'], streak_thresholds)
-        credits_tier = compute_tier(user['credits'], credits_thresholds)
-        level_tier = compute_tier(user['level'], level_thresholds)
-        invited_count = 0
-        if SessionLocal is not None:
-            db = get_db();
-            try:
-                invited_count, db = _db_retry_read(
-                    db,
-                    lambda s: (s.query(func.count(Referral.user_id))
-                                 .join(User, User.user_id==Referral.user_id)
-                                 .filter(Referral.referrer_id==int(user_id),(User.level>=2))
-                                 .scalar() or 0),
-                    attempts=2, backoff_base=0.1, label='ach:invited'
-                )
-            finally:
-                db.close()
-        invited_tier = compute_tier(invited_count, invited_thresholds)
-
-        # Кэш статистики ставок отдельно (чтобы не пересчитывать при частых запросах достижений)
-        global _ACH_BET_STATS_CACHE
-        if '_ACH_BET_STATS_CACHE' not in globals():
-            _ACH_BET_STATS_CACHE = {}
-        bet_cache_key = f"bst:{user_id}"  # bet stats
-        bet_stats_entry = _ACH_BET_STATS_CACHE.get(bet_cache_key)
-        bet_stats = None
-        # Кэшируем расчёт ставок дольше, чтобы избежать частых тяжёлых запросов
-        _ach_bet_ttl = 300
-        try:
-            _ach_bet_ttl = int(os.environ.get('ACH_BET_STATS_TTL', '300'))
-        except Exception:
-            _ach_bet_ttl = 300
-        if bet_stats_entry and (now_ts - bet_stats_entry['ts'] < _ach_bet_ttl):  # 5 минут по умолчанию
-            bet_stats = bet_stats_entry['data']
-        else:
-            bet_stats = {'total':0,'won':0,'max_win_odds':0.0,'markets_used':set(),'weeks_active':set()}
-            if SessionLocal is not None:
-                db = get_db();
-                try:
-                    rows, db = _db_retry_read(
-                        db,
-                        lambda s: s.query(Bet.id, Bet.status, Bet.odds, Bet.market, Bet.placed_at, Bet.user_id)
-                                   .filter(Bet.user_id==int(user_id)).all(),
-                        attempts=2, backoff_base=0.1, label='ach:bets'
-                    )
-                    for b in rows:
-                        bet_stats['total'] += 1
-                        try:
-                            if (b.status or '').lower()=='won':
-                                bet_stats['won'] += 1
-                                k=float((b.odds or '0').replace(',', '.'))
-                                if k>bet_stats['max_win_odds']: bet_stats['max_win_odds']=k
-                        except Exception: pass
-                        mk=(b.market or '1x2').lower();
-                        if mk in ('penalty','redcard'): mk='specials'
-                        bet_stats['markets_used'].add(mk)
-                        if b.placed_at:
-                            try:
-                                start=_week_period_start_msk_to_utc(b.placed_at.astimezone(timezone.utc))
-                                bet_stats['weeks_active'].add(start.date().isoformat())
-                            except Exception: pass
-                finally:
-                    db.close()
-            # Сохраняем в кэш (копии изменяемых set -> list для сериализации безопасности)
-            _ACH_BET_STATS_CACHE[bet_cache_key] = {
-                'ts': now_ts,
-                'data': {
-                    'total': bet_stats['total'],
-                    'won': bet_stats['won'],
-                    'max_win_odds': bet_stats['max_win_odds'],
-                    'markets_used': set(bet_stats['markets_used']),
-                    'weeks_active': set(bet_stats['weeks_active'])
-                }
-            }
-
-        # Приводим обратно к set если восстановлено из кэша
-        if not isinstance(bet_stats['markets_used'], set):
-            bet_stats['markets_used'] = set(bet_stats['markets_used'])
-        if not isinstance(bet_stats['weeks_active'], set):
-            bet_stats['weeks_active'] = set(bet_stats['weeks_active'])
-        betcount_tier=compute_tier(bet_stats['total'], betcount_thresholds); betwins_tier=compute_tier(bet_stats['won'], betwins_thresholds); bigodds_tier=compute_tier(bet_stats['max_win_odds'], bigodds_thresholds); markets_tier=compute_tier(len(bet_stats['markets_used']), markets_thresholds); weeks_tier=compute_tier(len(bet_stats['weeks_active']), weeks_thresholds)
-
-        # Чтение/апсерт перманентных достижений из БД
-        best_streak_tier = best_credits_tier = best_level_tier = 0
-        best_invited_tier = best_betcount_tier = best_betwins_tier = 0
-        best_bigodds_tier = best_markets_tier = best_weeks_tier = 0
-        if SessionLocal is not None:
-            db = get_db()
-            try:
+        db = get_db()
+        try:
+            row, db = _db_retry_read(
+                db,
+                lambda s: (s.query(User, UserAchievement, UserAchievementProgress)
+                             .outerjoin(UserAchievement, UserAchievement.user_id == User.user_id)
+                             .outerjoin(UserAchievementProgress, UserAchievementProgress.user_id == User.user_id)
+                             .filter(User.user_id == int(user_id))
+                             .first()),
+                attempts=2, backoff_base=0.1, label='ach:row'
+            )
+            if not row:
+                return jsonify({'error': 'Пользователь не найден'}), 404
+            db_user, ach_row, progress = row
+            if progress is None:
+                # Первое обращение после внедрения счётчиков — однократный бэкфилл из истории
+                progress = _ach_engine.backfill_progress(db, UserAchievementProgress, Bet, Referral, User, user_id,
+                                                         _week_period_start_msk_to_utc, app.logger)
+                db_user = db.get(User, int(user_id))
                 ach_row = db.get(UserAchievement, int(user_id))
-                now_dt = datetime.now(timezone.utc)
-                if not ach_row:
-                    ach_row = UserAchievement(user_id=int(user_id))
-                    db.add(ach_row)
-                    db.flush()
-                # Рассчитываем текущие tier'ы
-                cur = {
-                    'streak': int(streak_tier or 0),
-                    'credits': int(credits_tier or 0),
-                    'level': int(level_tier or 0),
-                    'invited': int(invited_tier or 0),
-                    'betcount': int(betcount_tier or 0),
-                    'betwins': int(betwins_tier or 0),
-                    'bigodds': int(bigodds_tier or 0),
-                    'markets': int(markets_tier or 0),
-                    'weeks': int(weeks_tier or 0),
-                }
-                # Сопоставление полей модели
-                mapping = [
-                    ('streak', 'best_streak_tier', 'streak_unlocked_at'),
-                    ('credits', 'best_credits_tier', 'credits_unlocked_at'),
-                    ('level', 'best_level_tier', 'level_unlocked_at'),
-                    ('invited', 'best_invited_tier', 'invited_unlocked_at'),
-                    ('betcount', 'best_betcount_tier', 'betcount_unlocked_at'),
-                    ('betwins', 'best_betwins_tier', 'betwins_unlocked_at'),
-                    ('bigodds', 'best_bigodds_tier', 'bigodds_unlocked_at'),
-                    ('markets', 'best_markets_tier', 'markets_unlocked_at'),
-                    ('weeks', 'best_weeks_tier', 'weeks_unlocked_at'),
-                ]
-                changed = False
-                # Список повышений для последующей выдачи наград
-                unlocked_events = []  # (group, new_tier, first_time:bool)
-                for key, tier_field, ts_field in mapping:
-                    current = cur[key]
-                    previous = int(getattr(ach_row, tier_field) or 0)
-                    if current > previous:
-                        setattr(ach_row, tier_field, current)
-                        first_time = False
-                        if previous == 0:
-                            # Первая разблокировка — фиксируем дату
-                            setattr(ach_row, ts_field, now_dt)
-                            first_time = True
-                        unlocked_events.append((key, current, first_time))
-                        changed = True
-                if changed:
-                    ach_row.updated_at = now_dt
-                    # Выдача наград с идемпотентностью
-                    # Готовим пользователя к обновлению XP/credits
-                    db_user = db.get(User, int(user_id))
-                    if db_user is None:
-                        return jsonify({'error': 'Пользователь не найден'}), 404
-                    total_xp_add = 0
-                    total_credits_add = 0
-                    for grp, new_tier, _first in unlocked_events:
-                        reward = ACHIEVEMENT_REWARDS.get(int(new_tier), {'xp':0, 'credits':0})
-                        if (reward.get('xp',0) or reward.get('credits',0)):
-                            # Проверяем по уникальному индексу, не выдавали ли уже (user_id, group, tier)
-                            already = db.query(UserAchievementReward.id).filter(
-                                UserAchievementReward.user_id==int(user_id),
-                                UserAchievementReward.group==grp,
-                                UserAchievementReward.tier==int(new_tier)
-                            ).first()
-                            if not already:
-                                # Копим сумму и запишем лог
-                                xp_add = int(reward.get('xp',0) or 0)
-                                cr_add = int(reward.get('credits',0) or 0)
-                                total_xp_add += xp_add
-                                total_credits_add += cr_add
-                                db.add(UserAchievementReward(user_id=int(user_id), group=grp, tier=int(new_tier), xp=xp_add, credits=cr_add))
-                    # Применяем начисления, если есть
-                    if total_xp_add or total_credits_add:
-                        # Добавляем XP поверх полосы уровня
-                        cur_level = int(db_user.level or 1)
-                        cur_xp = int(db_user.xp or 0)
-                        new_xp_total = cur_xp + total_xp_add
-                        new_level = cur_level
-                        # Повышаем уровень по той же формуле (стоимость уровня = level*100)
-                        while new_xp_total >= new_level * 100:
-                            new_xp_total -= new_level * 100
-                            new_level += 1
-                        db_user.xp = new_xp_total
-                        db_user.level = new_level
-                        db_user.credits = int(db_user.credits or 0) + total_credits_add
-                        db_user.updated_at = now_dt
+            now_dt = datetime.now(timezone.utc)
+            if ach_row is None:
+                ach_row = UserAchievement(user_id=int(user_id))
+                db.add(ach_row)
+            values = _ach_engine.progress_values(db_user, progress)
+            # Запись только при повышении tier'а (разблокировка фиксируется один раз)
+            unlocked_events = _ach_engine.evaluate_tiers(ach_row, values, thresholds, compute_tier, now_dt)
+            if unlocked_events or ach_row.created_at is None:
+                try:
+                    _xp_add, _cr_add, _old_level = _ach_engine.grant_rewards(
+                        db, db_user, unlocked_events, UserAchievementReward, ACHIEVEMENT_REWARDS, now_dt)
+                    _ach_engine.on_level_changed(db, UserAchievementProgress, Referral, user_id, _old_level, db_user.level)
+                    db.commit()
+                    if _xp_add:
+                        _public_profile_drop(user_id)
+                except Exception as e:
+                    # Возможная гонка/дубликат (уникальный индекс) — игнорируем награды, фиксируем только достижения
+                    db.rollback()
+                    app.logger.warning(f"Rewards commit failed (possibly duplicate): {e}")
                     try:
+                        ach_row = db.get(UserAchievement, int(user_id)) or UserAchievement(user_id=int(user_id))
+                        _ach_engine.evaluate_tiers(ach_row, values, thresholds, compute_tier, now_dt)
+                        db.add(ach_row)
                         db.commit()
-                    except Exception as e:
-                        # Возможный гонка/дубликат (уникальный индекс) — игнорируем награды, фиксируем только достижения
-                        try:
-                            from sqlalchemy.exc import IntegrityError  # локальный импорт
-                        except Exception:
-                            IntegrityError = Exception
+                    except Exception as e2:
                         db.rollback()
-                        app.logger.warning(f"Rewards commit failed (possibly duplicate): {e}")
-                        try:
-                            # Повторно зафиксируем только обновлённые tiers без повторной выдачи
-                            ach_row.updated_at = now_dt
-                            db.add(ach_row)
-                            db.commit()
-                        except Exception as e2:
-                            db.rollback()
-                            app.logger.error(f"Achievements commit after rewards failure also failed: {e2}")
-                # Присваиваем best_* для формирования ответа
-                best_streak_tier = int(ach_row.best_streak_tier or 0)
-                best_credits_tier = int(ach_row.best_credits_tier or 0)
-                best_level_tier = int(ach_row.best_level_tier or 0)
-                best_invited_tier = int(ach_row.best_invited_tier or 0)
-                best_betcount_tier = int(ach_row.best_betcount_tier or 0)
-                best_betwins_tier = int(ach_row.best_betwins_tier or 0)
-                best_bigodds_tier = int(ach_row.best_bigodds_tier or 0)
-                best_markets_tier = int(ach_row.best_markets_tier or 0)
-                best_weeks_tier = int(ach_row.best_weeks_tier or 0)
-            finally:
-                db.close()
+                        app.logger.error(f"Achievements commit after rewards failure also failed: {e2}")
+                values = _ach_engine.progress_values(db_user, progress)
+            best_streak_tier = int(ach_row.best_streak_tier or 0)
+            best_credits_tier = int(ach_row.best_credits_tier or 0)
+            best_level_tier = int(ach_row.best_level_tier or 0)
+            best_invited_tier = int(ach_row.best_invited_tier or 0)
+            best_betcount_tier = int(ach_row.best_betcount_tier or 0)
+            best_betwins_tier = int(ach_row.best_betwins_tier or 0)
+            best_bigodds_tier = int(ach_row.best_bigodds_tier or 0)
+            best_markets_tier = int(ach_row.best_markets_tier or 0)
+            best_weeks_tier = int(ach_row.best_weeks_tier or 0)
+        finally:
+            db.close()
 
         achievements=[]
         def add(group, best_tier, name_map, value, targets, icon_map):
@@ -9895,15 +10079,15 @@ def get_achievements():
                     'icon_url': icon_url,
                     'unlocked': False
                 })
-        add('streak', best_streak_tier, {1:'Бронза',2:'Серебро',3:'Золото'}, user['consecutive_days'], streak_targets, {1:'bronze',2:'silver',3:'gold'})
-        add('credits', best_credits_tier, {1:'Бедолага',2:'Мажор',3:'Олигарх'}, user['credits'], credits_targets, {1:'bronze',2:'silver',3:'gold'})
-        add('level', best_level_tier, {1:'Новобранец',2:'Ветеран',3:'Легенда'}, user['level'], level_targets, {1:'bronze',2:'silver',3:'gold'})
-        add('invited', best_invited_tier, {1:'Рекрутер',2:'Посол',3:'Легенда'}, invited_count, invited_targets, {1:'bronze',2:'silver',3:'gold'})
-        add('betcount', best_betcount_tier, {1:'Новичок ставок',2:'Профи ставок',3:'Марафонец'}, bet_stats['total'], betcount_targets, {1:'bronze',2:'silver',3:'gold'})
-        add('betwins', best_betwins_tier, {1:'Счастливчик',2:'Снайпер',3:'Чемпион'}, bet_stats['won'], betwins_targets, {1:'bronze',2:'silver',3:'gold'})
-        add('bigodds', best_bigodds_tier, {1:'Рисковый',2:'Хайроллер',3:'Легенда кэфов'}, bet_stats['max_win_odds'], bigodds_targets, {1:'bronze',2:'silver',3:'gold'})
-        add('markets', best_markets_tier, {1:'Универсал I',2:'Универсал II',3:'Универсал III'}, len(bet_stats['markets_used']), markets_targets, {1:'bronze',2:'silver',3:'gold'})
-        add('weeks', best_weeks_tier, {1:'Регуляр',2:'Постоянный',3:'Железный'}, len(bet_stats['weeks_active']), weeks_targets, {1:'bronze',2:'silver',3:'gold'})
+        add('streak', best_streak_tier, {1:'Бронза',2:'Серебро',3:'Золото'}, values['streak'], streak_targets, {1:'bronze',2:'silver',3:'gold'})
+        add('credits', best_credits_tier, {1:'Бедолага',2:'Мажор',3:'Олигарх'}, values['credits'], credits_targets, {1:'bronze',2:'silver',3:'gold'})
+        add('level', best_level_tier, {1:'Новобранец',2:'Ветеран',3:'Легенда'}, values['level'], level_targets, {1:'bronze',2:'silver',3:'gold'})
+        add('invited', best_invited_tier, {1:'Рекрутер',2:'Посол',3:'Легенда'}, values['invited'], invited_targets, {1:'bronze',2:'silver',3:'gold'})
+        add('betcount', best_betcount_tier, {1:'Новичок ставок',2:'Профи ставок',3:'Марафонец'}, values['betcount'], betcount_targets, {1:'bronze',2:'silver',3:'gold'})
+        add('betwins', best_betwins_tier, {1:'Счастливчик',2:'Снайпер',3:'Чемпион'}, values['betwins'], betwins_targets, {1:'bronze',2:'silver',3:'gold'})
+        add('bigodds', best_bigodds_tier, {1:'Рисковый',2:'Хайроллер',3:'Легенда кэфов'}, values['bigodds'], bigodds_targets, {1:'bronze',2:'silver',3:'gold'})
+        add('markets', best_markets_tier, {1:'Универсал I',2:'Универсал II',3:'Универсал III'}, values['markets'], markets_targets, {1:'bronze',2:'silver',3:'gold'})
+        add('weeks', best_weeks_tier, {1:'Регуляр',2:'Постоянный',3:'Железный'}, values['weeks'], weeks_targets, {1:'bronze',2:'silver',3:'gold'})
         # Финальный payload
         resp_payload = {'achievements': achievements}
         # Стабильный ETag (sorted keys)
@@ -9948,6 +10132,13 @@ def health_sync():
                 'sheet_rate_limit_hits': METRICS.get('sheet_rate_limit_hits', 0),
                 'sheet_last_error': METRICS.get('sheet_last_error', '')
             }
+        # executed / skipped по доменам, coalesced, sweeps, грязные домены
+        data['scheduler'] = _SYNC_TRACKER.stats()
+        data['live_registry'] = _LIVE_REGISTRY.stats()
+        data['public_profiles'] = _public_profiles.stats()
+        data['client_logs'] = _CLIENT_LOGS.stats()
+        data['live_scores'] = _LIVE_SCORES.stats()
+        data['live_table'] = _LIVE_TABLE.stats()
         return _json_response(data, 200)
     except Exception as e:
         return _json_response({'status': 'error', 'error': str(e)}, 500)
@@ -10160,33 +10351,42 @@ def features():
     return jsonify(features_info), 200
 
 # Admin client logs endpoint
+# Буфер клиентских логов: запрос только разбирает и ставит в очередь, пишет фоновый поток пачками
+_CLIENT_LOGS = ClientLogIngestor(
+    path=SETTINGS.CLIENT_LOG_FILE,
+    max_bytes=SETTINGS.CLIENT_LOG_MAX_BYTES,
+    backups=SETTINGS.CLIENT_LOG_BACKUPS,
+    buffer_size=SETTINGS.CLIENT_LOG_BUFFER,
+    session_quota=SETTINGS.CLIENT_LOG_SESSION_QUOTA,
+    quota_window_sec=SETTINGS.CLIENT_LOG_QUOTA_WINDOW_SEC,
+)
+
 @app.route('/api/admin/client-logs', methods=['POST'])
 def admin_client_logs():
-    """Receives structured logs from admin clients"""
+    """Receives structured logs from admin clients.
+    Тело: JSON {logs: [...]} или NDJSON (application/x-ndjson), опционально Content-Encoding: gzip.
+    Ответ 202: принято/отброшено (квота сессии, переполнение буфера)."""
     try:
         # Check if user is admin
         init_data = request.headers.get('X-Telegram-Init-Data', '')
         user_info = _extract_user_info(init_data)
-        
-        if not user_info or user_info.get('role') not in ['admin', 'owner']:
+        admin_id = os.environ.get('ADMIN_USER_ID', '')
+        is_admin = bool(user_info) and (user_info.get('role') in ['admin', 'owner']
+                                        or (admin_id and str(user_info.get('user_id')) == admin_id))
+        if not is_admin:
             return jsonify({'error': 'Access denied'}), 403
-            
-        if not request.is_json:
-            return jsonify({'error': 'JSON required'}), 400
-            
-        data = request.get_json()
-        logs = data.get('logs', [])
-        
-        # Store in database or log file (simplified implementation)
-        for log_entry in logs:
-            app.logger.info(f"[CLIENT-LOG] {log_entry.get('level', 'info').upper()} "
-                           f"[{log_entry.get('category', 'unknown')}] "
-                           f"{log_entry.get('message', '')} "
-                           f"| Session: {log_entry.get('sessionId', 'unknown')} "
-                           f"| Metadata: {json.dumps(log_entry.get('metadata', {}))}")
-        
-        return jsonify({'received': len(logs), 'status': 'ok'}), 200
-        
+
+        try:
+            logs = _CLIENT_LOGS.parse(request.get_data(cache=False),
+                                      request.headers.get('Content-Type', ''),
+                                      request.headers.get('Content-Encoding', ''))
+        except IngestError as e:
+            return jsonify({'error': str(e)}), 400
+
+        accepted, dropped = _CLIENT_LOGS.submit(logs, user_id=user_info.get('user_id'))
+        _CLIENT_LOGS.start()
+        return jsonify({'received': len(logs), 'accepted': accepted, 'dropped': dropped, 'status': 'ok'}), 202
+
     except Exception as e:
         app.logger.error(f"Admin client logs error: {e}")
         return jsonify({'error': 'Internal error'}), 500
@@ -10221,24 +10421,13 @@ def api_users_public_batch():
             return _json_response({'items': []})
         db: Session = get_db()
         try:
-            users = db.query(User).filter(User.user_id.in_(ids)).all()
-            # фото — отдельной пачкой
-            photos = {}
-            for r in db.query(UserPhoto).filter(UserPhoto.user_id.in_(ids)).all():
-                if r.photo_url:
-                    photos[int(r.user_id)] = r.photo_url
+            profiles = _public_profiles.get_public_profiles(db, ids, User, UserPhoto, cache=cache_manager)
             out = []
-            for u in users:
-                out.append({
-                    'user_id': int(u.user_id),
-                    'display_name': u.display_name or 'Игрок',
-                    'level': int(u.level or 1),
-                    'xp': int(u.xp or 0),
-                    'current_xp': int(u.xp or 0),
-                    'next_xp': int((u.level or 1) * 100),
-                    'consecutive_days': int(u.consecutive_days or 0),
-                    'photo_url': photos.get(int(u.user_id), '')
-                })
+            for uid in ids:
+                p = profiles.get(uid)
+                if not p:
+                    continue
+                out.append({**p, 'current_xp': p['xp'], 'next_xp': p['level'] * 100})
             return _json_response({'items': out})
         finally:
             db.close()
@@ -10282,18 +10471,87 @@ def api_league_table():
         app.logger.error(f"Ошибка загрузки таблицы лиги: {str(e)}")
         return jsonify({'error': 'Не удалось загрузить таблицу'}), 500
 
+def _snapshot_delta_response(key: str, fields=None):
+    """Ответ на ?since=<version>: изменённые записи снапшота key после версии since.
+    fields — callable() -> dict производных полей верхнего уровня (не из коллекции), отдаются
+    целиком в delta['fields'] и заменяют значения в кэше клиента.
+    None — дельтой не ответить (лог компактирован, версия неизвестна): вызывающий отдаёт полный payload."""
+    try:
+        since = int(request.args.get('since'))
+    except (TypeError, ValueError):
+        return None
+    if SessionLocal is None:
+        return None
+    db: Session = get_db()
+    try:
+        delta = _snapshot_delta(db, key, since)
+    except Exception as e:
+        app.logger.warning(f"snapshot delta {key} since={since} failed: {e}")
+        delta = None
+    finally:
+        db.close()
+    if delta is None:
+        return None
+    if fields is not None:
+        try:
+            delta['fields'] = fields()
+        except Exception as e:
+            app.logger.warning(f"snapshot delta {key} fields failed: {e}")
+            return None
+    resp = _json_response(delta)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+def _schedule_match_of_week(tours=None):
+    """match_of_week для /api/schedule: ручной feature-match (пока матч не завершён), иначе лучший
+    матч из betting-tours (fallback — туры расписания tours; None — читаются из снапшота schedule)."""
+    if SessionLocal is None:
+        return _pick_match_of_week(tours or [])
+    db: Session = get_db()
+    try:
+        fm = _snapshot_get(db, Snapshot, 'feature-match', app.logger) or {}
+        manual = (fm.get('payload') or {}).get('match') or None
+        if manual and isinstance(manual, dict):
+            mh, ma = manual.get('home'), manual.get('away')
+            if mh and ma:
+                try:
+                    dt = _get_match_datetime(mh, ma)
+                    if not dt or datetime.now() < dt + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
+                        return manual
+                except Exception:
+                    return manual
+        bt = _snapshot_get(db, Snapshot, 'betting-tours', app.logger)
+        tours_src = ((bt or {}).get('payload') or {}).get('tours')
+        if not tours_src and tours is None:
+            sched = _snapshot_get(db, Snapshot, 'schedule', app.logger)
+            tours = ((sched or {}).get('payload') or {}).get('tours')
+        return _pick_match_of_week(tours_src or tours or [])
+    finally:
+        try:
+            db.close()
+        except Exception:
+            pass
+
 @app.route('/api/schedule', methods=['GET'])
 @rate_limit(max_requests=int(os.environ.get('RL_SCHEDULE_RPM', '12')), time_window=60, per='ip')
 def api_schedule():
-    """Расписание (до 3 туров) через etag_json: только snapshot (без чтения Sheets), с match_of_week логикой."""
+    """Расписание (до 3 туров) через etag_json: только snapshot (без чтения Sheets), с match_of_week логикой.
+    ?since=<snapshot_version> — только изменённые туры (см. _snapshot_delta_response)."""
+    if request.args.get('since') is not None:
+        delta_resp = _snapshot_delta_response('schedule', fields=lambda: {'match_of_week': _schedule_match_of_week()})
+        if delta_resp is not None:
+            return delta_resp
     def _build():
         _t0 = time.time()
         payload = None
+        snap_v = 0
         # 1) snapshot из БД
         if SessionLocal is not None:
             db: Session = get_db()
             snap = None
             try:
+                # версия читается до payload: payload не старше версии, повтор дельт идемпотентен
+                snap_v = _snapshot_version(db, 'schedule')
                 snap = _snapshot_get(db, Snapshot, 'schedule', app.logger)
             finally:
                 try:
@@ -10315,53 +10573,10 @@ def api_schedule():
             payload = {'tours': []}
         # 3) match_of_week логика
         try:
-            manual = None
-            if SessionLocal is not None:
-                db2 = get_db()
-                try:
-                    fm = _snapshot_get(db2, Snapshot, 'feature-match', app.logger) or {}
-                    manual = (fm.get('payload') or {}).get('match') or None
-                finally:
-                    try:
-                        db2.close()
-                    except Exception:
-                        pass
-            use_manual = False
-            if manual and isinstance(manual, dict):
-                mh, ma = manual.get('home'), manual.get('away')
-                if mh and ma:
-                    try:
-                        status = 'scheduled'
-                        dt = _get_match_datetime(mh, ma)
-                        now = datetime.now()
-                        if dt:
-                            if dt <= now < dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
-                                status = 'live'
-                            elif now >= dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
-                                status = 'finished'
-                        if status != 'finished':
-                            use_manual = True
-                    except Exception:
-                        use_manual = True
-            if use_manual:
+            best = _schedule_match_of_week(payload.get('tours') or [])
+            if best:
                 payload = dict(payload)
-                payload['match_of_week'] = manual
-            else:
-                tours_src = payload.get('tours') or []
-                if SessionLocal is not None:
-                    db3 = get_db()
-                    try:
-                        bt = _snapshot_get(db3, Snapshot, 'betting-tours', app.logger)
-                        tours_src = (bt or {}).get('payload', {}).get('tours') or tours_src
-                    finally:
-                        try:
-                            db3.close()
-                        except Exception:
-                            pass
-                best = _pick_match_of_week(tours_src)
-                if best:
-                    payload = dict(payload)
-                    payload['match_of_week'] = best
+                payload['match_of_week'] = best
         except Exception:
             pass
         # 4) метрика латентности
@@ -10370,6 +10585,8 @@ def api_schedule():
                 _perf_metrics.api_observe('api_schedule', (time.time() - _t0) * 1000.0)
         except Exception:
             pass
+        payload = dict(payload)
+        payload['snapshot_version'] = snap_v
         return payload
 
     return etag_json(
@@ -10378,7 +10595,7 @@ def api_schedule():
         cache_ttl=900,
         max_age=900,
         swr=600,
-        core_filter=lambda p: {'tours': p.get('tours')}
+        core_filter=lambda p: {'tours': p.get('tours'), 'match_of_week': p.get('match_of_week')}
     )
 
 @app.route('/api/vote/match', methods=['POST'])
@@ -10397,7 +10614,7 @@ def api_vote_match():
             uid = int(parsed['user'].get('id'))
         else:
             # Разрешим голосование без Telegram, если включено явно
-            if os.environ.get('ALLOW_VOTE_WITHOUT_TELEGRAM', '0') in ('1','true','True'):
+            if SETTINGS.ALLOW_VOTE_WITHOUT_TELEGRAM:
                 uid = _pseudo_user_id()
             else:
                 return jsonify({'error': 'Недействительные данные'}), 401
@@ -10427,10 +10644,10 @@ def api_vote_match():
                 try:
                     ws_manager = current_app.config.get('websocket_manager')
                     inv = globals().get('invalidator')
-                    # bump версии коэффициентов (голос влияет на odds)
-                    new_ver = _bump_odds_version(home, away)
+                    # Голос влияет на odds: пересчёт и публикация (версия растёт, только если коэффициенты изменились)
+                    new_ver, odds_fields = _odds_published(home, away, date_key or None, force=True)
                     # Полный снэпшот рынков (1x2, totals, specials)
-                    odds_fields = _build_odds_fields(home, away) or {}
+                    odds_fields = dict(odds_fields or {})
                     odds_fields['odds_version'] = new_ver
                     payload = {
                         'entity': 'odds',
@@ -10517,7 +10734,7 @@ def api_vote_match_aggregates():
                 uid = None
                 if parsed and parsed.get('user'):
                     uid = int(parsed['user'].get('id'))
-                elif os.environ.get('ALLOW_VOTE_WITHOUT_TELEGRAM', '0') in ('1','true','True'):
+                elif SETTINGS.ALLOW_VOTE_WITHOUT_TELEGRAM:
                     uid = _pseudo_user_id()
                 if uid is not None:
                     mine = db.query(MatchVote).filter(
@@ -10556,7 +10773,7 @@ def api_vote_aggregates_batch():
         if parsed and parsed.get('user'):
             try: my_uid = int(parsed['user'].get('id'))
             except Exception: my_uid = None
-        elif os.environ.get('ALLOW_VOTE_WITHOUT_TELEGRAM', '0') in ('1','true','True'):
+        elif SETTINGS.ALLOW_VOTE_WITHOUT_TELEGRAM:
             my_uid = _pseudo_user_id()
 
         def norm(s: str) -> str:
@@ -10636,9 +10853,10 @@ def api_betting_tours():
                             _get_match_result,
                             _get_match_total_goals,
                             _get_special_result,
-                            BET_MATCH_DURATION_MINUTES,
+                            SETTINGS.BET_MATCH_DURATION_MINUTES,
                             datetime.now(timezone.utc),
-                            app.logger
+                            app.logger,
+                            on_won=_ach_progress_on_bet_won
                         )
                     finally:
                         dbs.close()
@@ -10718,41 +10936,49 @@ def api_betting_tours():
                             def _apply_lock(m, dt):
                                 lock = False
                                 if dt is not None:
-                                    lock = (dt - timedelta(minutes=BET_LOCK_AHEAD_MINUTES)) <= now_local
-                                # New: read matches.status
-                                try:
-                                    from utils.match_status import get_match_status_by_names
-                                    st = get_match_status_by_names(db, (m.get('home') or ''), (m.get('away') or ''))
-                                except Exception:
-                                    st = None
+                                    lock = (dt - timedelta(minutes=SETTINGS.BET_LOCK_AHEAD_MINUTES)) <= now_local
+                                # New: read matches.status (пакетно загружен для всех матчей снапшота)
+                                state = states.get(_ov_key(m.get('home') or '', m.get('away') or '')) or {}
+                                st = state.get('status')
                                 if st in ('live','finished') and dt is not None:
                                     if st == 'live':
-                                        if dt - timedelta(minutes=10) <= now_local < dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
+                                        if dt - timedelta(minutes=10) <= now_local < dt + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
                                             lock = True
                                     elif st == 'finished':
-                                        if now_local >= dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
+                                        if now_local >= dt + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
                                             lock = True
                                 # Legacy fallback: MatchFlags during transition
                                 if st is None:
-                                    try:
-                                        row = db.query(MatchFlags).filter(
-                                            MatchFlags.home==(m.get('home') or ''),
-                                            MatchFlags.away==(m.get('away') or '')
-                                        ).first()
-                                        if row and row.status in ('live','finished') and dt is not None:
-                                            if row.status == 'live':
-                                                if dt - timedelta(minutes=10) <= now_local < dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
-                                                    lock = True
-                                            elif row.status == 'finished':
-                                                if now_local >= dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES):
-                                                    lock = True
-                                    except Exception:
-                                        pass
+                                    flags_status = state.get('flags_status')
+                                    if flags_status in ('live','finished') and dt is not None:
+                                        if flags_status == 'live':
+                                            if dt - timedelta(minutes=10) <= now_local < dt + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
+                                                lock = True
+                                        elif flags_status == 'finished':
+                                            if now_local >= dt + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES):
+                                                lock = True
                                 m['lock'] = bool(lock)
 
+                            # Статусы всех матчей снапшота и сыгранные пары из results — одним заходом, а не на каждый матч
+                            try:
+                                states = _load_match_states(
+                                    db, [(m.get('home') or '', m.get('away') or '') for t in tours for m in (t.get('matches') or [])],
+                                    MatchFlags)
+                            except Exception:
+                                states = {}
+                            finished_pairs = set()
+                            try:
+                                snap_results = _snapshot_get(db, Snapshot, 'results', app.logger)
+                                for r in ((snap_results or {}).get('payload') or {}).get('results', []) or []:
+                                    if r.get('score_home') is not None and r.get('score_away') is not None:
+                                        finished_pairs.add((r.get('home'), r.get('away')))
+                            except Exception:
+                                pass
+
                             # Пройдём по турам и матчам: фильтрация по горизонту, начавшихся и обновление odds/lock
                             for t in tours:
                                 filtered = []
+                                odds_rows = _odds_rows_for(t.get('matches') or [])
                                 for m in (t.get('matches') or []):
                                     try:
                                         dt = _parse_match_dt(m)
@@ -10773,29 +10999,9 @@ def api_betting_tours():
                                             continue
                                         
                                         # НОВАЯ ПРОВЕРКА: Исключаем завершенные матчи полностью
-                                        is_finished = False
-                                        try:
-                                            # Проверяем статус в основной таблице matches
-                                            from utils.match_status import get_match_status_by_names
-                                            match_status = get_match_status_by_names(db, home, away)
-                                            if match_status == 'finished':
-                                                is_finished = True
-                                        except Exception:
-                                            pass
-                                        
-                                        # Дополнительная проверка: есть ли матч в результатах
-                                        if not is_finished:
-                                            try:
-                                                snap_results = _snapshot_get(db, Snapshot, 'results', app.logger)
-                                                if snap_results and 'payload' in snap_results:
-                                                    results = snap_results['payload'].get('results', [])
-                                                    for r in results:
-                                                        if (r.get('home') == home and r.get('away') == away and 
-                                                            r.get('score_home') is not None and r.get('score_away') is not None):
-                                                            is_finished = True
-                                                            break
-                                            except Exception:
-                                                pass
+                                        # (статус в основной таблице matches или матч уже есть в результатах)
+                                        is_finished = ((states.get((home, away)) or {}).get('status') == 'finished'
+                                                       or (home, away) in finished_pairs)
                                         
                                         if is_finished:
                                             continue  # Пропускаем завершенный матч
@@ -10810,32 +11016,18 @@ def api_betting_tours():
                                                     continue
                                             except Exception:
                                                 pass
-                                        # пересчёт коэффициентов и версии
+                                        # опубликованные коэффициенты и версия (общие для воркеров, без пересчёта)
                                         away = (m.get('away') or '').strip()
                                         draw = m.get('date') or m.get('datetime') or ''
                                         date_key = str(draw)[:10] if draw else ''
-                                        m['odds'] = _compute_match_odds(home, away, date_key)
-                                        try:
-                                            m['odds_version'] = _get_odds_version(home, away)
-                                        except Exception:
-                                            pass
-                                        # Гарантируем наличие рынков (тоталы и спецы), как в on-demand билдере
-                                        try:
-                                            totals = []
-                                            for ln in (3.5, 4.5, 5.5):
-                                                totals.append({'line': ln, 'odds': _compute_totals_odds(home, away, ln)})
-                                            sp_pen = _compute_specials_odds(home, away, 'penalty')
-                                            sp_red = _compute_specials_odds(home, away, 'redcard')
-                                            m['markets'] = {
-                                                'totals': totals,
-                                                'specials': {
-                                                    'penalty': { 'available': True, 'odds': sp_pen },
-                                                    'redcard': { 'available': True, 'odds': sp_red }
-                                                }
-                                            }
-                                        except Exception:
-                                            # Если по какой-то причине рынки не рассчитались — не блокируем выдачу
-                                            pass
+                                        ver, fields = _odds_published(
+                                            home, away, date_key or None,
+                                            row=(odds_rows.get((home, away)) if odds_rows is not None else _ODDS_ROW_UNSET))
+                                        m['odds'] = fields.get('odds') or _compute_match_odds(home, away, date_key)
+                                        m['odds_version'] = ver
+                                        # Рынки (тоталы и спецы) — из того же опубликованного payload, как в on-demand билдере
+                                        if fields.get('markets'):
+                                            m['markets'] = fields['markets']
                                         # lock
                                         _apply_lock(m, dt)
                                         filtered.append(m)
@@ -11217,6 +11409,46 @@ def api_match_score_get():
         app.logger.error(f"match/score/get error: {e}")
         return jsonify({'score_home': None, 'score_away': None})
 
+def _live_score_effects(home: str, away: str, states: list):
+    """Отложенные последствия правок счёта матча за окно (states — все промежуточные состояния с seq)"""
+    last = states[-1]
+    new_ver = _bump_odds_version(home, away)
+    inv = globals().get('invalidator')
+    if inv:
+        try:
+            dt = _get_match_datetime(home, away)
+            date_str = dt.isoformat()[:10] if dt else ''
+            topic = f"match:{home.lower()}__{away.lower()}__{date_str}:details"
+            inv.publish_topic(topic, 'data_patch', {
+                'type': 'data_patch',
+                'entity': 'match',
+                'id': {'home': home, 'away': away},
+                'fields': {'score_home': last['score_home'], 'score_away': last['score_away'], 'score_seq': last['seq']}
+            }, priority=1)
+        except Exception as e:
+            app.logger.warning(f"live score topic publish failed: {e}")
+        # Минимальная инвалидация для обновления таблицы/расписания
+        try:
+            inv.invalidate_for_change('league_table_update', {})
+            inv.invalidate_for_change('schedule_update', {})
+        except Exception:
+            pass
+    ws = app.config.get('websocket_manager')
+    try:
+        # O(teams): снять прежний счёт матча из live-таблицы и наложить новый (рассылка — в _live_table_publish)
+        _live_table_ensure()
+        _LIVE_TABLE.set_score(home, away, last['score_home'], last['score_away'])
+    except Exception as e:
+        app.logger.warning(f"live league table update failed: {e}")
+    if ws:
+        ws.notify_data_change('match_score', {
+            'home': home, 'away': away,
+            'score_home': last['score_home'], 'score_away': last['score_away'],
+            'odds_version': new_ver, 'seq': last['seq'], 'updated_at': last.get('updated_at'),
+        })
+
+_LIVE_SCORES = ScoreCoalescer(_live_score_effects, window_sec=SETTINGS.LIVE_SCORE_COALESCE_MS / 1000.0)
+
 @app.route('/api/match/score/set', methods=['POST'])
 def api_match_score_set():
     """Админ меняет текущий счёт (не влияет на ставки до завершения матча). Поля: initData, home, away, score_home, score_away."""
@@ -11283,45 +11515,23 @@ def api_match_score_set():
             db.commit()
 
             score_changed = (old_score_home != row.score_home) or (old_score_away != row.score_away)
-            
-            # Отправляем прямое live_update уведомление для мгновенного обновления счета
-            try:
-                ws = app.config.get('websocket_manager')
-                inv = globals().get('invalidator')
-                if ws and score_changed:
-                    # НОВОЕ: Прямое live_update уведомление для мгновенного отображения счета
-                    ws.notify_match_live_update(home, away, {
-                        'score_home': row.score_home,
-                        'score_away': row.score_away,
-                        'updated_at': datetime.now(timezone.utc).isoformat()
-                    })
-                    
-                    # Дополнительно обновляем версию коэффициентов если нужно
-                    new_ver = _bump_odds_version(home, away)
-                    
-                # Уведомляем компоненты через обычный data_change канал тоже
+
+            # live_update в комнату матча — сразу на каждую правку (каждое промежуточное состояние с seq);
+            # odds/инвалидации/live-таблица/notify_data_change — одним проходом по окну LIVE_SCORE_COALESCE_MS
+            if score_changed:
+                state = {
+                    'score_home': row.score_home,
+                    'score_away': row.score_away,
+                    'updated_at': datetime.now(timezone.utc).isoformat()
+                }
+                seq = _LIVE_SCORES.record(home, away, state)
+                _LIVE_SCORES.start()
                 try:
-                    if inv:
-                        dt = _get_match_datetime(home, away)
-                        date_str = dt.isoformat()[:10] if dt else ''
-                        topic = f"match:{home.lower()}__{away.lower()}__{date_str}:details"
-                        inv.publish_topic(topic, 'data_patch', {
-                            'type': 'data_patch',
-                            'entity': 'match',
-                            'id': {'home': home, 'away': away},
-                            'fields': {'score_home': row.score_home, 'score_away': row.score_away}
-                        }, priority=1)
-                        
-                        # Минимальная инвалидация для обновления таблицы/расписания
-                        try:
-                            inv.invalidate_for_change('league_table_update', {})
-                            inv.invalidate_for_change('schedule_update', {})
-                        except Exception:
-                            pass
+                    ws = app.config.get('websocket_manager')
+                    if ws:
+                        ws.notify_match_live_update(home, away, {**state, 'seq': seq})
                 except Exception:
                     pass
-            except Exception:
-                pass
             # Ранее счёт зеркалировался в Google Sheets (удалено)
             
             # Логируем успешное изменение счёта
@@ -11514,103 +11724,76 @@ def _compute_table_agg_base():
         pass
     return agg, list(agg.keys())
 
-def _build_league_payload_live():
-    """Лёгкая проекция таблицы с учётом текущих live‑счётов (MatchScore) для матчей,
-    которые идут сейчас по расписанию. Не изменяет базовые данные, только накладывает overlay.
-    """
-    agg, teams = _compute_table_agg_base()
-    now = datetime.now()
-    # Определим live‑матчи из расписания (окно: от начала до +BET_MATCH_DURATION_MINUTES)
-    live_pairs = []  # [(home, away)]
+def _live_table_publish(payload):
+    """Новая версия live-таблицы → WS league_table (клиент применяет values без рефетча)"""
+    if websocket_manager:
+        try:
+            websocket_manager.notify_data_change('league_table', payload)
+        except Exception as e:
+            app.logger.warning(f"live table push failed: {e}")
+
+# Финальная таблица + предварительные счета live-матчей (пересчёт по дельтам счёта)
+_LIVE_TABLE = LiveTableProjection(on_change=_live_table_publish, rebuild_sec=SETTINGS.LIVE_TABLE_REBUILD_SEC)
+
+def _live_table_scores(pairs):
+    """Текущие счета только указанных live-матчей — один запрос к match_scores"""
+    out = {p: None for p in pairs}
+    if not pairs or SessionLocal is None:
+        return out
+    db = get_db()
+    try:
+        rows = db.query(MatchScore).filter(or_(*[and_(MatchScore.home == h, MatchScore.away == a) for h, a in pairs])).all()
+        for r in rows:
+            if r.score_home is None or r.score_away is None:
+                continue
+            try:
+                out[(r.home, r.away)] = (int(r.score_home), int(r.score_away))
+            except Exception:
+                continue
+    finally:
+        db.close()
+    return out
+
+def _live_table_ensure():
+    """База — при первом чтении, после смены league-table/results или раз в LIVE_TABLE_REBUILD_SEC;
+    набор live-матчей — из реестра live (добавляются/снимаются только изменившиеся)"""
     try:
+        _live_registry_ensure()
+        live_pairs = {(m.get('home') or '', m.get('away') or '') for m in _LIVE_REGISTRY.read()['live']}
+    except Exception as e:
+        app.logger.warning(f"live table: registry read failed: {e}")
+        live_pairs = _LIVE_TABLE.live_pairs()
+    if _LIVE_TABLE.needs_rebuild():
+        agg, _teams = _compute_table_agg_base()
+        finished = set()
         if SessionLocal is not None:
             db = get_db()
             try:
-                snap = _snapshot_get(db, Snapshot, 'schedule', app.logger)
-                payload = snap and snap.get('payload') or {}
-                for t in (payload.get('tours') or []):
-                    for m in (t.get('matches') or []):
-                        home = (m.get('home') or '').strip(); away = (m.get('away') or '').strip()
-                        if not home or not away:
-                            continue
-                        dt_str = m.get('datetime') or m.get('date')
-                        dt = None
-                        if dt_str:
-                            try:
-                                dt = datetime.fromisoformat(str(dt_str))
-                            except Exception:
-                                dt = None
-                        if not dt:
-                            continue
-                        end_dt = dt + timedelta(minutes=BET_MATCH_DURATION_MINUTES)
-                        if dt <= now <= end_dt:
-                            live_pairs.append((home, away))
-                # Исключим уже учтённые в results (на случай ручной правки)
-                try:
-                    snap_res = _snapshot_get(db, Snapshot, 'results', app.logger)
-                    payload_res = snap_res and snap_res.get('payload') or {}
-                    finished_set = set()
-                    for r in (payload_res.get('results') or []):
-                        finished_set.add(((r.get('home') or '').strip(), (r.get('away') or '').strip()))
-                    live_pairs = [p for p in live_pairs if p not in finished_set]
-                except Exception:
-                    pass
-                # Наложим overlay по текущим счётам
-                if live_pairs:
-                    scores = { (s.home, s.away): (s.score_home, s.score_away) for s in db.query(MatchScore).all() }
-                    for home, away in live_pairs:
-                        sc = scores.get((home, away))
-                        if sc is None:  # попробуем обратный порядок на всякий случай
-                            sc = scores.get((home.strip(), away.strip()))
-                        if not sc:
-                            continue
-                        sh, sa = sc
-                        if sh is None or sa is None:
-                            continue
-                        try:
-                            sh = int(sh); sa = int(sa)
-                        except Exception:
-                            continue
-                        # Обеспечим присутствие команд
-                        _ = agg[home]; _ = agg[away]
-                        # Overlay: добавляем как будто матч завершён текущим счётом
-                        a_h = dict(agg[home]); a_a = dict(agg[away])
-                        # Чтобы не мутировать исходные значения при неоднократных вызовах
-                        # мы просто инкрементируем в агрегате
-                        agg[home]['P'] += 1; agg[home]['GF'] += sh; agg[home]['GA'] += sa
-                        agg[away]['P'] += 1; agg[away]['GF'] += sa; agg[away]['GA'] += sh
-                        if sh>sa:
-                            agg[home]['W'] += 1; agg[home]['PTS'] += 3; agg[away]['L'] += 1
-                        elif sh==sa:
-                            agg[home]['D'] += 1; agg[home]['PTS'] += 1; agg[away]['D'] += 1; agg[away]['PTS'] += 1
-                        else:
-                            agg[away]['W'] += 1; agg[away]['PTS'] += 3; agg[home]['L'] += 1
+                snap_res = _snapshot_get(db, Snapshot, 'results', app.logger)
+                for r in ((snap_res and snap_res.get('payload') or {}).get('results') or []):
+                    finished.add(((r.get('home') or '').strip(), (r.get('away') or '').strip()))
             finally:
                 db.close()
-    except Exception:
-        pass
-    # Формируем финальный payload как в основной таблице
-    def sort_key(name):
-        a = agg[name]; gd = a['GF']-a['GA']
-        return (-a['PTS'], -gd, -a['GF'], (name or '').lower())
-    teams = list(agg.keys())
-    teams.sort(key=sort_key)
-    header = ['№','Команда','И','В','Н','П','Р','О']
-    values = [header]
-    for i, name in enumerate(teams[:9], start=1):
-        a = agg[name]; gd = a['GF']-a['GA']
-        values.append([str(i), name, str(a['P']), str(a['W']), str(a['D']), str(a['L']), str(gd), str(a['PTS'])])
-    while len(values) < 10:
-        values.append(['']*8)
-    return {'range': 'A1:H10', 'updated_at': datetime.now(timezone.utc).isoformat(), 'values': values[:10], 'live': True}
+        _LIVE_TABLE.set_base(agg, finished, live=_live_table_scores(live_pairs))
+    else:
+        current = _LIVE_TABLE.live_pairs()
+        if live_pairs != current:
+            _LIVE_TABLE.sync_live(live_pairs, _live_table_scores(live_pairs - current))
+    return _LIVE_TABLE.read()
 
 @app.route('/api/league-table/live', methods=['GET'])
 def api_league_table_live():
     try:
-        payload = _build_league_payload_live()
-        resp = _json_response(payload)
-        # Живая таблица не кэшируется агрессивно
-        resp.headers['Cache-Control'] = 'no-store, max-age=0'
+        payload = _live_table_ensure() or {}
+        etag = payload.get('etag') or ''
+        if etag and request.headers.get('If-None-Match') == etag:
+            resp = flask.make_response('', 304)
+        else:
+            resp = _json_response(payload)
+        if etag:
+            resp.headers['ETag'] = etag
+        # Живая таблица: всегда ревалидация (304, пока версия проекции та же)
+        resp.headers['Cache-Control'] = 'no-cache'
         return resp
     except Exception as e:
         app.logger.error(f"live league table error: {e}")
@@ -11621,19 +11804,31 @@ def api_league_table_live():
 @app.route('/api/results', methods=['GET'])
 @rate_limit(max_requests=int(os.environ.get('RL_RESULTS_RPM', '12')), time_window=60, per='ip')
 def api_results():
-    """Результаты (прошедшие матчи) через etag_json: только snapshot (без чтения Sheets)."""
+    """Результаты (прошедшие матчи) через etag_json: только snapshot (без чтения Sheets).
+    ?since=<snapshot_version> — только изменённые строки."""
+    if request.args.get('since') is not None:
+        delta_resp = _snapshot_delta_response('results')
+        if delta_resp is not None:
+            return delta_resp
+    built={}
     def _build():
-        payload=None
+        payload=None; snap_v=0
         if SessionLocal is not None:
             db=get_db(); snap=None
-            try: snap=_snapshot_get(db, Snapshot, 'results', app.logger)
+            try:
+                snap_v=_snapshot_version(db, 'results')
+                snap=_snapshot_get(db, Snapshot, 'results', app.logger)
             finally: db.close()
             if snap and snap.get('payload'):
                 payload=snap['payload']
+                built['hash']=snap.get('content_hash')
         if payload is None:
             payload={'results': []}
+        payload=dict(payload); payload['snapshot_version']=snap_v
         return payload
-    return etag_json('results', _build, cache_ttl=900, max_age=900, swr=600, core_filter=lambda p: {'results': (p.get('results') or [])[:200]})
+    # ETag — сохранённый content_hash снапшота (без сериализации payload); нет хеша — по первым 200 строкам
+    return etag_json('results', _build, cache_ttl=900, max_age=900, swr=600,
+                     core_filter=lambda p: built.get('hash') or {'results': (p.get('results') or [])[:200]})
 
 # ---------------------------------------------------------------------------
 # Combined summary endpoint: schedule + results + betting tours + leaderboards
@@ -11767,107 +11962,114 @@ def api_summary():
         core_filter=_core
     )
 
-@app.route('/api/match-details', methods=['GET'])
-def api_match_details():
-    """DB-only: составы и события по матчу без Google Sheets.
-    Параметры: home, away (строки). Возвращает { teams?, rosters, lineups?, events }.
-    """
-    try:
-        home = (request.args.get('home') or '').strip()
-        away = (request.args.get('away') or '').strip()
-        if not home or not away:
-            return jsonify({'error': 'home и away обязательны'}), 400
-        cache_key = f"{home.strip().lower()}|{away.strip().lower()}"
-        def _build():
-            now_ts = int(time.time())
-            cached = MATCH_DETAILS_CACHE.get(cache_key)
-            if cached and (now_ts - cached['ts'] < MATCH_DETAILS_TTL):
-                return cached['payload']
-            # Достаём lineups из БД
-            home_players = []
-            away_players = []
-            extended_lineups = None
-            if SessionLocal is not None:
-                try:
-                    dbx = get_db()
-                    try:
-                        lrows, dbx = _db_retry_read(
-                            dbx,
-                            lambda s: s.query(MatchLineupPlayer).filter(MatchLineupPlayer.home==home, MatchLineupPlayer.away==away).all(),
-                            attempts=2, backoff_base=0.1, label='lineups:details:db'
-                        )
-                        if lrows:
-                            ext = { 'home': {'starting_eleven': [], 'substitutes': []}, 'away': {'starting_eleven': [], 'substitutes': []} }
-                            for r in lrows:
-                                side = 'home' if (r.team or 'home')=='home' else 'away'
-                                bucket = 'starting_eleven' if r.position=='starting_eleven' else 'substitutes'
-                                rec = {
-                                    'player': r.player,
-                                    'jersey_number': r.jersey_number,
-                                    'is_captain': bool(r.is_captain)
-                                }
-                                ext[side][bucket].append(rec)
-                                # плоский список
-                                if side=='home':
-                                    home_players.append(r.player)
-                                else:
-                                    away_players.append(r.player)
-                            for s in ('home','away'):
-                                for b in ('starting_eleven','substitutes'):
-                                    ext[s][b].sort(key=lambda x: (999 if x['jersey_number'] is None else x['jersey_number'], (x['player'] or '').lower()))
-                            extended_lineups = ext
-                        else:
-                            # fallback: team_roster
-                            from sqlalchemy import text as _sa_text
-                            home_rows, dbx = _db_retry_read(dbx, lambda s: s.execute(_sa_text("SELECT player FROM team_roster WHERE team=:t ORDER BY id ASC"), {'t': home}).fetchall(), attempts=2, backoff_base=0.1, label='lineups:details:roster-home')
-                            away_rows, dbx = _db_retry_read(dbx, lambda s: s.execute(_sa_text("SELECT player FROM team_roster WHERE team=:t ORDER BY id ASC"), {'t': away}).fetchall(), attempts=2, backoff_base=0.1, label='lineups:details:roster-away')
-                            home_players = [r[0] for r in home_rows] if home_rows else []
-                            away_players = [r[0] for r in away_rows] if away_rows else []
-                    finally:
-                        dbx.close()
-                except Exception:
-                    home_players = []
-                    away_players = []
-            # Подтянем события игроков из БД (если доступна)
+def _build_match_details_payload(home: str, away: str) -> dict:
+    """Составы и события матча из БД: { teams, rosters, lineups?, events } (без кэша).
+    Используется /api/match-details и WS-уведомлением lineups_updated (клиент применяет без рефетча)."""
+    # Достаём lineups из БД
+    home_players = []
+    away_players = []
+    extended_lineups = None
+    if SessionLocal is not None:
+        try:
+            dbx = get_db()
+            try:
+                lrows, dbx = _db_retry_read(
+                    dbx,
+                    lambda s: s.query(MatchLineupPlayer).filter(MatchLineupPlayer.home==home, MatchLineupPlayer.away==away).all(),
+                    attempts=2, backoff_base=0.1, label='lineups:details:db'
+                )
+                if lrows:
+                    ext = { 'home': {'starting_eleven': [], 'substitutes': []}, 'away': {'starting_eleven': [], 'substitutes': []} }
+                    for r in lrows:
+                        side = 'home' if (r.team or 'home')=='home' else 'away'
+                        bucket = 'starting_eleven' if r.position=='starting_eleven' else 'substitutes'
+                        rec = {
+                            'player': r.player,
+                            'jersey_number': r.jersey_number,
+                            'is_captain': bool(r.is_captain)
+                        }
+                        ext[side][bucket].append(rec)
+                        # плоский список
+                        if side=='home':
+                            home_players.append(r.player)
+                        else:
+                            away_players.append(r.player)
+                    for s in ('home','away'):
+                        for b in ('starting_eleven','substitutes'):
+                            ext[s][b].sort(key=lambda x: (999 if x['jersey_number'] is None else x['jersey_number'], (x['player'] or '').lower()))
+                    extended_lineups = ext
+                else:
+                    # fallback: team_roster
+                    from sqlalchemy import text as _sa_text
+                    home_rows, dbx = _db_retry_read(dbx, lambda s: s.execute(_sa_text("SELECT player FROM team_roster WHERE team=:t ORDER BY id ASC"), {'t': home}).fetchall(), attempts=2, backoff_base=0.1, label='lineups:details:roster-home')
+                    away_rows, dbx = _db_retry_read(dbx, lambda s: s.execute(_sa_text("SELECT player FROM team_roster WHERE team=:t ORDER BY id ASC"), {'t': away}).fetchall(), attempts=2, backoff_base=0.1, label='lineups:details:roster-away')
+                    home_players = [r[0] for r in home_rows] if home_rows else []
+                    away_players = [r[0] for r in away_rows] if away_rows else []
+            finally:
+                dbx.close()
+        except Exception:
+            home_players = []
+            away_players = []
+    # Подтянем события игроков из БД (если доступна)
+    events = {'home': [], 'away': []}
+    if SessionLocal is not None:
+        try:
+            dbx = get_db()
+            try:
+                rows = dbx.query(MatchPlayerEvent).filter(MatchPlayerEvent.home==home, MatchPlayerEvent.away==away).order_by(MatchPlayerEvent.minute.asc().nulls_last()).all()
+                for e in rows:
+                    side = 'home' if (e.team or 'home') == 'home' else 'away'
+                    events[side].append({
+                        'minute': (int(e.minute) if e.minute is not None else None),
+                        'player': e.player,
+                        'type': e.type,
+                        'note': e.note or ''
+                    })
+            finally:
+                dbx.close()
+        except Exception:
             events = {'home': [], 'away': []}
-            if SessionLocal is not None:
-                try:
-                    dbx = get_db()
-                    try:
-                        rows = dbx.query(MatchPlayerEvent).filter(MatchPlayerEvent.home==home, MatchPlayerEvent.away==away).order_by(MatchPlayerEvent.minute.asc().nulls_last()).all()
-                        for e in rows:
-                            side = 'home' if (e.team or 'home') == 'home' else 'away'
-                            events[side].append({
-                                'minute': (int(e.minute) if e.minute is not None else None),
-                                'player': e.player,
-                                'type': e.type,
-                                'note': e.note or ''
-                            })
-                    finally:
-                        dbx.close()
-                except Exception:
-                    events = {'home': [], 'away': []}
-            if extended_lineups:
-                flat_home = [p['player'] for p in extended_lineups['home']['starting_eleven']] + [p['player'] for p in extended_lineups['home']['substitutes']]
-                flat_away = [p['player'] for p in extended_lineups['away']['starting_eleven']] + [p['player'] for p in extended_lineups['away']['substitutes']]
-                payload_core = {
-                    'teams': {'home': home, 'away': away},
-                    'rosters': {'home': flat_home, 'away': flat_away},
-                    'lineups': extended_lineups,
-                    'events': events
-                }
-            else:
-                payload_core = {
-                    'teams': {'home': home, 'away': away},
-                    'rosters': {'home': home_players, 'away': away_players},
-                    'events': events
-                }
-            # лог для диагностики пустых составов
-            if not home_players and not away_players:
-                try:
-                    app.logger.info("Rosters not found for %s vs %s", home, away)
-                except Exception:
-                    pass
+    if extended_lineups:
+        flat_home = [p['player'] for p in extended_lineups['home']['starting_eleven']] + [p['player'] for p in extended_lineups['home']['substitutes']]
+        flat_away = [p['player'] for p in extended_lineups['away']['starting_eleven']] + [p['player'] for p in extended_lineups['away']['substitutes']]
+        payload_core = {
+            'teams': {'home': home, 'away': away},
+            'rosters': {'home': flat_home, 'away': flat_away},
+            'lineups': extended_lineups,
+            'events': events
+        }
+    else:
+        payload_core = {
+            'teams': {'home': home, 'away': away},
+            'rosters': {'home': home_players, 'away': away_players},
+            'events': events
+        }
+    # лог для диагностики пустых составов
+    if not home_players and not away_players:
+        try:
+            app.logger.info("Rosters not found for %s vs %s", home, away)
+        except Exception:
+            pass
+    return payload_core
+
+
+@app.route('/api/match-details', methods=['GET'])
+def api_match_details():
+    """DB-only: составы и события по матчу без Google Sheets.
+    Параметры: home, away (строки). Возвращает { teams?, rosters, lineups?, events }.
+    """
+    try:
+        home = (request.args.get('home') or '').strip()
+        away = (request.args.get('away') or '').strip()
+        if not home or not away:
+            return jsonify({'error': 'home и away обязательны'}), 400
+        cache_key = f"{home.strip().lower()}|{away.strip().lower()}"
+        def _build():
+            now_ts = int(time.time())
+            cached = MATCH_DETAILS_CACHE.get(cache_key)
+            if cached and (now_ts - cached['ts'] < MATCH_DETAILS_TTL):
+                return cached['payload']
+            payload_core = _build_match_details_payload(home, away)
             # сохраняем локально для быстрой отдачи до истечения TTL
             MATCH_DETAILS_CACHE[cache_key] = { 'ts': int(time.time()), 'etag': _etag_for_payload(payload_core), 'payload': payload_core }
             return payload_core
@@ -12529,12 +12731,17 @@ def api_admin_generate_season_schedule():
             # full_reset: выполнить полный сброс доменных данных (включая ставки и админ-логи),
             # затем полностью очистить таблицу matches с перезапуском последовательности ID
             if mode == 'full_reset':
+                force = str(request.form.get('force') or request.args.get('force')
+                            or payload_json.get('force') or '').strip().lower() == 'yes'
                 try:
                     # Полный сброс (внутри очистит кэши/снапшоты и т.д.)
-                    _ = _perform_full_reset(clear_admin_logs=True)
+                    reset_data, reset_code = _perform_full_reset(clear_admin_logs=True, force=force)
                 except Exception:
                     # продолжаем, даже если часть шагов сброса не удалась
-                    pass
+                    reset_data, reset_code = None, 200
+                if reset_code != 200 and (reset_data or {}).get('error') == 'backup_failed':
+                    # Нет точки восстановления — matches тоже не трогаем
+                    return jsonify(reset_data), reset_code
                 try:
                     # Полная очистка таблицы matches и зависимых с перезапуском ID
                     from sqlalchemy import text as _sql_text
@@ -12806,665 +13013,7 @@ def api_admin_refresh_all():
             pass
         return jsonify({'error': 'Не удалось выполнить объединённое обновление'}), 500
 
-@app.route('/api/streams/confirm', methods=['POST'])
-def api_streams_confirm():
-    """Админ подтверждает трансляцию для матча.
-    Поля: initData, home, away, date(YYYY-MM-DD optional), [vkVideoId]|[vkPostUrl]
-    """
-    try:
-        parsed = parse_and_verify_telegram_init_data(request.form.get('initData',''))
-        if not parsed or not parsed.get('user'):
-            return jsonify({'error': 'Недействительные данные'}), 401
-        user_id = str(parsed['user'].get('id'))
-        admin_id = os.environ.get('ADMIN_USER_ID','')
-        if not admin_id or user_id != admin_id:
-            return jsonify({'error': 'forbidden'}), 403
-        def _norm_team(v:str)->str:
-            return ' '.join(v.strip().split()).lower()
-        home_raw = (request.form.get('home') or '').strip()
-        away_raw = (request.form.get('away') or '').strip()
-        home = _norm_team(home_raw)
-        away = _norm_team(away_raw)
-        date_str = (request.form.get('date') or '').strip()  # YYYY-MM-DD
-        vk_id = (request.form.get('vkVideoId') or '').strip()
-        vk_url = (request.form.get('vkPostUrl') or '').strip()
-        # Если прислали embed-ссылку video_ext.php — извлечём oid/id и сохраним как vkVideoId
-        try:
-            if vk_url and 'video_ext.php' in vk_url:
-                u = urlparse(vk_url)
-                q = parse_qs(u.query)
-                oid = (q.get('oid',[None])[0])
-                vid = (q.get('id',[None])[0])
-                if oid and vid:
-                    vk_id = f"{oid}_{vid}"
-                    vk_url = ''
-        except Exception:
-            pass
-        # Также поддержим прямую ссылку вида https://vk.com/video-123456_654321
-        try:
-            if vk_url and '/video' in vk_url:
-                path = urlparse(vk_url).path or ''
-                # /video-123456_654321 или /video123_456
-                import re as _re
-                m = _re.search(r"/video(-?\d+_\d+)", path)
-                if m:
-                    vk_id = m.group(1)
-                    vk_url = ''
-        except Exception:
-            pass
-        if not home or not away:
-            return jsonify({'error': 'home/away обязательны'}), 400
-        if not vk_id and not vk_url:
-            return jsonify({'error': 'нужен vkVideoId или vkPostUrl'}), 400
-        if vk_id and not re.match(r'^-?\d+_\d+$', vk_id):
-            return jsonify({'error': 'vkVideoId должен быть формата oid_id'}), 400
-        if SessionLocal is None:
-            return jsonify({'error': 'БД недоступна'}), 500
-        db: Session = get_db()
-        try:
-            from sqlalchemy import func
-            row = db.query(MatchStream).filter(func.lower(MatchStream.home)==home, func.lower(MatchStream.away)==away, MatchStream.date==(date_str or None)).first()
-            now = datetime.now(timezone.utc)
-            if not row:
-                row = MatchStream(home=home, away=away, date=(date_str or None))
-                db.add(row)
-            row.vk_video_id = vk_id or None
-            row.vk_post_url = vk_url or None
-            row.confirmed_at = now
-            row.updated_at = now
-            db.commit()
-            return jsonify({'status': 'ok', 'home': home_raw, 'away': away_raw, 'date': date_str, 'vkVideoId': row.vk_video_id, 'vkPostUrl': row.vk_post_url})
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"streams/confirm error: {e}")
-        return jsonify({'error': 'Не удалось сохранить трансляцию'}), 500
-
-@app.route('/api/streams/list', methods=['GET'])
-def api_streams_list():
-    """Возвращает список подтвержденных трансляций (минимальный набор)."""
-    try:
-        if SessionLocal is None:
-            return jsonify({'items': []})
-        db: Session = get_db()
-        try:
-            rows = db.query(MatchStream).all()
-            items = []
-            for r in rows:
-                items.append({'home': r.home, 'away': r.away, 'date': r.date or '', 'vkVideoId': r.vk_video_id or '', 'vkPostUrl': r.vk_post_url or ''})
-            return jsonify({'items': items})
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"streams/list error: {e}")
-        return jsonify({'items': []})
-
-@app.route('/api/streams/upcoming', methods=['GET'])
-def api_streams_upcoming():
-    """Админ: список матчей рядом со стартом.
-    Параметры:
-      - window_min: показать матчи, которые начнутся в ближайшие N минут (по умолчанию 60, минимум 60, максимум 240)
-      - include_started_min: также включить матчи, которые уже начались за последние N минут (по умолчанию 30)
-    Возвращает: { matches: [{home, away, datetime}] }
-    """
-    try:
-        try:
-            window_min = int(request.args.get('window_min') or '360')
-        except Exception:
-            window_min = 360
-        # Минимум 60 минут, максимум 480 (8 часов)
-        window_min = max(60, min(480, window_min))
-        try:
-            include_started_min = int(request.args.get('include_started_min') or '30')
-        except Exception:
-            include_started_min = 30
-        include_started_min = max(0, min(180, include_started_min))
-        # Сдвиг локального времени расписания относительно системного времени сервера
-        try:
-            tz_min = int(os.environ.get('SCHEDULE_TZ_SHIFT_MIN') or '0')
-        except Exception:
-            tz_min = 0
-        if tz_min == 0:
-            try:
-                tz_h = int(os.environ.get('SCHEDULE_TZ_SHIFT_HOURS') or '0')
-            except Exception:
-                tz_h = 0
-            tz_min = tz_h * 60
-        now = datetime.now() + timedelta(minutes=tz_min)
-        until = now + timedelta(minutes=window_min)
-        since = now - timedelta(minutes=include_started_min)
-        # Достаём расписание из снапшота; если пусто — из таблицы
-        tours = []
-        if SessionLocal is not None:
-            dbx = get_db()
-            try:
-                # Correct signature requires Snapshot model and logger
-                snap = _snapshot_get(dbx, Snapshot, 'schedule', app.logger)
-                payload = snap and snap.get('payload')
-                tours = payload and payload.get('tours') or []
-            finally:
-                dbx.close()
-    # Без fallback к Sheets
-        matches = []
-        for t in tours or []:
-            for m in (t.get('matches') or []):
-                try:
-                    dt = None
-                    # 1) Поле datetime (возможны варианты: naive, с суффиксом Z, с явным смещением +hh:mm)
-                    if m.get('datetime'):
-                        raw = str(m['datetime']).strip()
-                        # поддержка ISO c 'Z'
-                        if raw.endswith('Z'):
-                            raw = raw[:-1] + '+00:00'
-                        try:
-                            parsed = datetime.fromisoformat(raw)
-                        except Exception:
-                            parsed = None
-                        if parsed is not None:
-                            # если aware — приводим к локальному наивному времени (UTC + tz_min)
-                            if getattr(parsed, 'tzinfo', None) is not None:
-                                parsed_utc_naive = parsed.astimezone(timezone.utc).replace(tzinfo=None)
-                                dt = parsed_utc_naive + timedelta(minutes=tz_min)
-                            else:
-                                # считаем локальным уже
-                                dt = parsed
-                    # 2) Пара date + time (наивные локальные)
-                    elif m.get('date'):
-                        d = datetime.fromisoformat(str(m['date'])).date()
-                        tm = None
-                        try:
-                            tm = datetime.strptime((m.get('time') or '00:00'), "%H:%M").time()
-                        except Exception:
-                            try:
-                                tm = datetime.strptime((m.get('time') or '00:00:00'), "%H:%M:%S").time()
-                            except Exception:
-                                tm = datetime.min.time()
-                        dt = datetime.combine(d, tm)
-                    if not dt:
-                        continue
-                    # Показываем матчи, которые начнутся в течение окна, а также те, что уже начались не ранее чем include_started_min минут назад
-                    if since <= dt <= until:
-                        matches.append({ 'home': m.get('home',''), 'away': m.get('away',''), 'datetime': dt.isoformat() })
-                except Exception:
-                    continue
-        # Отсортируем по времени начала
-        try:
-            matches.sort(key=lambda x: x.get('datetime') or '')
-        except Exception:
-            pass
-        return jsonify({ 'matches': matches })
-    except Exception as e:
-        app.logger.error(f"streams/upcoming error: {e}")
-        return jsonify({ 'matches': [] }), 200
-
-@app.route('/api/streams/set', methods=['POST'])
-def api_streams_set():
-    """Админский эндпоинт (совместим с фронтом): сохранить ссылку на трансляцию.
-    Поля: initData, home, away, datetime(iso optional), vk (строка: video_ext или прямая ссылка)
-    """
-    try:
-        import re as _re
-        parsed = parse_and_verify_telegram_init_data(request.form.get('initData', ''))
-        if not parsed or not parsed.get('user'):
-            return jsonify({'error': 'Недействительные данные'}), 401
-        user_id = str(parsed['user'].get('id'))
-        admin_id = os.environ.get('ADMIN_USER_ID', '')
-        if not admin_id or user_id != admin_id:
-            return jsonify({'error': 'forbidden'}), 403
-        def _norm_team(v:str)->str:
-            return ' '.join(v.strip().split()).lower()
-        home_raw = (request.form.get('home') or '').strip()
-        away_raw = (request.form.get('away') or '').strip()
-        home = _norm_team(home_raw)
-        away = _norm_team(away_raw)
-        dt_raw = (request.form.get('datetime') or '').strip()
-        # Поддержка ISO форматов с суффиксом Z
-        if dt_raw.endswith('Z'):
-            dt_raw = dt_raw[:-1] + '+00:00'
-        vk_raw = (request.form.get('vk') or '').strip()
-        if not home or not away:
-            return jsonify({'error': 'home/away обязательны'}), 400
-        # Определим дату для ключа
-        date_str = ''
-        try:
-            if dt_raw:
-                # Попробуем разные варианты разделения даты
-                date_str = datetime.fromisoformat(dt_raw).date().isoformat()
-        except Exception:
-            try:
-                date_part = dt_raw.split('T')[0]
-                datetime.fromisoformat(date_part)  # проверка
-                date_str = date_part
-            except Exception:
-                date_str = ''
-        # Разобрать vk_raw в vkVideoId или vkPostUrl
-        vk_id = ''
-        vk_url = ''
-        s = (vk_raw or '').strip()
-        try:
-            # Если админ вставил целиком <iframe ...>, извлечём src
-            if '<iframe' in s.lower():
-                m = _re.search(r"src\s*=\s*['\"]([^'\"]+)['\"]", s, _re.IGNORECASE)
-                if m:
-                    s = m.group(1).strip()
-            # Если где-то в строке встречаются oid и id (даже без корректного URL)
-            m2_oid = _re.search(r"(?:[?&#]|\b)oid=([-\d]+)\b", s)
-            m2_id = _re.search(r"(?:[?&#]|\b)id=(\d+)\b", s)
-            if m2_oid and m2_id:
-                vk_id = f"{m2_oid.group(1)}_{m2_id.group(1)}"
-            else:
-                # Пробуем как URL (vk.com или vkvideo.ru неважно)
-                u = urlparse(s)
-                if 'video_ext.php' in (u.path or ''):
-                    q = parse_qs(u.query)
-                    oid = (q.get('oid', [None])[0])
-                    vid = (q.get('id', [None])[0])
-                    if oid and vid:
-                        vk_id = f"{oid}_{vid}"
-                elif '/video' in (u.path or ''):
-                    m = _re.search(r"/video(-?\d+_\d+)", u.path or '')
-                    if m:
-                        vk_id = m.group(1)
-            # Если так и не получили vk_id, но похоже на ссылку — сохраним как постовую URL
-            if not vk_id:
-                # Принимаем только валидные http(s) ссылки, иначе игнор
-                if s.startswith('http://') or s.startswith('https://'):
-                    vk_url = s
-        except Exception:
-            # Если не смогли распарсить — сохраним как есть, но только если это URL
-            if s.startswith('http://') or s.startswith('https://'):
-                vk_url = s
-        if not vk_id and not vk_url:
-            return jsonify({'error': 'vk ссылка пуста'}), 400
-        if vk_id and not _re.match(r'^-?\d+_\d+$', vk_id):
-            return jsonify({'error': 'vkVideoId должен быть формата oid_id'}), 400
-        if SessionLocal is None:
-            return jsonify({'error': 'БД недоступна'}), 500
-        db: Session = get_db()
-        try:
-            from sqlalchemy import func
-            row = db.query(MatchStream).filter(
-                func.lower(MatchStream.home) == home,
-                func.lower(MatchStream.away) == away,
-                MatchStream.date == (date_str or None)
-            ).first()
-            if not row and not date_str:
-                # Разрешим перезапись самой свежей записи, даже если она без даты, если совпали команды
-                row = db.query(MatchStream).filter(
-                    func.lower(MatchStream.home) == home,
-                    func.lower(MatchStream.away) == away
-                ).order_by(MatchStream.updated_at.desc()).first()
-            now_ts = datetime.now(timezone.utc)
-            prev_id = None
-            prev_url = None
-            if not row:
-                row = MatchStream(home=home, away=away, date=(date_str or None))
-                db.add(row)
-            else:
-                try:
-                    prev_id = row.vk_video_id or None
-                    prev_url = row.vk_post_url or None
-                except Exception:
-                    prev_id = None
-                    prev_url = None
-            row.vk_video_id = vk_id or None
-            row.vk_post_url = vk_url or None
-            row.confirmed_at = now_ts
-            row.updated_at = now_ts
-            db.commit()
-            # Логирование факта сохранения для аудита
-            try:
-                app.logger.info(
-                    f"streams/set by admin {user_id}: {home} vs {away} ({date_str or '-'}) -> "
-                    f"vkVideoId={row.vk_video_id or ''} vkPostUrl={row.vk_post_url or ''} "
-                    f"(prev: id={prev_id or ''} url={prev_url or ''})"
-                )
-            except Exception:
-                pass
-            msg = 'Ссылка принята и сохранена'
-            try:
-                app.logger.info(f"streams/set saved: home_raw='{home_raw}' away_raw='{away_raw}' norm=('{home}','{away}') date='{date_str}' vk_id='{row.vk_video_id}' vk_url='{row.vk_post_url}'")
-            except Exception:
-                pass
-            return jsonify({
-                'status': 'ok',
-                'message': msg,
-                'home': home_raw,
-                'away': away_raw,
-                'date': date_str,
-                'vkVideoId': row.vk_video_id or '',
-                'vkPostUrl': row.vk_post_url or '',
-                'prev': {'vkVideoId': prev_id or '', 'vkPostUrl': prev_url or ''}
-            })
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"streams/set error: {e}")
-        return jsonify({'error': 'Не удалось сохранить'}), 500
-
-@app.route('/api/streams/get', methods=['GET'])
-def api_streams_get():
-    """Вернёт ссылку на трансляцию матча.
-
-    Логика:
-    1. Нормализуем названия команд (пробелы + lowercase).
-    2. Сначала отдаём последнюю сохранённую ссылку (если она актуальна <=48ч), БЕЗ проверки окна – чтобы админ сразу видел результат.
-    3. Если явной ссылки нет – сверяемся с расписанием и, если до матча осталось <= window минут, повторно ищем ссылку (на случай несовпадения даты).
-    4. Иначе available=False.
-    """
-    if SessionLocal is None:
-        return jsonify({'available': False})
-
-    # --- Входные параметры ---
-    def _norm_team(v: str) -> str:
-        try:
-            return ' '.join(v.strip().replace('ё','е').split()).lower()
-        except Exception:
-            return (v or '').strip().lower()
-
-    home_raw = (request.args.get('home') or '').strip()
-    away_raw = (request.args.get('away') or '').strip()
-    home = _norm_team(home_raw)
-    away = _norm_team(away_raw)
-    date_str = (request.args.get('date') or '').strip()
-    try:
-        win = int(request.args.get('window') or '60')
-    except Exception:
-        win = 60
-    win = max(10, min(240, win))
-
-    from sqlalchemy import func
-
-    # --- 1. Немедленный возврат сохранённой ссылки ---
-    force_any = (request.args.get('any') == '1')
-    try:
-        db = get_db()
-        try:
-            base_q = db.query(MatchStream).filter(
-                func.lower(MatchStream.home) == home,
-                func.lower(MatchStream.away) == away
-            )
-            row = base_q.filter(MatchStream.date == (date_str or None)).first()
-            if not row:
-                # Берём самую свежую вне зависимости от даты
-                row_latest = base_q.order_by(MatchStream.updated_at.desc()).first()
-                if row_latest:
-                    if force_any:
-                        row = row_latest
-                    else:
-                        try:
-                            if row_latest.updated_at and (datetime.now(timezone.utc) - row_latest.updated_at) <= timedelta(hours=48):
-                                row = row_latest
-                        except Exception:
-                            row = row_latest
-            if row and ((row.vk_video_id and row.vk_video_id.strip()) or (row.vk_post_url and row.vk_post_url.strip())):
-                try:
-                    app.logger.info(f"streams/get immediate link id='{row.vk_video_id}' url='{row.vk_post_url}' home='{home}' away='{away}' date='{date_str}' force_any={force_any}")
-                except Exception:
-                    pass
-                return jsonify({'available': True, 'vkVideoId': row.vk_video_id or '', 'vkPostUrl': row.vk_post_url or ''})
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"streams/get immediate lookup error: {e}")
-
-    # --- 2. Загрузка расписания (snapshot only) ---
-    tours = []
-    try:
-        dbs = get_db()
-        try:
-            snap = _snapshot_get(dbs, Snapshot, 'schedule', app.logger)
-            payload = snap and snap.get('payload')
-            tours = (payload and payload.get('tours')) or []
-        finally:
-            dbs.close()
-    except Exception:
-        pass
-    # без fallback к Sheets
-
-    # --- 3. Поиск матча в расписании ---
-    start_ts = None
-    if tours:
-        for t in tours:
-            matches = t.get('matches') or []
-            for m in matches:
-                try:
-                    if _norm_team(m.get('home','')) != home or _norm_team(m.get('away','')) != away:
-                        continue
-                    if m.get('datetime'):
-                        dt_obj = datetime.fromisoformat(str(m['datetime']).replace('Z', '+00:00'))
-                    elif m.get('date'):
-                        d_obj = datetime.fromisoformat(str(m['date'])).date()
-                        try:
-                            tm = datetime.strptime((m.get('time') or '00:00'), '%H:%M').time()
-                        except Exception:
-                            tm = datetime.min.time()
-                        dt_obj = datetime.combine(d_obj, tm)
-                    else:
-                        continue
-                    start_ts = int(dt_obj.timestamp() * 1000)
-                    raise StopIteration  # выходим из всех циклов
-                except StopIteration:
-                    break
-                except Exception:
-                    continue
-            if start_ts is not None:
-                break
-
-    # --- 4. Проверка окна ---
-    try:
-        tz_min = int(os.environ.get('SCHEDULE_TZ_SHIFT_MIN') or '0')
-    except Exception:
-        tz_min = 0
-    if tz_min == 0:
-        try:
-            tz_h = int(os.environ.get('SCHEDULE_TZ_SHIFT_HOURS') or '0')
-        except Exception:
-            tz_h = 0
-        tz_min = tz_h * 60
-    now_ms = int((time.time() + tz_min * 60) * 1000)
-    if not start_ts or (start_ts - now_ms) > win * 60 * 1000:
-        return jsonify({'available': False})
-
-    # --- 5. Повторный поиск ссылки в окне ---
-    try:
-        db = get_db()
-        try:
-            row2 = db.query(MatchStream).filter(
-                func.lower(MatchStream.home) == home,
-                func.lower(MatchStream.away) == away,
-                MatchStream.date == (date_str or None)
-            ).first()
-            if not row2 and date_str:
-                row2 = db.query(MatchStream).filter(
-                    func.lower(MatchStream.home) == home,
-                    func.lower(MatchStream.away) == away
-                ).order_by(MatchStream.updated_at.desc()).first()
-            if row2 and ((row2.vk_video_id and row2.vk_video_id.strip()) or (row2.vk_post_url and row2.vk_post_url.strip())):
-                return jsonify({'available': True, 'vkVideoId': row2.vk_video_id or '', 'vkPostUrl': row2.vk_post_url or ''})
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"streams/get window lookup error: {e}")
-    return jsonify({'available': False})
-
-@app.route('/api/streams/reset', methods=['POST'])
-def api_streams_reset():
-    """Админ: сбросить ссылку на трансляцию для конкретного матча (home/away/date)."""
-    try:
-        parsed = parse_and_verify_telegram_init_data(request.form.get('initData',''))
-        if not parsed or not parsed.get('user'):
-            return jsonify({'error': 'Недействительные данные'}), 401
-        user_id = str(parsed['user'].get('id'))
-        admin_id = os.environ.get('ADMIN_USER_ID','')
-        if not admin_id or user_id != admin_id:
-            return jsonify({'error': 'forbidden'}), 403
-        home = (request.form.get('home') or '').strip()
-        away = (request.form.get('away') or '').strip()
-        date_str = (request.form.get('date') or '').strip()
-        if not home or not away:
-            return jsonify({'error': 'home/away обязательны'}), 400
-        if SessionLocal is None:
-            return jsonify({'error': 'БД недоступна'}), 500
-        db: Session = get_db()
-        try:
-            row = db.query(MatchStream).filter(MatchStream.home==home, MatchStream.away==away, MatchStream.date==(date_str or None)).first()
-            if not row and date_str:
-                # поддержка старых записей без даты
-                row = db.query(MatchStream).filter(MatchStream.home==home, MatchStream.away==away).order_by(MatchStream.updated_at.desc()).first()
-            if not row:
-                return jsonify({'error': 'Запись не найдена'}), 404
-            row.vk_video_id = None
-            row.vk_post_url = None
-            row.confirmed_at = None
-            row.updated_at = datetime.now(timezone.utc)
-            db.commit()
-            return jsonify({'status': 'ok'})
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"streams/reset error: {e}")
-        return jsonify({'error': 'Не удалось сбросить ссылку'}), 500
-
-COMMENT_TTL_MINUTES = 60  # хранить комментарии трансляции 60 минут
-COMMENT_RATE_MINUTES = 5
-
-@app.route('/api/match/comments/list', methods=['GET'])
-def api_match_comments_list():
-    """Комментарии за последние COMMENT_TTL_MINUTES минут для матча. Параметры: home, away, date?"""
-    try:
-        if SessionLocal is None:
-            return jsonify({'items': []})
-        home = (request.args.get('home') or '').strip()
-        away = (request.args.get('away') or '').strip()
-        date_str = (request.args.get('date') or '').strip()
-        if not home or not away:
-            return jsonify({'items': []})
-        cutoff = datetime.now(timezone.utc) - timedelta(minutes=COMMENT_TTL_MINUTES)
-        db: Session = get_db()
-        try:
-            # Берём максимум 100 последних, затем переворачиваем в хронологический порядок
-            q = db.query(MatchComment).filter(
-                MatchComment.home==home,
-                MatchComment.away==away,
-                MatchComment.date==(date_str or None),
-                MatchComment.created_at >= cutoff
-            ).order_by(MatchComment.created_at.desc()).limit(100)
-            rows_desc = q.all()
-            rows = list(reversed(rows_desc))
-            # Избегаем N+1: батч-достаем имена пользователей
-            user_ids = list({int(r.user_id) for r in rows})
-            names_map = {}
-            if user_ids:
-                for u in db.query(User).filter(User.user_id.in_(user_ids)).all():
-                    try:
-                        names_map[int(u.user_id)] = u.display_name or 'User'
-                    except Exception:
-                        pass
-            items = []
-            for r in rows:
-                uid = int(r.user_id)
-                items.append({
-                    'user_id': uid,
-                    'name': names_map.get(uid, 'User'),
-                    'content': r.content,
-                    'created_at': r.created_at.isoformat()
-                })
-            # ETag и Last-Modified
-            last_ts = rows[-1].created_at if rows else None
-            # Версия как md5 по (last_ts + count)
-            version_seed = f"{last_ts.isoformat() if last_ts else ''}:{len(rows)}"
-            etag = hashlib.md5(version_seed.encode('utf-8')).hexdigest()
-            inm = request.headers.get('If-None-Match')
-            ims = request.headers.get('If-Modified-Since')
-            # Сравнение If-None-Match
-            if inm and inm == etag:
-                resp = app.response_class(status=304)
-                resp.headers['ETag'] = etag
-                if last_ts:
-                    resp.headers['Last-Modified'] = last_ts.strftime('%a, %d %b %Y %H:%M:%S GMT')
-                resp.headers['Cache-Control'] = 'no-cache'
-                return resp
-            # Сравнение If-Modified-Since
-            if ims and last_ts:
-                try:
-                    # Разбор RFC1123
-                    from email.utils import parsedate_to_datetime
-                    ims_dt = parsedate_to_datetime(ims)
-                    # Приводим к aware UTC
-                    if ims_dt.tzinfo is None:
-                        ims_dt = ims_dt.replace(tzinfo=timezone.utc)
-                    if last_ts <= ims_dt:
-                        resp = app.response_class(status=304)
-                        resp.headers['ETag'] = etag
-                        resp.headers['Last-Modified'] = last_ts.strftime('%a, %d %b %Y %H:%M:%S GMT')
-                        resp.headers['Cache-Control'] = 'no-cache'
-                        return resp
-                except Exception:
-                    pass
-            resp = jsonify({'items': items, 'version': etag})
-            resp.headers['ETag'] = etag
-            if last_ts:
-                resp.headers['Last-Modified'] = last_ts.strftime('%a, %d %b %Y %H:%M:%S GMT')
-            resp.headers['Cache-Control'] = 'no-cache'
-            return resp
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"comments/list error: {e}")
-        return jsonify({'items': []})
-
-@app.route('/api/match/comments/add', methods=['POST'])
-def api_match_comments_add():
-    """Добавляет комментарий (rate limit: 1 комментарий в 5 минут на пользователя/матч/дату)."""
-    try:
-        # Global anti-spam limiter: не чаще 3 комментариев за 60 секунд на пользователя
-        limited = _rate_limit('comments_add', limit=3, window_sec=60, allow_pseudo=False)
-        if limited is not None:
-            return limited
-        parsed = parse_and_verify_telegram_init_data(request.form.get('initData',''))
-        if not parsed or not parsed.get('user'):
-            return jsonify({'error': 'Недействительные данные'}), 401
-        user_id = int(parsed['user'].get('id'))
-        home = (request.form.get('home') or '').strip()
-        away = (request.form.get('away') or '').strip()
-        date_str = (request.form.get('date') or '').strip()
-        content = (request.form.get('content') or '').strip()
-        if not home or not away or not content:
-            return jsonify({'error': 'Пустой комментарий'}), 400
-        if len(content) > 280:
-            return jsonify({'error': 'Слишком длинный комментарий'}), 400
-        if SessionLocal is None:
-            return jsonify({'error': 'БД недоступна'}), 500
-        db: Session = get_db()
-        try:
-            # rate limit: ищем последний комментарий этого пользователя под этим матчем
-            window_start = datetime.now(timezone.utc) - timedelta(minutes=COMMENT_RATE_MINUTES)
-            recent = db.query(MatchComment).filter(
-                MatchComment.user_id==user_id,
-                MatchComment.home==home,
-                MatchComment.away==away,
-                MatchComment.date==(date_str or None),
-                MatchComment.created_at >= window_start
-            ).order_by(MatchComment.created_at.desc()).first()
-            if recent:
-                return jsonify({'error': f'Можно комментировать раз в {COMMENT_RATE_MINUTES} минут'}), 429
-            row = MatchComment(home=home, away=away, date=(date_str or None), user_id=user_id, content=content)
-            db.add(row)
-            # счетчик достижений
-            cc = db.get(CommentCounter, user_id)
-            if not cc:
-                cc = CommentCounter(user_id=user_id, comments_total=0, updated_at=datetime.now(timezone.utc))
-                db.add(cc)
-            cc.comments_total = int(cc.comments_total or 0) + 1
-            cc.updated_at = datetime.now(timezone.utc)
-            db.commit()
-            return jsonify({'status':'ok', 'created_at': row.created_at.isoformat(), 'comments_total': int(cc.comments_total or 0)})
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"comments/add error: {e}")
-        return jsonify({'error': 'Не удалось сохранить комментарий'}), 500
+# Трансляции и комментарии матчей: api/streams.py (ленивый blueprint, см. init_lazy_blueprints ниже)
 
 @app.route('/admin')
 @app.route('/admin/')
@@ -13873,11 +13422,11 @@ def admin_init_database_form():
 @app.route('/api/admin/users-stats', methods=['POST'])
 @log_user_management("Получение статистики пользователей")
 def api_admin_users_stats():
-    """Статистика пользователей (только админ):
-    - Всего пользователей
-    - Онлайн за 5/15 минут
-    - Активные уникальные за 1/7/30 дней (updated_at)
-    - Новые пользователи за 30 дней (created_at)
+    """Статистика пользователей (только админ) — строка user_stats + шарды событий + онлайн одним агрегатом:
+    - Всего пользователей, новые сегодня / за 30 дней
+    - Онлайн за 5/15 минут, активные за 1/7/30 дней (updated_at)
+    - С хотя бы одной ставкой / чек-ином, ставки и чек-ины сегодня
+    Событийные счётчики и онлайн точны сразу, окна активности 1/7/30 дней — на момент reconciled_at (USER_STATS_RECONCILE_SEC).
     """
     try:
         parsed = parse_and_verify_telegram_init_data(request.form.get('initData', ''))
@@ -13889,65 +13438,134 @@ def api_admin_users_stats():
                 affected_data={'error': 'Invalid auth data'}
             )
             return jsonify({'error': 'Недействительные данные'}), 401
-        user_id = str(parsed['user'].get('id'))
+        user_id = str(parsed['user'].get('id'))
+        admin_id = os.environ.get('ADMIN_USER_ID', '')
+        if not admin_id or user_id != admin_id:
+            manual_log(
+                action="users_stats",
+                description=f"Запрос статистики пользователей - доступ запрещен для пользователя {user_id}",
+                result_status='error',
+                affected_data={'user_id': user_id, 'admin_required': True}
+            )
+            return jsonify({'error': 'forbidden'}), 403
+        if SessionLocal is None:
+            manual_log(
+                action="users_stats",
+                description="Запрос статистики пользователей - база данных недоступна",
+                result_status='warning',
+                affected_data={'error': 'Database unavailable', 'fallback_used': True}
+            )
+            return jsonify({'total_users': 0, 'online_5m': 0, 'online_15m': 0, 'active_1d': 0, 'active_7d': 0, 'active_30d': 0, 'new_30d': 0,
+                            'new_today': 0, 'with_bets': 0, 'with_checkins': 0, 'checkins_today': 0, 'bets_today': 0})
+        now = datetime.now(timezone.utc)
+        db: Session = get_db()
+        try:
+            stats_data = _user_stats.read(db, UserStats, UserStatsCounter, User, now)
+        finally:
+            db.close()
+        # Строки ещё нет или фоновый пересчёт не идёт (планировщик выключен) — пересчитываем на месте
+        if _user_stats.is_stale(stats_data, now, 2 * max(30, SETTINGS.USER_STATS_RECONCILE_SEC)):
+            if _user_stats_reconcile() is not None:
+                db = get_db()
+                try:
+                    stats_data = _user_stats.read(db, UserStats, UserStatsCounter, User, now)
+                finally:
+                    db.close()
+        if stats_data is None:
+            return jsonify({'error': 'Не удалось получить статистику'}), 500
+        stats_data['ts'] = now.isoformat()
+
+        # Логируем запрос статистики
+        manual_log(
+            action="users_stats",
+            description="Статистика пользователей получена",
+            result_status='success',
+            affected_data={
+                'stats': stats_data,
+                'requested_by': user_id
+            }
+        )
+
+        return jsonify(stats_data)
+    except Exception as e:
+        app.logger.error(f"Ошибка admin users stats: {e}")
+        return jsonify({'error': 'Не удалось получить статистику'}), 500
+
+
+@app.route('/api/admin/users-stats/history', methods=['POST'])
+def api_admin_users_stats_history():
+    """История счётчиков пользователей по дням (user_stats_daily) для графиков. Поля: initData, [days=30]"""
+    try:
+        parsed = parse_and_verify_telegram_init_data(request.form.get('initData', ''))
+        if not parsed or not parsed.get('user'):
+            return jsonify({'error': 'Недействительные данные'}), 401
         admin_id = os.environ.get('ADMIN_USER_ID', '')
-        if not admin_id or user_id != admin_id:
-            manual_log(
-                action="users_stats",
-                description=f"Запрос статистики пользователей - доступ запрещен для пользователя {user_id}",
-                result_status='error',
-                affected_data={'user_id': user_id, 'admin_required': True}
-            )
+        if not admin_id or str(parsed['user'].get('id')) != admin_id:
             return jsonify({'error': 'forbidden'}), 403
         if SessionLocal is None:
-            manual_log(
-                action="users_stats",
-                description="Запрос статистики пользователей - база данных недоступна",
-                result_status='warning',
-                affected_data={'error': 'Database unavailable', 'fallback_used': True}
-            )
-            return jsonify({'total_users': 0, 'online_5m': 0, 'online_15m': 0, 'active_1d': 0, 'active_7d': 0, 'active_30d': 0, 'new_30d': 0})
+            return jsonify({'days': []})
+        try:
+            days = min(365, max(1, int(request.form.get('days') or 30)))
+        except Exception:
+            days = 30
         db: Session = get_db()
         try:
-            total = db.query(func.count(User.user_id)).scalar() or 0
-            now = datetime.now(timezone.utc)
-            dt5 = now - timedelta(minutes=5)
-            dt15 = now - timedelta(minutes=15)
-            online5 = db.query(func.count(User.user_id)).filter(User.updated_at >= dt5).scalar() or 0
-            online15 = db.query(func.count(User.user_id)).filter(User.updated_at >= dt15).scalar() or 0
-            d1 = now - timedelta(days=1)
-            d7 = now - timedelta(days=7)
-            d30 = now - timedelta(days=30)
-            active1 = db.query(func.count(func.distinct(User.user_id))).filter(User.updated_at >= d1).scalar() or 0
-            active7 = db.query(func.count(func.distinct(User.user_id))).filter(User.updated_at >= d7).scalar() or 0
-            active30 = db.query(func.count(func.distinct(User.user_id))).filter(User.updated_at >= d30).scalar() or 0
-            new30 = db.query(func.count(User.user_id)).filter(User.created_at >= d30).scalar() or 0
-            
-            stats_data = {
-                'total_users': int(total),
-                'online_5m': int(online5), 'online_15m': int(online15),
-                'active_1d': int(active1), 'active_7d': int(active7), 'active_30d': int(active30),
-                'new_30d': int(new30),
-                'ts': now.isoformat()
-            }
-            
-            # Логируем запрос статистики
-            manual_log(
-                action="users_stats",
-                description="Статистика пользователей получена",
-                result_status='success',
-                affected_data={
-                    'stats': stats_data,
-                    'requested_by': user_id
-                }
-            )
-            
-            return jsonify(stats_data)
+            return jsonify({'days': _user_stats.history(db, UserStatsDaily, days)})
         finally:
             db.close()
     except Exception as e:
-        app.logger.error(f"Ошибка admin users stats: {e}")
-        return jsonify({'error': 'Не удалось получить статистику'}), 500
+        app.logger.error(f"Ошибка admin users stats history: {e}")
+        return jsonify({'error': 'Не удалось получить историю'}), 500
+
+@app.route('/api/admin/backups', methods=['POST'])
+@require_admin()
+def api_admin_backup_create():
+    """Потоковая резервная копия таблиц приложения. Поля: initData, [kind=full|incremental], [tables=a,b]"""
+    kind = (request.form.get('kind') or 'full').strip().lower()
+    tables = [t.strip() for t in (request.form.get('tables') or '').split(',') if t.strip()] or None
+    meta = _stream_admin_backup('manual', tables, incremental=(kind == 'incremental'),
+                                created_by=os.environ.get('ADMIN_USER_ID') or None)
+    if meta is None:
+        return jsonify({'error': 'Не удалось создать резервную копию'}), 500
+    return jsonify({'status': 'ok', 'backup': meta})
+
+
+@app.route('/api/admin/backups/<int:backup_id>/restore', methods=['POST'])
+@require_admin()
+def api_admin_backup_restore(backup_id: int):
+    """Восстановление потоковой копии пачками вставок. Поля: initData, confirm=yes.
+    Полная копия заменяет содержимое своих таблиц, инкрементальная — upsert по первичному ключу."""
+    if (request.form.get('confirm') or '').strip().lower() != 'yes':
+        return jsonify({'error': 'Требуется confirm=yes'}), 400
+    if SessionLocal is None:
+        return jsonify({'error': 'БД недоступна'}), 500
+    db: Session = get_db()
+    try:
+        counts = _backups.restore_backup(db, {t.name: t for t in Base.metadata.sorted_tables}, backup_id,
+                                         batch_rows=SETTINGS.BACKUP_BATCH_ROWS)
+        db.commit()
+    except LookupError as e:
+        db.rollback()
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        db.rollback()
+        app.logger.error(f"admin backup restore failed: {e}")
+        return jsonify({'error': 'Не удалось восстановить резервную копию'}), 500
+    finally:
+        db.close()
+    # Данные подменены целиком — сбрасываем кэши ответов
+    try:
+        if cache_manager:
+            cache_manager.invalidate_pattern('cache:')
+        _ETAG_HELPER_CACHE.clear()
+    except Exception as e:
+        app.logger.warning(f"cache reset after restore failed: {e}")
+    try:
+        manual_log(action='admin_backup_restore', description=f'Восстановлена резервная копия {backup_id}',
+                   result_status='success', affected_data={'backup_id': backup_id, 'rows': counts})
+    except Exception:
+        pass
+    return jsonify({'status': 'ok', 'restored': counts})
 
 # ---------------- Version bump to force client cache refresh ----------------
 def _get_app_version(db: Session) -> int:
@@ -14003,8 +13621,26 @@ def api_admin_bump_version():
         app.logger.error(f"bump-version error: {e}")
         return jsonify({'error': 'Не удалось обновить версию'}), 500
 
-def _perform_full_reset(clear_admin_logs: bool = False):
+@app.route('/api/admin/settings/reload', methods=['POST'])
+def api_admin_settings_reload():
+    """Перечитывает реестр настроек (BET_*, кеши, sync, фичефлаги) без рестарта. Только админ по initData.
+    Действует на воркер, обработавший запрос; остальным воркерам — SIGHUP."""
+    try:
+        parsed = parse_and_verify_telegram_init_data(request.form.get('initData', ''))
+        if not parsed or not parsed.get('user'):
+            return jsonify({'error': 'Недействительные данные'}), 401
+        user_id = str(parsed['user'].get('id'))
+        admin_id = os.environ.get('ADMIN_USER_ID', '')
+        if not admin_id or user_id != admin_id:
+            return jsonify({'error': 'forbidden'}), 403
+        return jsonify({'status': 'ok', **_reload_settings('admin')})
+    except Exception as e:
+        app.logger.error(f"settings reload error: {e}")
+        return jsonify({'error': 'Не удалось перечитать настройки'}), 500
+
+def _perform_full_reset(clear_admin_logs: bool = False, force: bool = False):
     """Reusable helper to perform full reset. Optionally clears admin_logs and optionally auto-imports schedule.
+    Без копии таблиц (точки восстановления) сброс не выполняется; force=True — сброс без копии.
 
     Returns: dict(status, summary, post)
     """
@@ -14019,6 +13655,13 @@ def _perform_full_reset(clear_admin_logs: bool = False):
         'admin_logs_preserved': (not clear_admin_logs),
     }
 
+    # Потоковая копия таблиц приложения до очистки (память не растёт с объёмом данных)
+    _bk = _stream_admin_backup('full_reset')
+    if _bk is None and not force:
+        return {'status': 'error', 'error': 'backup_failed',
+                'message': 'Не удалось создать резервную копию перед сбросом; повторите с force=yes, чтобы сбросить без копии'}, 500
+    summary['backup_id'] = _bk['id'] if _bk else None
+
     db: Session = get_db()
     try:
         # Последовательно очищаем таблицы доменной логики (кроме users)
@@ -14066,13 +13709,23 @@ def _perform_full_reset(clear_admin_logs: bool = False):
         summary['db_deleted']['shop_order_items'] = _safe_delete(db.query(ShopOrderItem))
         summary['db_deleted']['shop_orders'] = _safe_delete(db.query(ShopOrder))
         summary['db_deleted']['bets'] = _safe_delete(db.query(Bet))
+        # Суточные суммы ставок (лимит BET_DAILY_MAX_STAKE) — вместе со ставками, иначе лимит исчерпан до конца дня
+        summary['db_deleted']['user_daily_stake'] = _safe_delete(db.query(UserDailyStake))
         summary['db_deleted']['referrals'] = _safe_delete(db.query(Referral))
+        # Счётчики достижений считаются из ставок/рефералов/чек-инов — без них разблокировки шли бы от старых значений
+        summary['db_deleted']['user_achievement_progress'] = _safe_delete(db.query(UserAchievementProgress))
         summary['db_deleted']['match_streams'] = _safe_delete(db.query(MatchStream))
         summary['db_deleted']['match_comments'] = _safe_delete(db.query(MatchComment))
         summary['db_deleted']['weekly_credit_baselines'] = _safe_delete(db.query(WeeklyCreditBaseline))
         summary['db_deleted']['monthly_credit_baselines'] = _safe_delete(db.query(MonthlyCreditBaseline))
         summary['db_deleted']['user_limits'] = _safe_delete(db.query(UserLimits))
         summary['db_deleted']['snapshots'] = _safe_delete(db.query(Snapshot))
+        # Лог дельт снапшотов: версии поднимаются до новой базы, клиенты со старым since получат полный payload
+        try:
+            with db.begin_nested():
+                summary['db_deleted']['snapshot_deltas'] = _reset_snapshot_deltas(db)
+        except Exception as _e:
+            app.logger.warning(f"full reset: snapshot deltas not reset: {_e}")
 
         # Очистка агрегированной таблицы игроков, если присутствует (источник для /api/scorers)
         try:
@@ -14133,6 +13786,15 @@ def _perform_full_reset(clear_admin_logs: bool = False):
             _ODDS_VERSION.clear()
         except Exception:
             pass
+        try:
+            dbo = get_db()
+            try:
+                dbo.query(OddsSnapshot).delete(synchronize_session=False)
+                dbo.commit()
+            finally:
+                dbo.close()
+        except Exception as e:
+            app.logger.warning(f"full reset: odds_snapshots cleanup failed: {e}")
 
         # Локальные кэши лидерборда
         try:
@@ -14291,7 +13953,8 @@ def api_admin_full_reset():
     """Полный сброс приложения до состояния "с нуля".
     Удаляет служебные таблицы и данные (снимки, ставки, заказы, кэши),
     но сохраняет пользователей и административные логи.
-    Доступно только администратору (по Telegram initData).
+    Доступно только администратору (по Telegram initData). Перед очисткой пишется резервная копия;
+    если она не удалась — 500 без изменений, force=yes — сброс без копии.
 
     Возвращает краткую сводку по очищенным объектам.
     """
@@ -14304,7 +13967,8 @@ def api_admin_full_reset():
         if not admin_id or user_id != admin_id:
             return jsonify({'error': 'forbidden'}), 403
 
-        data, code = _perform_full_reset(clear_admin_logs=False)
+        force = (request.form.get('force') or '').strip().lower() == 'yes'
+        data, code = _perform_full_reset(clear_admin_logs=False, force=force)
         return jsonify(data), code
     except Exception as e:
         try:
@@ -14314,8 +13978,12 @@ def api_admin_full_reset():
         return jsonify({'error': 'Не удалось выполнить полный сброс'}), 500
 
 @app.route('/api/admin/bulk-lineups', methods=['POST'])
+@require_admin()
 def api_admin_bulk_lineups():
-    """Массовый импорт составов для матча"""
+    """Массовый импорт составов для матча.
+    JSON: initData, match_id, home_lineup / away_lineup (строки "номер Имя Фамилия", капитан — (C) или *),
+    mode=replace|append. Первые 11 строк — основа. Запись — разницей с текущим составом (services/lineup_import.py).
+    """
     try:
         data = request.get_json()
         if not data:
@@ -14360,444 +14028,48 @@ def api_admin_bulk_lineups():
                 })
             return players
         
+        home, away, _dt = _resolve_match_by_id(str(match_id))
+        if not home:
+            return jsonify({'error': 'Матч не найден'}), 404
+        if SessionLocal is None:
+            return jsonify({'error': 'БД недоступна'}), 500
+
         result_message = []
-        
-        if home_lineup:
-            home_players = parse_lineup(home_lineup)
-            result_message.append(f"Домашние: {len(home_players)} игроков")
-            
-        if away_lineup:
-            away_players = parse_lineup(away_lineup)
-            result_message.append(f"Гости: {len(away_players)} игроков")
-        
-        # В реальной реализации здесь была бы запись в БД
-        # Для демонстрации просто возвращаем успех
+        incoming = {}
+        for side, text, label in (('home', home_lineup, 'Домашние'), ('away', away_lineup, 'Гости')):
+            if not text:
+                continue
+            players = parse_lineup(text)
+            if len(players) > 40:
+                return jsonify({'error': 'Слишком много строк'}), 400
+            entries = [_lineup_import.make_entry(p['name'], p['number'], 'starting_eleven' if p['is_starter'] else 'substitute', p['is_captain'])
+                       for p in players]
+            incoming[side] = [e for e in entries if e]
+            result_message.append(f"{label}: {len(incoming[side])} игроков")
+
+        db: Session = get_db()
+        try:
+            stats = _lineup_import.apply_lineup(db, MatchLineupPlayer, home, away, incoming,
+                                                mode='append' if mode == 'append' else 'replace')
+            db.commit()
+        finally:
+            db.close()
+        if stats['changed']:
+            _lineups_changed(home, away, match_id)
         return jsonify({
             'status': 'success',
             'message': ', '.join(result_message),
-            'mode': mode
+            'mode': mode,
+            'inserted': stats['inserted'],
+            'updated': stats['updated'],
+            'removed': stats['deleted']
         })
         
     except Exception as e:
         app.logger.error(f"bulk-lineups error: {e}")
         return jsonify({'error': 'Ошибка при импорте составов'}), 500
 
-############################
-# Новости API (перезаписано)
-############################
-
-def _get_news_session():
-    """Возвращает SQLAlchemy session для модели News.
-    1) Пробуем взять advanced db_manager (если новая архитектура активна)
-    2) Иначе fallback на legacy get_db()
-    """
-    try:
-        from database.database_models import db_manager as _adv_db  # type: ignore
-        return _adv_db.get_session()
-    except Exception:
-        return get_db()
-
-
-@app.route('/api/admin/news', methods=['GET'])
-def api_admin_news_list():
-    """Список новостей (админ)."""
-    try:
-        if News is None:
-            return jsonify({'error': 'Модель новостей недоступна'}), 500
-        parsed = parse_and_verify_telegram_init_data(request.args.get('initData', ''))
-        if not parsed or not parsed.get('user'):
-            return jsonify({'error': 'Недействительные данные'}), 401
-        user_id = str(parsed['user'].get('id'))
-        admin_id = os.environ.get('ADMIN_USER_ID', '')
-        if not admin_id or user_id != admin_id:
-            return jsonify({'error': 'Доступ запрещен'}), 403
-        if not SessionLocal:
-            return jsonify({'error': 'База данных недоступна'}), 500
-
-        db = _get_news_session()
-        try:
-            rows = db.query(News).order_by(News.created_at.desc()).all()
-            return jsonify({'news': [
-                {
-                    'id': r.id,
-                    'title': r.title,
-                    'content': r.content,
-                    'author_id': r.author_id,
-                    'created_at': r.created_at.isoformat() if r.created_at else None,
-                    'updated_at': r.updated_at.isoformat() if r.updated_at else None
-                } for r in rows
-            ]})
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"news list error: {e}")
-        return jsonify({'error': 'Ошибка при получении новостей'}), 500
-
-
-@app.route('/api/admin/news', methods=['POST'])
-def api_admin_news_create():
-    """Создать новость (админ)."""
-    try:
-        if News is None:
-            manual_log(
-                action="news_create",
-                description="Попытка создания новости - модель недоступна",
-                result_status='error',
-                affected_data={'error': 'News model unavailable'}
-            )
-            return jsonify({'error': 'Модель новостей недоступна'}), 500
-        data = request.get_json() or {}
-        parsed = parse_and_verify_telegram_init_data(data.get('initData', ''))
-        if not parsed or not parsed.get('user'):
-            manual_log(
-                action="news_create",
-                description="Создание новости - неверные данные авторизации",
-                result_status='error',
-                affected_data={'error': 'Invalid auth data'}
-            )
-            return jsonify({'error': 'Недействительные данные'}), 401
-        user_id = str(parsed['user'].get('id'))
-        admin_id = os.environ.get('ADMIN_USER_ID', '')
-        if not admin_id or user_id != admin_id:
-            manual_log(
-                action="news_create",
-                description=f"Создание новости - доступ запрещен для пользователя {user_id}",
-                result_status='error',
-                affected_data={'user_id': user_id, 'admin_required': True}
-            )
-            return jsonify({'error': 'Доступ запрещен'}), 403
-
-        title = (data.get('title') or '').strip()
-        content = (data.get('content') or '').strip()
-        if not title or not content:
-            manual_log(
-                action="news_create",
-                description="Создание новости - пустой заголовок или содержание",
-                result_status='error',
-                affected_data={'title_empty': not title, 'content_empty': not content}
-            )
-            return jsonify({'error': 'Заголовок и содержание обязательны'}), 400
-        if not SessionLocal:
-            manual_log(
-                action="news_create",
-                description="Создание новости - база данных недоступна",
-                result_status='error',
-                affected_data={'error': 'Database unavailable'}
-            )
-            return jsonify({'error': 'База данных недоступна'}), 500
-
-        db = _get_news_session()
-        try:
-            news = News(title=title, content=content, author_id=int(user_id))
-            db.add(news)
-            db.commit()
-
-            # Инвалидация + прогрев
-            try:
-                from optimizations.multilevel_cache import get_cache
-                cache = get_cache()
-                cache.invalidate_pattern('cache:news')
-                try:
-                    latest = db.query(News).order_by(News.created_at.desc()).limit(5).all()
-                    warm_payload = [
-                        {
-                            'id': r.id,
-                            'title': r.title,
-                            'content': r.content,
-                            'created_at': r.created_at.isoformat() if r.created_at else None
-                        } for r in latest
-                    ]
-                    cache.set('news', warm_payload, 'limit:5:offset:0')
-                except Exception:
-                    pass
-            except Exception as _e:
-                app.logger.warning(f"news cache invalidate (create) failed: {_e}")
-
-            # Логируем успешное создание новости
-            manual_log(
-                action="news_create",
-                description=f"Создана новость: '{title}' (ID: {news.id})",
-                result_status='success',
-                affected_data={
-                    'news_id': news.id,
-                    'title': title,
-                    'content_length': len(content),
-                    'author_id': user_id
-                }
-            )
-
-            return jsonify({'status': 'success', 'id': news.id, 'title': news.title, 'content': news.content})
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"news create error: {e}")
-        return jsonify({'error': 'Ошибка при создании новости'}), 500
-
-
-@app.route('/api/admin/news/<int:news_id>', methods=['PUT'])
-def api_admin_news_update(news_id):
-    """Обновить новость (админ)."""
-    try:
-        if News is None:
-            manual_log(
-                action="news_update",
-                description=f"Попытка обновления новости {news_id} - модель недоступна",
-                result_status='error',
-                affected_data={'news_id': news_id, 'error': 'News model unavailable'}
-            )
-            return jsonify({'error': 'Модель новостей недоступна'}), 500
-        data = request.get_json() or {}
-        parsed = parse_and_verify_telegram_init_data(data.get('initData', ''))
-        if not parsed or not parsed.get('user'):
-            manual_log(
-                action="news_update",
-                description=f"Обновление новости {news_id} - неверные данные авторизации",
-                result_status='error',
-                affected_data={'news_id': news_id, 'error': 'Invalid auth data'}
-            )
-            return jsonify({'error': 'Недействительные данные'}), 401
-        user_id = str(parsed['user'].get('id'))
-        admin_id = os.environ.get('ADMIN_USER_ID', '')
-        if not admin_id or user_id != admin_id:
-            manual_log(
-                action="news_update",
-                description=f"Обновление новости {news_id} - доступ запрещен для пользователя {user_id}",
-                result_status='error',
-                affected_data={'news_id': news_id, 'user_id': user_id, 'admin_required': True}
-            )
-            return jsonify({'error': 'Доступ запрещен'}), 403
-        if not SessionLocal:
-            manual_log(
-                action="news_update",
-                description=f"Обновление новости {news_id} - база данных недоступна",
-                result_status='error',
-                affected_data={'news_id': news_id, 'error': 'Database unavailable'}
-            )
-            return jsonify({'error': 'База данных недоступна'}), 500
-
-        db = _get_news_session()
-        try:
-            news = db.query(News).filter(News.id == news_id).first()
-            if not news:
-                manual_log(
-                    action="news_update",
-                    description=f"Обновление новости {news_id} - новость не найдена",
-                    result_status='error',
-                    affected_data={'news_id': news_id, 'error': 'News not found'}
-                )
-                return jsonify({'error': 'Новость не найдена'}), 404
-
-            # Сохраняем старые данные для логирования
-            old_title = news.title
-            old_content = news.content
-
-            title = (data.get('title') or '').strip()
-            content = (data.get('content') or '').strip()
-            if title:
-                news.title = title
-            if content:
-                news.content = content
-            news.updated_at = datetime.now(timezone.utc)
-            db.commit()
-
-            try:
-                from optimizations.multilevel_cache import get_cache
-                cache = get_cache()
-                cache.invalidate_pattern('cache:news')
-                try:
-                    latest = db.query(News).order_by(News.created_at.desc()).limit(5).all()
-                    warm_payload = [
-                        {
-                            'id': r.id,
-                            'title': r.title,
-                            'content': r.content,
-                            'created_at': r.created_at.isoformat() if r.created_at else None
-                        } for r in latest
-                    ]
-                    cache.set('news', warm_payload, 'limit:5:offset:0')
-                except Exception:
-                    pass
-            except Exception as _e:
-                app.logger.warning(f"news cache invalidate (update) failed: {_e}")
-
-            # Логируем успешное обновление новости
-            manual_log(
-                action="news_update",
-                description=f"Обновлена новость {news_id}: '{news.title}'",
-                result_status='success',
-                affected_data={
-                    'news_id': news_id,
-                    'changes': {
-                        'title': {'old': old_title, 'new': news.title} if title else None,
-                        'content': {'old_length': len(old_content), 'new_length': len(news.content)} if content else None
-                    },
-                    'updated_by': user_id
-                }
-            )
-
-            return jsonify({'status': 'success', 'id': news.id, 'title': news.title, 'content': news.content})
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"news update error: {e}")
-        return jsonify({'error': 'Ошибка при обновлении новости'}), 500
-
-
-@app.route('/api/admin/news/<int:news_id>', methods=['DELETE'])
-def api_admin_news_delete(news_id):
-    """Удалить новость (админ)."""
-    try:
-        if News is None:
-            manual_log(
-                action="news_delete",
-                description=f"Попытка удаления новости {news_id} - модель недоступна",
-                result_status='error',
-                affected_data={'news_id': news_id, 'error': 'News model unavailable'}
-            )
-            return jsonify({'error': 'Модель новостей недоступна'}), 500
-        parsed = parse_and_verify_telegram_init_data(request.args.get('initData', ''))
-        if not parsed or not parsed.get('user'):
-            manual_log(
-                action="news_delete",
-                description=f"Удаление новости {news_id} - неверные данные авторизации",
-                result_status='error',
-                affected_data={'news_id': news_id, 'error': 'Invalid auth data'}
-            )
-            return jsonify({'error': 'Недействительные данные'}), 401
-        user_id = str(parsed['user'].get('id'))
-        admin_id = os.environ.get('ADMIN_USER_ID', '')
-        if not admin_id or user_id != admin_id:
-            manual_log(
-                action="news_delete",
-                description=f"Удаление новости {news_id} - доступ запрещен для пользователя {user_id}",
-                result_status='error',
-                affected_data={'news_id': news_id, 'user_id': user_id, 'admin_required': True}
-            )
-            return jsonify({'error': 'Доступ запрещен'}), 403
-        if not SessionLocal:
-            manual_log(
-                action="news_delete",
-                description=f"Удаление новости {news_id} - база данных недоступна",
-                result_status='error',
-                affected_data={'news_id': news_id, 'error': 'Database unavailable'}
-            )
-            return jsonify({'error': 'База данных недоступна'}), 500
-
-        db = _get_news_session()
-        try:
-            news = db.query(News).filter(News.id == news_id).first()
-            if not news:
-                manual_log(
-                    action="news_delete",
-                    description=f"Удаление новости {news_id} - новость не найдена",
-                    result_status='error',
-                    affected_data={'news_id': news_id, 'error': 'News not found'}
-                )
-                return jsonify({'error': 'Новость не найдена'}), 404
-            
-            # Сохраняем данные для логирования перед удалением
-            deleted_news_data = {
-                'id': news.id,
-                'title': news.title,
-                'content_length': len(news.content),
-                'author_id': news.author_id,
-                'created_at': news.created_at.isoformat() if news.created_at else None
-            }
-            
-            db.delete(news)
-            db.commit()
-
-            try:
-                from optimizations.multilevel_cache import get_cache
-                cache = get_cache()
-                cache.invalidate_pattern('cache:news')
-                try:
-                    latest = db.query(News).order_by(News.created_at.desc()).limit(5).all()
-                    warm_payload = [
-                        {
-                            'id': r.id,
-                            'title': r.title,
-                            'content': r.content,
-                            'created_at': r.created_at.isoformat() if r.created_at else None
-                        } for r in latest
-                    ]
-                    cache.set('news', warm_payload, 'limit:5:offset:0')
-                except Exception:
-                    pass
-            except Exception as _e:
-                app.logger.warning(f"news cache invalidate (delete) failed: {_e}")
-
-            # Логируем успешное удаление новости
-            manual_log(
-                action="news_delete",
-                description=f"Удалена новость {news_id}: '{deleted_news_data['title']}'",
-                result_status='success',
-                affected_data={
-                    'deleted_news': deleted_news_data,
-                    'deleted_by': user_id
-                }
-            )
-
-            return jsonify({'status': 'success'})
-        finally:
-            db.close()
-    except Exception as e:
-        app.logger.error(f"news delete error: {e}")
-        return jsonify({'error': 'Ошибка при удалении новости'}), 500
-
-
-@app.route('/api/news', methods=['GET'])
-def api_news_public():
-    """Публичный список новостей (кэш + ETag)."""
-    try:
-        if News is None:
-            return jsonify({'news': []})
-        if not SessionLocal:
-            return jsonify({'error': 'База данных недоступна'}), 500
-        from optimizations.multilevel_cache import get_cache
-        cache = get_cache()
-        limit = min(int(request.args.get('limit', 5)), 50)
-        offset = max(int(request.args.get('offset', 0)), 0)
-
-        def _load():
-            db = _get_news_session()
-            try:
-                q = db.query(News).order_by(News.created_at.desc())
-                if offset:
-                    q = q.offset(offset)
-                q = q.limit(limit)
-                rows = q.all()
-                return [
-                    {
-                        'id': r.id,
-                        'title': r.title,
-                        'content': r.content,
-                        'created_at': r.created_at.isoformat() if r.created_at else None
-                    } for r in rows
-                ]
-            finally:
-                db.close()
-
-        news_list = cache.get('news', identifier=f"limit:{limit}:offset:{offset}", loader_func=_load) or []
-        try:
-            import hashlib as _hl, json as _json
-            _core = _json.dumps(news_list, ensure_ascii=False, sort_keys=True).encode('utf-8')
-            etag = _hl.md5(_core).hexdigest()
-            inm = request.headers.get('If-None-Match')
-            if inm and inm == etag:
-                resp = app.response_class(status=304)
-                resp.headers['ETag'] = etag
-                resp.headers['Cache-Control'] = 'public, max-age=120, stale-while-revalidate=60'
-                return resp
-            resp = _json_response({'news': news_list, 'version': etag})
-            resp.headers['ETag'] = etag
-            resp.headers['Cache-Control'] = 'public, max-age=120, stale-while-revalidate=60'
-            return resp
-        except Exception:
-            return _json_response({'news': news_list})
-    except Exception as e:
-        app.logger.error(f"public news error: {e}")
-        return jsonify({'error': 'Ошибка при получении новостей'}), 500
+# Новости (админ CRUD + публичный список): api/news.py (ленивый blueprint)
 
 @app.route('/api/stats-table', methods=['GET'])
 def api_stats_table():
@@ -14869,8 +14141,10 @@ def api_specials_set():
                             fields={'penalty_yes': row.penalty_yes, 'redcard_yes': row.redcard_yes, 'odds_version': new_ver}
                         )
                     # Патч коэффициентов/рынков (частичный snapshot) — дебаунс
-                    odds_fields = _build_odds_fields(home, away)
+                    # bump пометил публикацию устаревшей — пересчитываем и публикуем заново
+                    new_ver, odds_fields = _odds_published(home, away)
                     if odds_fields:
+                        odds_fields = dict(odds_fields)
                         odds_fields['odds_version'] = new_ver
                         if hasattr(ws, 'notify_patch_debounced'):
                             ws.notify_patch_debounced(
@@ -14961,7 +14235,7 @@ def api_specials_settle():
                     finished = False
                     if b.match_datetime:
                         try:
-                            end_dt = b.match_datetime + timedelta(minutes=BET_MATCH_DURATION_MINUTES)
+                            end_dt = b.match_datetime + timedelta(minutes=SETTINGS.BET_MATCH_DURATION_MINUTES)
                         except Exception:
                             end_dt = b.match_datetime
                         if end_dt <= now:
@@ -14992,6 +14266,7 @@ def api_specials_settle():
                     if u:
                         u.credits = int(u.credits or 0) + payout
                         u.updated_at = datetime.now(timezone.utc)
+                    _ach_progress_on_bet_won(db, b)
                     won_cnt += 1
                 else:
                     b.status = 'lost'
@@ -15116,6 +14391,7 @@ def api_match_settle():
                     if u:
                         u.credits = int(u.credits or 0) + payout
                         u.updated_at = datetime.now(timezone.utc)
+                    _ach_progress_on_bet_won(db, b)
                     won_cnt += 1
                 else:
                     b.status = 'lost'
@@ -15168,6 +14444,7 @@ def api_match_settle():
             except Exception as fin_err:  # noqa: F841
                 try: app.logger.error(f"finalize after settle failed: {fin_err}")
                 except Exception: pass
+            _odds_mark_stale(home, away)
             # Помечаем матч как завершённый: сначала основная таблица matches.status, затем (временно) MatchFlags
             try:
                 try:
@@ -15175,6 +14452,8 @@ def api_match_settle():
                     ok, err = set_match_status_by_names(db, home, away, 'finished', mirror_to_flags=True)
                     if not ok and err:
                         app.logger.warning(f"settle: failed to set matches.status finished: {err}")
+                    if ok:
+                        _LIVE_REGISTRY.set_manual(home, away, 'finished')
                 except Exception as _e:
                     try: app.logger.warning(f"settle: helper error: {_e}")
                     except Exception: pass
@@ -15671,32 +14950,39 @@ def api_lineup_bulk_set():
         # Ограничение
         if len(home_items) > 40 or len(away_items) > 40:
             return jsonify({'error': 'Слишком много строк'}), 400
+        incoming = {}
+        for side, items in (('home', home_items), ('away', away_items)):
+            if items:
+                # первые 11 строк — основа, остальные — запас
+                incoming[side] = [_lineup_import.make_entry(it['player'], it['jersey_number'],
+                                                            'starting_eleven' if idx < 11 else 'substitute', it['is_captain'])
+                                  for idx, it in enumerate(items)]
         db: Session = get_db()
-        added = {'home': 0, 'away': 0}
-        replaced = {'home': 0, 'away': 0}
         try:
-            for side, items in (('home', home_items), ('away', away_items)):
-                if not items:
-                    continue
-                # replace: удаляем старые строки этой стороны
-                if mode == 'replace':
-                    q = db.query(MatchLineupPlayer).filter(MatchLineupPlayer.home==home, MatchLineupPlayer.away==away, MatchLineupPlayer.team==side)
-                    replaced[side] = q.count()
-                    q.delete()
-                # Создаём
-                for idx, it in enumerate(items):
-                    position = 'starting_eleven' if idx < 11 else 'substitute'
-                    row = MatchLineupPlayer(home=home, away=away, team=side, player=it['player'], jersey_number=it['jersey_number'], position=position, is_captain=1 if it['is_captain'] else 0)
-                    db.add(row)
-                    added[side] += 1
+            stats = _lineup_import.apply_lineup(db, MatchLineupPlayer, home, away, incoming,
+                                                mode='append' if mode == 'append' else 'replace')
             db.commit()
-            return jsonify({'status': 'ok', 'added': added, 'replaced': replaced, 'mode': mode})
         finally:
             db.close()
+        if stats['changed']:
+            _lineups_changed(home, away)
+        # added/replaced — прежний контракт (строк передано / строк стороны до замены), рядом счётчики разницы
+        added = {'home': len(home_items), 'away': len(away_items)}
+        replaced = {side: (stats['existing'][side] if mode == 'replace' and side in incoming else 0) for side in added}
+        return jsonify({'status': 'ok', 'added': added, 'replaced': replaced, 'mode': mode,
+                        'inserted': stats['inserted'], 'updated': stats['updated'], 'removed': stats['deleted']})
     except Exception as e:
         app.logger.error(f"Ошибка lineup/bulk_set: {e}")
         return jsonify({'error': 'Не удалось выполнить массовый импорт'}), 500
 
+# Ленивые blueprint'ы (новости, трансляции, комментарии): URL-правила регистрируются сейчас,
+# модули view-функций импортируются при первом запросе. Зависимости берутся из globals() этого модуля.
+try:
+    from api.lazy_blueprints import init_lazy_blueprints
+    init_lazy_blueprints(app, lambda: globals())
+except Exception as _lb_e:
+    print(f"[WARN] Lazy blueprints init failed: {_lb_e}")
+
 if __name__ == '__main__':
     # Локальный standalone запуск (в прод Gunicorn вызывает wsgi:app)
     
@@ -0,0 +1 @@
+"""Offline benchmarks for Liga Obninska (не входят в тесты pytest)"""
@@ -0,0 +1,206 @@
+"""
+Synthetic data generator для офлайн-бенчмарков.
+
+Заполняет БД (SQLite или локальный Postgres) детерминированным набором:
+команды, активный турнир, матчи (сыгранные + ближайшие 6 дней), счета,
+ставки, голоса, комментарии и снапшоты schedule/results.
+Работает через модели уже импортированного app.py, чтобы схема совпадала с продом.
+"""
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+# Таблицы, которые генератор очищает при reset=True (только данные бенчмарка)
+_RESET_TABLES = (
+    'bets', 'user_daily_stake', 'match_votes', 'match_comments', 'comment_counters', 'match_scores',
+    'match_flags', 'odds_snapshots', 'user_achievements', 'user_achievement_progress', 'user_achievement_rewards',
+    'monthly_credit_baselines', 'weekly_credit_baselines', 'user_stats', 'user_stats_daily', 'user_stats_counters',
+    'snapshot_deltas', 'snapshot_versions', 'snapshots', 'users', 'matches', 'teams', 'tournaments',
+)
+
+
+def _round_robin(team_names):
+    """Пары круговой системы (метод кругов); возвращает список туров со списком пар"""
+    names = list(team_names)
+    if len(names) % 2:
+        names.append(None)
+    n = len(names)
+    tours = []
+    for _ in range(n - 1):
+        pairs = [(names[i], names[n - 1 - i]) for i in range(n // 2)]
+        tours.append([p for p in pairs if p[0] and p[1]])
+        names = [names[0]] + [names[-1]] + names[1:-1]
+    return tours
+
+
+def generate(appmod, users=500, teams=10, matches=90, bets=5000, votes=2000, comments=1000,
+             seed=42, reset=False, now=None, live=0):
+    """Генерирует данные в БД app.py. Возвращает dict со сводкой (счётчики, id пользователей, ближайшие матчи).
+
+    matches — общее число матчей; ~2/3 сыгранные, остальные в окне ближайших 6 дней.
+    live — сколько ближайших матчей перевести в статус live (начались 30 минут назад), для нагрузочных тестов.
+    """
+    from sqlalchemy import text
+    from database.database_models import Base as AdvBase, Tournament, Team, Match
+
+    if appmod.SessionLocal is None:
+        raise RuntimeError('DATABASE_URL не настроен: генератору нужна БД')
+    rnd = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    now_naive = now.replace(tzinfo=None)
+
+    AdvBase.metadata.create_all(appmod.engine)
+    appmod.Base.metadata.create_all(appmod.engine)
+
+    db = appmod.get_db()
+    try:
+        if reset:
+            for table in _RESET_TABLES:
+                try:
+                    db.execute(text(f'DELETE FROM {table}'))
+                except Exception:
+                    db.rollback()
+            db.commit()
+        elif db.query(appmod.User).first() is not None:
+            raise RuntimeError('БД не пуста: используйте reset=True (удалит данные бенчмарк-таблиц)')
+
+        # 1) Турнир и команды
+        tour_obj = Tournament(name='Bench League', season='bench', status='active',
+                              start_date=(now_naive - timedelta(days=120)).date())
+        db.add(tour_obj)
+        team_rows = [Team(name=f'Команда {i:02d}', city='Обнинск') for i in range(1, teams + 1)]
+        db.add_all(team_rows)
+        db.flush()
+        team_id = {t.name: t.id for t in team_rows}
+
+        # 2) Матчи: круговая система, повторяем круги до нужного количества
+        rounds = _round_robin([t.name for t in team_rows])
+        fixtures = []
+        tour_no = 0
+        while len(fixtures) < matches:
+            for pairs in rounds:
+                tour_no += 1
+                for home, away in pairs:
+                    fixtures.append((tour_no, home, away))
+            if not rounds:
+                break
+        fixtures = fixtures[:matches]
+        n_played = (len(fixtures) * 2) // 3
+        last_played_tour = fixtures[n_played - 1][0] if n_played else 0
+        future_tours = sorted({t for t, _, _ in fixtures[n_played:]})
+
+        match_rows = []
+        results = []
+        for idx, (t_no, home, away) in enumerate(fixtures):
+            if idx < n_played:
+                # Сыгранные туры — раз в неделю в прошлом
+                dt = (now_naive - timedelta(days=7 * (last_played_tour - t_no + 1))).replace(hour=18, minute=0, second=0, microsecond=0)
+                sh, sa = rnd.randint(0, 5), rnd.randint(0, 5)
+                status = 'finished'
+            elif idx < n_played + live:
+                dt = (now_naive - timedelta(minutes=30)).replace(second=0, microsecond=0)
+                sh, sa = 0, 0
+                status = 'live'
+            else:
+                # Будущие туры раскладываем по ближайшим 6 дням
+                day = 1 + (future_tours.index(t_no) % 6)
+                dt = (now_naive + timedelta(days=day)).replace(hour=12 + (idx % 8), minute=0, second=0, microsecond=0)
+                sh, sa = 0, 0
+                status = 'scheduled'
+            match_rows.append(Match(tournament_id=tour_obj.id, home_team_id=team_id[home], away_team_id=team_id[away],
+                                    match_date=dt, tour=t_no, home_score=sh, away_score=sa, status=status))
+            if status == 'finished':
+                db.add(appmod.MatchScore(home=home, away=away, score_home=sh, score_away=sa))
+                results.append({'home': home, 'away': away, 'score_home': str(sh), 'score_away': str(sa),
+                                'date': dt.date().isoformat(), 'time': dt.strftime('%H:%M'),
+                                'datetime': dt.isoformat(), 'tour': t_no})
+        db.add_all(match_rows)
+
+        # 3) Пользователи
+        user_ids = list(range(1_000_001, 1_000_001 + users))
+        db.add_all([
+            appmod.User(user_id=uid, display_name=f'Игрок {uid % 100000}', tg_username=f'bench_{uid}',
+                        credits=rnd.randint(100, 50000), xp=rnd.randint(0, 5000), level=rnd.randint(1, 30),
+                        consecutive_days=rnd.randint(0, 60),
+                        last_checkin_date=(now_naive - timedelta(days=rnd.randint(0, 10))).date())
+            for uid in user_ids
+        ])
+
+        # 4) Ставки: половина — открытые по сыгранным матчам (материал для settlement)
+        played = fixtures[:n_played] or fixtures
+        upcoming = fixtures[n_played:] or fixtures
+        dt_by_pair = {(home, away): m.match_date for (_, home, away), m in zip(fixtures, match_rows)}
+        selections_1x2 = ('home', 'draw', 'away')
+        bet_rows = []
+        for i in range(bets):
+            t_no, home, away = rnd.choice(played if i % 2 == 0 else upcoming)
+            r = rnd.random()
+            if r < 0.7:
+                market, selection = '1x2', rnd.choice(selections_1x2)
+            elif r < 0.9:
+                market, selection = 'totals', rnd.choice(('over_3.5', 'under_3.5', 'over_4.5', 'under_4.5'))
+            else:
+                market, selection = rnd.choice(('penalty', 'redcard')), rnd.choice(('yes', 'no'))
+            bet_rows.append(appmod.Bet(
+                user_id=rnd.choice(user_ids), tour=t_no, home=home, away=away,
+                match_datetime=dt_by_pair[(home, away)], market=market, selection=selection,
+                odds=f'{rnd.uniform(1.3, 4.5):.2f}', stake=rnd.choice((10, 50, 100, 200, 500)),
+                status='open', placed_at=now - timedelta(hours=rnd.randint(1, 24 * 6)),
+            ))
+        db.add_all(bet_rows)
+
+        # 5) Голоса и комментарии по ближайшим матчам
+        seen_votes = set()
+        vote_rows = []
+        for _ in range(votes):
+            _, home, away = rnd.choice(upcoming)
+            uid = rnd.choice(user_ids)
+            date_key = dt_by_pair[(home, away)].date().isoformat()
+            key = (home, away, date_key, uid)
+            if key in seen_votes:
+                continue
+            seen_votes.add(key)
+            vote_rows.append(appmod.MatchVote(home=home, away=away, date_key=date_key, user_id=uid,
+                                              choice=rnd.choice(selections_1x2)))
+        db.add_all(vote_rows)
+        db.add_all([
+            appmod.MatchComment(home=home, away=away, date=dt_by_pair[(home, away)].date().isoformat(),
+                                user_id=rnd.choice(user_ids), content=f'bench comment {i}',
+                                created_at=now - timedelta(minutes=rnd.randint(0, 55)))
+            for i, (_, home, away) in enumerate(rnd.choice(upcoming) for _ in range(comments))
+        ])
+        db.commit()
+
+        # 6) Снапшоты, которые в проде пишет фоновой sync
+        appmod._snapshot_set(db, appmod.Snapshot, 'results',
+                             {'results': results, 'updated_at': now.isoformat()}, appmod.app.logger)
+        appmod._update_schedule_snapshot_from_matches(db, appmod.app.logger)
+        db.commit()
+        upcoming_out = [
+            {'home': home, 'away': away, 'tour': t_no, 'status': m.status,
+             'date': m.match_date.date().isoformat(), 'datetime': m.match_date.isoformat()}
+            for (t_no, home, away), m in list(zip(fixtures, match_rows))[n_played:]
+        ]
+    finally:
+        db.close()
+
+    return {
+        'seed': seed,
+        'teams': teams,
+        'matches': len(fixtures),
+        'played': n_played,
+        'users': users,
+        'bets': bets,
+        'votes': len(vote_rows),
+        'comments': comments,
+        'user_ids': user_ids,
+        'upcoming': upcoming_out,
+    }
+
+
+if __name__ == '__main__':  # pragma: no cover - ручной запуск: python -m benchmarks.datagen
+    import app as _app
+    summary = generate(_app, reset=True)
+    summary.pop('user_ids', None)
+    summary.pop('upcoming', None)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
@@ -0,0 +1,285 @@
+"""
+Offline benchmark горячих эндпоинтов Liga Obninska.
+
+Поднимает app.py на SQLite (по умолчанию) или локальном Postgres, заполняет БД
+синтетикой (benchmarks/datagen.py) и через Flask test client замеряет:
+  /api/betting/tours, /api/league-table, /api/schedule, /api/summary, /api/achievements
+  (cold — кэши очищены перед каждым вызовом, warm — повторный вызов из кэша),
+  а также settlement открытых ставок и сборку лидербордов.
+
+Запуск:
+    python -m benchmarks.hot_endpoints --out benchmarks/results/base.json
+    python -m benchmarks.hot_endpoints --baseline benchmarks/results/base.json --threshold 0.25
+Код выхода 1 — если медиана какого-либо кейса выросла больше порога относительно baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import secrets
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+DEFAULT_SQLITE = os.path.join(ROOT, 'benchmarks', '.bench.sqlite3')
+
+# Эндпоинты, замеряемые через test client: name -> path
+ENDPOINTS = {
+    'betting_tours': '/api/betting/tours',
+    'league_table': '/api/league-table',
+    'schedule': '/api/schedule',
+    'summary': '/api/summary',
+    'achievements': '/api/achievements',
+}
+
+# Лимиты @rate_limit читаются из env при импорте app — поднимаем, чтобы не ловить 429
+_RATE_LIMIT_ENVS = ('RL_TOURS_RPM', 'RL_SCHEDULE_RPM', 'RL_SUMMARY_RPM', 'RL_ACHIEVEMENTS_RPM', 'RL_RESULTS_RPM')
+
+
+def _prepare_env(database_url: str):
+    """Окружение для импорта app: своя БД, без Redis/WebSocket/фоновых потоков"""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('BOT_TOKEN', 'bench:' + secrets.token_hex(16))
+    os.environ['WEBSOCKETS_ENABLED'] = '0'
+    os.environ['ENABLE_SCHEDULER'] = '0'
+    os.environ['ENABLE_SELF_PING'] = '0'
+    os.environ.pop('REDIS_URL', None)
+    # Число SQL-запросов на запрос берём из заголовков QueryProfiler
+    os.environ['QUERY_PROFILER_HEADERS'] = '1'
+    for name in _RATE_LIMIT_ENVS:
+        os.environ[name] = '1000000'
+
+
+def _clear_caches(appmod):
+    """Сбрасывает in-process кэши, чтобы следующий вызов прошёл через builder"""
+    try:
+        appmod._ETAG_HELPER_CACHE.clear()
+    except Exception:
+        pass
+    ach = getattr(appmod, 'ACHIEVEMENTS_CACHE', None)
+    if isinstance(ach, dict):
+        ach.clear()
+    cm = getattr(appmod, 'cache_manager', None)
+    if cm is not None:
+        try:
+            with cm.lock:
+                cm.memory_cache.clear()
+        except Exception:
+            pass
+    for name in ('LEAGUE_TABLE_CACHE', 'SCHEDULE_CACHE', 'LEADER_PRED_CACHE', 'LEADER_RICH_CACHE',
+                 'LEADER_SERVER_CACHE', 'LEADER_PRIZES_CACHE'):
+        c = getattr(appmod, name, None)
+        if isinstance(c, dict):
+            c['ts'] = 0
+
+
+def _stats(samples):
+    ordered = sorted(samples)
+    p95_idx = max(0, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        'runs': len(ordered),
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[p95_idx], 3),
+        'min_ms': round(ordered[0], 3),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+    }
+
+
+def _time_request(client, path, headers):
+    t0 = time.perf_counter()
+    resp = client.get(path, headers=headers)
+    elapsed = (time.perf_counter() - t0) * 1000
+    try:
+        queries = int(resp.headers.get('X-DB-Query-Count', '') or -1)
+    except ValueError:
+        queries = -1
+    return elapsed, resp.status_code, queries
+
+
+def bench_endpoint(appmod, client, path, iterations, warmup, headers_fn):
+    """Замер одного эндпоинта: cold (очистка кэшей перед вызовом) и warm (из кэша)"""
+    out = {}
+    for mode in ('cold', 'warm'):
+        samples, statuses, queries = [], set(), []
+        for i in range(warmup + iterations):
+            if mode == 'cold':
+                _clear_caches(appmod)
+            elapsed, status, q = _time_request(client, path, headers_fn(i))
+            if i < warmup:
+                continue
+            samples.append(elapsed)
+            statuses.add(status)
+            if q >= 0:
+                queries.append(q)
+        res = _stats(samples)
+        res['status'] = sorted(statuses)
+        if queries:
+            res['queries'] = int(statistics.median(queries))
+        out[mode] = res
+    return out
+
+
+def bench_callable(fn, iterations, setup=None):
+    samples = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return _stats(samples)
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float = 2.0):
+    """Сравнивает медианы кейсов с baseline. Возвращает список регрессий.
+
+    Регрессия: median > baseline_median * (1 + threshold) и абсолютный прирост > min_delta_ms
+    (порог шума для быстрых кейсов).
+    """
+    regressions = []
+    base_cases = (baseline or {}).get('cases') or {}
+    for name, cur in ((current or {}).get('cases') or {}).items():
+        base = base_cases.get(name)
+        if not base:
+            continue
+        b, c = float(base.get('median_ms') or 0), float(cur.get('median_ms') or 0)
+        if b <= 0:
+            continue
+        if c > b * (1 + threshold) and (c - b) > min_delta_ms:
+            regressions.append({'case': name, 'baseline_ms': b, 'current_ms': c, 'ratio': round(c / b, 3)})
+    return regressions
+
+
+def run(args):
+    database_url = args.database_url or os.environ.get('BENCH_DATABASE_URL') or ''
+    if not database_url:
+        if os.path.exists(DEFAULT_SQLITE):
+            os.remove(DEFAULT_SQLITE)
+        database_url = 'sqlite:///' + DEFAULT_SQLITE
+    _prepare_env(database_url)
+
+    import app as appmod
+    from benchmarks.datagen import generate
+    from benchmarks.telegram import sign_init_data, make_user
+
+    dataset = generate(appmod, users=args.users, teams=args.teams, matches=args.matches, bets=args.bets,
+                       votes=args.votes, comments=args.comments, seed=args.seed,
+                       reset=args.reset or database_url.startswith('sqlite'))
+    user_ids = dataset.pop('user_ids')
+    dataset.pop('upcoming', None)
+    bot_token = os.environ['BOT_TOKEN']
+    init_data = [sign_init_data(bot_token, make_user(uid)) for uid in user_ids[:max(1, args.iterations + args.warmup)]]
+
+    client = appmod.app.test_client()
+    cases = {}
+    for name, path in ENDPOINTS.items():
+        if name == 'achievements':
+            headers_fn = lambda i: {'X-Telegram-Init-Data': init_data[i % len(init_data)]}
+        else:
+            headers_fn = lambda i: {}
+        res = bench_endpoint(appmod, client, path, args.iterations, args.warmup, headers_fn)
+        for mode, stats in res.items():
+            cases[f'{name}:{mode}'] = stats
+
+    # Settlement: перед каждым прогоном возвращаем ставки в open
+    def _reset_bets():
+        db = appmod.get_db()
+        try:
+            db.query(appmod.Bet).update({'status': 'open', 'payout': 0}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _settle():
+        db = appmod.get_db()
+        try:
+            appmod._settle_open_bets_new(db, appmod.Bet, appmod.User, appmod._get_match_result,
+                                         appmod._get_match_total_goals, appmod._get_special_result,
+                                         appmod.SETTINGS.BET_MATCH_DURATION_MINUTES, datetime.now(timezone.utc),
+                                         appmod.app.logger)
+        finally:
+            db.close()
+
+    def _leaderboards():
+        db = appmod.get_db()
+        try:
+            appmod._build_leaderboards_payloads(db)
+        finally:
+            db.close()
+
+    cases['settlement'] = bench_callable(_settle, args.heavy_iterations, setup=_reset_bets)
+    cases['leaderboards_build'] = bench_callable(_leaderboards, args.iterations)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': database_url.split(':', 1)[0],
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'heavy_iterations': args.heavy_iterations,
+            'dataset': dataset,
+        },
+        'cases': cases,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Offline benchmark of hot endpoints (Flask test client)')
+    ap.add_argument('--database-url', help='по умолчанию временная SQLite (или BENCH_DATABASE_URL)')
+    ap.add_argument('--reset', action='store_true', help='очистить бенчмарк-таблицы в непустой БД (Postgres)')
+    ap.add_argument('--users', type=int, default=500)
+    ap.add_argument('--teams', type=int, default=10)
+    ap.add_argument('--matches', type=int, default=90)
+    ap.add_argument('--bets', type=int, default=5000)
+    ap.add_argument('--votes', type=int, default=2000)
+    ap.add_argument('--comments', type=int, default=1000)
+    ap.add_argument('--seed', type=int, default=42)
+    ap.add_argument('--iterations', type=int, default=20)
+    ap.add_argument('--warmup', type=int, default=2)
+    ap.add_argument('--heavy-iterations', type=int, default=3, help='прогоны settlement')
+    ap.add_argument('--out', help='файл для JSON результата (по умолчанию benchmarks/results/<timestamp>.json)')
+    ap.add_argument('--baseline', help='JSON прошлого прогона для проверки регрессий')
+    ap.add_argument('--threshold', type=float, default=float(os.environ.get('BENCH_REGRESSION_THRESHOLD', '0.25')),
+                    help='допустимый относительный рост медианы (0.25 = +25%%)')
+    ap.add_argument('--min-delta-ms', type=float, default=2.0, help='порог шума в мс')
+    args = ap.parse_args(argv)
+
+    result = run(args)
+
+    out = args.out or os.path.join(ROOT, 'benchmarks', 'results',
+                                   datetime.now().strftime('hot_endpoints-%Y%m%d-%H%M%S.json'))
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold, args.min_delta_ms)
+        result['regressions'] = regressions
+        result['meta']['baseline'] = os.path.abspath(args.baseline)
+        result['meta']['threshold'] = args.threshold
+        if regressions:
+            exit_code = 1
+
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    width = max(len(k) for k in result['cases'])
+    for name, s in result['cases'].items():
+        q = f"  q={s['queries']}" if 'queries' in s else ''
+        print(f"{name:<{width}}  median={s['median_ms']:>9.2f}ms  p95={s['p95_ms']:>9.2f}ms{q}")
+    for r in result.get('regressions', []):
+        print(f"REGRESSION {r['case']}: {r['baseline_ms']}ms -> {r['current_ms']}ms (x{r['ratio']})")
+    print(f"results: {out}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Нагрузочный стенд матч-дня (Locust + Socket.IO клиенты)"""
@@ -0,0 +1,280 @@
+"""
+Locust-сценарии матч-дня для Liga Obninska.
+
+Сервер поднимается локально:  python -m benchmarks.loadtest.serve --port 8000
+Нагрузка (headless, 5 минут, 300 клиентов):
+    locust -f benchmarks/loadtest/locustfile.py --host http://127.0.0.1:8000 \\
+        --headless -u 300 -r 30 -t 5m --csv benchmarks/results/matchday
+
+LOADTEST_PROFILE  — matchday (по умолчанию) | browse | betting
+LOADTEST_MANIFEST — путь к манифесту от serve.py
+LOADTEST_REPORT   — JSON-сводка (rps, перцентили, error rate) по завершении
+"""
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+from locust import HttpUser, User, between, events, task
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.telegram import sign_init_data, make_user  # noqa: E402
+
+MANIFEST_PATH = os.environ.get('LOADTEST_MANIFEST') or os.path.join(ROOT, 'benchmarks', 'results', 'loadtest-manifest.json')
+with open(MANIFEST_PATH, 'r', encoding='utf-8') as _f:
+    MANIFEST = json.load(_f)
+
+PROFILE = (os.environ.get('LOADTEST_PROFILE') or 'matchday').lower()
+# Веса классов пользователей по профилям; AdminScoreUser — всегда один экземпляр (fixed_count)
+PROFILES = {
+    'matchday': {'SpectatorUser': 60, 'BettorUser': 15, 'LiveViewerUser': 25, 'admin': True},
+    'browse': {'SpectatorUser': 80, 'BettorUser': 0, 'LiveViewerUser': 20, 'admin': False},
+    'betting': {'SpectatorUser': 20, 'BettorUser': 80, 'LiveViewerUser': 0, 'admin': True},
+}
+if PROFILE not in PROFILES:
+    raise SystemExit(f'Unknown LOADTEST_PROFILE={PROFILE!r}, expected one of {sorted(PROFILES)}')
+
+MATCHES = MANIFEST.get('matches') or []
+LIVE_MATCHES = [m for m in MATCHES if m.get('status') == 'live'] or MATCHES[:1]
+# Ставки принимаются только по турам из снапшота schedule (текущий + 2 следующих)
+_SCHEDULED = [m for m in MATCHES if m.get('status') == 'scheduled'] or MATCHES
+_BET_TOURS = sorted({m.get('tour') for m in _SCHEDULED if m.get('tour') is not None})[:3]
+BET_MATCHES = [m for m in _SCHEDULED if m.get('tour') in _BET_TOURS] or _SCHEDULED
+USERS = MANIFEST.get('users') or []
+BOT_TOKEN = MANIFEST['bot_token']
+
+# Время последнего изменения счёта админом: по нему считаем задержку доставки WS-событий
+_LAST_ADMIN_UPDATE = {'ts': 0.0}
+
+
+def _pick_match(live_bias: float = 0.7) -> dict:
+    if LIVE_MATCHES and random.random() < live_bias:
+        return random.choice(LIVE_MATCHES)
+    return random.choice(MATCHES)
+
+
+def _topic_for(m: dict) -> str:
+    # Схема WS_TOPIC_SCHEME=no_date (по умолчанию на сервере)
+    return f"match:{m['home'].lower()}__{m['away'].lower()}__:details"
+
+
+def _fire(request_type: str, name: str, started: float, exc=None, length: int = 0):
+    events.request.fire(request_type=request_type, name=name,
+                        response_time=(time.perf_counter() - started) * 1000,
+                        response_length=length, exception=exc, context={})
+
+
+class _EtagMixin:
+    """GET с If-None-Match, как у клиента (etag-fetch.js): 304 — успешный ответ"""
+
+    def etag_get(self, path, params=None, name=None):
+        key = (path, tuple(sorted((params or {}).items())))
+        headers = {}
+        if key in self._etags:
+            headers['If-None-Match'] = self._etags[key]
+        with self.client.get(path, params=params, headers=headers, name=name or path, catch_response=True) as r:
+            if r.status_code == 200:
+                et = r.headers.get('ETag')
+                if et:
+                    self._etags[key] = et
+                r.success()
+            elif r.status_code == 304:
+                r.success()
+            elif r.status_code == 429:
+                r.failure('429 rate limited')
+            else:
+                r.failure(f'HTTP {r.status_code}')
+
+
+class SpectatorUser(_EtagMixin, HttpUser):
+    """Зритель: опрашивает детали матча, комментарии и туры ставок"""
+    weight = PROFILES[PROFILE]['SpectatorUser']
+    wait_time = between(3, 8)
+
+    def on_start(self):
+        self._etags = {}
+        self.match = _pick_match()
+
+    @task(5)
+    def match_details(self):
+        self.etag_get('/api/match-details', {'home': self.match['home'], 'away': self.match['away']})
+
+    @task(4)
+    def comments_list(self):
+        self.etag_get('/api/match/comments/list',
+                      {'home': self.match['home'], 'away': self.match['away'], 'date': self.match['date']})
+
+    @task(3)
+    def betting_tours(self):
+        self.etag_get('/api/betting/tours')
+
+    @task(1)
+    def schedule(self):
+        self.etag_get('/api/schedule')
+
+    @task(1)
+    def switch_match(self):
+        self.match = _pick_match()
+
+
+class BettorUser(_EtagMixin, HttpUser):
+    """Игрок: смотрит туры и делает ставки"""
+    weight = PROFILES[PROFILE]['BettorUser']
+    wait_time = between(5, 15)
+
+    def on_start(self):
+        self._etags = {}
+        self.user_id = random.choice(USERS)
+        self.init_data = sign_init_data(BOT_TOKEN, make_user(self.user_id))
+
+    @task(3)
+    def betting_tours(self):
+        self.etag_get('/api/betting/tours')
+
+    @task(2)
+    def place_bet(self):
+        m = random.choice(BET_MATCHES)
+        form = {'initData': self.init_data, 'tour': str(m.get('tour') or ''), 'home': m['home'], 'away': m['away'],
+                'market': '1x2', 'selection': random.choice(('home', 'draw', 'away')),
+                'stake': str(random.choice((10, 50, 100)))}
+        with self.client.post('/api/betting/place', data=form, name='/api/betting/place', catch_response=True) as r:
+            if r.status_code == 200:
+                r.success()
+            elif r.status_code == 429:
+                # лимиты ставок ожидаемы под нагрузкой: считаем отдельно, не как ошибку сервера
+                r.success()
+                events.request.fire(request_type='LIMIT', name='/api/betting/place 429', response_time=0,
+                                    response_length=0, exception=None, context={})
+            elif r.status_code == 400:
+                # недостаточно кредитов / матч уже начался — бизнес-отказ, не ошибка
+                r.success()
+            else:
+                r.failure(f'HTTP {r.status_code}')
+
+    @task(1)
+    def my_bets(self):
+        with self.client.post('/api/betting/my-bets', data={'initData': self.init_data},
+                              name='/api/betting/my-bets', catch_response=True) as r:
+            if r.status_code in (200, 304):
+                r.success()
+            else:
+                r.failure(f'HTTP {r.status_code}')
+
+
+class LiveViewerUser(User):
+    """Держит Socket.IO-подписку на live-матч и predictions_page, меряет задержку доставки"""
+    weight = PROFILES[PROFILE]['LiveViewerUser']
+    wait_time = between(15, 30)
+
+    def on_start(self):
+        import socketio  # python-socketio Client, ставится вместе с flask-socketio
+        self.sio = socketio.Client(reconnection=False)
+        self.match = _pick_match(live_bias=1.0)
+        for event in ('data_patch', 'data_changed', 'topic_update', 'live_update', 'match_finished'):
+            self.sio.on(event, self._make_handler(event))
+        self._connect()
+
+    def _make_handler(self, event):
+        def _handler(payload=None):
+            lag_ms = 0.0
+            last = _LAST_ADMIN_UPDATE['ts']
+            if last and time.time() - last < 30:
+                lag_ms = (time.time() - last) * 1000
+            events.request.fire(request_type='WS', name=f'recv {event}', response_time=lag_ms,
+                                response_length=len(json.dumps(payload, default=str)) if payload else 0,
+                                exception=None, context={})
+        return _handler
+
+    def _connect(self):
+        started = time.perf_counter()
+        try:
+            self.sio.connect(self.host, transports=['websocket', 'polling'], wait_timeout=10)
+            self.sio.emit('subscribe', {'topic': _topic_for(self.match)})
+            self.sio.emit('subscribe', {'topic': 'predictions_page'})
+            _fire('WS', 'connect+subscribe', started)
+        except Exception as e:
+            _fire('WS', 'connect+subscribe', started, exc=e)
+
+    @task
+    def hold(self):
+        if not self.sio.connected:
+            _fire('WS', 'disconnected', time.perf_counter(), exc=RuntimeError('socket dropped'))
+            self._connect()
+
+    def on_stop(self):
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+
+class AdminScoreUser(HttpUser):
+    """Админ: обновляет счёт live-матчей (источник WS-пушей)"""
+    fixed_count = 1
+    wait_time = between(10, 20)
+
+    def on_start(self):
+        self.init_data = sign_init_data(BOT_TOKEN, make_user(MANIFEST['admin_id'], 'Admin', 'admin'))
+        self.scores = {(m['home'], m['away']): [0, 0] for m in LIVE_MATCHES}
+
+    @task
+    def update_score(self):
+        m = random.choice(LIVE_MATCHES)
+        score = self.scores.setdefault((m['home'], m['away']), [0, 0])
+        score[random.randint(0, 1)] += 1
+        form = {'initData': self.init_data, 'home': m['home'], 'away': m['away'],
+                'score_home': str(score[0]), 'score_away': str(score[1])}
+        _LAST_ADMIN_UPDATE['ts'] = time.time()
+        self.client.post('/api/match/score/set', data=form, name='/api/match/score/set [admin]')
+
+
+# Профили без классов: веса 0 исключаем из запуска
+for _cls in (SpectatorUser, BettorUser, LiveViewerUser):
+    if not _cls.weight:
+        _cls.abstract = True
+del _cls  # Locust ищет классы User среди глобалов модуля
+if not PROFILES[PROFILE]['admin']:
+    AdminScoreUser.abstract = True
+
+
+@events.quitting.add_listener
+def _write_report(environment, **kwargs):
+    """JSON-сводка: throughput, перцентили латентности и доля ошибок по каждому эндпоинту"""
+    stats = environment.stats
+
+    def _entry(e):
+        return {
+            'method': e.method,
+            'name': e.name,
+            'requests': e.num_requests,
+            'failures': e.num_failures,
+            'rps': round(e.total_rps, 2),
+            'error_rate': round(e.fail_ratio, 4),
+            'avg_ms': round(e.avg_response_time, 2),
+            'p50_ms': e.get_response_time_percentile(0.5),
+            'p95_ms': e.get_response_time_percentile(0.95),
+            'p99_ms': e.get_response_time_percentile(0.99),
+        }
+
+    report = {
+        'profile': PROFILE,
+        'finished_at': datetime.utcnow().isoformat() + 'Z',
+        'host': environment.host,
+        'manifest': {k: MANIFEST.get(k) for k in ('workers', 'database')},
+        'total': _entry(stats.total),
+        'endpoints': [_entry(e) for e in sorted(stats.entries.values(), key=lambda x: (x.method or '', x.name))],
+    }
+    path = os.environ.get('LOADTEST_REPORT') or os.path.join(
+        ROOT, 'benchmarks', 'results', datetime.now().strftime(f'loadtest-{PROFILE}-%Y%m%d-%H%M%S.json'))
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'[loadtest] report: {path}')
+    except Exception as e:
+        print(f'[loadtest] failed to write report: {e}')
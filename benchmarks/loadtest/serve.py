@@ -0,0 +1,89 @@
+"""
+Локальный сервер для нагрузочного теста: синтетика в БД + gunicorn (gevent websocket worker).
+
+    python -m benchmarks.loadtest.serve --port 8000 --live 2
+Пишет манифест (BOT_TOKEN, ADMIN_USER_ID, пользователи, ближайшие матчи) для locustfile
+и заменяет себя процессом gunicorn с той же конфигурацией, что и на Render.
+"""
+import argparse
+import json
+import os
+import secrets
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+DEFAULT_MANIFEST = os.path.join(ROOT, 'benchmarks', 'results', 'loadtest-manifest.json')
+DEFAULT_SQLITE = os.path.join(ROOT, 'benchmarks', '.loadtest.sqlite3')
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Seed synthetic data and start gunicorn+gevent for load tests')
+    ap.add_argument('--database-url', help='по умолчанию временная SQLite (или BENCH_DATABASE_URL)')
+    ap.add_argument('--reset', action='store_true', help='очистить бенчмарк-таблицы в непустой БД (Postgres)')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8000)
+    ap.add_argument('--workers', type=int, default=1, help='gunicorn workers (на Render: 1)')
+    ap.add_argument('--users', type=int, default=2000)
+    ap.add_argument('--matches', type=int, default=90)
+    ap.add_argument('--bets', type=int, default=10000)
+    ap.add_argument('--live', type=int, default=2, help='сколько ближайших матчей сделать live')
+    ap.add_argument('--manifest', default=DEFAULT_MANIFEST)
+    ap.add_argument('--seed-only', action='store_true', help='только подготовить БД и манифест')
+    args = ap.parse_args(argv)
+
+    database_url = args.database_url or os.environ.get('BENCH_DATABASE_URL') or ''
+    if not database_url:
+        if os.path.exists(DEFAULT_SQLITE):
+            os.remove(DEFAULT_SQLITE)
+        database_url = 'sqlite:///' + DEFAULT_SQLITE
+
+    env = os.environ
+    env['DATABASE_URL'] = database_url
+    env.setdefault('BOT_TOKEN', 'load:' + secrets.token_hex(16))
+    env.setdefault('ADMIN_USER_ID', '999000001')
+    env['WEBSOCKETS_ENABLED'] = '1'
+    env['WS_TOPIC_SUBSCRIPTIONS_ENABLED'] = '1'
+    env['ENABLE_SELF_PING'] = '0'
+    # Все виртуальные клиенты приходят с одного IP: per-IP лимиты @rate_limit иначе съедят весь трафик
+    for name in ('RL_TOURS_RPM', 'RL_SCHEDULE_RPM', 'RL_SUMMARY_RPM', 'RL_RESULTS_RPM', 'RL_MATCH_STATUS_LIVE_RPM'):
+        env.setdefault(name, '1000000')
+
+    import app as appmod
+    from benchmarks.datagen import generate
+
+    dataset = generate(appmod, users=args.users, matches=args.matches, bets=args.bets, live=args.live,
+                       reset=args.reset or database_url.startswith('sqlite'))
+    manifest = {
+        'base_url': f'http://{args.host}:{args.port}',
+        'bot_token': env['BOT_TOKEN'],
+        'admin_id': int(env['ADMIN_USER_ID']),
+        'users': dataset['user_ids'],
+        'matches': dataset['upcoming'],
+        'workers': args.workers,
+        'database': database_url.split(':', 1)[0],
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.manifest)), exist_ok=True)
+    with open(args.manifest, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"[loadtest] manifest: {args.manifest} ({len(manifest['users'])} users, {len(manifest['matches'])} matches)")
+    if args.seed_only:
+        return 0
+
+    cmd = [
+        sys.executable, '-m', 'gunicorn',
+        '-k', 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker',
+        '-w', str(args.workers),
+        '-b', f'{args.host}:{args.port}',
+        '--chdir', ROOT,
+        'wsgi:app',
+    ]
+    print('[loadtest] exec:', ' '.join(cmd))
+    sys.stdout.flush()
+    os.execvpe(cmd[0], cmd, dict(env))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Cold-start benchmark: время `import app` и латентность первого запроса.
+
+Каждый прогон — отдельный процесс python, чтобы не мешал кеш модулей.
+Запуск:
+    python -m benchmarks.startup --runs 5 --path /api/news
+Результат — JSON в stdout (или в файл через --out).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+_PROBE = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+import app as _app
+t1 = time.perf_counter()
+client = _app.app.test_client()
+paths = {paths!r}
+first = {{}}
+for p in paths:
+    s = time.perf_counter()
+    r = client.get(p)
+    first[p] = {{'ms': round((time.perf_counter() - s) * 1000, 2), 'status': r.status_code}}
+print(json.dumps({{'import_ms': round((t1 - t0) * 1000, 2), 'first_request': first,
+                  'rules': len(list(_app.app.url_map.iter_rules()))}}))
+"""
+
+
+def _run_once(paths, env):
+    code = _PROBE.format(root=ROOT, paths=list(paths))
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, timeout=120)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr[-2000:])
+    # app.py печатает служебные строки при импорте — берём последнюю JSON-строку
+    for line in reversed(out.stdout.strip().splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError('probe produced no JSON')
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Measure app import time and first-request latency')
+    ap.add_argument('--runs', type=int, default=5)
+    ap.add_argument('--path', action='append', dest='paths', help='URL to hit after import (repeatable)')
+    ap.add_argument('--out', help='write JSON result to file')
+    args = ap.parse_args(argv)
+    paths = args.paths or ['/health', '/api/news']
+
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(ROOT, 'benchmarks', '.startup.sqlite3'))
+    env.setdefault('WEBSOCKETS_ENABLED', '0')
+
+    runs = [_run_once(paths, env) for _ in range(max(1, args.runs))]
+    imports = [r['import_ms'] for r in runs]
+    result = {
+        'runs': len(runs),
+        'import_ms': {'median': statistics.median(imports), 'min': min(imports), 'max': max(imports)},
+        'first_request_ms': {
+            p: statistics.median(r['first_request'][p]['ms'] for r in runs) for p in paths
+        },
+        'status': {p: runs[-1]['first_request'][p]['status'] for p in paths},
+        'rules': runs[-1]['rules'],
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
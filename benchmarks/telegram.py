@@ -0,0 +1,35 @@
+"""
+Telegram WebApp initData signer для бенчмарков и нагрузочных тестов.
+
+Подпись совпадает с проверкой в app.parse_and_verify_telegram_init_data:
+secret_key = HMAC_SHA256(key="WebAppData", data=bot_token),
+hash = HMAC_SHA256(key=secret_key, data=data_check_string).
+"""
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import urlencode
+
+
+def sign_init_data(bot_token: str, user: dict, auth_date: int = None, **extra) -> str:
+    """Возвращает строку initData (urlencoded) с корректным hash для данного BOT_TOKEN"""
+    fields = {
+        'auth_date': str(int(auth_date if auth_date is not None else time.time())),
+        'user': json.dumps(user, ensure_ascii=False, separators=(',', ':')),
+    }
+    for k, v in extra.items():
+        fields[k] = str(v)
+    data_check_string = '\n'.join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret_key = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    fields['hash'] = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+def make_user(user_id: int, first_name: str = None, username: str = None) -> dict:
+    """Минимальный объект user из initData"""
+    return {
+        'id': int(user_id),
+        'first_name': first_name or f'Bench{user_id}',
+        'username': username or f'bench_{user_id}',
+    }
@@ -3,8 +3,11 @@ Configuration module for Liga Obninska
 Manages application settings and environment variables
 """
 import os
+import json
+import hashlib
 import secrets
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, NamedTuple, Optional
 
 class Config:
     """Application configuration class"""
@@ -129,6 +132,209 @@ class TestingConfig(Config):
     TESTING = True
     DATABASE_URL = os.environ.get('TEST_DATABASE_URL', 'sqlite:///test.db')
 
+class Setting(NamedTuple):
+    """Описание настройки реестра: имя env-переменной, тип (int|float|bool|str|json), значение по умолчанию"""
+    name: str
+    type: str
+    default: Any
+    group: str
+    alias: Optional[str] = None  # устаревшее имя переменной, читается если основное не задано
+
+
+def _s(name: str, type_: str, default: Any, group: str, alias: Optional[str] = None) -> Setting:
+    return Setting(name, type_, default, group, alias)
+
+
+# Настройки горячих путей (коэффициенты, ставки, кеши, фоновый sync, фичефлаги).
+# Парсятся один раз при старте и по явному reload, а не на каждый расчёт/запрос.
+SETTINGS_SPEC = (
+    # Ставки
+    _s('BET_MIN_STAKE', 'int', 10, 'betting'),
+    _s('BET_MAX_STAKE', 'int', 10000, 'betting'),
+    _s('BET_DAILY_MAX_STAKE', 'int', 50000, 'betting'),
+    _s('BET_MARGIN', 'float', 0.06, 'betting'),
+    _s('BET_MATCH_DURATION_MINUTES', 'int', 120, 'betting'),
+    _s('BET_LOCK_AHEAD_MINUTES', 'int', 5, 'betting'),
+    # Модель коэффициентов
+    _s('BET_BASE_TOTAL', 'float', 4.2, 'odds'),
+    _s('BET_HOME_ADV', 'float', 0.0, 'odds'),
+    _s('BET_RANK_SHARE_SCALE', 'float', 0.03, 'odds'),
+    _s('BET_RANK_TOTAL_SCALE', 'float', 0.015, 'odds'),
+    _s('BET_STR_SHARE_SCALE', 'float', 0.05, 'odds'),
+    _s('BET_STR_TOTAL_SCALE', 'float', 0.015, 'odds'),
+    _s('BET_MIN_RATE', 'float', 0.15, 'odds'),
+    _s('BET_MAX_RATE', 'float', 5.0, 'odds'),
+    _s('BET_DC_RHO', 'float', -0.05, 'odds'),
+    _s('BET_MAX_GOALS', 'int', 8, 'odds'),
+    _s('BET_SOFTMAX_GAMMA', 'float', 1.30, 'odds'),
+    _s('BET_FAV_TARGET_ODDS', 'float', 1.40, 'odds'),
+    _s('BET_VOTE_INFLUENCE_MAX', 'float', 0.15, 'odds'),
+    _s('BET_FAV_PULL', 'float', 0.50, 'odds'),
+    _s('BET_SOFTMAX_DRAW_GAMMA', 'float', 1.00, 'odds'),
+    _s('BET_DRAW_BOOST_MAX', 'float', 0.25, 'odds'),
+    _s('BET_DRAW_MAX_PROB', 'float', 0.35, 'odds'),
+    _s('BET_FORM_MAX_INFL', 'float', 0.12, 'odds'),
+    _s('BET_PARITY_MIN_ODD', 'float', 2.00, 'odds'),
+    _s('BET_PARITY_MAX_ODD', 'float', 2.50, 'odds'),
+    _s('BET_PARITY_MID_ODD', 'float', 2.20, 'odds'),
+    _s('BET_BASE_PENALTY', 'float', 0.35, 'odds'),
+    _s('BET_BASE_REDCARD', 'float', 0.22, 'odds'),
+    _s('BET_STR_SPECIALS_SCALE', 'float', 0.020, 'odds'),
+    _s('BET_TEAM_STRENGTHS_JSON', 'json', {}, 'odds'),
+    # Кеши
+    _s('ODDS_PUBLISH_MAX_AGE_SEC', 'int', 1800, 'cache'),
+    _s('ACH_CACHE_TTL', 'int', 300, 'cache'),
+    _s('ETAG_CACHE_MAX_KEYS', 'int', 256, 'cache'),
+    _s('SNAPSHOT_DELTA_RETAIN', 'int', 200, 'cache'),
+    _s('PUBLIC_PROFILE_CACHE_MAX', 'int', 5000, 'cache'),
+    _s('PUBLIC_PROFILE_LOCAL_TTL', 'float', 30.0, 'cache'),
+    # Фоновый sync
+    _s('ENABLE_SCHEDULER', 'bool', True, 'sync'),
+    _s('SYNC_INTERVAL_SEC', 'int', 600, 'sync'),
+    _s('SYNC_COALESCE_SEC', 'float', 3.0, 'sync'),
+    _s('SYNC_MAX_DELAY_SEC', 'float', 30.0, 'sync'),
+    _s('SYNC_SWEEP_SEC', 'int', 1800, 'sync'),
+    _s('LIVE_SOON_MIN', 'int', 30, 'sync'),
+    _s('LIVE_REGISTRY_RELOAD_SEC', 'int', 300, 'sync'),
+    _s('LIVE_SCORE_COALESCE_MS', 'int', 1500, 'sync'),
+    _s('LIVE_TABLE_REBUILD_SEC', 'int', 300, 'sync'),
+    _s('USER_STATS_RECONCILE_SEC', 'int', 600, 'sync'),
+    _s('LEADER_PRECOMPUTE_ENABLED', 'bool', True, 'sync'),
+    _s('LEADER_PRECOMPUTE_SEC', 'int', 60, 'sync'),
+    # Клиентские логи админки (/api/admin/client-logs)
+    _s('CLIENT_LOG_FILE', 'str', '', 'logs'),
+    _s('CLIENT_LOG_MAX_BYTES', 'int', 5 * 1024 * 1024, 'logs'),
+    _s('CLIENT_LOG_BACKUPS', 'int', 3, 'logs'),
+    _s('CLIENT_LOG_BUFFER', 'int', 5000, 'logs'),
+    _s('CLIENT_LOG_SESSION_QUOTA', 'int', 600, 'logs'),
+    _s('CLIENT_LOG_QUOTA_WINDOW_SEC', 'int', 60, 'logs'),
+    # Резервные копии админки (потоковые, services/backups.py)
+    _s('BACKUP_DIR', 'str', '', 'backup'),
+    _s('BACKUP_CODEC', 'str', 'gzip', 'backup'),
+    _s('BACKUP_CHUNK_KB', 'int', 1024, 'backup'),
+    _s('BACKUP_BATCH_ROWS', 'int', 1000, 'backup'),
+    # Фичефлаги и время
+    _s('ALLOW_VOTE_WITHOUT_TELEGRAM', 'bool', False, 'features'),
+    _s('FEATURE_TEAM_ROSTER_STORE', 'bool', False, 'features'),
+    _s('DEFAULT_TZ', 'str', 'Europe/Moscow', 'features'),
+    _s('SCHEDULE_TZ_SHIFT_MIN', 'int', 0, 'features'),
+    _s('SCHEDULE_TZ_SHIFT_HOURS', 'int', 0, 'features'),
+    _s('DEFAULT_TZ_MINUTES', 'int', 180, 'features', alias='DEFAULT_TZ_MIN'),
+)
+
+
+def _read_env_file(path: str) -> Dict[str, str]:
+    """KEY=VALUE строки (.env формат); комментарии и пустые строки пропускаются"""
+    out: Dict[str, str] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, val = line.split('=', 1)
+            out[key.strip()] = val.strip().strip('"').strip("'")
+    return out
+
+
+def _parse_setting(spec: Setting, raw: Optional[str]) -> Any:
+    if raw is None or str(raw).strip() == '':
+        return spec.default
+    raw = str(raw).strip()
+    if spec.type == 'int':
+        return int(raw)
+    if spec.type == 'float':
+        return float(raw.replace(',', '.'))
+    if spec.type == 'bool':
+        return raw.lower() in ('1', 'true', 'yes', 'on')
+    if spec.type == 'json':
+        return json.loads(raw)
+    return raw
+
+
+class SettingsRegistry:
+    """Типизированный реестр настроек: значения парсятся один раз (load/reload).
+
+    Доступ — атрибутом (settings.BET_MARGIN) или get(name). Невалидное значение
+    заменяется значением по умолчанию и попадает в errors. version растёт только
+    когда reload реально изменил значения — её можно включать в ключи кешей.
+    """
+
+    def __init__(self, spec=SETTINGS_SPEC, env=None):
+        self._spec = {s.name: s for s in spec}
+        # RLock: load() может повторно войти из того же потока (reload по сигналу поверх load)
+        self._lock = threading.RLock()
+        self._values: Dict[str, Any] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self.version = 0
+        self.errors: list[str] = []
+        self.load(env)
+
+    def load(self, env=None) -> list[str]:
+        """(Пере)читает настройки из env. Возвращает имена изменившихся.
+
+        По умолчанию — os.environ поверх которого накладывается файл SETTINGS_ENV_FILE
+        (окружение запущенного процесса снаружи не меняется, файл — способ поменять значения без рестарта).
+        """
+        errors: list[str] = []
+        if env is None:
+            env = dict(os.environ)
+            path = env.get('SETTINGS_ENV_FILE', '').strip()
+            if path:
+                try:
+                    env.update(_read_env_file(path))
+                except Exception as e:
+                    errors.append(f"SETTINGS_ENV_FILE: {e}")
+        values: Dict[str, Any] = {}
+        for name, spec in self._spec.items():
+            try:
+                raw = env.get(name)
+                if not raw and spec.alias:
+                    raw = env.get(spec.alias)
+                values[name] = _parse_setting(spec, raw)
+            except Exception as e:
+                values[name] = spec.default
+                errors.append(f"{name}: {e}")
+        with self._lock:
+            changed = [k for k, v in values.items() if self._values.get(k, object()) != v]
+            if changed or not self.version:
+                self._values = values
+                self._fingerprints = {}
+                self.version += 1
+            self.errors = errors
+        return changed
+
+    def reload(self, env=None) -> list[str]:
+        return self.load(env)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self._values.get(name, default)
+
+    def __getattr__(self, name: str) -> Any:
+        values = self.__dict__.get('_values') or {}
+        if name in values:
+            return values[name]
+        raise AttributeError(name)
+
+    def group(self, group: str) -> Dict[str, Any]:
+        values = self._values
+        return {k: values[k] for k, s in self._spec.items() if s.group == group}
+
+    def fingerprint(self, prefix: str = '') -> str:
+        """Стабильный между воркерами хеш значений (по префиксу имени) — для config_hash кешей"""
+        cached = self._fingerprints.get(prefix)
+        if cached is None:
+            items = sorted((k, v) for k, v in self._values.items() if k.startswith(prefix))
+            raw = json.dumps(items, sort_keys=True, ensure_ascii=False, default=str)
+            cached = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+            self._fingerprints[prefix] = cached
+        return cached
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._values)
+
+
+settings = SettingsRegistry()
+
 # Configuration mapping
 config_map = {
     'development': DevelopmentConfig,
@@ -0,0 +1,41 @@
+"""Create admin_backup_chunks (streamed admin backups stored in chunks)
+
+Revision ID: 20261019_add_admin_backup_chunks
+Revises: 20261019_add_user_stats
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_add_admin_backup_chunks'
+down_revision = '20261019_add_user_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        sa.text(
+            """
+            CREATE TABLE IF NOT EXISTS admin_backups (
+                id SERIAL PRIMARY KEY,
+                action VARCHAR(128) NOT NULL,
+                payload_gz BYTEA NOT NULL,
+                metadata JSONB,
+                created_by VARCHAR(64),
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+            );
+            CREATE INDEX IF NOT EXISTS idx_admin_backups_action_created_at ON admin_backups(action, created_at DESC);
+            CREATE TABLE IF NOT EXISTS admin_backup_chunks (
+                backup_id INTEGER NOT NULL REFERENCES admin_backups(id) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                data BYTEA NOT NULL,
+                PRIMARY KEY (backup_id, seq)
+            );
+            """
+        )
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS admin_backup_chunks;")
@@ -0,0 +1,39 @@
+"""Create odds_snapshots (published odds with cross-worker version)
+
+Revision ID: 20261019_add_odds_snapshots
+Revises: 20261019_add_user_achievement_progress
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_add_odds_snapshots'
+down_revision = '20261019_add_user_achievement_progress'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        sa.text(
+            """
+            CREATE TABLE IF NOT EXISTS odds_snapshots (
+                home VARCHAR(128) NOT NULL,
+                away VARCHAR(128) NOT NULL,
+                date_key VARCHAR(10),
+                version INTEGER NOT NULL DEFAULT 1,
+                payload TEXT NOT NULL,
+                payload_hash VARCHAR(40),
+                config_hash VARCHAR(40),
+                stale BOOLEAN NOT NULL DEFAULT false,
+                updated_at TIMESTAMPTZ DEFAULT NOW(),
+                PRIMARY KEY (home, away)
+            );
+            CREATE INDEX IF NOT EXISTS ix_odds_snapshots_away ON odds_snapshots(away);
+            """
+        )
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS odds_snapshots;")
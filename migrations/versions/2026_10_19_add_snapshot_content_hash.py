@@ -0,0 +1,27 @@
+"""Add snapshots.content_hash (content-addressed snapshot writes, no-op skip)
+
+Revision ID: 20261019_add_snapshot_content_hash
+Revises: 20261019_add_snapshot_deltas
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_add_snapshot_content_hash'
+down_revision = '20261019_add_snapshot_deltas'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        sa.text(
+            """
+            ALTER TABLE snapshots ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+            """
+        )
+    )
+
+
+def downgrade():
+    op.execute("ALTER TABLE snapshots DROP COLUMN IF EXISTS content_hash;")
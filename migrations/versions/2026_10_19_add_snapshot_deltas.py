@@ -0,0 +1,42 @@
+"""Create snapshot_versions and snapshot_deltas (versioned schedule/results deltas)
+
+Revision ID: 20261019_add_snapshot_deltas
+Revises: 20261019_add_user_daily_stake
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_add_snapshot_deltas'
+down_revision = '20261019_add_user_daily_stake'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        sa.text(
+            """
+            CREATE TABLE IF NOT EXISTS snapshot_versions (
+                key VARCHAR(64) PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0,
+                base_version INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMPTZ DEFAULT NOW()
+            );
+            CREATE TABLE IF NOT EXISTS snapshot_deltas (
+                id SERIAL PRIMARY KEY,
+                snapshot_key VARCHAR(64) NOT NULL,
+                version INTEGER NOT NULL,
+                entry_key TEXT NOT NULL,
+                entry TEXT NULL,
+                created_at TIMESTAMPTZ DEFAULT NOW()
+            );
+            CREATE INDEX IF NOT EXISTS ix_snapshot_deltas_key_version ON snapshot_deltas(snapshot_key, version);
+            """
+        )
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS snapshot_deltas;")
+    op.execute("DROP TABLE IF EXISTS snapshot_versions;")
@@ -0,0 +1,39 @@
+"""Create user_achievement_progress (incremental achievement counters)
+
+Revision ID: 20261019_add_user_achievement_progress
+Revises: 20250927_add_team_players
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_add_user_achievement_progress'
+down_revision = '20250927_add_team_players'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        sa.text(
+            """
+            CREATE TABLE IF NOT EXISTS user_achievement_progress (
+                user_id INTEGER PRIMARY KEY,
+                bets_total INTEGER NOT NULL DEFAULT 0,
+                bets_won INTEGER NOT NULL DEFAULT 0,
+                max_win_odds DOUBLE PRECISION NOT NULL DEFAULT 0,
+                markets_mask INTEGER NOT NULL DEFAULT 0,
+                weeks_active INTEGER NOT NULL DEFAULT 0,
+                last_bet_week TIMESTAMPTZ,
+                invited_count INTEGER NOT NULL DEFAULT 0,
+                checkins_total INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMPTZ DEFAULT NOW(),
+                updated_at TIMESTAMPTZ DEFAULT NOW()
+            );
+            """
+        )
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS user_achievement_progress;")
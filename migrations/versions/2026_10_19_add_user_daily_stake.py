@@ -0,0 +1,33 @@
+"""Create user_daily_stake (per-user daily stake ledger)
+
+Revision ID: 20261019_add_user_daily_stake
+Revises: 20261019_add_odds_snapshots
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_add_user_daily_stake'
+down_revision = '20261019_add_odds_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        sa.text(
+            """
+            CREATE TABLE IF NOT EXISTS user_daily_stake (
+                user_id INTEGER NOT NULL,
+                day DATE NOT NULL,
+                total INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMPTZ DEFAULT NOW(),
+                PRIMARY KEY (user_id, day)
+            );
+            """
+        )
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS user_daily_stake;")
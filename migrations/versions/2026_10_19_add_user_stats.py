@@ -0,0 +1,58 @@
+"""Create user_stats / user_stats_daily (rolling counters for the admin users dashboard)
+
+Revision ID: 20261019_add_user_stats
+Revises: 20261019_add_snapshot_content_hash
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_add_user_stats'
+down_revision = '20261019_add_snapshot_content_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        sa.text(
+            """
+            CREATE TABLE IF NOT EXISTS user_stats (
+                id INTEGER PRIMARY KEY,
+                stats_day DATE,
+                total_users INTEGER NOT NULL DEFAULT 0,
+                new_today INTEGER NOT NULL DEFAULT 0,
+                with_bets INTEGER NOT NULL DEFAULT 0,
+                with_checkins INTEGER NOT NULL DEFAULT 0,
+                checkins_today INTEGER NOT NULL DEFAULT 0,
+                bets_today INTEGER NOT NULL DEFAULT 0,
+                active_1d INTEGER NOT NULL DEFAULT 0,
+                active_7d INTEGER NOT NULL DEFAULT 0,
+                active_30d INTEGER NOT NULL DEFAULT 0,
+                new_30d INTEGER NOT NULL DEFAULT 0,
+                online_5m INTEGER NOT NULL DEFAULT 0,
+                online_15m INTEGER NOT NULL DEFAULT 0,
+                reconciled_at TIMESTAMPTZ,
+                updated_at TIMESTAMPTZ DEFAULT NOW()
+            );
+            CREATE TABLE IF NOT EXISTS user_stats_daily (
+                day DATE PRIMARY KEY,
+                total_users INTEGER NOT NULL DEFAULT 0,
+                new_users INTEGER NOT NULL DEFAULT 0,
+                active_1d INTEGER NOT NULL DEFAULT 0,
+                active_7d INTEGER NOT NULL DEFAULT 0,
+                active_30d INTEGER NOT NULL DEFAULT 0,
+                with_bets INTEGER NOT NULL DEFAULT 0,
+                with_checkins INTEGER NOT NULL DEFAULT 0,
+                checkins INTEGER NOT NULL DEFAULT 0,
+                bets INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMPTZ DEFAULT NOW()
+            );
+            """
+        )
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS user_stats_daily;")
+    op.execute("DROP TABLE IF EXISTS user_stats;")
@@ -0,0 +1,54 @@
+"""Create user_stats_counters (sharded per-day event counters for the admin users dashboard)
+
+Revision ID: 20261019_add_user_stats_counters
+Revises: 20261019_add_admin_backup_chunks
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_add_user_stats_counters'
+down_revision = '20261019_add_admin_backup_chunks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        sa.text(
+            """
+            CREATE TABLE IF NOT EXISTS user_stats_counters (
+                day DATE NOT NULL,
+                shard INTEGER NOT NULL,
+                new_users INTEGER NOT NULL DEFAULT 0,
+                first_bets INTEGER NOT NULL DEFAULT 0,
+                first_checkins INTEGER NOT NULL DEFAULT 0,
+                checkins INTEGER NOT NULL DEFAULT 0,
+                bets INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, shard)
+            );
+            ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS ev_new_users INTEGER NOT NULL DEFAULT 0;
+            ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS ev_first_bets INTEGER NOT NULL DEFAULT 0;
+            ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS ev_first_checkins INTEGER NOT NULL DEFAULT 0;
+            ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS ev_checkins INTEGER NOT NULL DEFAULT 0;
+            ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS ev_bets INTEGER NOT NULL DEFAULT 0;
+            CREATE INDEX IF NOT EXISTS idx_users_updated_at ON users (updated_at);
+            """
+        )
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_users_updated_at;")
+    op.execute(
+        sa.text(
+            """
+            ALTER TABLE user_stats DROP COLUMN IF EXISTS ev_new_users;
+            ALTER TABLE user_stats DROP COLUMN IF EXISTS ev_first_bets;
+            ALTER TABLE user_stats DROP COLUMN IF EXISTS ev_first_checkins;
+            ALTER TABLE user_stats DROP COLUMN IF EXISTS ev_checkins;
+            ALTER TABLE user_stats DROP COLUMN IF EXISTS ev_bets;
+            """
+        )
+    )
+    op.execute("DROP TABLE IF EXISTS user_stats_counters;")
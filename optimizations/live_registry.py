@@ -0,0 +1,189 @@
+"""
+Реестр live и скоро начинающихся матчей в памяти процесса.
+
+Окна матчей (старт .. старт + длительность) загружаются из снапшота betting-tours и ручных
+live-статусов (matches.status) при reload — после пересборки туров и смены статуса админом,
+плюс страховочно раз в reload_sec. Переходы scheduled → soon → live → завершён выполняет таймер
+на ближайшую границу окна, а не каждый запрос; о переходах сообщает on_change
+(app.py → WebSocketManager, data_type='match_status_change'). Чтение — O(live) с готовым ETag.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+
+
+class LiveMatchRegistry:
+    def __init__(self, now_fn: Callable[[], datetime], duration_min: int = 120, soon_min: int = 30,
+                 on_change: Optional[Callable[[List[dict]], None]] = None):
+        self.now_fn = now_fn
+        self.duration_min = duration_min
+        self.soon_min = soon_min
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._reload_requested = False
+        self._loaded = False
+        # (home, away) -> начало матча по расписанию (локальное naive-время, как в снапшоте)
+        self._starts: Dict[Key, datetime] = {}
+        # (home, away) -> live_started_at iso для ручного live (matches.status='live')
+        self._manual: Dict[Key, str] = {}
+        self._state: Dict[Key, str] = {}
+        self._live: List[dict] = []
+        self._soon: List[dict] = []
+        self._etag = ''
+        self._updated_at: Optional[str] = None
+        self._next_at: Optional[datetime] = None
+        self._stats = {'reloads': 0, 'transitions': 0, 'reads': 0}
+        self._thread = None
+
+    # ---------------- загрузка и ручные статусы ----------------
+    def reload(self, schedule_matches: Iterable[dict], manual_live: Iterable[Tuple[str, str, Optional[str]]]) -> List[dict]:
+        """schedule_matches — матчи туров ({home, away, datetime}); manual_live — (home, away, live_started_iso)"""
+        starts: Dict[Key, datetime] = {}
+        for m in schedule_matches or ():
+            dt_str = m.get('datetime')
+            if not dt_str:
+                continue
+            try:
+                starts[(m.get('home', ''), m.get('away', ''))] = datetime.fromisoformat(dt_str)
+            except Exception:
+                continue
+        manual = {((h or ''), (a or '')): iso for h, a, iso in (manual_live or ())}
+        with self._lock:
+            # Первая загрузка — не рассылаем «переходы» для уже идущих матчей
+            notify = self._loaded
+            self._starts = starts
+            self._manual = manual
+            self._loaded = True
+            self._reload_requested = False
+            self._stats['reloads'] += 1
+        return self.tick(notify=notify)
+
+    def request_reload(self) -> None:
+        """Пометить реестр к перезагрузке (таймерный поток или ближайшее чтение)"""
+        with self._lock:
+            self._reload_requested = True
+        self._wake.set()
+
+    def needs_reload(self) -> bool:
+        """Читателю нужно загрузить реестр сам: ещё не загружен или reload запрошен без таймерного потока"""
+        with self._lock:
+            return not self._loaded or (self._reload_requested and self._thread is None)
+
+    def set_manual(self, home: str, away: str, status: str, live_started_at: Optional[str] = None) -> List[dict]:
+        """Ручная смена статуса админом: live добавляет матч, любой другой статус снимает ручной live"""
+        key = (home or '', away or '')
+        with self._lock:
+            if status == 'live':
+                self._manual[key] = self._manual.get(key) or live_started_at or self.now_fn().isoformat()
+            else:
+                self._manual.pop(key, None)
+        return self.tick()
+
+    # ---------------- переходы ----------------
+    def tick(self, now: Optional[datetime] = None, notify: bool = True) -> List[dict]:
+        """Пересчитать состояния на момент now; возвращает переходы [{home, away, status, previous}]"""
+        now = now or self.now_fn()
+        duration = timedelta(minutes=self.duration_min)
+        soon = timedelta(minutes=self.soon_min)
+        with self._lock:
+            state: Dict[Key, str] = {}
+            live: List[dict] = []
+            soon_items: List[dict] = []
+            next_at: Optional[datetime] = None
+            for key, start in self._starts.items():
+                end = start + duration
+                if start <= now < end:
+                    state[key] = 'live'
+                    live.append({'home': key[0], 'away': key[1], 'live_started_at': start.isoformat()})
+                elif start - soon <= now < start:
+                    state[key] = 'soon'
+                    soon_items.append({'home': key[0], 'away': key[1], 'datetime': start.isoformat()})
+                for edge in (start - soon, start, end):
+                    if edge > now and (next_at is None or edge < next_at):
+                        next_at = edge
+            for key, iso in self._manual.items():
+                if state.get(key) != 'live':
+                    state[key] = 'live'
+                    live.append({'home': key[0], 'away': key[1], 'live_started_at': iso or now.isoformat()})
+            soon_items = [it for it in soon_items if state.get((it['home'], it['away'])) == 'soon']
+            transitions = []
+            for key in set(self._state) | set(state):
+                prev, cur = self._state.get(key, 'scheduled'), state.get(key, 'scheduled')
+                if prev == cur:
+                    continue
+                # Конец окна live — матч ушёл из реестра (финал фиксирует админ / match_finalize)
+                status = 'ended' if prev == 'live' and cur == 'scheduled' else cur
+                transitions.append({'home': key[0], 'away': key[1], 'status': status, 'previous': prev})
+            self._state = state
+            self._next_at = next_at
+            raw = json.dumps({'live': live, 'soon': soon_items}, sort_keys=True, ensure_ascii=False)
+            etag = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+            if etag != self._etag:
+                self._live, self._soon, self._etag = live, soon_items, etag
+                self._updated_at = now.isoformat()
+            self._stats['transitions'] += len(transitions)
+        if transitions and notify and self.on_change:
+            try:
+                self.on_change(transitions)
+            except Exception as e:
+                logger.warning(f"live registry on_change failed: {e}")
+        return transitions
+
+    def next_transition_in(self, now: Optional[datetime] = None) -> Optional[float]:
+        now = now or self.now_fn()
+        with self._lock:
+            if self._next_at is None:
+                return None
+            return max(0.0, (self._next_at - now).total_seconds())
+
+    # ---------------- чтение ----------------
+    def read(self) -> dict:
+        """{live, soon, etag, updated_at}; просроченная граница окна пересчитывается здесь же"""
+        due = self.next_transition_in()
+        if due is not None and due <= 0:
+            self.tick()
+        with self._lock:
+            self._stats['reads'] += 1
+            return {'live': list(self._live), 'soon': list(self._soon), 'etag': self._etag, 'updated_at': self._updated_at}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, 'live': len(self._live), 'soon': len(self._soon), 'tracked': len(self._starts),
+                    'manual': len(self._manual), 'next_transition_at': self._next_at.isoformat() if self._next_at else None}
+
+    # ---------------- таймер ----------------
+    def start(self, loader: Callable[[], None], reload_sec: float = 300.0) -> None:
+        """Фоновый поток: спит до ближайшей границы окна / запроса reload / reload_sec"""
+        if self._thread is not None:
+            return
+
+        def _loop():
+            last_reload = 0.0
+            while True:
+                try:
+                    if self._reload_requested or not self._loaded or time.time() - last_reload >= reload_sec:
+                        loader()
+                        last_reload = time.time()
+                    else:
+                        self.tick()
+                except Exception as e:
+                    logger.warning(f"live registry loop error: {e}")
+                due = self.next_transition_in()
+                timeout = reload_sec - (time.time() - last_reload)
+                if due is not None:
+                    timeout = min(timeout, due + 0.5)
+                self._wake.wait(max(1.0, timeout))
+                self._wake.clear()
+
+        t = threading.Thread(target=_loop, daemon=True, name='live-registry')
+        t.start()
+        self._thread = t
@@ -0,0 +1,172 @@
+"""
+Live-проекция таблицы лиги: финальная таблица (завершённые матчи) + предварительные счёта live-матчей.
+
+База (агрегат по завершённым матчам) пересобирается только по request_rebuild (изменились
+снапшоты league-table/results) или раз в rebuild_sec. Набор live-матчей задаёт реестр live
+(app.py → sync_live), правка счёта (set_score) вычитает прежний вклад матча и добавляет новый —
+O(1) по агрегату и O(teams) на сортировку строк, без чтения снапшотов и всех MatchScore.
+Каждое изменение строк поднимает version и передаётся в on_change (WS league_table).
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+Score = Tuple[int, int]
+
+HEADER = ['№', 'Команда', 'И', 'В', 'Н', 'П', 'Р', 'О']
+_ZERO = {'P': 0, 'W': 0, 'D': 0, 'L': 0, 'GF': 0, 'GA': 0, 'PTS': 0}
+
+
+def _apply(agg: Dict[str, dict], home: str, away: str, sh: int, sa: int, sign: int) -> None:
+    """Вклад одного матча в агрегат (sign=-1 — снять)"""
+    for team, gf, ga in ((home, sh, sa), (away, sa, sh)):
+        a = agg.setdefault(team, dict(_ZERO))
+        a['P'] += sign
+        a['GF'] += sign * gf
+        a['GA'] += sign * ga
+        if gf > ga:
+            a['W'] += sign
+            a['PTS'] += 3 * sign
+        elif gf == ga:
+            a['D'] += sign
+            a['PTS'] += sign
+        else:
+            a['L'] += sign
+
+
+class LiveTableProjection:
+    def __init__(self, on_change: Optional[Callable[[dict], None]] = None, rows: int = 9,
+                 rebuild_sec: float = 300.0):
+        self.on_change = on_change
+        self.rows = rows
+        self.rebuild_sec = rebuild_sec
+        self._lock = threading.Lock()
+        self._base: Dict[str, dict] = {}
+        self._finished: set = set()
+        self._live: Dict[Key, Optional[Score]] = {}
+        self._agg: Dict[str, dict] = {}
+        self._payload: Optional[dict] = None
+        self._version = 0
+        self._base_at = 0.0
+        self._rebuild_requested = True
+        self._stats = {'rebuilds': 0, 'score_updates': 0, 'published': 0}
+
+    # ---------------- база ----------------
+    def request_rebuild(self) -> None:
+        with self._lock:
+            self._rebuild_requested = True
+
+    def needs_rebuild(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._rebuild_requested or now - self._base_at >= self.rebuild_sec
+
+    def set_base(self, agg: Dict[str, dict], finished: Iterable[Key] = (),
+                 live: Optional[Dict[Key, Optional[Score]]] = None, now: Optional[float] = None) -> bool:
+        """Новая финальная таблица (+ опционально набор live со счетами); полный пересчёт агрегата"""
+        with self._lock:
+            self._base = {team: {**_ZERO, **{k: int(v.get(k, 0) or 0) for k in _ZERO}} for team, v in (agg or {}).items()}
+            self._finished = set(finished or ())
+            if live is not None:
+                self._live = dict(live)
+            self._base_at = time.time() if now is None else now
+            self._rebuild_requested = False
+            self._stats['rebuilds'] += 1
+            self._agg = {team: dict(v) for team, v in self._base.items()}
+            for (home, away), score in self._live.items():
+                if score is not None and (home, away) not in self._finished:
+                    _apply(self._agg, home, away, score[0], score[1], 1)
+        return self._publish()
+
+    # ---------------- live ----------------
+    def live_pairs(self) -> set:
+        with self._lock:
+            return set(self._live)
+
+    def sync_live(self, pairs: Iterable[Key], scores: Optional[Dict[Key, Optional[Score]]] = None) -> bool:
+        """Набор live-матчей сменился (начались/закончились): снимает ушедшие, добавляет новые
+        со счётом из scores; вклады остальных не трогаются"""
+        pairs = set(pairs or ())
+        scores = scores or {}
+        with self._lock:
+            for key in list(self._live):
+                if key not in pairs:
+                    self._overlay(key, None)
+                    self._live.pop(key, None)
+            for key in pairs:
+                if key not in self._live:
+                    self._overlay(key, scores.get(key))
+        return self._publish()
+
+    def set_score(self, home: str, away: str, score_home, score_away) -> bool:
+        """Правка счёта live-матча; не live (или уже в результатах) — игнорируется"""
+        key = (home, away)
+        try:
+            score = (int(score_home), int(score_away)) if score_home is not None and score_away is not None else None
+        except (TypeError, ValueError):
+            score = None
+        with self._lock:
+            if key not in self._live or self._live[key] == score:
+                return False
+            self._overlay(key, score)
+            self._stats['score_updates'] += 1
+        return self._publish()
+
+    def _overlay(self, key: Key, score: Optional[Score]) -> None:
+        # под self._lock
+        prev = self._live.get(key)
+        if key not in self._finished:
+            if prev is not None:
+                _apply(self._agg, key[0], key[1], prev[0], prev[1], -1)
+            if score is not None:
+                _apply(self._agg, key[0], key[1], score[0], score[1], 1)
+        self._live[key] = score
+
+    # ---------------- чтение ----------------
+    def _publish(self) -> bool:
+        with self._lock:
+            def sort_key(name):
+                a = self._agg[name]
+                return (-a['PTS'], -(a['GF'] - a['GA']), -a['GF'], (name or '').lower())
+            teams = sorted(self._agg, key=sort_key)
+            values = [HEADER]
+            for i, name in enumerate(teams[:self.rows], start=1):
+                a = self._agg[name]
+                values.append([str(i), name, str(a['P']), str(a['W']), str(a['D']), str(a['L']),
+                               str(a['GF'] - a['GA']), str(a['PTS'])])
+            while len(values) < self.rows + 1:
+                values.append([''] * len(HEADER))
+            if self._payload is not None and self._payload['values'] == values:
+                return False
+            # Первая сборка — без рассылки (клиенты и так читают таблицу)
+            first = self._payload is None
+            self._version += 1
+            etag = hashlib.sha1(json.dumps(values, ensure_ascii=False).encode('utf-8')).hexdigest()
+            self._payload = {
+                'range': 'A1:H10', 'updated_at': datetime.now(timezone.utc).isoformat(), 'values': values,
+                'live': True, 'version': self._version, 'etag': etag,
+            }
+            payload = dict(self._payload)
+            self._stats['published'] += 1
+        if self.on_change and not first:
+            try:
+                self.on_change(payload)
+            except Exception as e:
+                logger.warning(f"live table on_change failed: {e}")
+        return True
+
+    def read(self) -> Optional[dict]:
+        with self._lock:
+            return dict(self._payload) if self._payload is not None else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, 'version': self._version, 'teams': len(self._agg), 'live': len(self._live),
+                    'base_age_sec': round(time.time() - self._base_at, 1) if self._base_at else None}
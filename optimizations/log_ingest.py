@@ -0,0 +1,204 @@
+"""
+Приём клиентских логов админки пачками (/api/admin/client-logs).
+
+Запрос только разбирает тело (JSON {logs: [...]} или NDJSON, опционально gzip), проверяет квоту
+сессии и кладёт записи в ограниченный буфер. Фоновый писатель раз в flush_sec (или при наполнении
+batch_size) сериализует пачку и пишет её одним вызовом: в ротируемый файл (path) либо одной записью
+в logger 'client_logs'. Переполнение буфера и превышение квоты — отбрасываются со счётчиками.
+"""
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = ('timestamp', 'sessionId', 'level', 'category', 'message', 'url', 'userAgent')
+_MAX_TEXT = 2000
+
+
+class IngestError(ValueError):
+    """Тело запроса не разобрано (битый gzip/JSON, превышен размер)"""
+
+
+class ClientLogIngestor:
+    def __init__(self, path: str = '', max_bytes: int = 5 * 1024 * 1024, backups: int = 3,
+                 buffer_size: int = 5000, batch_size: int = 500, flush_sec: float = 2.0,
+                 session_quota: int = 600, quota_window_sec: float = 60.0,
+                 max_body_bytes: int = 2 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self.flush_sec = flush_sec
+        self.session_quota = session_quota
+        self.quota_window_sec = quota_window_sec
+        self.max_body_bytes = max_body_bytes
+        self._buf: deque = deque(maxlen=max(1, int(buffer_size)))
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        # sessionId -> [начало окна, записей в окне]
+        self._quota: Dict[str, List[float]] = {}
+        self._handler: Optional[RotatingFileHandler] = None
+        self._thread = None
+        self._rate_window: deque = deque()
+        self._stats = {
+            'received': 0, 'accepted': 0, 'written': 0, 'batches': 0,
+            'dropped_quota': 0, 'dropped_full': 0, 'dropped_invalid': 0, 'write_errors': 0,
+        }
+
+    # ---------------- разбор ----------------
+    def parse(self, body: bytes, content_type: str = '', content_encoding: str = '') -> List[dict]:
+        """JSON {logs: [...]}, JSON-массив или NDJSON; gzip/deflate по заголовку или сигнатуре"""
+        raw = body or b''
+        enc = (content_encoding or '').lower()
+        try:
+            if 'gzip' in enc or raw[:2] == b'\x1f\x8b':
+                raw = self._inflate(raw, 16 + zlib.MAX_WBITS)
+            elif 'deflate' in enc:
+                raw = self._inflate(raw, zlib.MAX_WBITS)
+        except IngestError:
+            raise
+        except Exception as e:
+            raise IngestError(f'bad compressed body: {e}')
+        if len(raw) > self.max_body_bytes:
+            raise IngestError('body too large')
+        text = raw.decode('utf-8', errors='replace').strip()
+        if not text:
+            return []
+        if 'ndjson' not in (content_type or '') and text[0] in '[{':
+            try:
+                data = json.loads(text)
+                logs = data.get('logs', []) if isinstance(data, dict) else data
+                return [e for e in logs if isinstance(e, dict)] if isinstance(logs, list) else []
+            except ValueError:
+                # Не один JSON-документ — пробуем NDJSON
+                pass
+        out = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                with self._lock:
+                    self._stats['dropped_invalid'] += 1
+                continue
+            if isinstance(entry, dict):
+                out.append(entry)
+        return out
+
+    def _inflate(self, raw: bytes, wbits: int) -> bytes:
+        # Ограничиваем распакованный размер (gzip-бомба)
+        d = zlib.decompressobj(wbits)
+        data = d.decompress(raw, self.max_body_bytes + 1)
+        if len(data) > self.max_body_bytes or d.unconsumed_tail:
+            raise IngestError('body too large')
+        return data
+
+    # ---------------- очередь ----------------
+    def submit(self, entries: List[dict], user_id=None, now: Optional[float] = None) -> Tuple[int, int]:
+        """Ставит записи в буфер; возвращает (принято, отброшено)"""
+        now = time.time() if now is None else now
+        accepted = dropped = 0
+        with self._lock:
+            self._stats['received'] += len(entries)
+            for e in entries:
+                sess = str(e.get('sessionId') or f'user:{user_id}')[:64]
+                window = self._quota.get(sess)
+                if window is None or now - window[0] >= self.quota_window_sec:
+                    window = self._quota[sess] = [now, 0]
+                if window[1] >= self.session_quota:
+                    self._stats['dropped_quota'] += 1
+                    dropped += 1
+                    continue
+                window[1] += 1
+                if len(self._buf) >= self._buf.maxlen:
+                    self._stats['dropped_full'] += 1
+                    dropped += 1
+                    continue
+                self._buf.append((now, user_id, e))
+                accepted += 1
+            self._stats['accepted'] += accepted
+            if accepted:
+                self._rate_window.append((now, accepted))
+            if len(self._quota) > 10000:
+                self._quota = {k: v for k, v in self._quota.items() if now - v[0] < self.quota_window_sec}
+            full = len(self._buf) >= self.batch_size
+        if full:
+            self._wake.set()
+        return accepted, dropped
+
+    # ---------------- запись ----------------
+    @staticmethod
+    def _line(received_at: float, user_id, e: dict) -> str:
+        rec = {k: (str(e.get(k))[:_MAX_TEXT] if e.get(k) is not None else None) for k in _FIELDS}
+        rec['user_id'] = user_id
+        rec['received_at'] = round(received_at, 3)
+        meta = e.get('metadata')
+        if meta:
+            rec['metadata'] = meta
+        try:
+            return json.dumps(rec, ensure_ascii=False, default=str)
+        except Exception:
+            rec['metadata'] = str(meta)[:_MAX_TEXT]
+            return json.dumps(rec, ensure_ascii=False, default=str)
+
+    def flush(self) -> int:
+        """Забирает до batch_size записей и пишет их одним вызовом; возвращает число записанных"""
+        with self._lock:
+            batch = [self._buf.popleft() for _ in range(min(self.batch_size, len(self._buf)))]
+        if not batch:
+            return 0
+        chunk = '\n'.join(self._line(*item) for item in batch)
+        try:
+            if self.path:
+                if self._handler is None:
+                    self._handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes,
+                                                        backupCount=self.backups, encoding='utf-8')
+                    self._handler.setFormatter(logging.Formatter('%(message)s'))
+                self._handler.emit(logging.makeLogRecord({'msg': chunk, 'levelno': logging.INFO}))
+            else:
+                logging.getLogger('client_logs').info(f"[CLIENT-LOG] batch={len(batch)}\n{chunk}")
+        except Exception as e:
+            with self._lock:
+                self._stats['write_errors'] += 1
+            logger.warning(f"client log write failed: {e}")
+            return 0
+        with self._lock:
+            self._stats['written'] += len(batch)
+            self._stats['batches'] += 1
+        return len(batch)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        def _loop():
+            while True:
+                self._wake.wait(self.flush_sec)
+                self._wake.clear()
+                try:
+                    while self.flush() >= self.batch_size:
+                        pass
+                except Exception as e:
+                    logger.warning(f"client log writer error: {e}")
+
+        t = threading.Thread(target=_loop, daemon=True, name='client-log-writer')
+        t.start()
+        self._thread = t
+
+    def stats(self, now: Optional[float] = None) -> dict:
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._rate_window and now - self._rate_window[0][0] > 60:
+                self._rate_window.popleft()
+            per_min = sum(n for _, n in self._rate_window)
+            return {**self._stats, 'queued': len(self._buf), 'capacity': self._buf.maxlen,
+                    'ingest_per_sec': round(per_min / 60.0, 2), 'sessions': len(self._quota),
+                    'writer': self._thread is not None}
@@ -41,6 +41,8 @@ class MultiLevelCache:
             'results': {'memory': 120, 'redis': 3600},  # Этап 2: memory +2 мин
             # Новости (легкие, можно держать в памяти коротко)
             'news': {'memory': 120, 'redis': 300},  # 2 мин в памяти, 5 мин в Redis
+            # Публичные профили (аватары/оверлеи): локальный LRU держит services/public_profiles, здесь — только Redis
+            'public_profile': {'memory': 0, 'redis': 900},
         }
 
     def _make_key(self, cache_type: str, identifier: str = '') -> str:
@@ -128,6 +130,64 @@ class MultiLevelCache:
             print(f"Cache set error for {key}: {e}")
             return False
 
+    def get_many(self, cache_type: str, identifiers: list) -> Dict[str, Any]:
+        """Пакетное чтение: memory, затем один MGET в Redis для промахов.
+        Возвращает {identifier: data} только для найденных ключей."""
+        config = self.ttl_config.get(cache_type, {'memory': 300, 'redis': 1800})
+        found: Dict[str, Any] = {}
+        pending = []
+        now = time.time()
+        with self.lock:
+            for ident in identifiers:
+                ident = str(ident)
+                if config['memory'] > 0:
+                    entry = self.memory_cache.get(self._make_key(cache_type, ident))
+                    if entry and now - entry['timestamp'] < config['memory']:
+                        found[ident] = entry['data']
+                        continue
+                pending.append(ident)
+        if found and _metrics: _metrics.cache_inc('memory_hits')
+        if pending and self.redis_client and config['redis'] > 0:
+            try:
+                raw = self.redis_client.mget([self._make_key(cache_type, i) for i in pending])
+                for ident, cached in zip(pending, raw or []):
+                    if not cached:
+                        continue
+                    data = pickle.loads(cached)
+                    found[ident] = data
+                    if config['memory'] > 0:
+                        with self.lock:
+                            self.memory_cache[self._make_key(cache_type, ident)] = {'data': data, 'timestamp': now}
+                if _metrics and len(found) > 0: _metrics.cache_inc('redis_hits')
+            except Exception as e:
+                print(f"Redis mget error for {cache_type}: {e}")
+        return found
+
+    def set_many(self, cache_type: str, items: Dict[str, Any]) -> bool:
+        """Пакетная запись во все уровни (Redis — одним pipeline)"""
+        if not items:
+            return True
+        config = self.ttl_config.get(cache_type, {'memory': 300, 'redis': 1800})
+        try:
+            if config['memory'] > 0:
+                now = time.time()
+                with self.lock:
+                    for ident, data in items.items():
+                        self.memory_cache[self._make_key(cache_type, str(ident))] = {'data': data, 'timestamp': now}
+            if self.redis_client and config['redis'] > 0:
+                try:
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    for ident, data in items.items():
+                        pipe.setex(self._make_key(cache_type, str(ident)), config['redis'], pickle.dumps(data))
+                    pipe.execute()
+                except Exception as e:
+                    print(f"Redis pipeline set error for {cache_type}: {e}")
+            if _metrics: _metrics.cache_inc('sets')
+            return True
+        except Exception as e:
+            print(f"Cache set_many error for {cache_type}: {e}")
+            return False
+
     def invalidate(self, cache_type: str, identifier: str = '') -> bool:
         """Инвалидирует данные во всех уровнях кэша"""
         key = self._make_key(cache_type, identifier)
@@ -0,0 +1,94 @@
+"""
+Схлопывание побочных эффектов смены live-счёта по матчу.
+
+Запись счёта (MatchScore) и live_update в комнату матча выполняются сразу на каждый клик админа.
+Тяжёлые последствия — bump версии коэффициентов, инвалидация кэшей, пересчёт live-таблицы лиги и
+notify_data_change — копятся по матчу и выполняются один раз через window_sec после первой правки
+(не позже чем через window_sec: окно не продлевается). В эффект передаются все промежуточные
+состояния окна с seq; промежуточные клиенты уже получили через live_update, наружу уходит последнее.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+
+
+class ScoreCoalescer:
+    def __init__(self, apply: Callable[[str, str, List[dict]], None], window_sec: float = 1.5):
+        self.apply = apply
+        self.window_sec = window_sec
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        # (home, away) -> {'due': ts, 'states': [...]}
+        self._pending: Dict[Key, dict] = {}
+        self._seq: Dict[Key, int] = {}
+        self._thread = None
+        self._stats = {'recorded': 0, 'flushes': 0, 'coalesced': 0, 'errors': 0}
+
+    def record(self, home: str, away: str, state: dict, now: Optional[float] = None) -> int:
+        """Добавляет состояние матча в текущее окно; возвращает его seq (монотонно по матчу)"""
+        now = time.time() if now is None else now
+        key = (home, away)
+        with self._lock:
+            seq = self._seq.get(key, 0) + 1
+            self._seq[key] = seq
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = {'due': now + self.window_sec, 'states': []}
+            else:
+                self._stats['coalesced'] += 1
+            entry['states'].append({**state, 'seq': seq})
+            self._stats['recorded'] += 1
+        self._wake.set()
+        return seq
+
+    def next_due_in(self, now: Optional[float] = None) -> Optional[float]:
+        now = time.time() if now is None else now
+        with self._lock:
+            if not self._pending:
+                return None
+            return max(0.0, min(e['due'] for e in self._pending.values()) - now)
+
+    def flush(self, now: Optional[float] = None, force: bool = False) -> int:
+        """Выполняет эффекты для матчей с истёкшим окном (force — для всех); возвращает число матчей"""
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [k for k, e in self._pending.items() if force or e['due'] <= now]
+            batches = [(k, self._pending.pop(k)['states']) for k in due]
+        for (home, away), states in batches:
+            try:
+                self.apply(home, away, states)
+                with self._lock:
+                    self._stats['flushes'] += 1
+            except Exception as e:
+                with self._lock:
+                    self._stats['errors'] += 1
+                logger.warning(f"live score effects failed for {home} vs {away}: {e}")
+        return len(batches)
+
+    def start(self) -> None:
+        """Фоновый поток: спит до ближайшего окна или новой записи"""
+        if self._thread is not None:
+            return
+
+        def _loop():
+            while True:
+                due = self.next_due_in()
+                self._wake.wait(60.0 if due is None else due)
+                self._wake.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.warning(f"live score coalescer loop error: {e}")
+
+        t = threading.Thread(target=_loop, daemon=True, name='live-score-coalescer')
+        t.start()
+        self._thread = t
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, 'pending': len(self._pending), 'window_sec': self.window_sec}
@@ -0,0 +1,209 @@
+"""
+Событийный фоновый sync вместо полной пересборки всех снапшотов по таймеру.
+
+Коммиты ORM-сессий, затронувшие исходные таблицы (матчи, счета, ставки, пользователи), помечают
+домены sync грязными (TABLE_DOMAINS) и поднимают их счётчик изменений. Цикл в app.py пересобирает
+только грязные домены, выждав coalesce_sec тишины (всплеск изменений — одна пересборка, не дольше
+max_delay_sec), и раз в sweep_sec делает страховочный полный проход (raw SQL, другие инстансы).
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+# Домены фонового sync (ключи метрик last_sync в app.py)
+SYNC_DOMAINS = ('league-table', 'schedule', 'results', 'betting-tours', 'leaderboards')
+
+_MATCH_DOMAINS = ('league-table', 'schedule', 'results', 'betting-tours')
+
+# Исходная таблица -> домены, которые из неё собираются. Таблицы, которые пишет сам sync
+# (snapshots, league_table, odds_snapshots), сюда не входят — иначе sync будил бы сам себя.
+TABLE_DOMAINS: Dict[str, tuple] = {
+    'matches': _MATCH_DOMAINS,
+    'match_scores': _MATCH_DOMAINS,
+    'match_flags': _MATCH_DOMAINS,
+    'teams': _MATCH_DOMAINS,
+    'match_specials': ('betting-tours',),
+    'match_votes': ('betting-tours',),
+    'bets': ('leaderboards', 'betting-tours'),
+    'users': ('leaderboards',),
+    'weekly_credit_baselines': ('leaderboards',),
+    'monthly_credit_baselines': ('leaderboards',),
+}
+
+
+class ChangeTracker:
+    """Грязные флаги и счётчики изменений по доменам sync (потокобезопасно)"""
+
+    def __init__(self, domains: Iterable[str] = SYNC_DOMAINS, coalesce_sec: float = 3.0,
+                 max_delay_sec: float = 30.0, sweep_sec: float = 1800.0,
+                 min_interval: Optional[Dict[str, float]] = None):
+        self.domains = tuple(domains)
+        # Домен не пересобирается чаще min_interval[domain] сек (частые записи users → лидерборды)
+        self.min_interval: Dict[str, float] = dict(min_interval or {})
+        self.coalesce_sec = coalesce_sec
+        self.max_delay_sec = max_delay_sec
+        self.sweep_sec = sweep_sec
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._seq: Dict[str, int] = {d: 0 for d in self.domains}
+        # domain -> (первая, последняя) пометка с момента последней пересборки
+        self._dirty: Dict[str, List[float]] = {}
+        self._last_run: Dict[str, float] = {}
+        # 0 — первый take_due делает полный проход (как прежний старт цикла)
+        self._last_sweep = 0.0
+        self._stats = {
+            'marks': 0,
+            'coalesced': 0,
+            'sweeps': 0,
+            'executed': {d: 0 for d in self.domains},
+            'skipped': {d: 0 for d in self.domains},
+            'last_reason': {},
+        }
+        self._installed = False
+
+    def configure(self, coalesce_sec: Optional[float] = None, max_delay_sec: Optional[float] = None,
+                  sweep_sec: Optional[float] = None, min_interval: Optional[Dict[str, float]] = None):
+        if coalesce_sec is not None:
+            self.coalesce_sec = max(0.0, float(coalesce_sec))
+        if max_delay_sec is not None:
+            self.max_delay_sec = max(self.coalesce_sec, float(max_delay_sec))
+        if sweep_sec is not None:
+            self.sweep_sec = max(1.0, float(sweep_sec))
+        if min_interval is not None:
+            self.min_interval = dict(min_interval)
+
+    def mark(self, *domains: str, reason: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            for d in domains:
+                if d not in self._seq:
+                    continue
+                self._seq[d] += 1
+                self._stats['marks'] += 1
+                window = self._dirty.get(d)
+                if window is None:
+                    self._dirty[d] = [now, now]
+                else:
+                    # Уже ждёт пересборки — изменение войдёт в неё же
+                    window[1] = now
+                    self._stats['coalesced'] += 1
+                if reason:
+                    self._stats['last_reason'][d] = reason
+        self._wake.set()
+
+    def mark_tables(self, tables: Iterable[str]) -> None:
+        tables = set(tables or ())
+        domains: Set[str] = set()
+        for t in tables:
+            domains.update(TABLE_DOMAINS.get(t, ()))
+        if domains:
+            self.mark(*sorted(domains), reason=','.join(sorted(t for t in tables if t in TABLE_DOMAINS)))
+
+    def sequence(self, domain: str) -> int:
+        with self._lock:
+            return self._seq.get(domain, 0)
+
+    def next_due_in(self, now: Optional[float] = None) -> float:
+        """Секунды до ближайшей пересборки (грязный домен или страховочный проход)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            due = self._last_sweep + self.sweep_sec
+            for d, (first, last) in self._dirty.items():
+                ready = min(last + self.coalesce_sec, first + self.max_delay_sec)
+                due = min(due, max(ready, self._last_run.get(d, 0.0) + self.min_interval.get(d, 0.0)))
+        return max(0.0, due - now)
+
+    def wait(self, timeout: float) -> bool:
+        """Ждёт пометки или таймаута; True — были новые пометки"""
+        woke = self._wake.wait(max(0.0, timeout))
+        self._wake.clear()
+        return woke
+
+    def take_due(self, now: Optional[float] = None, tick: bool = False) -> List[str]:
+        """Домены к пересборке сейчас (снимает с них флаг). tick=True — прошёл прежний интервал
+        SYNC_INTERVAL_SEC: чистые домены учитываются как пропущенные пересборки."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_sec:
+                self._last_sweep = now
+                self._stats['sweeps'] += 1
+                self._dirty.clear()
+                due = list(self.domains)
+            else:
+                due = [d for d in self.domains if d in self._dirty and (
+                    now - self._dirty[d][1] >= self.coalesce_sec or now - self._dirty[d][0] >= self.max_delay_sec)
+                    and now - self._last_run.get(d, 0.0) >= self.min_interval.get(d, 0.0)]
+                for d in due:
+                    self._dirty.pop(d, None)
+                if tick:
+                    for d in self.domains:
+                        if d not in due and d not in self._dirty:
+                            self._stats['skipped'][d] += 1
+            for d in due:
+                self._stats['executed'][d] += 1
+                self._last_run[d] = now
+            return due
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'marks': self._stats['marks'],
+                'coalesced': self._stats['coalesced'],
+                'sweeps': self._stats['sweeps'],
+                'executed': dict(self._stats['executed']),
+                'skipped': dict(self._stats['skipped']),
+                'dirty': sorted(self._dirty),
+                'seq': dict(self._seq),
+                'last_reason': dict(self._stats['last_reason']),
+                'coalesce_sec': self.coalesce_sec,
+                'sweep_sec': self.sweep_sec,
+            }
+
+    def install(self, session_cls=None) -> None:
+        """Подписывается на события ORM-сессий: таблицы из flush/bulk UPDATE копятся в session.info
+        и помечаются после commit (откат — сбрасывает)."""
+        if self._installed:
+            return
+        from sqlalchemy import event
+        if session_cls is None:
+            from sqlalchemy.orm import Session as session_cls
+
+        def _note(session, tables):
+            if tables:
+                session.info.setdefault('_sync_tables', set()).update(tables)
+
+        @event.listens_for(session_cls, 'before_flush')
+        def _before_flush(session, flush_context, instances):
+            tables = set()
+            for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+                name = getattr(getattr(obj, '__table__', None), 'name', None)
+                if name in TABLE_DOMAINS:
+                    tables.add(name)
+            _note(session, tables)
+
+        @event.listens_for(session_cls, 'do_orm_execute')
+        def _orm_execute(state):
+            if not (state.is_update or state.is_delete or state.is_insert):
+                return
+            mapper = state.bind_mapper
+            name = getattr(getattr(mapper, 'local_table', None), 'name', None)
+            if name in TABLE_DOMAINS:
+                _note(state.session, {name})
+
+        # SAVEPOINT (begin_nested) тоже вызывает эти хуки — ждём внешнюю транзакцию;
+        # таблицы из откаченного savepoint остаются: лишняя пересборка безопаснее пропущенной
+        @event.listens_for(session_cls, 'after_commit')
+        def _after_commit(session):
+            if session.in_nested_transaction():
+                return
+            tables = session.info.pop('_sync_tables', None)
+            if tables:
+                self.mark_tables(tables)
+
+        @event.listens_for(session_cls, 'after_rollback')
+        def _after_rollback(session):
+            if session.in_nested_transaction():
+                return
+            session.info.pop('_sync_tables', None)
+
+        self._installed = True
@@ -4,15 +4,18 @@ WebSocket manager для real-time уведомлений при изменен
 """
 import json
 import threading
-from typing import Dict, Set, Any
-from flask_socketio import SocketIO, emit, join_room, leave_room
+import uuid
+from typing import Dict, Set, Any, TYPE_CHECKING
 import logging
 from datetime import datetime, timezone
 
+if TYPE_CHECKING:  # flask_socketio тянет socketio/engineio (~0.2с импорта) — нужен только при WEBSOCKETS_ENABLED
+    from flask_socketio import SocketIO
+
 logger = logging.getLogger(__name__)
 
 class WebSocketManager:
-    def __init__(self, socketio: SocketIO):
+    def __init__(self, socketio: 'SocketIO'):
         self.socketio = socketio
         # user_id -> {session_ids}
         self.connected_users = {}
@@ -28,6 +31,11 @@ class WebSocketManager:
         # Настройки дебаунса по топикам
         self.topic_debounce_enabled = True
         self.topic_debounce_ms = 180
+        # Версии потоков (stream -> последняя отправленная версия): клиент применяет патчи по порядку,
+        # по разрыву версий делает один resync. epoch меняется при рестарте процесса
+        self._stream_versions: Dict[str, int] = {}
+        self._stream_lock = threading.Lock()
+        self.stream_epoch = uuid.uuid4().hex[:8]
         # Примитивные метрики
         self._metrics = {
             'ws_messages_sent': 0,
@@ -160,6 +168,16 @@ class WebSocketManager:
         with self._topic_lock:
             return dict(self._metrics)
 
+    def _stamp_version(self, message: dict, stream: str) -> dict:
+        """Добавляет в сообщение stream/v/epoch (v монотонно растёт в пределах stream)"""
+        with self._stream_lock:
+            v = self._stream_versions.get(stream, 0) + 1
+            self._stream_versions[stream] = v
+        message['stream'] = stream
+        message['v'] = v
+        message['epoch'] = self.stream_epoch
+        return message
+
     def notify_data_change(self, data_type: str, data: dict = None):
         """
         Уведомляет всех подключенных пользователей об изменении данных
@@ -174,6 +192,11 @@ class WebSocketManager:
             'timestamp': json.dumps(data.get('updated_at', ''), default=str) if data else None,
             'data': data
         }
+        # Поток по типу данных (+ матч, если событие про конкретный матч)
+        stream = f"data|{data_type}"
+        if data and data.get('home') and data.get('away'):
+            stream += f"|{data.get('home')}|{data.get('away')}"
+        self._stamp_version(message, stream)
         
         try:
             # Отправляем всем подключенным пользователям (совместимый синтаксис)
@@ -205,6 +228,7 @@ class WebSocketManager:
         entity_id: идентификатор сущности (например, {'home':..., 'away':...} или числовой id)
         fields: изменённые поля, например {'score_home': 1, 'score_away': 0} или {'odds': {...}, 'odds_version': 123}
         room: необязательная комната для таргетированной доставки
+        Сообщение получает stream/v/epoch: клиент по разрыву версий делает один resync вместо рефетча на каждый патч.
         """
         if not self.socketio:
             return
@@ -216,6 +240,7 @@ class WebSocketManager:
                 'fields': fields,
                 'ts': datetime.now(timezone.utc).isoformat()
             }
+            self._stamp_version(message, self._make_patch_key(entity, entity_id, room))
             if room:
                 self.socketio.emit('data_patch', message, room=room, namespace='/')
             else:
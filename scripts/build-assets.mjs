@@ -0,0 +1,130 @@
+#!/usr/bin/env node
+/**
+ * Сборка статики: минификация, хеш содержимого в имени файла, манифест и предсжатые .gz/.br.
+ *
+ *   npm run build            # tsc + эта сборка
+ *   node scripts/build-assets.mjs
+ *
+ * Конфигурация — static/assets.json (её же читает utils/assets.py):
+ *   bundles — CSS, склеиваемые в один файл в заданном порядке;
+ *   files   — каталоги static/, каждый .js/.css из которых минифицируется и хешируется отдельно.
+ * Классические скрипты не склеиваются: они общаются через глобалы и грузятся по порядку,
+ * ошибка в одном не должна останавливать остальные. ES-модули (static/js/store, static/js/dist)
+ * остаются как есть — переименование сломало бы относительные import.
+ *
+ * Минификация — через esbuild, если он установлен (npm i --no-save esbuild); без него файлы
+ * копируются как есть, но хеши, манифест и сжатые варианты всё равно создаются.
+ */
+import { createHash } from 'node:crypto';
+import { mkdirSync, readFileSync, readdirSync, rmSync, statSync, writeFileSync } from 'node:fs';
+import { dirname, extname, join, relative, resolve } from 'node:path';
+import { fileURLToPath } from 'node:url';
+import { brotliCompressSync, constants as zc, gzipSync } from 'node:zlib';
+
+const ROOT = resolve(dirname(fileURLToPath(import.meta.url)), '..');
+const STATIC = join(ROOT, 'static');
+const config = JSON.parse(readFileSync(join(STATIC, 'assets.json'), 'utf8'));
+const OUT = join(STATIC, config.out || 'dist');
+// Не сжимаем крошечные файлы: выигрыш меньше заголовков
+const MIN_COMPRESS_BYTES = 512;
+
+let esbuild = null;
+try {
+  esbuild = await import('esbuild');
+} catch {
+  console.warn('[assets] esbuild не найден — минификация пропущена (npm i --no-save esbuild)');
+}
+
+async function minify(code, ext) {
+  if (!esbuild) return code;
+  // format не задаём: классические скрипты остаются скриптами, глобальные имена не переименовываются
+  const res = await esbuild.transform(code, {
+    loader: ext === '.css' ? 'css' : 'js',
+    minify: true,
+    target: ext === '.css' ? 'chrome80' : 'es2020',
+    legalComments: 'none',
+  });
+  return res.code;
+}
+
+// Относительные url() в CSS считаются от исходного каталога — в dist/ они бы сломались
+function absolutizeCssUrls(source, logical) {
+  const base = dirname(logical);
+  return source.replace(/url\(\s*(['"]?)(?!data:|https?:|\/|#)([^'")]+)\1\s*\)/g, (_m, q, ref) => {
+    const abs = join('/static', base, ref).split('\\').join('/');
+    return `url(${q}${abs}${q})`;
+  });
+}
+
+function hashed(logical, content) {
+  const h = createHash('sha256').update(content).digest('hex').slice(0, 10);
+  const ext = extname(logical);
+  return `${logical.slice(0, -ext.length)}.${h}${ext}`;
+}
+
+function emit(logical, content) {
+  const name = hashed(logical, content);
+  const target = join(OUT, name);
+  mkdirSync(dirname(target), { recursive: true });
+  const buf = Buffer.from(content, 'utf8');
+  writeFileSync(target, buf);
+  if (buf.length >= MIN_COMPRESS_BYTES) {
+    writeFileSync(`${target}.gz`, gzipSync(buf, { level: 9 }));
+    writeFileSync(
+      `${target}.br`,
+      brotliCompressSync(buf, {
+        params: {
+          [zc.BROTLI_PARAM_QUALITY]: 11,
+          [zc.BROTLI_PARAM_SIZE_HINT]: buf.length,
+        },
+      }),
+    );
+  }
+  return { name, bytes: buf.length };
+}
+
+async function main() {
+  rmSync(OUT, { recursive: true, force: true });
+  const manifest = {};
+  let rawTotal = 0;
+  let outTotal = 0;
+
+  for (const [logical, members] of Object.entries(config.bundles || {})) {
+    const ext = extname(logical);
+    const parts = members.map((m) => {
+      const src = readFileSync(join(STATIC, m), 'utf8');
+      return extname(m) === '.css' ? absolutizeCssUrls(src, m) : src;
+    });
+    const source = parts.join('\n');
+    rawTotal += Buffer.byteLength(source);
+    const { name, bytes } = emit(logical, await minify(source, ext));
+    outTotal += bytes;
+    manifest[logical] = name;
+  }
+
+  for (const dir of config.files || []) {
+    for (const file of readdirSync(join(STATIC, dir)).sort()) {
+      const ext = extname(file);
+      const full = join(STATIC, dir, file);
+      if (!['.js', '.css'].includes(ext) || !statSync(full).isFile()) continue;
+      const logical = relative(STATIC, full).split('\\').join('/');
+      let source = readFileSync(full, 'utf8');
+      // ES-модули с import/export не переименовываем (см. шапку)
+      if (ext === '.js' && /^\s*(import|export)\s/m.test(source)) continue;
+      if (ext === '.css') source = absolutizeCssUrls(source, logical);
+      rawTotal += Buffer.byteLength(source);
+      const { name, bytes } = emit(logical, await minify(source, ext));
+      outTotal += bytes;
+      manifest[logical] = name;
+    }
+  }
+
+  writeFileSync(join(OUT, 'manifest.json'), `${JSON.stringify(manifest, null, 2)}\n`);
+  const kb = (n) => (n / 1024).toFixed(1);
+  console.log(
+    `[assets] ${Object.keys(manifest).length} файлов -> ${relative(ROOT, OUT)}/ ` +
+      `(${kb(rawTotal)} KB -> ${kb(outTotal)} KB${esbuild ? '' : ', без минификации'})`,
+  );
+}
+
+await main();
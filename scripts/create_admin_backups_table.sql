@@ -8,3 +8,10 @@ CREATE TABLE IF NOT EXISTS admin_backups (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
 );
 CREATE INDEX IF NOT EXISTS idx_admin_backups_action_created_at ON admin_backups(action, created_at DESC);
+-- Потоковые копии (services/backups.py): сжатый поток кусками
+CREATE TABLE IF NOT EXISTS admin_backup_chunks (
+    backup_id INTEGER NOT NULL REFERENCES admin_backups(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    data BYTEA NOT NULL,
+    PRIMARY KEY (backup_id, seq)
+);
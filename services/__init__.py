@@ -16,13 +16,25 @@ except Exception:
 	apply_lineups_to_adv_stats = None  # type: ignore
 
 try:
-	from .snapshots import snapshot_get, snapshot_set  # noqa
+	from .snapshots import snapshot_get, snapshot_set, snapshot_store, snapshot_delta, snapshot_version, configure_deltas as configure_snapshot_deltas, reset_deltas as reset_snapshot_deltas  # noqa
 except Exception:
-	snapshot_get = snapshot_set = None  # type: ignore
+	snapshot_get = snapshot_set = snapshot_store = snapshot_delta = snapshot_version = configure_snapshot_deltas = reset_snapshot_deltas = None  # type: ignore
+
+try:
+	from .public_profiles import get_public_profiles, invalidate_public_profile  # noqa
+except Exception:
+	get_public_profiles = invalidate_public_profile = None  # type: ignore
 
 __all__ = [
 	'settle_open_bets',
 	'apply_lineups_to_adv_stats',
 	'snapshot_get',
 	'snapshot_set',
+	'snapshot_store',
+	'snapshot_delta',
+	'snapshot_version',
+	'configure_snapshot_deltas',
+	'reset_snapshot_deltas',
+	'get_public_profiles',
+	'invalidate_public_profile',
 ]
@@ -0,0 +1,221 @@
+"""Achievements engine: инкрементальные счётчики прогресса.
+
+Счётчики (ставки, выигрыши, рынки, активные недели, приглашённые, чек-ины) живут
+в одной строке user_achievement_progress и обновляются атомарными UPDATE в момент
+события (ставка, расчёт, чек-ин, рост уровня приглашённого) в транзакции самого события.
+Строка создаётся один раз бэкфиллом из истории bets/referrals под блокировкой строки users;
+до этого события её не трогают — бэкфилл всё равно посчитает их из таблиц. Tier'ы сравниваются с best_* в UserAchievement
+и пишутся только при повышении (разблокировка фиксируется один раз).
+"""
+from __future__ import annotations
+from datetime import datetime, timezone
+
+from sqlalchemy import case, or_, func
+from sqlalchemy.exc import IntegrityError
+
+MARKET_BITS = {'1x2': 1, 'totals': 2, 'specials': 4}
+
+# group -> (поле best tier, поле даты первой разблокировки) в UserAchievement
+TIER_FIELDS = [
+    ('streak', 'best_streak_tier', 'streak_unlocked_at'),
+    ('credits', 'best_credits_tier', 'credits_unlocked_at'),
+    ('level', 'best_level_tier', 'level_unlocked_at'),
+    ('invited', 'best_invited_tier', 'invited_unlocked_at'),
+    ('betcount', 'best_betcount_tier', 'betcount_unlocked_at'),
+    ('betwins', 'best_betwins_tier', 'betwins_unlocked_at'),
+    ('bigodds', 'best_bigodds_tier', 'bigodds_unlocked_at'),
+    ('markets', 'best_markets_tier', 'markets_unlocked_at'),
+    ('weeks', 'best_weeks_tier', 'weeks_unlocked_at'),
+]
+
+# Уровень, начиная с которого приглашённый засчитывается рефереру
+INVITED_QUALIFY_LEVEL = 2
+
+
+def market_bit(market) -> int:
+    mk = (market or '1x2').lower()
+    if mk in ('penalty', 'redcard'):
+        mk = 'specials'
+    return MARKET_BITS.get(mk, 0)
+
+
+def _parse_odds(odds) -> float:
+    try:
+        return float(str(odds or '0').replace(',', '.'))
+    except Exception:
+        return 0.0
+
+
+def _bump(db, Progress, user_id, values: dict) -> bool:
+    """Атомарный UPDATE строки прогресса; False — строки нет (бэкфилл ещё не выполнялся)"""
+    values[Progress.updated_at] = datetime.now(timezone.utc)
+    n = (db.query(Progress)
+           .filter(Progress.user_id == int(user_id))
+           .update(values, synchronize_session=False))
+    return bool(n)
+
+
+def on_bet_placed(db, Progress, user_id: int, market: str, week_start: datetime) -> bool:
+    """Новая ставка: +1 к числу ставок, рынок в маску, новая неделя активности (ставки идут по времени)"""
+    new_week = or_(Progress.last_bet_week.is_(None), Progress.last_bet_week < week_start)
+    return _bump(db, Progress, user_id, {
+        Progress.bets_total: Progress.bets_total + 1,
+        Progress.markets_mask: Progress.markets_mask.op('|')(market_bit(market)),
+        Progress.weeks_active: Progress.weeks_active + case((new_week, 1), else_=0),
+        Progress.last_bet_week: case((new_week, week_start), else_=Progress.last_bet_week),
+    })
+
+
+def on_bet_won(db, Progress, user_id: int, odds) -> bool:
+    """Выигравшая ставка: +1 к выигрышам и максимум выигравшего коэффициента"""
+    k = _parse_odds(odds)
+    return _bump(db, Progress, user_id, {
+        Progress.bets_won: Progress.bets_won + 1,
+        Progress.max_win_odds: case((Progress.max_win_odds < k, k), else_=Progress.max_win_odds),
+    })
+
+
+def on_checkin(db, Progress, user_id: int) -> bool:
+    return _bump(db, Progress, user_id, {Progress.checkins_total: Progress.checkins_total + 1})
+
+
+def on_level_changed(db, Progress, Referral, user_id: int, old_level: int, new_level: int) -> bool:
+    """Приглашённый впервые достиг INVITED_QUALIFY_LEVEL — засчитываем рефереру"""
+    if not (int(old_level or 0) < INVITED_QUALIFY_LEVEL <= int(new_level or 0)):
+        return False
+    referrer_id = db.query(Referral.referrer_id).filter(Referral.user_id == int(user_id)).scalar()
+    if not referrer_id:
+        return False
+    return _bump(db, Progress, referrer_id, {Progress.invited_count: Progress.invited_count + 1})
+
+
+def backfill_progress(db, Progress, Bet, Referral, User, user_id: int, week_start_fn, logger=None):
+    """Однократно считает счётчики из истории и создаёт строку прогресса.
+
+    week_start_fn(dt_utc) -> datetime начала недели (как в лидербордах).
+    Подсчёт идёт под блокировкой строки users: транзакция ставки держит её (списание кредитов) до
+    своего bump, так что ставка либо уже видна подсчёту, либо её bump попадёт в созданную здесь строку.
+    Параллельный бэкфилл ждёт блокировку и перечитывает готовую строку.
+    """
+    uid = int(user_id)
+    db.query(User.user_id).filter(User.user_id == uid).with_for_update().first()
+    existing = db.query(Progress).filter(Progress.user_id == uid).populate_existing().first()
+    if existing is not None:
+        db.commit()
+        return existing
+    won_case = case((Bet.status == 'won', 1), else_=0)
+    total, won = db.query(func.count(Bet.id), func.coalesce(func.sum(won_case), 0)).filter(Bet.user_id == uid).one()
+    max_odds = 0.0
+    for (odds,) in db.query(Bet.odds).filter(Bet.user_id == uid, Bet.status == 'won').distinct():
+        max_odds = max(max_odds, _parse_odds(odds))
+    mask = 0
+    for (market,) in db.query(Bet.market).filter(Bet.user_id == uid).distinct():
+        mask |= market_bit(market)
+    weeks = set()
+    for (placed_at,) in db.query(Bet.placed_at).filter(Bet.user_id == uid, Bet.placed_at.isnot(None)):
+        try:
+            if placed_at.tzinfo is None:
+                placed_at = placed_at.replace(tzinfo=timezone.utc)
+            weeks.add(week_start_fn(placed_at.astimezone(timezone.utc)))
+        except Exception:
+            pass
+    invited = (db.query(func.count(Referral.user_id))
+                 .join(User, User.user_id == Referral.user_id)
+                 .filter(Referral.referrer_id == uid, User.level >= INVITED_QUALIFY_LEVEL)
+                 .scalar() or 0)
+    now = datetime.now(timezone.utc)
+    row = Progress(
+        user_id=uid,
+        bets_total=int(total or 0),
+        bets_won=int(won or 0),
+        max_win_odds=max_odds,
+        markets_mask=mask,
+        weeks_active=len(weeks),
+        last_bet_week=(max(weeks) if weeks else None),
+        invited_count=int(invited),
+        checkins_total=0,
+        created_at=now,
+        updated_at=now,
+    )
+    try:
+        db.add(row)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        row = db.get(Progress, uid)
+    except Exception as e:
+        db.rollback()
+        if logger:
+            try: logger.warning(f"achievements backfill failed for {uid}: {e}")
+            except Exception: pass
+        raise
+    return row
+
+
+def progress_values(user, progress) -> dict:
+    """Текущие значения по группам: поля пользователя + счётчики прогресса"""
+    mask = int(getattr(progress, 'markets_mask', 0) or 0)
+    return {
+        'streak': int(user.consecutive_days or 0),
+        'credits': int(user.credits or 0),
+        'level': int(user.level or 1),
+        'invited': int(getattr(progress, 'invited_count', 0) or 0),
+        'betcount': int(getattr(progress, 'bets_total', 0) or 0),
+        'betwins': int(getattr(progress, 'bets_won', 0) or 0),
+        'bigodds': float(getattr(progress, 'max_win_odds', 0) or 0.0),
+        'markets': bin(mask).count('1'),
+        'weeks': int(getattr(progress, 'weeks_active', 0) or 0),
+    }
+
+
+def evaluate_tiers(ach_row, values: dict, thresholds: dict, compute_tier, now=None) -> list:
+    """Сравнивает текущие tier'ы с best_* и повышает их. Возвращает [(group, tier, first_time)]"""
+    now = now or datetime.now(timezone.utc)
+    unlocked = []
+    for group, tier_field, ts_field in TIER_FIELDS:
+        current = int(compute_tier(values[group], thresholds[group]) or 0)
+        previous = int(getattr(ach_row, tier_field) or 0)
+        if current > previous:
+            setattr(ach_row, tier_field, current)
+            first_time = previous == 0
+            if first_time:
+                setattr(ach_row, ts_field, now)
+            unlocked.append((group, current, first_time))
+    if unlocked:
+        ach_row.updated_at = now
+    return unlocked
+
+
+def grant_rewards(db, user, unlocked: list, RewardModel, rewards_map: dict, now=None):
+    """Начисляет XP/кредиты за новые tier'ы (идемпотентно по журналу наград).
+
+    Возвращает (xp_added, credits_added, old_level). Коммит — на стороне вызывающего.
+    """
+    now = now or datetime.now(timezone.utc)
+    old_level = int(user.level or 1)
+    total_xp = total_credits = 0
+    if not unlocked:
+        return 0, 0, old_level
+    granted = {(g, int(t)) for g, t in db.query(RewardModel.group, RewardModel.tier)
+                                         .filter(RewardModel.user_id == int(user.user_id))}
+    for group, tier, _first in unlocked:
+        reward = rewards_map.get(int(tier), {'xp': 0, 'credits': 0})
+        xp_add = int(reward.get('xp', 0) or 0)
+        cr_add = int(reward.get('credits', 0) or 0)
+        if not (xp_add or cr_add) or (group, int(tier)) in granted:
+            continue
+        total_xp += xp_add
+        total_credits += cr_add
+        db.add(RewardModel(user_id=int(user.user_id), group=group, tier=int(tier), xp=xp_add, credits=cr_add))
+    if total_xp or total_credits:
+        # XP поверх полосы уровня, стоимость уровня = level*100
+        xp = int(user.xp or 0) + total_xp
+        level = old_level
+        while xp >= level * 100:
+            xp -= level * 100
+            level += 1
+        user.xp = xp
+        user.level = level
+        user.credits = int(user.credits or 0) + total_credits
+        user.updated_at = now
+    return total_xp, total_credits, old_level
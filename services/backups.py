@@ -0,0 +1,343 @@
+"""Streaming admin backups.
+
+Резервная копия пишется потоком, без полного дампа в памяти: строки таблиц читаются пачками
+(yield_per), кодируются NDJSON и проходят через gzip или zstd (если установлен zstandard) прямо в
+приёмник — файл в BACKUP_DIR или кусками по chunk_bytes в admin_backup_chunks (аналог large object,
+переносимый между Postgres и SQLite). Запись о копии — строка admin_backups (payload_gz пустой,
+всё описание в metadata: format, codec, storage, kind, since, started_at, rows).
+
+Формат потока (по строке JSON):
+  {"kind": "header", "format": "stream-v1", "backup": "full"|"incremental", "since": ..., "tables": [...]}
+  {"kind": "table", "name": t, "columns": [...]}, затем строки — JSON-массивы значений по columns,
+  {"kind": "end", "table": t, "rows": n}
+
+Инкрементальная копия — строки с updated_at > since (since — started_at прошлой копии); таблицы
+без updated_at копируются целиком. Удаления инкремент не видит. Восстановление читает поток обратно
+и пишет пачками: полная копия очищает свои таблицы и вставляет строки, инкрементальная — upsert по
+первичному ключу (DELETE ... IN + INSERT). Восстанавливать цепочку: полная, затем инкременты по порядку.
+"""
+from __future__ import annotations
+
+import base64
+import gzip
+import io
+import json
+import os
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Date, DateTime, LargeBinary, Numeric, delete, insert, select, text, tuple_
+
+try:
+    import zstandard as _zstd
+except ImportError:  # необязательная зависимость
+    _zstd = None
+
+FORMAT = 'stream-v1'
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def available_codecs() -> tuple:
+    return ('gzip', 'zstd') if _zstd is not None else ('gzip',)
+
+
+def resolve_codec(codec: str) -> str:
+    """Запрошенный кодек или gzip, если zstandard не установлен"""
+    codec = (codec or 'gzip').strip().lower()
+    return codec if codec in available_codecs() else 'gzip'
+
+
+def open_writer(sink, codec: str):
+    """Сжимающий writer поверх sink; close() дописывает хвост кодека, sink не закрывает"""
+    if codec == 'zstd':
+        return _zstd.ZstdCompressor(level=3).stream_writer(sink, closefd=False)
+    return gzip.GzipFile(fileobj=sink, mode='wb', compresslevel=6)
+
+
+def open_reader(source):
+    """Распаковывающий reader; кодек определяется по сигнатуре потока"""
+    buf = source if hasattr(source, 'peek') else io.BufferedReader(source)
+    magic = buf.peek(4)[:4]
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=buf, mode='rb')
+    if magic == _ZSTD_MAGIC:
+        if _zstd is None:
+            raise RuntimeError('zstd backup requires the zstandard package')
+        return _zstd.ZstdDecompressor().stream_reader(buf)
+    raise ValueError('unknown backup codec')
+
+
+class ChunkSink(io.RawIOBase):
+    """Приёмник: буфер до chunk_bytes, затем INSERT куска в admin_backup_chunks (транзакция вызывающего)"""
+
+    def __init__(self, db, backup_id: int, chunk_bytes: int = 1 << 20):
+        super().__init__()
+        self.db = db
+        self.backup_id = int(backup_id)
+        self.chunk_bytes = max(1024, int(chunk_bytes))
+        self.chunks = 0
+        self.bytes = 0
+        self._buf = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._buf += b
+        while len(self._buf) >= self.chunk_bytes:
+            self._emit(bytes(self._buf[:self.chunk_bytes]))
+            del self._buf[:self.chunk_bytes]
+        return len(b)
+
+    def _emit(self, data: bytes):
+        self.db.execute(text("INSERT INTO admin_backup_chunks(backup_id, seq, data) VALUES (:b, :s, :d)"),
+                        {'b': self.backup_id, 's': self.chunks, 'd': data})
+        self.chunks += 1
+        self.bytes += len(data)
+
+    def close(self):
+        if not self.closed and self._buf:
+            self._emit(bytes(self._buf))
+            self._buf.clear()
+        super().close()
+
+
+class ChunkSource(io.RawIOBase):
+    """Источник: куски admin_backup_chunks по одному (в памяти не больше куска)"""
+
+    def __init__(self, db, backup_id: int):
+        super().__init__()
+        self.db = db
+        self.backup_id = int(backup_id)
+        self._seq = 0
+        self._buf = b''
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buf and not self._eof:
+            row = self.db.execute(text("SELECT data FROM admin_backup_chunks WHERE backup_id=:b AND seq=:s"),
+                                  {'b': self.backup_id, 's': self._seq}).fetchone()
+            if row is None:
+                self._eof = True
+                break
+            self._buf = bytes(row[0])
+            self._seq += 1
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode('ascii')
+    return str(value)
+
+
+def _decoder(col):
+    t = col.type
+    if isinstance(t, DateTime):
+        return datetime.fromisoformat
+    if isinstance(t, Date):
+        return date.fromisoformat
+    if isinstance(t, Numeric) and getattr(t, 'asdecimal', False):
+        return Decimal
+    if isinstance(t, LargeBinary):
+        return base64.b64decode
+    return None
+
+
+def dump_tables(db, tables, out, since: Optional[datetime] = None, batch_rows: int = 1000) -> dict:
+    """Пишет таблицы в out (бинарный writer) потоком; возвращает {table: rows}"""
+    def line(obj):
+        out.write(json.dumps(obj, ensure_ascii=False, default=_encode, separators=(',', ':')).encode('utf-8'))
+        out.write(b'\n')
+
+    line({'kind': 'header', 'format': FORMAT, 'backup': 'incremental' if since else 'full',
+          'since': since.isoformat() if since else None, 'tables': [t.name for t in tables]})
+    counts = {}
+    for table in tables:
+        cols = [c.name for c in table.columns]
+        line({'kind': 'table', 'name': table.name, 'columns': cols})
+        stmt = select(table)
+        if since is not None and 'updated_at' in table.c:
+            stmt = stmt.where(table.c.updated_at > since)
+        pk = list(table.primary_key.columns)
+        if pk:
+            stmt = stmt.order_by(*pk)
+        n = 0
+        for row in db.execute(stmt.execution_options(yield_per=max(1, int(batch_rows)))):
+            line(list(row))
+            n += 1
+        line({'kind': 'end', 'table': table.name, 'rows': n})
+        counts[table.name] = n
+    return counts
+
+
+def _metadata_param(db) -> str:
+    return 'CAST(:metadata AS JSONB)' if db.get_bind().dialect.name == 'postgresql' else ':metadata'
+
+
+def write_backup(db, tables, action: str, codec: str = 'gzip', since: Optional[datetime] = None,
+                 backup_dir: str = '', chunk_bytes: int = 1 << 20, batch_rows: int = 1000,
+                 created_by: Optional[str] = None) -> dict:
+    """Потоковая копия таблиц + строка admin_backups (commit — у вызывающего). Возвращает metadata с id."""
+    codec = resolve_codec(codec)
+    started_at = datetime.now(timezone.utc)
+    meta = {'format': FORMAT, 'codec': codec, 'kind': 'incremental' if since else 'full',
+            'since': since.isoformat() if since else None, 'started_at': started_at.isoformat(),
+            'storage': 'file' if backup_dir else 'chunks'}
+    backup_id = db.execute(text(f"""
+        INSERT INTO admin_backups(action, payload_gz, metadata, created_by, created_at)
+        VALUES (:action, :payload, {_metadata_param(db)}, :created_by, :created_at) RETURNING id
+    """), {'action': action, 'payload': b'', 'metadata': json.dumps(meta), 'created_by': created_by,
+           'created_at': started_at}).scalar()
+    if backup_dir:
+        os.makedirs(backup_dir, exist_ok=True)
+        meta['path'] = os.path.join(backup_dir, f"backup-{backup_id}-{started_at.strftime('%Y%m%dT%H%M%S')}.ndjson.{'zst' if codec == 'zstd' else 'gz'}")
+        sink = open(meta['path'], 'wb')
+    else:
+        sink = ChunkSink(db, backup_id, chunk_bytes)
+    try:
+        writer = open_writer(sink, codec)
+        try:
+            meta['rows'] = dump_tables(db, tables, writer, since=since, batch_rows=batch_rows)
+        finally:
+            writer.close()
+    finally:
+        if isinstance(sink, ChunkSink):
+            sink.close()
+            meta['chunks'] = sink.chunks
+            meta['bytes'] = sink.bytes
+        else:
+            sink.close()
+            meta['bytes'] = os.path.getsize(meta['path'])
+    db.execute(text(f"UPDATE admin_backups SET metadata = {_metadata_param(db)} WHERE id = :id"),
+               {'metadata': json.dumps(meta), 'id': backup_id})
+    meta['id'] = backup_id
+    return meta
+
+
+def _load_meta(raw):
+    if isinstance(raw, dict):
+        return raw
+    try:
+        return json.loads(raw) if raw else {}
+    except Exception:
+        return {}
+
+
+def get_backup(db, backup_id: int) -> Optional[dict]:
+    row = db.execute(text("SELECT id, action, metadata FROM admin_backups WHERE id = :id"), {'id': int(backup_id)}).fetchone()
+    if row is None:
+        return None
+    meta = _load_meta(row[2])
+    meta.update(id=row[0], action=row[1])
+    return meta
+
+
+def last_backup_started_at(db, table_names=None, scan: int = 50) -> Optional[datetime]:
+    """started_at последней потоковой копии, покрывающей table_names, — граница следующего инкремента"""
+    need = set(table_names or ())
+    rows = db.execute(text("SELECT metadata FROM admin_backups ORDER BY id DESC LIMIT :n"), {'n': int(scan)}).fetchall()
+    for (raw,) in rows:
+        meta = _load_meta(raw)
+        if meta.get('format') == FORMAT and meta.get('started_at') and need <= set(meta.get('rows') or ()):
+            return datetime.fromisoformat(meta['started_at'])
+    return None
+
+
+def restore_stream(db, tables_by_name: dict, stream, batch_rows: int = 1000) -> dict:
+    """Применяет распакованный поток пачками (commit — у вызывающего). Возвращает {table: rows}"""
+    lines = io.TextIOWrapper(stream, encoding='utf-8')
+    header = json.loads(lines.readline() or '{}')
+    if header.get('kind') != 'header' or header.get('format') != FORMAT:
+        raise ValueError('not a stream backup')
+    full = header.get('backup') == 'full'
+    known = [tables_by_name[n] for n in header.get('tables') or [] if n in tables_by_name]
+    if full:
+        # Полная копия заменяет содержимое: сначала зависимые таблицы
+        for table in reversed(known):
+            db.execute(delete(table))
+    counts = {}
+    table, cols, decoders, pks, batch = None, [], [], [], []
+
+    def flush():
+        if not batch:
+            return
+        if not full and pks:
+            # Инкремент — upsert по первичному ключу (в т.ч. составному: user_daily_stake, odds_snapshots, ...)
+            if len(pks) == 1:
+                cond = pks[0].in_([r[pks[0].name] for r in batch])
+            else:
+                cond = tuple_(*pks).in_([tuple(r[c.name] for c in pks) for r in batch])
+            db.execute(delete(table).where(cond))
+        db.execute(insert(table), batch)
+        counts[table.name] = counts.get(table.name, 0) + len(batch)
+        batch.clear()
+
+    for raw in lines:
+        item = json.loads(raw)
+        if isinstance(item, dict):
+            if item.get('kind') == 'table':
+                table = tables_by_name.get(item['name'])
+                cols = item['columns']
+                if table is not None:
+                    decoders = [(_decoder(table.c[c]) if c in table.c else None) for c in cols]
+                    pks = [c for c in table.primary_key.columns if c.name in cols]
+                    if len(pks) != len(table.primary_key.columns):
+                        pks = []
+                    counts.setdefault(table.name, 0)
+            elif item.get('kind') == 'end':
+                if table is not None:
+                    flush()
+                table = None
+            continue
+        if table is None:
+            continue  # таблица из копии отсутствует в текущей схеме
+        row = {}
+        for c, dec, v in zip(cols, decoders, item):
+            if c not in table.c:
+                continue
+            row[c] = dec(v) if (dec is not None and v is not None) else v
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            flush()
+    _sync_sequences(db, [tables_by_name[n] for n in counts])
+    return counts
+
+
+def _sync_sequences(db, tables):
+    """Postgres: после вставки явных id двигаем serial-последовательности к MAX(id)"""
+    if db.get_bind().dialect.name != 'postgresql':
+        return
+    for table in tables:
+        pks = list(table.primary_key.columns)
+        try:
+            if len(pks) != 1 or not pks[0].autoincrement or not issubclass(pks[0].type.python_type, int):
+                continue
+        except NotImplementedError:
+            continue
+        col = pks[0].name
+        db.execute(text(f"SELECT setval(pg_get_serial_sequence(:t, :c), (SELECT COALESCE(MAX({col}), 1) FROM {table.name}))"),
+                   {'t': table.name, 'c': col})
+
+
+def restore_backup(db, tables_by_name: dict, backup_id: int, batch_rows: int = 1000) -> dict:
+    """Восстанавливает копию admin_backups по id (файл или куски)"""
+    meta = get_backup(db, backup_id)
+    if not meta or meta.get('format') != FORMAT:
+        raise LookupError('backup not found')
+    if meta.get('storage') == 'file':
+        with open(meta['path'], 'rb') as fh:
+            return restore_stream(db, tables_by_name, open_reader(fh), batch_rows)
+    return restore_stream(db, tables_by_name, open_reader(ChunkSource(db, backup_id)), batch_rows)
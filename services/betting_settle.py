@@ -16,11 +16,14 @@ def settle_open_bets(
     bet_match_duration_minutes: int,
     now,
     logger,
+    on_won=None,
 ):
     """Массовый расчёт открытых ставок.
 
     Защищено от сравнения naive и timezone-aware datetime:
     если now имеет tzinfo, приводим его к UTC naive. (Bet.match_datetime хранится без tz.)
+    on_won(db, bet) — необязательный хук на выигравшую ставку (например, счётчики достижений),
+    выполняется в той же транзакции до commit.
     """
     if now is None:
         now = datetime.utcnow()
@@ -91,6 +94,11 @@ def settle_open_bets(
             u=db.get(User, b.user_id)
             if u:
                 u.credits = int(u.credits or 0) + payout
+            if on_won is not None:
+                try: on_won(db, b)
+                except Exception as e:
+                    try: logger.warning(f"settle_open_bets on_won hook failed: {e}")
+                    except Exception: pass
         else:
             b.status='lost'; b.payout=0
         # updated_at также делаем naive UTC для консистентности
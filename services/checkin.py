@@ -0,0 +1,78 @@
+"""Daily check-in service.
+
+Чек-ин дня — один условный UPDATE строки users (WHERE last_checkin_date IS NULL OR < today):
+серия, день цикла (1..7), награда XP/кредитов и переход уровня считаются выражениями SQL от
+текущих значений строки и возвращаются через RETURNING. Второй параллельный запрос того же дня
+не проходит условие (rowcount 0) — двойной чек-ин невозможен без блокировок и чтения заранее.
+
+Награда: 10 XP и 50 кредитов за каждый день цикла. Уровень стоит level*100 XP; за чек-ин (≤70 XP)
+возможен один переход, поэтому UPDATE делает не больше одного; строки с XP сверх полосы
+(старые данные) доводятся отдельным UPDATE в той же транзакции.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, case, func, or_, update
+
+XP_PER_DAY = 10
+CREDITS_PER_DAY = 50
+CYCLE_DAYS = 7
+
+
+def cycle_day_for(streak: int) -> int:
+    """День цикла по новой серии (1..CYCLE_DAYS)"""
+    return ((int(streak or 1) - 1) % CYCLE_DAYS) + 1
+
+
+def apply_checkin(db, User, user_id: int, today: date) -> Optional[dict]:
+    """Применяет чек-ин в текущей транзакции (commit — у вызывающего).
+    None — уже отмечен сегодня или пользователя нет."""
+    uid = int(user_id)
+    streak = func.coalesce(User.consecutive_days, 0)
+    xp = func.coalesce(User.xp, 0)
+    level = func.coalesce(User.level, 1)
+    # Пропуск дня (последний чек-ин раньше вчера) — серия и цикл с начала
+    reset = and_(User.last_checkin_date.isnot(None), User.last_checkin_date < today - timedelta(days=1))
+    cycle = case((reset, 1), else_=(streak % CYCLE_DAYS) + 1)
+    xp_sum = xp + cycle * XP_PER_DAY
+    level_up = xp_sum >= level * 100
+    stmt = (update(User)
+            .where(User.user_id == uid,
+                   or_(User.last_checkin_date.is_(None), User.last_checkin_date < today))
+            .values({
+                User.last_checkin_date: today,
+                User.consecutive_days: case((reset, 1), else_=streak + 1),
+                User.xp: case((level_up, xp_sum - level * 100), else_=xp_sum),
+                User.level: case((level_up, level + 1), else_=level),
+                User.credits: func.coalesce(User.credits, 0) + cycle * CREDITS_PER_DAY,
+                User.updated_at: datetime.now(timezone.utc),
+            })
+            .returning(User.consecutive_days, User.xp, User.level, User.credits)
+            .execution_options(synchronize_session=False))
+    row = db.execute(stmt).first()
+    if row is None:
+        return None
+    new_streak, new_xp, new_level, new_credits = (int(v or 0) for v in row)
+    cd = cycle_day_for(new_streak)
+    # При xp < level*100 до чек-ина переход уровня оставляет в полосе меньше самой награды
+    prev_level = new_level - 1 if new_xp < cd * XP_PER_DAY else new_level
+    # Старые строки с XP сверх полосы уровня — доводим как прежний цикл while
+    if new_xp >= new_level * 100:
+        while new_xp >= new_level * 100:
+            new_xp -= new_level * 100
+            new_level += 1
+        db.execute(update(User).where(User.user_id == uid)
+                   .values({User.xp: new_xp, User.level: new_level})
+                   .execution_options(synchronize_session=False))
+    return {
+        'cycle_day': cd,
+        'xp_reward': cd * XP_PER_DAY,
+        'credits_reward': cd * CREDITS_PER_DAY,
+        'consecutive_days': new_streak,
+        'xp': new_xp,
+        'level': new_level,
+        'credits': new_credits,
+        'prev_level': prev_level,
+    }
@@ -0,0 +1,104 @@
+"""Set-based lineup import.
+
+Состав матча (match_lineups) сохраняется как разница с уже записанным: одно чтение строк матча,
+сравнение в памяти по (team, имя без учёта регистра/повторных пробелов) и три bulk-оператора в
+транзакции вызывающего — DELETE ... WHERE id IN (...), INSERT executemany и UPDATE executemany по id.
+Неизменившиеся игроки не трогаются; повторный импорт того же состава — ноль записей.
+
+mode='replace' — стороны из входных данных заменяются целиком (лишние игроки удаляются);
+mode='append' — только добавление/обновление. Стороны, которых нет во входных данных, не трогаются;
+пустой список стороны при replace очищает её.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, update
+
+SIDES = ('home', 'away')
+POSITIONS = ('starting_eleven', 'substitute')
+FIELDS = ('player', 'jersey_number', 'position', 'is_captain')
+
+
+def player_key(name: str) -> str:
+    return ' '.join((name or '').split()).lower()
+
+
+def normalize_position(pos) -> str:
+    """Позиция из формата фронта (main/sub/start/bench) в схему match_lineups"""
+    pos = (pos or '').strip().lower()
+    if pos in POSITIONS:
+        return pos
+    return 'substitute' if pos in ('sub', 'bench') else 'starting_eleven'
+
+
+def make_entry(player, jersey_number=None, position='starting_eleven', is_captain=False):
+    """Нормализованная строка состава; None — пустое имя"""
+    name = ' '.join((player or '').split())
+    if not name:
+        return None
+    try:
+        num = int(jersey_number) if jersey_number is not None and str(jersey_number).strip() != '' else None
+    except (TypeError, ValueError):
+        num = None
+    return {'player': name, 'jersey_number': num, 'position': normalize_position(position),
+            'is_captain': 1 if is_captain else 0}
+
+
+def diff_lineup(existing, incoming: dict, mode: str = 'replace'):
+    """existing — строки матча (id, team, player, jersey_number, position, is_captain);
+    incoming — {side: [entry, ...]}. Возвращает (inserts, updates, delete_ids)."""
+    current = {}
+    delete_ids = []
+    for r in existing:
+        key = (r.team, player_key(r.player))
+        if key in current:
+            delete_ids.append(r.id)  # дубликат старой схемы
+        else:
+            current[key] = r
+    inserts, updates = [], []
+    for side, entries in incoming.items():
+        if side not in SIDES:
+            continue
+        seen = set()
+        for e in entries or ():
+            key = (side, player_key(e['player']))
+            if key in seen:
+                continue
+            seen.add(key)
+            row = current.pop(key, None)
+            if row is None:
+                inserts.append({'team': side, **e})
+            elif any(getattr(row, f) != e[f] for f in FIELDS):
+                updates.append({'id': row.id, **e})
+        if mode == 'replace':
+            for key in [k for k in current if k[0] == side]:
+                delete_ids.append(current.pop(key).id)
+    return inserts, updates, delete_ids
+
+
+def apply_lineup(db, MatchLineupPlayer, home: str, away: str, incoming: dict, mode: str = 'replace') -> dict:
+    """Применяет состав матча bulk-операторами (commit — у вызывающего). Возвращает счётчики;
+    existing — сколько строк было у затронутых сторон до записи."""
+    M = MatchLineupPlayer
+    sides = [s for s in SIDES if s in incoming and (incoming[s] or mode == 'replace')]
+    stats = {'inserted': 0, 'updated': 0, 'deleted': 0, 'changed': False, 'existing': dict.fromkeys(SIDES, 0)}
+    if not sides:
+        return stats
+    existing = (db.query(M.id, M.team, M.player, M.jersey_number, M.position, M.is_captain)
+                  .filter(M.home == home, M.away == away, M.team.in_(sides))
+                  .order_by(M.id)
+                  .all())
+    for row in existing:
+        stats['existing'][row.team] = stats['existing'].get(row.team, 0) + 1
+    inserts, updates, delete_ids = diff_lineup(existing, incoming, mode)
+    if delete_ids:
+        db.execute(delete(M).where(M.id.in_(delete_ids)).execution_options(synchronize_session=False))
+    if updates:
+        db.execute(update(M), updates)
+    if inserts:
+        now = datetime.now(timezone.utc)
+        db.execute(insert(M), [{'home': home, 'away': away, 'created_at': now, **row} for row in inserts])
+    stats.update(inserted=len(inserts), updated=len(updates), deleted=len(delete_ids),
+                 changed=bool(inserts or updates or delete_ids))
+    return stats
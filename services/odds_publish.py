@@ -0,0 +1,139 @@
+"""Odds publication service: опубликованные коэффициенты матча с общей версией.
+
+Строка odds_snapshots на матч (home, away) хранит готовый payload коэффициентов
+(1X2, тоталы, спецрынки) и монотонную версию. Таблица общая для всех воркеров,
+поэтому odds_version одинакова на любом инстансе, а читатели берут payload без
+пересчёта. Пересчёт — только когда строка помечена stale (голос, завершение
+матча, админские изменения), сменилась конфигурация BET_* или истёк max_age.
+Версия растёт только если пересчитанный payload реально изменился.
+"""
+from __future__ import annotations
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+
+def payload_hash(fields: dict) -> str:
+    raw = json.dumps(fields or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def config_fingerprint(env: dict, extra=None) -> str:
+    """Отпечаток параметров модели коэффициентов: все BET_* переменные + доп. данные (базовые силы команд)"""
+    items = sorted((k, str(v)) for k, v in (env or {}).items() if k.startswith('BET_'))
+    raw = json.dumps([items, extra], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _key(home, away):
+    return ((home or '').strip(), (away or '').strip())
+
+
+def load_published(db, Model, pairs) -> dict:
+    """Один запрос на набор матчей: {(home, away): row}"""
+    keys = {_key(h, a) for h, a in (pairs or [])}
+    if not keys:
+        return {}
+    homes = {h for h, _ in keys}
+    aways = {a for _, a in keys}
+    out = {}
+    for row in db.query(Model).filter(Model.home.in_(homes), Model.away.in_(aways)):
+        k = (row.home, row.away)
+        if k in keys:
+            out[k] = row
+    return out
+
+
+def get_published(db, Model, home: str, away: str):
+    return db.get(Model, _key(home, away))
+
+
+def is_fresh(row, config_hash: str, date_key: str | None = None, max_age_sec: int = 0, now=None) -> bool:
+    if row is None or row.stale or not row.payload_hash or row.config_hash != config_hash:
+        return False
+    if date_key and row.date_key and row.date_key != date_key:
+        return False
+    if max_age_sec and row.updated_at is not None:
+        now = now or datetime.now(timezone.utc)
+        ts = row.updated_at if row.updated_at.tzinfo else row.updated_at.replace(tzinfo=timezone.utc)
+        if (now - ts).total_seconds() > max_age_sec:
+            return False
+    return True
+
+
+def row_fields(row) -> dict:
+    try:
+        return json.loads(row.payload or '{}') or {}
+    except Exception:
+        return {}
+
+
+def publish(db, Model, home: str, away: str, date_key: str | None, fields: dict, config_hash: str) -> tuple[int, bool]:
+    """Сохраняет пересчитанный payload. Возвращает (version, changed).
+
+    Версия инкрементится атомарно (UPDATE version = version + 1) только при изменении payload;
+    при гонке вставок двух воркеров вторая превращается в обычное обновление.
+    """
+    home, away = _key(home, away)
+    h = payload_hash(fields)
+    raw = json.dumps(fields or {}, ensure_ascii=False, default=str)
+    now = datetime.now(timezone.utc)
+    row = db.get(Model, (home, away))
+    if row is None:
+        try:
+            db.add(Model(home=home, away=away, date_key=date_key, version=1, payload=raw, payload_hash=h,
+                         config_hash=config_hash, stale=False, updated_at=now))
+            db.commit()
+            return 1, True
+        except IntegrityError:
+            db.rollback()
+            row = db.get(Model, (home, away))
+    flt = (Model.home == home, Model.away == away)
+    if row is not None and row.payload_hash == h:
+        db.query(Model).filter(*flt).update(
+            {Model.stale: False, Model.config_hash: config_hash, Model.date_key: date_key, Model.updated_at: now},
+            synchronize_session=False)
+        db.commit()
+        return int(row.version or 1), False
+    db.query(Model).filter(*flt).update(
+        {Model.version: Model.version + 1, Model.payload: raw, Model.payload_hash: h, Model.stale: False,
+         Model.config_hash: config_hash, Model.date_key: date_key, Model.updated_at: now},
+        synchronize_session=False)
+    db.commit()
+    db.expire_all()
+    return int(db.query(Model.version).filter(*flt).scalar() or 1), True
+
+
+def bump(db, Model, home: str, away: str) -> int:
+    """Принудительно повышает версию и помечает payload устаревшим (следующий читатель пересчитает)"""
+    home, away = _key(home, away)
+    now = datetime.now(timezone.utc)
+    flt = (Model.home == home, Model.away == away)
+    n = db.query(Model).filter(*flt).update(
+        {Model.version: Model.version + 1, Model.stale: True, Model.updated_at: now}, synchronize_session=False)
+    if not n:
+        try:
+            db.add(Model(home=home, away=away, version=2, payload='{}', payload_hash=None, stale=True, updated_at=now))
+            db.commit()
+            return 2
+        except IntegrityError:
+            db.rollback()
+            db.query(Model).filter(*flt).update(
+                {Model.version: Model.version + 1, Model.stale: True, Model.updated_at: now}, synchronize_session=False)
+    db.commit()
+    return int(db.query(Model.version).filter(*flt).scalar() or 1)
+
+
+def mark_stale(db, Model, teams) -> int:
+    """Помечает устаревшими коэффициенты всех матчей с участием команд (изменилась форма/таблица)"""
+    names = [t for t in {(t or '').strip() for t in (teams or [])} if t]
+    if not names:
+        return 0
+    n = (db.query(Model)
+           .filter(or_(Model.home.in_(names), Model.away.in_(names)))
+           .update({Model.stale: True}, synchronize_session=False))
+    db.commit()
+    return int(n or 0)
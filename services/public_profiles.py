@@ -0,0 +1,142 @@
+"""Public profile service.
+
+Публичные поля пользователя (display_name, level, xp, consecutive_days, photo_url) для аватаров,
+лидербордов и оверлеев призов. Чтение пачкой: локальный ограниченный LRU процесса -> один MGET
+в общем кэше (cache_manager / Redis, тип 'public_profile') -> один запрос `IN` в БД только для
+промахов, найденное дописывается в оба уровня.
+
+Инвалидация — invalidate_public_profile(user_id) после смены имени, чек-ина/наград и фото.
+Общий кэш сбрасывается для всех воркеров сразу; локальный LRU других воркеров живёт не дольше
+local_ttl секунд, поэтому держится коротким.
+
+Использование:
+  from services.public_profiles import get_public_profiles, invalidate_public_profile
+  profiles = get_public_profiles(db, ids, User, UserPhoto, cache=cache_manager)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+CACHE_TYPE = 'public_profile'
+
+_lock = threading.Lock()
+# user_id -> (timestamp, profile)
+_local: "OrderedDict[int, tuple]" = OrderedDict()
+_cfg = {'max_entries': 5000, 'local_ttl': 30.0}
+_stats = {'local_hits': 0, 'shared_hits': 0, 'db_loaded': 0, 'db_queries': 0, 'invalidations': 0}
+
+
+def configure(max_entries: Optional[int] = None, local_ttl: Optional[float] = None) -> None:
+    with _lock:
+        if max_entries is not None:
+            _cfg['max_entries'] = max(0, int(max_entries))
+        if local_ttl is not None:
+            _cfg['local_ttl'] = max(0.0, float(local_ttl))
+        while len(_local) > _cfg['max_entries']:
+            _local.popitem(last=False)
+
+
+def _profile(user_id, display_name, level, xp, consecutive_days, photo_url) -> dict:
+    return {
+        'user_id': int(user_id),
+        'display_name': display_name or 'Игрок',
+        'level': int(level or 1),
+        'xp': int(xp or 0),
+        'consecutive_days': int(consecutive_days or 0),
+        'photo_url': photo_url or '',
+    }
+
+
+def _remember(items: Dict[int, dict], now: float) -> None:
+    if _cfg['max_entries'] <= 0:
+        return
+    with _lock:
+        for uid, prof in items.items():
+            _local[uid] = (now, prof)
+            _local.move_to_end(uid)
+        while len(_local) > _cfg['max_entries']:
+            _local.popitem(last=False)
+
+
+def get_public_profiles(db, user_ids: Iterable[int], User, UserPhoto, cache=None) -> Dict[int, dict]:
+    """{user_id: profile} для существующих пользователей; порядок и дубликаты во входе не важны"""
+    ids = []
+    seen = set()
+    for x in user_ids or ():
+        try:
+            uid = int(x)
+        except Exception:
+            continue
+        if uid > 0 and uid not in seen:
+            seen.add(uid)
+            ids.append(uid)
+    out: Dict[int, dict] = {}
+    if not ids:
+        return out
+    now = time.time()
+    misses = []
+    with _lock:
+        ttl = _cfg['local_ttl']
+        for uid in ids:
+            ent = _local.get(uid)
+            if ent and now - ent[0] < ttl:
+                _local.move_to_end(uid)
+                out[uid] = ent[1]
+            else:
+                if ent:
+                    _local.pop(uid, None)
+                misses.append(uid)
+        _stats['local_hits'] += len(out)
+    if misses and cache is not None:
+        try:
+            shared = cache.get_many(CACHE_TYPE, [str(u) for u in misses]) or {}
+        except Exception:
+            shared = {}
+        if shared:
+            got = {int(k): v for k, v in shared.items() if isinstance(v, dict)}
+            out.update(got)
+            _remember(got, now)
+            misses = [u for u in misses if u not in got]
+            with _lock:
+                _stats['shared_hits'] += len(got)
+    if misses:
+        rows = (db.query(User.user_id, User.display_name, User.level, User.xp, User.consecutive_days, UserPhoto.photo_url)
+                  .outerjoin(UserPhoto, UserPhoto.user_id == User.user_id)
+                  .filter(User.user_id.in_(misses))
+                  .all())
+        loaded = {int(r[0]): _profile(*r) for r in rows}
+        out.update(loaded)
+        _remember(loaded, now)
+        with _lock:
+            _stats['db_queries'] += 1
+            _stats['db_loaded'] += len(loaded)
+        if loaded and cache is not None:
+            try:
+                cache.set_many(CACHE_TYPE, {str(k): v for k, v in loaded.items()})
+            except Exception:
+                pass
+    return out
+
+
+def invalidate_public_profile(user_id, cache=None) -> None:
+    """Сбрасывает профиль в локальном LRU и общем кэше (после коммита изменения)"""
+    try:
+        uid = int(user_id)
+    except Exception:
+        return
+    with _lock:
+        _local.pop(uid, None)
+        _stats['invalidations'] += 1
+    if cache is not None:
+        try:
+            cache.invalidate(CACHE_TYPE, str(uid))
+        except Exception:
+            pass
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, 'local_entries': len(_local), **_cfg}
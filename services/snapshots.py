@@ -1,8 +1,158 @@
-"""Snapshots service abstraction."""
+"""Snapshots service abstraction.
+
+Для schedule/results (DELTA_COLLECTIONS) snapshot_set дополнительно пишет append-only лог
+изменений по записям (тур расписания, строка результата) в snapshot_deltas и поднимает версию
+в snapshot_versions. Полный payload в snapshots остаётся материализованной базой для читателей;
+snapshot_delta(key, since) отдаёт только изменённые записи. Лог старше retain версий
+компактируется: base_version сдвигается, клиенты со since < base получают полный payload.
+Запись без старого payload (первая или после сброса, reset_deltas) тоже сдвигает базу на новую версию.
+
+Запись адресуется по содержимому: content_hash (sha256 канонического JSON без updated_at) хранится
+в строке; совпал с сохранённым — UPDATE, лог дельт и инвалидация у вызывающего пропускаются
+(snapshot_store -> 'unchanged'). Хеш годится как готовый ETag.
+"""
 from __future__ import annotations
-import json, time
+import hashlib, json, sys, time
 from datetime import datetime, timezone
 
+# key -> (коллекция в payload, поля ключа записи, порядок значим)
+DELTA_COLLECTIONS = {
+    'schedule': ('tours', ('tour',), True),
+    'results': ('results', ('home', 'away', 'date'), False),
+}
+# Служебная запись дельты: новый порядок ключей коллекции
+ORDER_KEY = '__order__'
+_delta_cfg: dict = {}
+# Поля верхнего уровня, меняющиеся при каждой сборке без изменения данных
+VOLATILE_KEYS = ('updated_at',)
+
+
+def content_hash(payload) -> str:
+    """Стабильный хеш содержимого: sort_keys, без VOLATILE_KEYS верхнего уровня"""
+    if isinstance(payload, dict):
+        payload = {k: v for k, v in payload.items() if k not in VOLATILE_KEYS}
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _backoff(seconds: float):
+    """Пауза между попытками, не блокирующая hub gevent/eventlet даже без monkey-patch time"""
+    try:
+        if 'gevent' in sys.modules:
+            import gevent
+            return gevent.sleep(seconds)
+        if 'eventlet' in sys.modules:
+            import eventlet
+            return eventlet.sleep(seconds)
+    except Exception:
+        pass
+    time.sleep(seconds)
+
+
+def configure_deltas(DeltaModel, VersionModel, retain: int = 200):
+    """Включает лог дельт (модели из app.py); без вызова snapshot_set работает как раньше"""
+    _delta_cfg.update({'delta': DeltaModel, 'version': VersionModel, 'retain': max(1, int(retain))})
+
+
+def entry_key(entry: dict, fields) -> str:
+    # Та же схема на клиенте (etag-fetch.js applySnapshotDelta): None -> ''
+    return '|'.join('' if entry.get(f) is None else str(entry.get(f)) for f in fields)
+
+
+def _entries(key: str, payload) -> dict:
+    collection, fields, _ = DELTA_COLLECTIONS[key]
+    items = (payload or {}).get(collection) if isinstance(payload, dict) else None
+    return {entry_key(e, fields): e for e in (items or []) if isinstance(e, dict)}
+
+
+def _record_delta(db, key: str, old_payload, new_payload):
+    """Пишет изменённые записи как новую версию (в транзакции вызывающего). Возвращает версию."""
+    Delta, Version = _delta_cfg['delta'], _delta_cfg['version']
+    old, new = _entries(key, old_payload), _entries(key, new_payload)
+    changes = [(k, e) for k, e in new.items() if old.get(k) != e]
+    changes += [(k, None) for k in old if k not in new]
+    if DELTA_COLLECTIONS[key][2] and list(old) != list(new):
+        changes.append((ORDER_KEY, list(new)))
+    vrow = db.query(Version).filter(Version.key == key).with_for_update().first()
+    # Старого payload нет (первая запись, снапшот удалён сбросом): удалённые записи в дельту не попадут
+    rebase = old_payload is None and vrow is not None
+    if not changes and not rebase:
+        return vrow.version if vrow else 0
+    now = datetime.now(timezone.utc)
+    if vrow is None:
+        vrow = Version(key=key, version=0, base_version=0)
+        db.add(vrow)
+    vrow.version = (vrow.version or 0) + 1
+    vrow.updated_at = now
+    if rebase:
+        # Клиенты со since до этой версии получают полный payload
+        vrow.base_version = vrow.version
+        db.query(Delta).filter(Delta.snapshot_key == key).delete(synchronize_session=False)
+        return vrow.version
+    for k, e in changes:
+        db.add(Delta(snapshot_key=key, version=vrow.version, entry_key=k,
+                     entry=(None if e is None else json.dumps(e, ensure_ascii=False)), created_at=now))
+    # Компакция: держим последние retain версий, остальное покрывает полный payload
+    retain = _delta_cfg['retain']
+    if vrow.version - (vrow.base_version or 0) > retain:
+        vrow.base_version = vrow.version - retain
+        db.query(Delta).filter(Delta.snapshot_key == key, Delta.version <= vrow.base_version).delete(synchronize_session=False)
+    return vrow.version
+
+
+def reset_deltas(db) -> int:
+    """Сброс лога дельт вместе со снапшотами (в транзакции вызывающего): записи удаляются, версия
+    поднимается и становится базой — любой since до сброса получает полный payload. Возвращает число удалённых записей."""
+    Delta, Version = _delta_cfg.get('delta'), _delta_cfg.get('version')
+    if Delta is None:
+        return 0
+    deleted = db.query(Delta).delete(synchronize_session=False)
+    db.query(Version).update({Version.version: Version.version + 1, Version.base_version: Version.version + 1,
+                              Version.updated_at: datetime.now(timezone.utc)}, synchronize_session=False)
+    return int(deleted or 0)
+
+
+def snapshot_version(db, key: str) -> int:
+    """Текущая версия лога дельт (0 — лог не ведётся)"""
+    Version = _delta_cfg.get('version')
+    if Version is None or key not in DELTA_COLLECTIONS:
+        return 0
+    try:
+        row = db.get(Version, key)
+        return int(row.version) if row else 0
+    except Exception:
+        try: db.rollback()
+        except Exception: pass
+        return 0
+
+
+def snapshot_delta(db, key: str, since: int):
+    """Изменения после версии since: {snapshot_version, collection, key_fields, changes:[{key, entry|None}]}.
+    None — дельтой не ответить (лог не ведётся, since старше базы или из будущего): нужен полный payload."""
+    Delta, Version = _delta_cfg.get('delta'), _delta_cfg.get('version')
+    if Delta is None or key not in DELTA_COLLECTIONS:
+        return None
+    row = db.get(Version, key)
+    if row is None or since < (row.base_version or 0) or since > row.version:
+        return None
+    rows = (db.query(Delta.entry_key, Delta.entry)
+              .filter(Delta.snapshot_key == key, Delta.version > since)
+              .order_by(Delta.version.asc(), Delta.id.asc())
+              .all())
+    latest: dict = {}
+    for k, raw in rows:
+        latest.pop(k, None)  # порядок — по последнему изменению
+        latest[k] = None if raw is None else json.loads(raw)
+    collection, fields, _ = DELTA_COLLECTIONS[key]
+    return {
+        'since': since,
+        'snapshot_version': int(row.version),
+        'collection': collection,
+        'key_fields': list(fields),
+        'changes': [{'key': k, 'entry': e} for k, e in latest.items()],
+    }
+
+
 def snapshot_get(db, SnapshotModel, key: str, logger):
     attempts=0
     while attempts<3:
@@ -12,7 +162,8 @@ def snapshot_get(db, SnapshotModel, key: str, logger):
                 return None
             try: data=json.loads(row.payload)
             except Exception: data=None
-            return {'key': key,'payload': data,'updated_at': (row.updated_at or datetime.now(timezone.utc)).isoformat()}
+            return {'key': key,'payload': data,'updated_at': (row.updated_at or datetime.now(timezone.utc)).isoformat(),
+                    'content_hash': getattr(row, 'content_hash', None)}
         except Exception as e:
             try: db.rollback()
             except Exception: pass
@@ -20,21 +171,40 @@ def snapshot_get(db, SnapshotModel, key: str, logger):
             if attempts>=3:
                 try: logger.warning(f"snapshot_get failed {key}: {e}")
                 except Exception: pass
-            time.sleep(0.1*attempts)
+            _backoff(0.1*attempts)
     return None
 
-def snapshot_set(db, SnapshotModel, key: str, payload: dict, logger):
+def snapshot_store(db, SnapshotModel, key: str, payload: dict, logger) -> str:
+    """Пишет снапшот: 'written' | 'unchanged' (хеш совпал, строка не тронута) | 'failed'"""
+    digest=content_hash(payload)
+    has_hash=hasattr(SnapshotModel, 'content_hash')
     attempts=0
     while attempts<3:
         try:
+            row=db.get(SnapshotModel, key)
+            if row is not None and has_hash and row.content_hash == digest:
+                return 'unchanged'
             raw=json.dumps(payload, ensure_ascii=False)
             now=datetime.now(timezone.utc)
-            row=db.get(SnapshotModel, key)
+            if _delta_cfg and key in DELTA_COLLECTIONS:
+                old_payload=None
+                if row:
+                    try: old_payload=json.loads(row.payload)
+                    except Exception: old_payload=None
+                # Лог дельт — best-effort: сбой (например, таблицы ещё нет) не должен ронять запись снапшота
+                try:
+                    with db.begin_nested():
+                        _record_delta(db, key, old_payload, payload)
+                except Exception as de:
+                    try: logger.warning(f"snapshot delta failed {key}: {de}")
+                    except Exception: pass
             if row:
                 row.payload=raw; row.updated_at=now
             else:
                 row=SnapshotModel(key=key, payload=raw, updated_at=now); db.add(row)
-            db.commit(); return True
+            if has_hash:
+                row.content_hash=digest
+            db.commit(); return 'written'
         except Exception as e:
             try: db.rollback()
             except Exception: pass
@@ -42,8 +212,13 @@ def snapshot_set(db, SnapshotModel, key: str, payload: dict, logger):
             if attempts>=3:
                 try: logger.warning(f"snapshot_set failed {key}: {e}")
                 except Exception: pass
-            time.sleep(0.1*attempts)
-    return False
+                break
+            _backoff(0.1*attempts)
+    return 'failed'
+
+def snapshot_set(db, SnapshotModel, key: str, payload: dict, logger) -> bool:
+    """True — снапшот актуален (записан или не изменился)"""
+    return snapshot_store(db, SnapshotModel, key, payload, logger) != 'failed'
 
 # Backward-compatible aliases (old import style)
 get_snapshot = snapshot_get
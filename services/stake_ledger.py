@@ -0,0 +1,55 @@
+"""Daily stake ledger: суточная сумма ставок пользователя одной строкой.
+
+Строка user_daily_stake (user_id, day) хранит сумму ставок за UTC-сутки. Резерв под
+новую ставку — условный UPDATE (total + stake <= cap) в той же транзакции, что и вставка
+Bet: проверка лимита O(1) и без гонок между параллельными запросами/воркерами.
+Первая ставка дня создаёт строку, засеивая её суммой уже сделанных сегодня ставок
+(переход со старой схемы без ledger'а).
+"""
+from __future__ import annotations
+from datetime import date, datetime, time, timezone
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+
+def day_bounds_utc(day: date) -> tuple[datetime, datetime]:
+    return (datetime.combine(day, time.min).replace(tzinfo=timezone.utc),
+            datetime.combine(day, time.max).replace(tzinfo=timezone.utc))
+
+
+def _try_increment(db, Ledger, user_id: int, day: date, stake: int, cap: int) -> bool:
+    n = (db.query(Ledger)
+           .filter(Ledger.user_id == user_id, Ledger.day == day, Ledger.total + stake <= cap)
+           .update({Ledger.total: Ledger.total + stake, Ledger.updated_at: datetime.now(timezone.utc)},
+                   synchronize_session=False))
+    return bool(n)
+
+
+def reserve_daily_stake(db, Ledger, Bet, user_id: int, stake: int, cap: int, day: date | None = None) -> bool:
+    """Резервирует stake в суточном лимите. False — лимит будет превышен.
+
+    Коммит — на стороне вызывающего (вместе со ставкой); при отказе вызывающий делает rollback.
+    """
+    uid = int(user_id)
+    stake = int(stake)
+    day = day or datetime.now(timezone.utc).date()
+    if _try_increment(db, Ledger, uid, day, stake, cap):
+        return True
+    if db.query(Ledger.user_id).filter(Ledger.user_id == uid, Ledger.day == day).first() is not None:
+        return False
+    # Строки за сутки нет: засеваем суммой уже сделанных сегодня ставок
+    start_dt, end_dt = day_bounds_utc(day)
+    placed = (db.query(func.coalesce(func.sum(Bet.stake), 0))
+                .filter(Bet.user_id == uid, Bet.placed_at >= start_dt, Bet.placed_at <= end_dt)
+                .scalar() or 0)
+    if int(placed) + stake > cap:
+        return False
+    try:
+        with db.begin_nested():
+            db.add(Ledger(user_id=uid, day=day, total=int(placed) + stake, updated_at=datetime.now(timezone.utc)))
+        return True
+    except IntegrityError:
+        # Параллельный запрос создал строку раньше — повторяем условный UPDATE
+        return _try_increment(db, Ledger, uid, day, stake, cap)
+
@@ -0,0 +1,83 @@
+"""User profile loader.
+
+Профиль для /api/user собирается одним запросом в одной сессии: users + user_photos + user_prefs +
+user_limits + referrals (LEFT JOIN по user_id). Результат — готовый DTO (compose_profile), который
+app.py кэширует по пользователю (cache_manager, тип 'user_profile') с ETag (profile_etag).
+
+Инвалидация: install_invalidation подписывается на коммиты ORM-сессий и вызывает on_invalidate(user_id)
+для каждого изменённого/созданного/удалённого объекта профильных таблиц (кредиты, имя, фото,
+любимая команда, чек-ин). Bulk UPDATE (Query.update) хук не видит — такие места сбрасывают
+кэш сами.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+
+PROFILE_TABLES = ('users', 'user_photos', 'user_prefs', 'user_limits', 'referrals')
+# Не входят в ETag: меняются при каждом заходе без изменения данных профиля
+VOLATILE_KEYS = ('updated_at',)
+
+
+def load_profile_parts(db, user_id: int, User, UserPhoto, UserPref, UserLimits, Referral):
+    """(user, photo, pref, limits, referral) одним запросом; None — пользователя нет"""
+    row = (db.query(User, UserPhoto, UserPref, UserLimits, Referral)
+             .outerjoin(UserPhoto, UserPhoto.user_id == User.user_id)
+             .outerjoin(UserPref, UserPref.user_id == User.user_id)
+             .outerjoin(UserLimits, UserLimits.user_id == User.user_id)
+             .outerjoin(Referral, Referral.user_id == User.user_id)
+             .filter(User.user_id == int(user_id))
+             .first())
+    return tuple(row) if row is not None else None
+
+
+def compose_profile(user: dict, photo=None, pref=None, limits=None, referral=None) -> dict:
+    """DTO /api/user: serialize_user(...) + части профиля из соседних таблиц"""
+    dto = dict(user)
+    dto['favorite_team'] = (getattr(pref, 'favorite_team', None) or '') if pref is not None else ''
+    dto['photo_url'] = (getattr(photo, 'photo_url', None) or '') if photo is not None else ''
+    dto['name_changes_left'] = int(limits.name_changes_left if limits is not None and limits.name_changes_left is not None else 1)
+    dto['favorite_changes_left'] = int(limits.favorite_changes_left if limits is not None and limits.favorite_changes_left is not None else 1)
+    dto['referral_code'] = (getattr(referral, 'referral_code', None) or '') if referral is not None else ''
+    return dto
+
+
+def profile_etag(dto: dict) -> str:
+    core = {k: v for k, v in (dto or {}).items() if k not in VOLATILE_KEYS}
+    raw = json.dumps(core, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def install_invalidation(on_invalidate, session_cls=None, tables=PROFILE_TABLES) -> None:
+    """Хуки ORM: user_id изменённых объектов профильных таблиц -> on_invalidate после commit"""
+    from sqlalchemy import event
+    if session_cls is None:
+        from sqlalchemy.orm import Session as session_cls
+    tables = set(tables)
+
+    @event.listens_for(session_cls, 'before_flush')
+    def _before_flush(session, flush_context, instances):
+        ids = set()
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            name = getattr(getattr(obj, '__table__', None), 'name', None)
+            uid = getattr(obj, 'user_id', None)
+            if name in tables and uid is not None:
+                ids.add(int(uid))
+        if ids:
+            session.info.setdefault('_profile_user_ids', set()).update(ids)
+
+    @event.listens_for(session_cls, 'after_commit')
+    def _after_commit(session):
+        if session.in_nested_transaction():
+            return
+        for uid in session.info.pop('_profile_user_ids', None) or ():
+            try:
+                on_invalidate(uid)
+            except Exception:
+                pass
+
+    @event.listens_for(session_cls, 'after_rollback')
+    def _after_rollback(session):
+        if session.in_nested_transaction():
+            return
+        session.info.pop('_profile_user_ids', None)
@@ -0,0 +1,193 @@
+"""User statistics counters.
+
+Дашборд /api/admin/users-stats не считает восемь COUNT по users. Основа — строка user_stats (id=1),
+которую пишет только reconcile (один агрегат по users + один по bets): окна активности 1/7/30 дней,
+new_30d и точные значения событийных счётчиков на момент reconciled_at.
+
+События (новый пользователь, чек-ин, ставка) общей строки не трогают: record делает upsert
+col = col + d в строку (день, шард) таблицы user_stats_counters, шард — user_id % SHARDS, так что
+одновременные события разных пользователей не ждут одну блокировку. read складывает шарды: к основе
+прибавляется прирост событий с момента reconcile (суммы дня на момент reconcile хранятся в ev_* строки
+user_stats), суточные счётчики нового дня — сумма событий дня. Онлайн за 5/15 минут считается на чтении
+одним агрегатом по users.updated_at (индекс), без ожидания reconcile.
+reconcile же пишет снимок дня в user_stats_daily — история для графиков.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import case, func, text
+
+ROW_ID = 1
+SHARDS = 16
+# Поля событий в user_stats_counters -> счётчики дашборда, которые они двигают
+EVENT_FIELDS = ('new_users', 'first_bets', 'first_checkins', 'checkins', 'bets')
+EVENT_TARGETS = {
+    'new_users': ('total_users', 'new_today'),
+    'first_bets': ('with_bets',),
+    'first_checkins': ('with_checkins',),
+    'checkins': ('checkins_today',),
+    'bets': ('bets_today',),
+}
+EVENT_COUNTERS = ('total_users', 'new_today', 'with_bets', 'with_checkins', 'checkins_today', 'bets_today')
+DAILY_COUNTERS = ('new_today', 'checkins_today', 'bets_today')
+# Только reconcile
+WINDOW_COUNTERS = ('active_1d', 'active_7d', 'active_30d', 'new_30d')
+# На чтении
+ONLINE_COUNTERS = ('online_5m', 'online_15m')
+HISTORY_FIELDS = ('total_users', 'new_users', 'active_1d', 'active_7d', 'active_30d',
+                  'with_bets', 'with_checkins', 'checkins', 'bets')
+
+
+def record(db, UserStatsCounter, today: date, user_id: int, **deltas) -> None:
+    """Событие в шард (today, user_id % SHARDS) в текущей транзакции; deltas — поля EVENT_FIELDS"""
+    cols = [k for k in EVENT_FIELDS if int(deltas.get(k) or 0)]
+    if not cols:
+        return
+    table = UserStatsCounter.__tablename__
+    params = {'day': today, 'shard': int(user_id) % SHARDS}
+    params.update({k: int(deltas.get(k) or 0) for k in EVENT_FIELDS})
+    db.execute(text(
+        f"INSERT INTO {table} (day, shard, {', '.join(EVENT_FIELDS)}) "
+        f"VALUES (:day, :shard, {', '.join(':' + k for k in EVENT_FIELDS)}) "
+        f"ON CONFLICT (day, shard) DO UPDATE SET {', '.join(f'{k} = {table}.{k} + excluded.{k}' for k in cols)}"
+    ), params)
+
+
+def _event_sums(db, UserStatsCounter, since_day: date) -> dict:
+    """{day: {field: сумма по шардам}} для дней >= since_day"""
+    C = UserStatsCounter
+    rows = (db.query(C.day, *[func.coalesce(func.sum(getattr(C, k)), 0) for k in EVENT_FIELDS])
+              .filter(C.day >= since_day)
+              .group_by(C.day)
+              .all())
+    return {r[0]: dict(zip(EVENT_FIELDS, (int(v or 0) for v in r[1:]))) for r in rows}
+
+
+def online(db, User, now: datetime) -> dict:
+    """Онлайн за 5/15 минут по last-seen (users.updated_at) — диапазон по индексу"""
+    row = db.query(
+        func.coalesce(func.sum(case((User.updated_at >= now - timedelta(minutes=5), 1), else_=0)), 0),
+        func.count(User.user_id),
+    ).filter(User.updated_at >= now - timedelta(minutes=15)).one()
+    return {'online_5m': int(row[0] or 0), 'online_15m': int(row[1] or 0)}
+
+
+def compute(db, User, Bet, now: datetime) -> dict:
+    """Точные значения всех счётчиков: один агрегат по users и один по bets"""
+    day_start = datetime.combine(now.date(), dtime.min, tzinfo=timezone.utc)
+
+    def since(col, dt):
+        return func.coalesce(func.sum(case((col >= dt, 1), else_=0)), 0)
+
+    row = db.query(
+        func.count(User.user_id),
+        since(User.created_at, day_start),
+        since(User.created_at, now - timedelta(days=30)),
+        since(User.updated_at, now - timedelta(minutes=5)),
+        since(User.updated_at, now - timedelta(minutes=15)),
+        since(User.updated_at, now - timedelta(days=1)),
+        since(User.updated_at, now - timedelta(days=7)),
+        since(User.updated_at, now - timedelta(days=30)),
+        func.coalesce(func.sum(case((User.last_checkin_date.isnot(None), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((User.last_checkin_date == now.date(), 1), else_=0)), 0),
+    ).one()
+    with_bets, bets_today = db.query(
+        func.count(func.distinct(Bet.user_id)),
+        since(Bet.placed_at, day_start),
+    ).one()
+    keys = ('total_users', 'new_today', 'new_30d', 'online_5m', 'online_15m',
+            'active_1d', 'active_7d', 'active_30d', 'with_checkins', 'checkins_today')
+    out = {k: int(v or 0) for k, v in zip(keys, row)}
+    out['with_bets'] = int(with_bets or 0)
+    out['bets_today'] = int(bets_today or 0)
+    return out
+
+
+def reconcile(db, UserStats, UserStatsDaily, UserStatsCounter, User, Bet, now: Optional[datetime] = None) -> dict:
+    """Пересчёт счётчиков и снимок дня в историю (commit — у вызывающего)"""
+    now = now or datetime.now(timezone.utc)
+    counts = compute(db, User, Bet, now)
+    # Уже учтённые в counts события дня: read прибавит к основе только то, что придёт после
+    offsets = _event_sums(db, UserStatsCounter, now.date()).get(now.date(), {})
+    row = db.get(UserStats, ROW_ID)
+    if row is None:
+        row = UserStats(id=ROW_ID)
+        db.add(row)
+    for k, v in counts.items():
+        setattr(row, k, v)
+    for k in EVENT_FIELDS:
+        setattr(row, f'ev_{k}', int(offsets.get(k) or 0))
+    (db.query(UserStatsCounter)
+       .filter(UserStatsCounter.day < now.date())
+       .delete(synchronize_session=False))
+    row.stats_day = now.date()
+    row.reconciled_at = now
+    row.updated_at = now
+    day = db.get(UserStatsDaily, now.date())
+    if day is None:
+        day = UserStatsDaily(day=now.date())
+        db.add(day)
+    day.total_users = counts['total_users']
+    day.new_users = counts['new_today']
+    day.active_1d = counts['active_1d']
+    day.active_7d = counts['active_7d']
+    day.active_30d = counts['active_30d']
+    day.with_bets = counts['with_bets']
+    day.with_checkins = counts['with_checkins']
+    day.checkins = counts['checkins_today']
+    day.bets = counts['bets_today']
+    day.updated_at = now
+    return counts
+
+
+def read(db, UserStats, UserStatsCounter, User, now: datetime) -> Optional[dict]:
+    """Счётчики для дашборда: основа reconcile + шарды событий после него + онлайн;
+    None — reconcile ещё не выполнялся"""
+    row = db.get(UserStats, ROW_ID)
+    if row is None:
+        return None
+    today = now.date()
+    base_day = row.stats_day or today
+    sums = _event_sums(db, UserStatsCounter, min(base_day, today))
+    # Прирост событий с момента reconcile по каждому полю
+    grown = {k: sum(d.get(k, 0) for d in sums.values()) - int(getattr(row, f'ev_{k}') or 0) for k in EVENT_FIELDS}
+    out = {name: int(getattr(row, name) or 0) for name in EVENT_COUNTERS + WINDOW_COUNTERS}
+    for k, targets in EVENT_TARGETS.items():
+        for name in targets:
+            if name in DAILY_COUNTERS and base_day != today:
+                # reconcile был в прошлые сутки: суточный счётчик — только события сегодня
+                out[name] = sums.get(today, {}).get(k, 0)
+            else:
+                out[name] = max(0, out[name] + grown[k])
+    out.update(online(db, User, now))
+    out['reconciled_at'] = row.reconciled_at.isoformat() if row.reconciled_at else None
+    return out
+
+
+def is_stale(stats: Optional[dict], now: datetime, max_age_sec: float) -> bool:
+    if not stats or not stats.get('reconciled_at'):
+        return True
+    try:
+        ts = datetime.fromisoformat(stats['reconciled_at'])
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        return (now - ts).total_seconds() >= max_age_sec
+    except Exception:
+        return True
+
+
+def history(db, UserStatsDaily, days: int = 30) -> list:
+    """Снимки по дням (старые -> новые) для графиков"""
+    rows = (db.query(UserStatsDaily)
+              .order_by(UserStatsDaily.day.desc())
+              .limit(max(1, int(days)))
+              .all())
+    out = []
+    for r in reversed(rows):
+        item = {'day': r.day.isoformat()}
+        for name in HISTORY_FIELDS:
+            item[name] = int(getattr(r, name) or 0)
+        out.append(item)
+    return out
@@ -87,13 +87,23 @@
       this.buffer = [];
 
       try {
-        await fetch(this.endpoint, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify({ logs }),
-        });
+        // NDJSON, по возможности gzip — сервер ставит пачку в очередь и пишет её фоном
+        const ndjson = logs.map(entry => JSON.stringify(entry)).join('\n');
+        const headers = {
+          'Content-Type': 'application/x-ndjson',
+          'X-Telegram-Init-Data': window.Telegram?.WebApp?.initData || '',
+        };
+        let body = ndjson;
+        if (typeof CompressionStream === 'function') {
+          try {
+            const stream = new Blob([ndjson]).stream().pipeThrough(new CompressionStream('gzip'));
+            body = await new Response(stream).blob();
+            headers['Content-Encoding'] = 'gzip';
+          } catch (_) {
+            body = ndjson;
+          }
+        }
+        await fetch(this.endpoint, { method: 'POST', headers, body });
       } catch (error) {
         console.warn('Failed to send logs to server:', error);
         // Re-add failed logs to buffer (up to limit)
@@ -129,8 +129,14 @@
           btnFullReset.textContent = '...';
           const fd = new FormData();
           fd.append('initData', window.Telegram?.WebApp?.initData || '');
-          const r = await fetch('/api/admin/full-reset', { method: 'POST', body: fd });
-          const d = await r.json().catch(() => ({}));
+          let r = await fetch('/api/admin/full-reset', { method: 'POST', body: fd });
+          let d = await r.json().catch(() => ({}));
+          // Резервная копия не создалась — сброс не выполнен; без копии только по явному подтверждению
+          if (d?.error === 'backup_failed' && confirm((d.message || 'Резервная копия не создана.') + '\nСбросить без копии?')) {
+            fd.append('force', 'yes');
+            r = await fetch('/api/admin/full-reset', { method: 'POST', body: fd });
+            d = await r.json().catch(() => ({}));
+          }
           const msg = r.ok
             ? 'Готово. Очищено: ' + JSON.stringify(d.summary || {})
             : d?.error || 'Ошибка';
@@ -506,6 +512,10 @@
         ['Активные (7 дней)', d.active_7d || 0],
         ['Активные (30 дней)', d.active_30d || 0],
         ['Всего пользователей', d.total_users || 0],
+        ['Новые сегодня', d.new_today || 0],
+        ['Со ставками', d.with_bets || 0],
+        ['С чек-инами', d.with_checkins || 0],
+        ['Ставки / чек-ины сегодня', `${d.bets_today || 0} / ${d.checkins_today || 0}`],
       ];
       rows.forEach(([k, v]) => {
         const tr = document.createElement('tr');
@@ -518,7 +528,9 @@
       });
       if (updated) {
         try {
-          updated.textContent = `Обновлено: ${new Date().toLocaleString()}`;
+          // окна активности пересчитываются периодически — показываем момент пересчёта
+          const ts = d.reconciled_at ? new Date(d.reconciled_at) : new Date();
+          updated.textContent = `Обновлено: ${ts.toLocaleString()}`;
         } catch (_) {}
       }
       if (lblUsers) {
@@ -3,11 +3,34 @@
 // Использование:
 // fetchEtag('/api/achievements', { cacheKey:'achievements:v1', swrMs:30000, extract: j=>j.achievements||[] })
 //   .then(({data, etag, fromCache, updated}) => { /* ... */ });
+//
+// Хранилище: IndexedDB (память + LRU-бюджет по байтам), при недоступности — localStorage.
+// Одинаковые параллельные запросы делят один fetch; запросы первого экрана (summary, schedule)
+// идут первыми, второстепенные (лидерборды, достижения) ждут их завершения.
 (function () {
   if (window.fetchEtag) {
     return;
   } // уже определено
 
+  const DB_NAME = 'liga-etag-cache';
+  const DB_VERSION = 1;
+  const ENTRIES = 'entries'; // key -> { etag, ts, data, raw }
+  const LRU = 'lru'; // key -> { key, size, atime } (лёгкий индекс без payload)
+  const BUDGET_BYTES = 4 * 1024 * 1024;
+  const MAX_ENTRIES = 300;
+  const MAX_PARALLEL = 4; // обычных запросов параллельно, пока идут приоритетные
+  const ATIME_FLUSH_MS = 2000;
+
+  // Приоритет по пути, если вызывающий не указал priority явно
+  const PRIORITY_BY_PATH = [
+    ['/api/summary', 'high'],
+    ['/api/schedule', 'high'],
+    ['/api/leaderboard/', 'low'],
+    ['/api/league/stats/', 'low'],
+    ['/api/achievements', 'low'],
+  ];
+  const PRIORITY_RANK = { high: 0, normal: 1, low: 2 };
+
   function safeParse(jsonText) {
     try {
       return JSON.parse(jsonText);
@@ -25,6 +48,299 @@
     }
   }
 
+  // ---------------- Хранилище: память + IndexedDB (LRU) ----------------
+  const mem = new Map(); // key -> entry
+  const lru = new Map(); // key -> { size, atime }; порядок вставки = порядок LRU
+  let lruBytes = 0;
+  const dirtyAtime = new Set();
+  let atimeTimer = null;
+  let dbPromise = null;
+
+  function reqToPromise(req) {
+    return new Promise((resolve, reject) => {
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => reject(req.error);
+    });
+  }
+
+  function openDb() {
+    if (dbPromise) {
+      return dbPromise;
+    }
+    dbPromise = new Promise(resolve => {
+      try {
+        if (!window.indexedDB) {
+          resolve(null);
+          return;
+        }
+        const req = window.indexedDB.open(DB_NAME, DB_VERSION);
+        req.onupgradeneeded = () => {
+          const db = req.result;
+          if (!db.objectStoreNames.contains(ENTRIES)) {
+            db.createObjectStore(ENTRIES);
+          }
+          if (!db.objectStoreNames.contains(LRU)) {
+            db.createObjectStore(LRU, { keyPath: 'key' });
+          }
+        };
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => resolve(null); // приватный режим / WebView без IDB
+        req.onblocked = () => resolve(null);
+      } catch (_) {
+        resolve(null);
+      }
+    }).then(async db => {
+      if (!db) {
+        return null;
+      }
+      // Индекс LRU читаем один раз за сессию (без payload)
+      try {
+        const rows = await reqToPromise(db.transaction(LRU).objectStore(LRU).getAll());
+        rows.sort((a, b) => (a.atime || 0) - (b.atime || 0));
+        rows.forEach(r => {
+          lru.set(r.key, { size: r.size || 0, atime: r.atime || 0 });
+          lruBytes += r.size || 0;
+        });
+      } catch (_) {}
+      return db;
+    });
+    return dbPromise;
+  }
+
+  function touch(key) {
+    const meta = lru.get(key);
+    if (!meta) {
+      return;
+    }
+    lru.delete(key);
+    meta.atime = Date.now();
+    lru.set(key, meta);
+    dirtyAtime.add(key);
+    if (!atimeTimer) {
+      atimeTimer = setTimeout(flushAtime, ATIME_FLUSH_MS);
+    }
+  }
+
+  async function flushAtime() {
+    atimeTimer = null;
+    const keys = Array.from(dirtyAtime);
+    dirtyAtime.clear();
+    const db = await openDb();
+    if (!db || !keys.length) {
+      return;
+    }
+    try {
+      const store = db.transaction(LRU, 'readwrite').objectStore(LRU);
+      keys.forEach(key => {
+        const meta = lru.get(key);
+        if (meta) {
+          store.put({ key, size: meta.size, atime: meta.atime });
+        }
+      });
+    } catch (_) {}
+  }
+
+  // Записи, положенные в localStorage старой версией или через прямую запись (см. prime)
+  function takeLegacy(key) {
+    try {
+      const raw = localStorage.getItem(key);
+      if (!raw) {
+        return null;
+      }
+      const parsed = safeParse(raw);
+      if (parsed && typeof parsed === 'object' && 'ts' in parsed && 'data' in parsed) {
+        return { entry: parsed, size: raw.length };
+      }
+    } catch (_) {}
+    return null;
+  }
+
+  async function getEntry(key) {
+    const db = await openDb();
+    let entry = mem.get(key) || null;
+    if (!entry && db) {
+      try {
+        entry = (await reqToPromise(db.transaction(ENTRIES).objectStore(ENTRIES).get(key))) || null;
+      } catch (_) {
+        entry = null;
+      }
+      if (entry) {
+        mem.set(key, entry);
+      }
+    }
+    const legacy = takeLegacy(key);
+    if (legacy && (!entry || (legacy.entry.ts || 0) > (entry.ts || 0))) {
+      entry = legacy.entry;
+      if (db) {
+        // переносим в IDB и освобождаем квоту localStorage
+        putEntry(key, entry, legacy.size);
+        try {
+          localStorage.removeItem(key);
+        } catch (_) {}
+      } else {
+        mem.set(key, entry);
+      }
+    }
+    if (entry) {
+      touch(key);
+    }
+    return entry;
+  }
+
+  async function putEntry(key, entry, size) {
+    mem.set(key, entry);
+    const db = await openDb();
+    if (!db) {
+      try {
+        localStorage.setItem(key, JSON.stringify(entry));
+      } catch (_) {}
+      return;
+    }
+    const bytes = size || 0;
+    const prev = lru.get(key);
+    if (prev) {
+      lruBytes -= prev.size || 0;
+      lru.delete(key);
+    }
+    const meta = { size: bytes, atime: Date.now() };
+    lru.set(key, meta);
+    lruBytes += bytes;
+    try {
+      const tx = db.transaction([ENTRIES, LRU], 'readwrite');
+      tx.objectStore(ENTRIES).put(entry, key);
+      tx.objectStore(LRU).put({ key, size: bytes, atime: meta.atime });
+    } catch (_) {}
+    evict(db, key);
+  }
+
+  function evict(db, keep) {
+    const victims = [];
+    let bytes = lruBytes;
+    for (const [key, meta] of lru) {
+      if (bytes <= BUDGET_BYTES && lru.size - victims.length <= MAX_ENTRIES) {
+        break;
+      }
+      if (key === keep) {
+        continue;
+      }
+      victims.push(key);
+      bytes -= meta.size || 0;
+    }
+    if (victims.length) {
+      removeKeys(db, victims);
+    }
+  }
+
+  function removeKeys(db, keys) {
+    keys.forEach(key => {
+      const meta = lru.get(key);
+      if (meta) {
+        lruBytes -= meta.size || 0;
+        lru.delete(key);
+      }
+      mem.delete(key);
+      dirtyAtime.delete(key);
+    });
+    if (!db) {
+      return;
+    }
+    try {
+      const tx = db.transaction([ENTRIES, LRU], 'readwrite');
+      keys.forEach(key => {
+        tx.objectStore(ENTRIES).delete(key);
+        tx.objectStore(LRU).delete(key);
+      });
+    } catch (_) {}
+  }
+
+  // ---------------- Сеть: общий in-flight и приоритеты ----------------
+  const inflight = new Map(); // method url|If-None-Match -> Promise<{status, text, ...}>
+  const waiting = [];
+  let active = 0;
+  let highActive = 0;
+
+  function priorityFor(url, explicit) {
+    if (explicit && explicit in PRIORITY_RANK) {
+      return explicit;
+    }
+    const path = normalizeKey(url);
+    for (const [prefix, prio] of PRIORITY_BY_PATH) {
+      if (path.startsWith(prefix)) {
+        return prio;
+      }
+    }
+    return 'normal';
+  }
+
+  function canStart(prio) {
+    if (prio === 'high') {
+      return true;
+    }
+    if (prio === 'low') {
+      return highActive === 0 && active < MAX_PARALLEL;
+    }
+    return highActive === 0 || active < MAX_PARALLEL;
+  }
+
+  function pump() {
+    waiting.sort((a, b) => PRIORITY_RANK[a.prio] - PRIORITY_RANK[b.prio]);
+    for (let i = 0; i < waiting.length; ) {
+      if (canStart(waiting[i].prio)) {
+        waiting.splice(i, 1)[0].run();
+      } else {
+        i++;
+      }
+    }
+  }
+
+  function schedule(prio, task) {
+    return new Promise((resolve, reject) => {
+      const job = {
+        prio,
+        run: () => {
+          active++;
+          if (prio === 'high') {
+            highActive++;
+          }
+          Promise.resolve()
+            .then(task)
+            .then(resolve, reject)
+            .finally(() => {
+              active--;
+              if (prio === 'high') {
+                highActive--;
+              }
+              pump();
+            });
+        },
+      };
+      if (canStart(prio)) {
+        job.run();
+      } else {
+        waiting.push(job);
+      }
+    });
+  }
+
+  function sharedFetch(finalUrl, method, reqHeaders, prio) {
+    const flightKey = `${method} ${finalUrl}|${JSON.stringify(reqHeaders)}`;
+    let p = inflight.get(flightKey);
+    if (!p) {
+      p = schedule(prio, () =>
+        fetch(finalUrl, { method, headers: reqHeaders, priority: prio === 'normal' ? 'auto' : prio })
+      )
+        .then(async res => ({
+          status: res.status,
+          etagHeader: res.headers ? res.headers.get('ETag') : null,
+          headerUpdatedAt: res.headers ? res.headers.get('X-Updated-At') : null,
+          text: res.status === 304 ? null : await res.text(),
+        }))
+        .finally(() => inflight.delete(flightKey));
+      inflight.set(flightKey, p);
+    }
+    return p;
+  }
+
   /**
    * fetchEtag(url, options)
    * options:
@@ -35,9 +351,69 @@
    *  - headers (доп. заголовки)
    *  - params (object) — будут добавлены в query
    *  - forceRevalidate (boolean) — игнорировать окно свежести и пойти в сеть (If-None-Match)
-   * Возвращает Promise<{ data, etag, fromCache, updated, raw }>
+   *  - staleWhileRevalidate (boolean) — при наличии кэша вернуть его сразу, а сеть проверить в фоне;
+   *    новые данные придут в onUpdate(result)
+   *  - priority ('high' | 'normal' | 'low') — по умолчанию по пути (PRIORITY_BY_PATH)
+   *  - delta (boolean) — для снапшотов с snapshot_version (schedule/results): запрашивать ?since=
+   *    и применять к кэшу только изменённые записи
+   * Возвращает Promise<{ data, etag, fromCache, updated, raw, ts }>
    */
+  // Применить дельту снапшота (/api/schedule|results?since=v) к полному payload из кэша.
+  // Ключ записи — поля key_fields через '|', null → '' (как services/snapshots.py entry_key)
+  function applySnapshotDelta(raw, delta) {
+    const coll = delta.collection;
+    const fields = delta.key_fields || [];
+    const keyOf = e => fields.map(f => (e && e[f] != null ? String(e[f]) : '')).join('|');
+    const list = Array.isArray(raw && raw[coll]) ? raw[coll].slice() : [];
+    const index = new Map(list.map((e, i) => [keyOf(e), i]));
+    let order = null;
+    (delta.changes || []).forEach(ch => {
+      if (ch.key === '__order__') {
+        order = ch.entry;
+        return;
+      }
+      const i = index.get(ch.key);
+      if (ch.entry == null) {
+        if (i !== undefined) {
+          list[i] = null;
+          index.delete(ch.key);
+        }
+      } else if (i !== undefined) {
+        list[i] = ch.entry;
+      } else {
+        index.set(ch.key, list.length);
+        list.push(ch.entry);
+      }
+    });
+    let next = list.filter(Boolean);
+    if (Array.isArray(order)) {
+      const byKey = new Map(next.map(e => [keyOf(e), e]));
+      next = order.map(k => byKey.get(k)).filter(Boolean);
+    }
+    const out = Object.assign({}, raw, { [coll]: next, snapshot_version: delta.snapshot_version });
+    // Производные поля верхнего уровня (match_of_week) приходят целиком: null — поле снято
+    Object.entries(delta.fields || {}).forEach(([k, v]) => {
+      if (v == null) delete out[k];
+      else out[k] = v;
+    });
+    return out;
+  }
+
+  // Отличаются ли поля delta.fields от закэшированного payload
+  function deltaFieldsChanged(raw, fields) {
+    return Object.entries(fields || {}).some(
+      ([k, v]) => JSON.stringify(v == null ? null : v) !== JSON.stringify(raw && raw[k] != null ? raw[k] : null)
+    );
+  }
+
   function fetchEtag(url, options = {}) {
+    if (!options.cacheKey) {
+      throw new Error('fetchEtag: cacheKey required');
+    }
+    return run(url, options);
+  }
+
+  async function run(url, options) {
     const {
       cacheKey,
       swrMs = 30000,
@@ -46,12 +422,13 @@
       headers = {},
       params = null,
       forceRevalidate = false,
+      staleWhileRevalidate = false,
+      priority = null,
+      delta = false,
       onSuccess = null,
       onStale = null,
+      onUpdate = null,
     } = options;
-    if (!cacheKey) {
-      throw new Error('fetchEtag: cacheKey required');
-    }
 
     // Собираем финальный URL (безопасно добавляем params)
     let finalUrl = url;
@@ -83,112 +460,60 @@
         }
       } catch (_) {}
     }
-    const now = Date.now();
-    let cached = null;
-    try {
-      cached = safeParse(localStorage.getItem(storeKey));
-    } catch (_) {}
-    const isFresh = cached && now - (cached.ts || 0) < swrMs;
-
-    // Быстрый возврат свежих данных (SWR) — сеть не идём
-    if (isFresh && !forceRevalidate) {
-      const result = {
+    function fromCached(cached, extra) {
+      return {
         data: cached.data,
         etag: cached.etag,
         fromCache: true,
         updated: false,
         raw: cached.raw,
+        ts: cached.ts,
+        ...extra,
       };
+    }
+    function call(fn, result) {
       try {
-        if (typeof onSuccess === 'function') {
-          onSuccess(result);
+        if (typeof fn === 'function') {
+          fn(result);
         }
       } catch (_) {}
+    }
+
+    const now = Date.now();
+    let cached = null;
+    try {
+      cached = await getEntry(storeKey);
+    } catch (_) {}
+    const isFresh = cached && now - (cached.ts || 0) < swrMs;
+
+    // Быстрый возврат свежих данных (SWR) — сеть не идём
+    if (isFresh && !forceRevalidate) {
+      const result = fromCached(cached);
+      call(onSuccess, result);
       emit('etag:success', { cacheKey: storeKey, url: normalizeKey(finalUrl), ...result });
       emit('etag:cache_hit', {
         cacheKey: storeKey,
         url: normalizeKey(finalUrl),
         age: now - (cached.ts || 0),
       });
-      return Promise.resolve(result);
-    }
-
-    // Сформировать заголовки (conditional запрос если есть ETag)
-    const reqHeaders = Object.assign({}, headers);
-    if (cached && cached.etag) {
-      reqHeaders['If-None-Match'] = cached.etag;
+      return result;
     }
 
-    return fetch(finalUrl, { method, headers: reqHeaders })
-      .then(async res => {
-        const headerUpdatedAt = res.headers ? res.headers.get('X-Updated-At') : null;
-        if (res.status === 304 && cached) {
-          // Ничего не изменилось — возвращаем кэш и время обновления из заголовка
-          const result = {
-            data: cached.data,
-            etag: cached.etag,
-            fromCache: true,
-            updated: false,
-            raw: cached.raw,
-            headerUpdatedAt,
-          };
-          try {
-            if (typeof onSuccess === 'function') {
-              onSuccess(result);
-            }
-          } catch (_) {}
-          emit('etag:success', { cacheKey: storeKey, url: normalizeKey(finalUrl), ...result });
-          emit('etag:not_modified', {
-            cacheKey: storeKey,
-            url: normalizeKey(finalUrl),
-            etag: cached.etag,
-          });
-          return result;
-        }
-        let json = null;
-        try {
-          json = await res.json();
-        } catch (e) {
-          if (cached) {
-            const result = {
-              data: cached.data,
-              etag: cached.etag,
-              fromCache: true,
-              updated: false,
-              raw: cached.raw,
-              headerUpdatedAt,
-            };
-            try {
-              if (typeof onStale === 'function') {
-                onStale(result);
-              }
-            } catch (_) {}
-            return result;
-          }
-          throw e;
-        }
-        const etag =
-          (json && (json.version || res.headers.get('ETag'))) || res.headers.get('ETag') || null;
-        let data = null;
-        try {
-          data = extract(json);
-        } catch (e) {
-          data = json;
-        }
-        try {
-          localStorage.setItem(storeKey, JSON.stringify({ etag, ts: Date.now(), data, raw: json }));
-        } catch (_) {}
-        const result = { data, etag, fromCache: false, updated: true, raw: json, headerUpdatedAt };
-        try {
-          if (typeof onSuccess === 'function') {
-            onSuccess(result);
-          }
-        } catch (_) {}
-        emit('etag:success', { cacheKey: storeKey, url: normalizeKey(finalUrl), ...result });
-        emit('etag:cache_miss', { cacheKey: storeKey, url: normalizeKey(finalUrl), etag });
-        return result;
-      })
-      .catch(err => {
+    async function revalidate() {
+      // Сформировать заголовки (conditional запрос если есть ETag)
+      const reqHeaders = Object.assign({}, headers);
+      // Дельта снапшота: вместо If-None-Match — ?since=<snapshot_version> из кэша
+      const sinceVersion = delta && cached && cached.raw ? Number(cached.raw.snapshot_version) : 0;
+      let requestUrl = finalUrl;
+      if (sinceVersion > 0) {
+        requestUrl += `${finalUrl.includes('?') ? '&' : '?'}since=${sinceVersion}`;
+      } else if (cached && cached.etag) {
+        reqHeaders['If-None-Match'] = cached.etag;
+      }
+      let res;
+      try {
+        res = await sharedFetch(requestUrl, method, reqHeaders, priorityFor(finalUrl, priority));
+      } catch (err) {
         console.warn('fetchEtag error', err);
         emit('etag:error', {
           cacheKey: storeKey,
@@ -196,76 +521,124 @@
           error: err.message || 'Network error',
         });
         if (cached) {
-          const result = {
-            data: cached.data,
-            etag: cached.etag,
-            fromCache: true,
-            updated: false,
-            raw: cached.raw,
-          };
-          try {
-            if (typeof onStale === 'function') {
-              onStale(result);
-            }
-          } catch (_) {}
+          const result = fromCached(cached);
+          call(onStale, result);
           emit('etag:stale', { cacheKey: storeKey, url: normalizeKey(finalUrl), ...result });
           return result;
         }
         throw err;
-      });
+      }
+      const headerUpdatedAt = res.headerUpdatedAt;
+      if (res.status === 304 && cached) {
+        // Ничего не изменилось — возвращаем кэш и время обновления из заголовка
+        const result = fromCached(cached, { headerUpdatedAt });
+        call(onSuccess, result);
+        emit('etag:success', { cacheKey: storeKey, url: normalizeKey(finalUrl), ...result });
+        emit('etag:not_modified', {
+          cacheKey: storeKey,
+          url: normalizeKey(finalUrl),
+          etag: cached.etag,
+        });
+        return result;
+      }
+      let json = res.text === null ? null : safeParse(res.text);
+      let size = res.text ? res.text.length : 0;
+      let deltaEtag = null;
+      if (json && sinceVersion > 0 && Array.isArray(json.changes) && json.collection) {
+        if (!json.changes.length && !deltaFieldsChanged(cached.raw, json.fields)) {
+          // Изменений нет — как 304
+          const result = fromCached(cached, { headerUpdatedAt });
+          call(onSuccess, result);
+          emit('etag:success', { cacheKey: storeKey, url: normalizeKey(finalUrl), ...result });
+          return result;
+        }
+        json = applySnapshotDelta(cached.raw, json);
+        size = JSON.stringify(json).length;
+        deltaEtag = `snap-${json.snapshot_version}`;
+        emit('etag:delta', {
+          cacheKey: storeKey,
+          url: normalizeKey(finalUrl),
+          since: sinceVersion,
+          version: json.snapshot_version,
+          bytes: res.text.length,
+        });
+      }
+      if (json === null) {
+        if (cached) {
+          const result = fromCached(cached, { headerUpdatedAt });
+          call(onStale, result);
+          return result;
+        }
+        throw new Error('fetchEtag: invalid JSON');
+      }
+      const etag = deltaEtag || (json && (json.version || res.etagHeader)) || res.etagHeader || null;
+      let data = null;
+      try {
+        data = extract(json);
+      } catch (e) {
+        data = json;
+      }
+      const ts = Date.now();
+      putEntry(storeKey, { etag, ts, data, raw: json }, size).catch(() => {});
+      const result = { data, etag, fromCache: false, updated: true, raw: json, ts, headerUpdatedAt };
+      call(onSuccess, result);
+      emit('etag:success', { cacheKey: storeKey, url: normalizeKey(finalUrl), ...result });
+      emit('etag:cache_miss', { cacheKey: storeKey, url: normalizeKey(finalUrl), etag });
+      return result;
+    }
+
+    // Кэш есть, но устарел (или нужна ревалидация): отдаём его сразу, сеть — в фоне
+    if (cached && staleWhileRevalidate) {
+      const result = fromCached(cached, { stale: true });
+      call(onSuccess, result);
+      emit('etag:success', { cacheKey: storeKey, url: normalizeKey(finalUrl), ...result });
+      revalidate()
+        .then(fresh => {
+          if (fresh && fresh.updated) {
+            call(onUpdate, fresh);
+          }
+        })
+        .catch(() => {});
+      return result;
+    }
+    return revalidate();
   }
 
   // Global cache management utilities
   window.fetchEtagUtils = {
     clearCache: function (pattern) {
-      if (!localStorage) {
-        return 0;
-      }
-      let count = 0;
-      const keys = Object.keys(localStorage);
-      for (const key of keys) {
-        if (!pattern || key.includes(pattern)) {
-          try {
+      const keys = new Set([...lru.keys(), ...mem.keys()].filter(k => !pattern || k.includes(pattern)));
+      try {
+        Object.keys(localStorage).forEach(key => {
+          if (!pattern || key.includes(pattern)) {
+            keys.add(key);
             localStorage.removeItem(key);
-            count++;
-          } catch (_) {}
-        }
-      }
-      console.log(`🗑️ Cleared ${count} cache entries${pattern ? ` matching "${pattern}"` : ''}`);
-      return count;
+          }
+        });
+      } catch (_) {}
+      openDb().then(db => removeKeys(db, Array.from(keys)));
+      console.log(`🗑️ Cleared ${keys.size} cache entries${pattern ? ` matching "${pattern}"` : ''}`);
+      return keys.size;
     },
 
     getCacheStats: function () {
-      if (!localStorage) {
-        return { total: 0, etag: 0, size: 0 };
-      }
-      const keys = Object.keys(localStorage);
-      let etagCount = 0,
-        totalSize = 0;
-
-      for (const key of keys) {
-        try {
-          const value = localStorage.getItem(key);
-          if (value) {
-            totalSize += value.length;
-            // Heuristic: ETag cache entries usually have 'etag' property
-            if (value.includes('"etag"') || key.includes(':')) {
-              etagCount++;
-            }
-          }
-        } catch (_) {}
-      }
-
       return {
-        total: keys.length,
-        etag: etagCount,
-        size: Math.round(totalSize / 1024), // KB
+        total: lru.size || mem.size,
+        etag: lru.size || mem.size,
+        size: Math.round(lruBytes / 1024), // KB
+        backend: lru.size ? 'indexeddb' : 'memory',
       };
     },
 
     invalidateByPrefix: function (prefix) {
       return this.clearCache(prefix);
     },
+
+    // Положить готовые данные под cacheKey (например, части /api/summary для лидербордов)
+    prime: function (cacheKey, data, ts = Date.now()) {
+      const text = JSON.stringify(data);
+      return putEntry(cacheKey, { etag: null, ts, data, raw: data }, text ? text.length : 0);
+    },
   };
 
   window.fetchEtag = fetchEtag;
@@ -1032,6 +1032,26 @@
     } catch (_) {}
   }
 
+  // Применить снимок таблицы из WS (data_changed: league_table) без запроса к серверу
+  function applyTable(data) {
+    try {
+      const table = document.getElementById('league-table');
+      const updatedText = document.getElementById('league-updated-text');
+      if (window.LeagueStore) {
+        window.LeagueStore.update(s => {
+          s.table = Array.isArray(data?.values) ? data.values : [];
+        });
+      }
+      if (!table) {
+        return;
+      }
+      renderLeagueTable(table, updatedText, data);
+      if (updatedText && data?.updated_at) {
+        setUpdatedLabelSafely(updatedText, data.updated_at);
+      }
+    } catch (_) {}
+  }
+
   async function refreshSchedule() {
     try {
       const pane = document.getElementById('league-pane-schedule');
@@ -1108,6 +1128,7 @@
         .fetchEtag('/api/schedule', {
           cacheKey: 'league:schedule',
           swrMs: 8000,
+          delta: true,
           extract: j => j?.data || j,
           onSuccess: res => {
             try {
@@ -1152,6 +1173,7 @@
     renderResults,
     setUpdatedLabelSafely,
     refreshTable,
+    applyTable,
     refreshSchedule,
   };
 
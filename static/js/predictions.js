@@ -984,9 +984,35 @@
           fd.append('line', String(line));
         }
         fd.append('stake', String(amt));
+        // Версия коэффициентов, которую видит пользователь: если на сервере они уже другие — 409
+        const seenVersion = Math.max(
+          Number(m.odds_version) || 0,
+          Number(window.realtimeUpdater?._getOddsVersion?.(m.home, m.away)) || 0
+        );
+        if (seenVersion > 0) {
+          fd.append('odds_version', String(seenVersion));
+        }
         return fetch('/api/betting/place', { method: 'POST', body: fd })
           .then(r => r.json())
           .then(resp => {
+            if (resp?.odds_changed) {
+              // Подхватываем актуальные коэффициенты в карточку и стор, как при WS-обновлении
+              m.odds_version = resp.odds_version;
+              try {
+                document.dispatchEvent(
+                  new CustomEvent('bettingOddsUpdate', {
+                    detail: {
+                      home: m.home,
+                      away: m.away,
+                      date: String(m.date || m.datetime || '').slice(0, 10),
+                      odds: resp.odds || {},
+                      markets: resp.markets || {},
+                      odds_version: resp.odds_version,
+                    },
+                  })
+                );
+              } catch (_) {}
+            }
             if (resp?.error) {
               try {
                 tg?.showAlert?.(resp.error);
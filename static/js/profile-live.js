@@ -9,10 +9,18 @@
   const getPair = m => `${(m.home || '').toLowerCase()}__${(m.away || '').toLowerCase()}`;
   let lastLiveKeys = new Set();
   let initialized = false;
+  let liveEtag = null;
   async function fetchLiveFlags() {
     try {
-      const r = await fetch('/api/match/status/live?_=' + Date.now());
+      // Список live меняется по таймеру сервера и приходит пушем (match_status_change) — опрос условный
+      const headers = liveEtag && window.__LIVE_STATUS ? { 'If-None-Match': liveEtag } : {};
+      const r = await fetch('/api/match/status/live', { headers });
+      if (r.status === 304) {
+        window.__LIVE_STATUS.ts = Date.now();
+        return window.__LIVE_STATUS.pairs;
+      }
       const d = await r.json();
+      liveEtag = r.headers.get('ETag');
       const pairs = new Set();
       (d.items || []).forEach(it => {
         pairs.add(`${(it.home || '').toLowerCase()}__${(it.away || '').toLowerCase()}`);
@@ -45,12 +53,13 @@
       } catch (_) {}
     }
   }
-  async function scan() {
+  async function scan(opts = {}) {
     try {
       const cached = JSON.parse(localStorage.getItem('schedule:tours') || 'null');
       const tours = cached?.data?.tours || [];
       const currentLive = new Set();
-      const pairFlags = await fetchLiveFlags();
+      const pairFlags =
+        opts.useCached && window.__LIVE_STATUS ? window.__LIVE_STATUS.pairs : await fetchLiveFlags();
       const nowStarted = [];
       tours.forEach(t =>
         (t.matches || []).forEach(m => {
@@ -112,10 +121,26 @@
       }
     } catch (_) {}
   }
+  // Пуш из realtime-updates (data_type 'match_status_change'): применяем без запроса
+  function applyStatusChange(data) {
+    if (!data || !data.home || !data.away) {
+      return;
+    }
+    if (!window.__LIVE_STATUS) {
+      window.__LIVE_STATUS = { pairs: new Set(), ts: 0 };
+    }
+    const pair = getPair(data);
+    if (data.status === 'live') {
+      window.__LIVE_STATUS.pairs.add(pair);
+    } else {
+      window.__LIVE_STATUS.pairs.delete(pair);
+    }
+    scan({ useCached: true });
+  }
   setInterval(scan, 30000);
   // Убрана тестовая кнопка уведомления LIVE (оставляем возможность повторно включить через консоль при необходимости)
   document.addEventListener('DOMContentLoaded', () => {
     /* no test button */
   });
-  window.ProfileLive = { scan };
+  window.ProfileLive = { scan, applyStatusChange };
 })();
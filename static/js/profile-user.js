@@ -277,13 +277,39 @@
     }
     const formData = new FormData();
     formData.append('initData', tg.initData || '');
-    return fetch('/api/user', { method: 'POST', body: formData })
+    // Профиль кэшируется по ETag: 304 — берём сохранённую копию того же пользователя
+    const cacheKey = 'profile:user';
+    let cached = null;
+    try {
+      cached = JSON.parse(localStorage.getItem(cacheKey) || 'null');
+      if (!cached || cached.uid !== tg.initDataUnsafe.user.id || !cached.etag) {
+        cached = null;
+      }
+    } catch (_) {
+      cached = null;
+    }
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    return fetch('/api/user', { method: 'POST', body: formData, headers })
       .then(res => {
         if (res.status === 401) {
           window.showAlert?.('Ошибка авторизации', 'error');
           throw new Error('Unauthorized');
         }
-        return res.json();
+        if (res.status === 304 && cached) {
+          return cached.data;
+        }
+        const etag = res.headers.get('ETag');
+        return res.json().then(data => {
+          try {
+            if (etag && data && !data.error) {
+              localStorage.setItem(
+                cacheKey,
+                JSON.stringify({ uid: tg.initDataUnsafe.user.id, etag, data })
+              );
+            }
+          } catch (_) {}
+          return data;
+        });
       })
       .then(async data => {
         renderUserProfile(data);
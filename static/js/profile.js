@@ -1298,14 +1298,11 @@
         }
         // небольшая задержка, чтобы не мешать первичной загрузке
         setTimeout(() => {
+          // Свежесть проверяет сам fetchEtag (кэш в IndexedDB): свежая запись не уходит в сеть
           const tryPrefetch = (cacheKey, url, swrMs) => {
-            try {
-              const cached = JSON.parse(localStorage.getItem(cacheKey) || 'null');
-              if (cached && cached.ts && Date.now() - cached.ts < swrMs) {
-                return;
-              } // свежо
-            } catch (_) {}
-            window.fetchEtag(url, { cacheKey, swrMs, extract: j => j }).catch(() => {});
+            window
+              .fetchEtag(url, { cacheKey, swrMs, extract: j => j, priority: 'low' })
+              .catch(() => {});
           };
           // Префетчим «богатство» и «сервер» (не активные по умолчанию)
           tryPrefetch('lb:rich', '/api/leaderboard/top-rich', 60000);
@@ -2271,6 +2268,7 @@
           cacheKey: 'results:etag-temp',
           swrMs: FRESH_TTL,
           forceRevalidate: true,
+          delta: true,
           extract: j => j,
         })
         .then(res => {
@@ -2367,6 +2365,60 @@
   // Предзагрузка статистики и расписания во время заставки
   let _resultsPreloaded = false;
   let _schedulePreloaded = false;
+  // Раскладывает /api/summary по ключам, которые читают вкладки (кэш и фоновые обновления)
+  function applySummary(store) {
+    // ts кэша, а не текущее время: устаревший summary не должен выглядеть свежим
+    const now = store.ts || Date.now();
+    const raw = store.raw || store.data || {};
+    // Сохраним под уже используемыми ключами, но без version (чтобы не слать чужой ETag)
+    try {
+      if (raw.schedule) {
+        localStorage.setItem(
+          'schedule:tours',
+          JSON.stringify({ data: raw.schedule, version: null, ts: now })
+        );
+      }
+    } catch (_) {}
+    try {
+      if (raw.results) {
+        localStorage.setItem(
+          'results:list',
+          JSON.stringify({ data: raw.results, version: null, ts: now })
+        );
+      }
+    } catch (_) {}
+    try {
+      if (raw.tours) {
+        localStorage.setItem(
+          'betting:tours',
+          JSON.stringify({ data: raw.tours, version: null, ts: now })
+        );
+      }
+    } catch (_) {}
+    try {
+      const lb = raw.leaderboard || {};
+      const lbKeys = {
+        'top-predictors': 'lb:predictors',
+        'top-rich': 'lb:rich',
+        'server-leaders': 'lb:server',
+        prizes: 'lb:prizes',
+      };
+      Object.entries(lbKeys).forEach(([name, cacheKey]) => {
+        if (!lb[name]) {
+          return;
+        }
+        if (window.fetchEtagUtils?.prime) {
+          window.fetchEtagUtils.prime(cacheKey, lb[name], now);
+        } else {
+          localStorage.setItem(
+            cacheKey,
+            JSON.stringify({ etag: null, ts: now, data: lb[name], raw: lb[name] })
+          );
+        }
+      });
+    } catch (_) {}
+  }
+
   let _statsPreloaded = false;
   function preloadUfoData() {
     // Новая статистика (goal+assist) загружается лениво через loadStatsTable при открытии вкладки,
@@ -2389,73 +2441,11 @@
             leaderboard: 'top-predictors,top-rich,server-leaders,prizes',
           },
           extract: j => j,
+          // Кэш отдаём сразу (первый экран без ожидания сети), свежие данные — через onUpdate
+          staleWhileRevalidate: true,
+          onUpdate: applySummary,
         })
-        .then(store => {
-          const now = Date.now();
-          const raw = store.raw || store.data || {};
-          // Сохраним под уже используемыми ключами, но без version (чтобы не слать чужой ETag)
-          try {
-            if (raw.schedule) {
-              localStorage.setItem(
-                'schedule:tours',
-                JSON.stringify({ data: raw.schedule, version: null, ts: now })
-              );
-            }
-          } catch (_) {}
-          try {
-            if (raw.results) {
-              localStorage.setItem(
-                'results:list',
-                JSON.stringify({ data: raw.results, version: null, ts: now })
-              );
-            }
-          } catch (_) {}
-          try {
-            if (raw.tours) {
-              localStorage.setItem(
-                'betting:tours',
-                JSON.stringify({ data: raw.tours, version: null, ts: now })
-              );
-            }
-          } catch (_) {}
-          try {
-            const lb = raw.leaderboard || {};
-            if (lb['top-predictors']) {
-              localStorage.setItem(
-                'lb:predictors',
-                JSON.stringify({
-                  etag: null,
-                  ts: now,
-                  data: lb['top-predictors'],
-                  raw: lb['top-predictors'],
-                })
-              );
-            }
-            if (lb['top-rich']) {
-              localStorage.setItem(
-                'lb:rich',
-                JSON.stringify({ etag: null, ts: now, data: lb['top-rich'], raw: lb['top-rich'] })
-              );
-            }
-            if (lb['server-leaders']) {
-              localStorage.setItem(
-                'lb:server',
-                JSON.stringify({
-                  etag: null,
-                  ts: now,
-                  data: lb['server-leaders'],
-                  raw: lb['server-leaders'],
-                })
-              );
-            }
-            if (lb['prizes']) {
-              localStorage.setItem(
-                'lb:prizes',
-                JSON.stringify({ etag: null, ts: now, data: lb['prizes'], raw: lb['prizes'] })
-              );
-            }
-          } catch (_) {}
-        })
+        .then(applySummary)
         .catch(() => {
           // Fallback: разнести на отдельные запросы ниже
         })
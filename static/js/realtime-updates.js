@@ -33,6 +33,12 @@ class RealtimeUpdater {
     this.lastPongTime = 0;
     // Версионность коэффициентов по матчу: key = "home|away" → int
     this.oddsVersions = new Map();
+    // Версии потоков data_patch/data_changed (stream → { epoch, v }) и resync в полёте
+    // (stream → отложенные патчи, пришедшие во время resync)
+    this.streamVersions = new Map();
+    this.resyncPending = new Map();
+    // Последний применённый seq счёта по матчу (ScoreCoalescer на сервере): key = "home|away" → int
+    this.scoreSeq = new Map();
     // Очередь тем для подписки до момента connect
     this.pendingTopics = new Set();
     this.subscribedTopics = new Set();
@@ -140,6 +146,8 @@ class RealtimeUpdater {
     this.socket.on('connect', () => {
       this.isConnected = true;
       this.reconnectAttempts = 0;
+      // seq счёта живёт в памяти сервера и начинается заново после его рестарта
+      this.scoreSeq.clear();
       try {
         window.__WEBSOCKETS_CONNECTED = true;
       } catch (_) {}
@@ -227,7 +235,6 @@ class RealtimeUpdater {
     // Компактные патчи данных
     this.socket.on('data_patch', patch => {
       this.handleDataPatch(patch);
-      __wsEmit('ws:data_patch', patch || {});
     });
 
     // Топиковые уведомления (например, глобальный full_reset)
@@ -349,10 +356,10 @@ class RealtimeUpdater {
             const openedTeam = nameEl ? nameEl.textContent.trim() : '';
             // Если открыт экран одной из команд матча — инвалидация кэша + форсированный refresh
             if (openedTeam && (openedTeam === home || openedTeam === away)) {
-              // Удаляем ETag кэш, чтобы следующий fetch не получил 304 со старым snapshot
+              // Удаляем ETag кэш (fetchEtag, IndexedDB), чтобы следующий fetch не получил 304 со старым snapshot
               const cacheKey = `team:overview:${openedTeam.toLowerCase()}`;
               try {
-                localStorage.removeItem(cacheKey);
+                window.fetchEtagUtils?.invalidateByPrefix(cacheKey);
               } catch (_) {}
               // Попробуем лёгкий refetch (используем имеющийся API TeamPage)
               if (window.TeamPage && typeof window.TeamPage.openTeam === 'function') {
@@ -386,6 +393,8 @@ class RealtimeUpdater {
           localStorage.removeItem('league:results');
           localStorage.removeItem('schedule:tours');
           localStorage.removeItem('betting:tours'); // ВАЖНО: инвалидируем кэш прогнозов
+          // league:schedule живёт в кэше fetchEtag (IndexedDB), localStorage его не содержит
+          window.fetchEtagUtils?.invalidateByPrefix('league:schedule');
         } catch (_) {}
         // Дополнительно обновляем результаты если не было results_block
         if (!payload.results_block) {
@@ -577,11 +586,121 @@ class RealtimeUpdater {
     } catch (_) {}
   }
 
+  // Версия сообщения потока: 'apply' | 'stale' | 'gap'.
+  // Без stream/v (topic-патчи, старый сервер) — всегда 'apply'. fullState: сообщение несёт полное
+  // состояние (таблица, коэффициенты), пропуск предыдущих версий для него не важен.
+  _checkStreamVersion(msg, fullState = false) {
+    if (!msg || !msg.stream || msg.v == null) {
+      return 'apply';
+    }
+    const v = Number(msg.v) || 0;
+    const cur = this.streamVersions.get(msg.stream);
+    if (cur && cur.epoch === msg.epoch && v <= cur.v) {
+      return 'stale';
+    }
+    // Первое сообщение потока — точка отсчёта; смена epoch (рестарт сервера) — разрыв
+    const gap = !fullState && !!cur && (cur.epoch !== msg.epoch || v !== cur.v + 1);
+    this.streamVersions.set(msg.stream, { epoch: msg.epoch, v });
+    try {
+      window.RealtimeStore?.update(s => {
+        s.versions = Object.assign({}, s.versions, { [msg.stream]: v });
+        s.epoch = msg.epoch || null;
+      });
+    } catch (_) {}
+    return gap ? 'gap' : 'apply';
+  }
+
+  // Один resync на поток: патч, открывший разрыв (trigger), и пришедшие во время загрузки
+  // применяются после неё по порядку
+  _resyncStream(stream, loader, trigger = null) {
+    if (this.resyncPending.has(stream)) {
+      if (trigger) {
+        this.resyncPending.get(stream).push(trigger);
+      }
+      return;
+    }
+    this.resyncPending.set(stream, trigger ? [trigger] : []);
+    try {
+      window.RealtimeStore?.update(s => {
+        s.resyncs = (s.resyncs || 0) + 1;
+      });
+    } catch (_) {}
+    Promise.resolve()
+      .then(loader)
+      .catch(() => {})
+      .finally(() => {
+        const queued = this.resyncPending.get(stream) || [];
+        this.resyncPending.delete(stream);
+        queued.forEach(p => this._applyDataPatch(p));
+      });
+  }
+
+  _resyncPatch(patch) {
+    const { entity, id } = patch;
+    if (entity === 'match' && id && id.home && id.away) {
+      // Счёт — единственное поле патчей матча, которое не приходит полным снимком другим путём
+      const params = new URLSearchParams({ home: id.home, away: id.away });
+      this._resyncStream(patch.stream, () =>
+        fetch(`/api/match/score/get?${params.toString()}`, { cache: 'no-store' })
+          .then(r => (r.ok ? r.json() : null))
+          .then(j => {
+            if (j) {
+              this.updateMatchScore(id.home, id.away, j);
+            }
+          }),
+        patch
+      );
+      return;
+    }
+    this._resyncStream(patch.stream, () => this._refreshEntity(entity), patch);
+  }
+
+  // Полная перезагрузка сущности после разрыва версий: сброс кэша fetchEtag и перерисовка открытого экрана
+  _refreshEntity(entity) {
+    const prefixes = {
+      league_table: ['league:table'],
+      schedule: ['league:schedule', 'schedule:'],
+      results: ['league:results', 'results:'],
+      betting_tours: ['betting:tours'],
+    }[entity] || [`${entity}:`];
+    try {
+      prefixes.forEach(p => window.fetchEtagUtils?.invalidateByPrefix(p));
+    } catch (_) {}
+    if (entity === 'league_table') {
+      this.refreshLeagueTable();
+    } else if (entity === 'schedule' || entity === 'results' || entity === 'betting_tours') {
+      this.refreshSchedule();
+    }
+  }
+
   handleDataPatch(patch) {
     // Патчи могут приходить без поля type (тип уже задан именем события 'data_patch')
     if (!patch) {
       return;
     }
+    // Коэффициенты приходят полным снимком и сами охраняются odds_version
+    const verdict = this._checkStreamVersion(patch, patch.entity === 'odds');
+    if (verdict === 'stale') {
+      return;
+    }
+    const queued = patch.stream ? this.resyncPending.get(patch.stream) : null;
+    if (queued) {
+      queued.push(patch);
+      return;
+    }
+    if (verdict === 'gap') {
+      this._resyncPatch(patch);
+      return;
+    }
+    this._applyDataPatch(patch);
+  }
+
+  _applyDataPatch(patch) {
+    this._applyPatchLocal(patch);
+    __wsEmit('ws:data_patch', patch || {});
+  }
+
+  _applyPatchLocal(patch) {
     const { entity, id, fields } = patch;
     try {
       if (entity === 'match') {
@@ -591,8 +710,12 @@ class RealtimeUpdater {
           if (fields && fields.odds_version != null) {
             this._setOddsVersion(id.home, id.away, Number(fields.odds_version) || 0);
           }
-          // локальное обновление счёта, если передан
-          if (fields && (fields.score_home !== undefined || fields.score_away !== undefined)) {
+          // локальное обновление счёта, если передан (и не старше уже показанного по score_seq)
+          if (
+            fields &&
+            (fields.score_home !== undefined || fields.score_away !== undefined) &&
+            this._acceptScoreSeq(id.home, id.away, fields.score_seq)
+          ) {
             this.updateMatchScore(id.home, id.away, {
               score_home: fields.score_home,
               score_away: fields.score_away,
@@ -602,6 +725,7 @@ class RealtimeUpdater {
           const other = { ...fields };
           delete other.score_home;
           delete other.score_away;
+          delete other.score_seq;
           delete other.odds_version;
           if (Object.keys(other).length) {
             this.refreshMatchDetails({ home: id.home, away: id.away, ...other });
@@ -664,6 +788,20 @@ class RealtimeUpdater {
     } catch (_) {}
   }
 
+  // true — состояние счёта с этим seq можно показывать (запоминает его); без seq — всегда true
+  _acceptScoreSeq(home, away, seq) {
+    const n = Number(seq);
+    if (seq == null || !Number.isFinite(n)) {
+      return true;
+    }
+    const key = this._ovKey(home, away);
+    if (n < (this.scoreSeq.get(key) || 0)) {
+      return false;
+    }
+    this.scoreSeq.set(key, n);
+    return true;
+  }
+
   _ovKey(home, away) {
     return `${(home || '').trim()}|${(away || '').trim()}`;
   }
@@ -762,6 +900,10 @@ class RealtimeUpdater {
 
   handleDataUpdate(message) {
     const { type, data_type, data, timestamp } = message;
+    // data_changed несёт уведомление или полный снимок — разрывы не важны, отбрасываем только устаревшие
+    if (this._checkStreamVersion(message, true) === 'stale') {
+      return;
+    }
 
     if (this.debug) {
     }
@@ -784,7 +926,10 @@ class RealtimeUpdater {
     if (this.debug) {
     }
 
-    // Обновляем счет матча в real-time
+    // Обновляем счет матча в real-time (правка старше уже показанной — пропускаем)
+    if (!this._acceptScoreSeq(home, away, data?.seq)) {
+      return;
+    }
     this.updateMatchScore(home, away, data);
 
     // Показываем уведомление
@@ -800,7 +945,12 @@ class RealtimeUpdater {
   updateUI(dataType, data, timestamp) {
     switch (dataType) {
       case 'league_table':
-        this.refreshLeagueTable();
+        // Снимок таблицы уже в сообщении — применяем без рефетча
+        if (data && Array.isArray(data.values) && typeof window.League?.applyTable === 'function') {
+          window.League.applyTable(data);
+        } else {
+          this.refreshLeagueTable();
+        }
         break;
 
       case 'results':
@@ -901,6 +1051,24 @@ class RealtimeUpdater {
         this.handleLineupsUpdated(data);
         break;
 
+      case 'match_score':
+        // Схлопнутое окно правок счёта: итоговый счёт окна и его seq
+        try {
+          // Окно могло прийти после более нового немедленного live_update — счёт не откатываем
+          if (data && data.home && data.away && this._acceptScoreSeq(data.home, data.away, data.seq)) {
+            this.updateMatchScore(data.home, data.away, data);
+          }
+        } catch (_) {}
+        break;
+
+      case 'match_status_change':
+        // Переход из реестра live на сервере (soon / live / ended) — без опроса /api/match/status/live
+        try {
+          window.ProfileLive?.applyStatusChange?.(data);
+          document.dispatchEvent(new CustomEvent('matchStatusChange', { detail: data }));
+        } catch (_) {}
+        break;
+
       default:
         // Общее обновление данных
         this.triggerDataRefresh(dataType);
@@ -935,6 +1103,12 @@ class RealtimeUpdater {
         console.log('[RealtimeUpdates] No relevant elements found on page, skipping lineup update');
         return;
       }
+      // Сервер присылает полные детали матча в уведомлении — применяем без запроса
+      if (data.details && typeof data.details === 'object') {
+        this.refreshMatchDetails({ ...data.details, home: data.home, away: data.away });
+        this.showNotification(`Обновлены составы: ${data.home} vs ${data.away}`);
+        return;
+      }
       // Фетчим свежие детали матча, чтобы получить обновлённые составы
       if (data.home && data.away) {
         const params = new URLSearchParams({ home: data.home, away: data.away });
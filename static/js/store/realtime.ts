@@ -5,6 +5,11 @@ declare global {
     connected: boolean;
     topics: string[];
     reconnects: number;
+    // Последняя применённая версия по потоку WS (stream → v), epoch процесса сервера
+    versions: Record<string, number>;
+    epoch: string | null;
+    // Сколько раз по разрыву версий делали resync-запрос
+    resyncs: number;
   }
   interface Window {
     RealtimeStore?: StoreApi<RealtimeState>;
@@ -12,7 +17,14 @@ declare global {
 }
 
 (() => {
-  const init: RealtimeState = { connected: false, topics: [], reconnects: 0 };
+  const init: RealtimeState = {
+    connected: false,
+    topics: [],
+    reconnects: 0,
+    versions: {},
+    epoch: null,
+    resyncs: 0,
+  };
   const realtime = window.Store.createStore<RealtimeState>('realtime', init);
   window.RealtimeStore = realtime;
 })();
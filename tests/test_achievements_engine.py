@@ -0,0 +1,116 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from services import achievements as ach
+
+Base = declarative_base()
+
+
+class User(Base):
+    __tablename__ = 'users'
+    user_id = Column(Integer, primary_key=True)
+    level = Column(Integer, default=1)
+
+
+class Referral(Base):
+    __tablename__ = 'referrals'
+    user_id = Column(Integer, primary_key=True)
+    referrer_id = Column(Integer)
+
+
+class Bet(Base):
+    __tablename__ = 'bets'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer)
+    market = Column(String(16))
+    odds = Column(String(16))
+    status = Column(String(16))
+    placed_at = Column(DateTime(timezone=True))
+
+
+class Progress(Base):
+    __tablename__ = 'user_achievement_progress'
+    user_id = Column(Integer, primary_key=True)
+    bets_total = Column(Integer, default=0)
+    bets_won = Column(Integer, default=0)
+    max_win_odds = Column(Float, default=0.0)
+    markets_mask = Column(Integer, default=0)
+    weeks_active = Column(Integer, default=0)
+    last_bet_week = Column(DateTime(timezone=True))
+    invited_count = Column(Integer, default=0)
+    checkins_total = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+
+
+def _week(dt):
+    d = dt.astimezone(timezone.utc)
+    return (d - timedelta(days=d.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_backfill_then_incremental_events_match_recount():
+    db = _session()
+    t0 = datetime(2025, 9, 1, 12, tzinfo=timezone.utc)
+    db.add_all([User(user_id=1), User(user_id=2, level=1), Referral(user_id=2, referrer_id=1)])
+    db.add_all([
+        Bet(user_id=1, market='1x2', odds='2.10', status='won', placed_at=t0),
+        Bet(user_id=1, market='totals', odds='1.80', status='lost', placed_at=t0 + timedelta(days=8)),
+    ])
+    db.commit()
+
+    row = ach.backfill_progress(db, Progress, Bet, Referral, User, 1, _week)
+    assert (row.bets_total, row.bets_won, row.weeks_active) == (2, 1, 2)
+    assert row.max_win_odds == 2.1 and row.markets_mask == 3
+
+    # события: ставка в той же неделе (неделя не растёт), ставка через неделю, выигрыш, приглашённый
+    later = t0 + timedelta(days=9)
+    assert ach.on_bet_placed(db, Progress, 1, 'penalty', _week(later))
+    assert ach.on_bet_placed(db, Progress, 1, '1x2', _week(later + timedelta(days=7)))
+    assert ach.on_bet_won(db, Progress, 1, '3.50')
+    assert ach.on_level_changed(db, Progress, Referral, 2, 1, 2)
+    assert not ach.on_level_changed(db, Progress, Referral, 2, 2, 3)  # уже засчитан
+    assert not ach.on_bet_placed(db, Progress, 2, '1x2', _week(later))  # нет строки — ждёт бэкфилла
+    db.commit()
+    db.expire_all()
+
+    row = db.get(Progress, 1)
+    assert (row.bets_total, row.bets_won, row.weeks_active, row.invited_count) == (4, 2, 3, 1)
+    assert row.max_win_odds == 3.5 and row.markets_mask == 7
+
+    # Повторный бэкфилл (проигравший гонку воркер) отдаёт готовую строку, а не пересчёт поверх событий
+    again = ach.backfill_progress(db, Progress, Bet, Referral, User, 1, _week)
+    assert (again.bets_total, again.invited_count) == (4, 1)
+
+
+def test_evaluate_tiers_unlocks_once():
+    class Row:
+        pass
+    r = Row()
+    for _, tier_field, ts_field in ach.TIER_FIELDS:
+        setattr(r, tier_field, 0)
+        setattr(r, ts_field, None)
+    thresholds = {g: [(30, 2), (7, 1)] for g, _, _ in ach.TIER_FIELDS}
+    values = {g: 0 for g, _, _ in ach.TIER_FIELDS}
+    values['streak'] = 8
+    compute = lambda v, thr: next((t for th, t in thr if v >= th), 0)
+
+    first = ach.evaluate_tiers(r, values, thresholds, compute)
+    assert first == [('streak', 1, True)] and r.streak_unlocked_at is not None
+    assert ach.evaluate_tiers(r, values, thresholds, compute) == []
+    values['streak'] = 31
+    assert ach.evaluate_tiers(r, values, thresholds, compute) == [('streak', 2, False)]
@@ -0,0 +1,153 @@
+import sys
+import os
+from datetime import date, datetime, timedelta, timezone
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, text, Column, Integer, String, Date, DateTime, Numeric
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from services import backups
+
+Base = declarative_base()
+
+
+class Team(Base):
+    __tablename__ = 'teams'
+    id = Column(Integer, primary_key=True)
+    name = Column(String(64))
+    founded = Column(Date)
+    updated_at = Column(DateTime(timezone=True))
+
+
+class Order(Base):
+    __tablename__ = 'orders'
+    id = Column(Integer, primary_key=True)
+    total = Column(Numeric(10, 2))
+    note = Column(String(255))
+
+
+class DailyStake(Base):
+    __tablename__ = 'user_daily_stake'
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    total = Column(Integer)
+    updated_at = Column(DateTime(timezone=True))
+
+
+class Baseline(Base):
+    __tablename__ = 'weekly_credit_baselines'
+    user_id = Column(Integer, primary_key=True)
+    period_start = Column(DateTime(timezone=True), primary_key=True)
+    credits_base = Column(Integer)
+
+
+T0 = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+
+def _session():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("""CREATE TABLE admin_backups (id INTEGER PRIMARY KEY AUTOINCREMENT, action VARCHAR(128) NOT NULL,
+                             payload_gz BLOB NOT NULL, metadata TEXT, created_by VARCHAR(64), created_at TIMESTAMP)"""))
+        conn.execute(text("""CREATE TABLE admin_backup_chunks (backup_id INTEGER NOT NULL, seq INTEGER NOT NULL, data BLOB NOT NULL,
+                             PRIMARY KEY (backup_id, seq))"""))
+    return sessionmaker(bind=engine)()
+
+
+def _seed(db, n=300):
+    db.add_all([Team(id=i, name=f'Team {i} ' + 'x' * 40, founded=date(1990, 1, 1) + timedelta(days=i),
+                     updated_at=T0) for i in range(1, n + 1)])
+    db.add_all([Order(id=1, total='10.50', note='a'), Order(id=2, total='3.00', note=None)])
+    db.commit()
+
+
+def _tables():
+    return {t.name: t for t in Base.metadata.sorted_tables}
+
+
+def test_full_backup_streams_to_chunks_and_restores():
+    db = _session()
+    _seed(db)
+    tables = [Team.__table__, Order.__table__]
+    meta = backups.write_backup(db, tables, 'full_reset', chunk_bytes=1024, batch_rows=50, created_by='42')
+    db.commit()
+    assert meta['rows'] == {'teams': 300, 'orders': 2} and meta['kind'] == 'full' and meta['codec'] == 'gzip'
+    assert meta['chunks'] > 1
+    assert db.execute(text("SELECT COUNT(*) FROM admin_backup_chunks WHERE backup_id=:b"), {'b': meta['id']}).scalar() == meta['chunks']
+
+    # Разрушительная операция, затем восстановление
+    db.query(Order).delete()
+    db.query(Team).filter(Team.id > 10).delete()
+    db.add(Team(id=999, name='stale'))
+    db.commit()
+    counts = backups.restore_backup(db, _tables(), meta['id'], batch_rows=64)
+    db.commit()
+    assert counts == {'teams': 300, 'orders': 2}
+    assert db.query(Team).count() == 300 and db.get(Team, 999) is None
+    t = db.get(Team, 7)
+    assert t.founded == date(1990, 1, 8) and t.updated_at.replace(tzinfo=timezone.utc) == T0
+    assert str(db.get(Order, 1).total) == '10.50' and db.get(Order, 2).note is None
+
+
+def test_incremental_backup_to_file_upserts_changed_rows(tmp_path):
+    db = _session()
+    _seed(db, 20)
+    tables = [Team.__table__, Order.__table__]
+    base = backups.write_backup(db, tables, 'manual', backup_dir=str(tmp_path))
+    db.commit()
+    assert os.path.exists(base['path']) and base['storage'] == 'file'
+
+    since = backups.last_backup_started_at(db, ['teams', 'orders'])
+    assert since is not None and backups.last_backup_started_at(db, ['users']) is None
+    later = datetime.now(timezone.utc) + timedelta(seconds=5)
+    db.get(Team, 3).name = 'Renamed'
+    db.get(Team, 3).updated_at = later
+    db.add(Team(id=21, name='New', updated_at=later))
+    db.commit()
+    inc = backups.write_backup(db, tables, 'manual', since=since, backup_dir=str(tmp_path))
+    db.commit()
+    # teams — только изменённые; orders без updated_at — целиком
+    assert inc['kind'] == 'incremental' and inc['rows'] == {'teams': 2, 'orders': 2}
+
+    # Откат к полной копии, затем инкремент поверх
+    backups.restore_backup(db, _tables(), base['id'])
+    db.commit()
+    assert db.get(Team, 3).name.startswith('Team 3') and db.get(Team, 21) is None
+    backups.restore_backup(db, _tables(), inc['id'])
+    db.commit()
+    assert db.get(Team, 3).name == 'Renamed' and db.get(Team, 21).name == 'New'
+    assert db.query(Team).count() == 21
+
+
+def test_incremental_restore_upserts_composite_primary_keys():
+    db = _session()
+    day = date(2025, 9, 1)
+    db.add_all([DailyStake(user_id=1, day=day, total=100, updated_at=T0),
+                DailyStake(user_id=2, day=day, total=50, updated_at=T0),
+                Baseline(user_id=1, period_start=T0, credits_base=1000)])
+    db.commit()
+    tables = [DailyStake.__table__, Baseline.__table__]
+    since = datetime.now(timezone.utc) - timedelta(seconds=5)
+    db.get(DailyStake, (1, day)).updated_at = datetime.now(timezone.utc)
+    db.commit()
+    inc = backups.write_backup(db, tables, 'manual', since=since)
+    db.commit()
+    # Составной PK: изменённая строка; без updated_at — таблица целиком
+    assert inc['kind'] == 'incremental' and inc['rows'] == {'user_daily_stake': 1, 'weekly_credit_baselines': 1}
+
+    # Строки по-прежнему в таблицах — восстановление заменяет их по ключу, а не падает на UNIQUE
+    db.get(DailyStake, (1, day)).total = 999
+    db.get(Baseline, (1, T0)).credits_base = 5
+    db.commit()
+    counts = backups.restore_backup(db, _tables(), inc['id'])
+    db.commit()
+    db.expire_all()
+    assert counts == {'user_daily_stake': 1, 'weekly_credit_baselines': 1}
+    assert db.get(DailyStake, (1, day)).total == 100 and db.get(DailyStake, (2, day)).total == 50
+    assert db.get(Baseline, (1, T0)).credits_base == 1000
+    assert db.query(DailyStake).count() == 2 and db.query(Baseline).count() == 1
@@ -0,0 +1,31 @@
+import sys
+import os
+import hashlib
+import hmac
+from urllib.parse import parse_qs
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.hot_endpoints import compare
+from benchmarks.telegram import sign_init_data, make_user
+
+
+def test_compare_flags_only_significant_regressions():
+    base = {'cases': {'a': {'median_ms': 10.0}, 'b': {'median_ms': 1.0}, 'c': {'median_ms': 50.0}}}
+    cur = {'cases': {'a': {'median_ms': 14.0}, 'b': {'median_ms': 2.5}, 'c': {'median_ms': 55.0}, 'new': {'median_ms': 1.0}}}
+    regs = compare(cur, base, threshold=0.25, min_delta_ms=2.0)
+    # a: +40% и +4мс -> регрессия; b: +150%, но +1.5мс (шум); c: +10%
+    assert [r['case'] for r in regs] == ['a']
+
+
+def test_signed_init_data_verifies_like_app():
+    token = '123:abc'
+    init_data = sign_init_data(token, make_user(42), auth_date=1700000000)
+    parsed = parse_qs(init_data)
+    received = parsed.pop('hash')[0]
+    dcs = '\n'.join(f"{k}={v[0]}" for k, v in sorted(parsed.items()))
+    secret = hmac.new(b"WebAppData", token.encode(), hashlib.sha256).digest()
+    assert hmac.new(secret, dcs.encode(), hashlib.sha256).hexdigest() == received
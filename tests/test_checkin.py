@@ -0,0 +1,98 @@
+import sys
+import os
+import threading
+from datetime import date, timedelta
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, Column, Integer, Date, DateTime
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from services.checkin import apply_checkin
+
+Base = declarative_base()
+
+
+class User(Base):
+    __tablename__ = 'users'
+    user_id = Column(Integer, primary_key=True)
+    credits = Column(Integer, default=0)
+    xp = Column(Integer, default=0)
+    level = Column(Integer, default=1)
+    consecutive_days = Column(Integer, default=0)
+    last_checkin_date = Column(Date, nullable=True)
+    updated_at = Column(DateTime(timezone=True))
+
+
+TODAY = date(2025, 9, 10)
+
+
+def _sessions(path):
+    engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': 30, 'check_same_thread': False})
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_streak_rewards_and_level_up(tmp_path):
+    Session = _sessions(tmp_path / 'c.db')
+    db = Session()
+    db.add_all([
+        User(user_id=1, credits=100, xp=90, level=1, consecutive_days=6, last_checkin_date=TODAY - timedelta(days=1)),
+        User(user_id=2, credits=0, xp=5, level=3, consecutive_days=4, last_checkin_date=TODAY - timedelta(days=3)),
+        User(user_id=3, credits=0, xp=750, level=2, consecutive_days=0, last_checkin_date=None),
+    ])
+    db.commit()
+
+    # 7-й день цикла: +70 XP (переход уровня 1 -> 2), +350 кредитов
+    r = apply_checkin(db, User, 1, TODAY)
+    assert (r['cycle_day'], r['consecutive_days'], r['xp'], r['level'], r['credits']) == (7, 7, 60, 2, 450)
+    assert r['prev_level'] == 1
+    # Пропуск дня — серия с начала
+    r = apply_checkin(db, User, 2, TODAY)
+    assert (r['cycle_day'], r['consecutive_days'], r['xp'], r['level'], r['prev_level']) == (1, 1, 15, 3, 3)
+    # XP сверх полосы (старые данные) доводится как прежний цикл: 760 -> ур.3 (560) -> ур.4 (260)
+    r = apply_checkin(db, User, 3, TODAY)
+    assert (r['xp'], r['level']) == (260, 4)
+    assert apply_checkin(db, User, 1, TODAY) is None
+    assert apply_checkin(db, User, 99, TODAY) is None
+    db.commit()
+    u = db.get(User, 3)
+    assert (u.xp, u.level, u.last_checkin_date) == (260, 4, TODAY)
+
+
+def test_concurrent_checkins_apply_once(tmp_path):
+    Session = _sessions(tmp_path / 'race.db')
+    db = Session()
+    db.add(User(user_id=7, credits=0, xp=0, level=1, consecutive_days=0))
+    db.commit()
+    db.close()
+
+    workers = 8
+    barrier = threading.Barrier(workers)
+    results, errors = [], []
+
+    def worker():
+        s = Session()
+        try:
+            barrier.wait()
+            results.append(apply_checkin(s, User, 7, TODAY))
+            s.commit()
+        except Exception as e:
+            s.rollback()
+            errors.append(e)
+        finally:
+            s.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len([r for r in results if r is not None]) == 1
+    u = Session().get(User, 7)
+    assert (u.credits, u.xp, u.consecutive_days) == (50, 10, 1)
@@ -0,0 +1,98 @@
+import sys
+import os
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, DateTime
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from services import lineup_import
+from services.lineup_import import make_entry
+
+Base = declarative_base()
+
+
+class MatchLineupPlayer(Base):
+    __tablename__ = 'match_lineups'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    home = Column(Text, nullable=False)
+    away = Column(Text, nullable=False)
+    team = Column(String(8), nullable=False)
+    player = Column(Text, nullable=False)
+    jersey_number = Column(Integer, nullable=True)
+    position = Column(String(32), nullable=False, default='starting_eleven')
+    is_captain = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True))
+
+
+def _squad(prefix, n=16):
+    return [make_entry(f'{prefix} {i}', i, 'starting_eleven' if i <= 11 else 'substitute', i == 1) for i in range(1, n + 1)]
+
+
+def _rows(db, team):
+    return {(r.player, r.jersey_number, r.position, r.is_captain)
+            for r in db.query(MatchLineupPlayer).filter(MatchLineupPlayer.team == team)}
+
+
+def test_full_squad_applied_with_bulk_statements_and_diffed():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(MatchLineupPlayer(home='A', away='C', team='home', player='Other match'))
+    db.commit()
+
+    stmts = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cur, sql, params, ctx, many: stmts.append(sql.split()[0]))
+    stats = lineup_import.apply_lineup(db, MatchLineupPlayer, 'A', 'B', {'home': _squad('H'), 'away': _squad('W')})
+    db.commit()
+    # Один SELECT и один INSERT executemany на 32 игрока
+    assert stmts == ['SELECT', 'INSERT']
+    assert (stats['inserted'], stats['updated'], stats['deleted'], stats['changed']) == (32, 0, 0, True)
+
+    # Тот же состав — только чтение
+    stmts.clear()
+    stats = lineup_import.apply_lineup(db, MatchLineupPlayer, 'A', 'B', {'home': _squad('H'), 'away': _squad('W')})
+    assert stmts == ['SELECT'] and not stats['changed']
+
+    # Замена: номер сменился, капитан другой, двое ушли, один новый
+    squad = _squad('H', 14)
+    squad[4]['jersey_number'] = 55
+    squad[0]['is_captain'] = 0
+    squad[1]['is_captain'] = 1
+    squad.append(make_entry('  New   Guy ', 99, 'sub'))
+    stmts.clear()
+    stats = lineup_import.apply_lineup(db, MatchLineupPlayer, 'A', 'B', {'home': squad})
+    db.commit()
+    assert stmts == ['SELECT', 'DELETE', 'UPDATE', 'INSERT']
+    assert (stats['inserted'], stats['updated'], stats['deleted']) == (1, 3, 2)
+    assert stats['existing'] == {'home': 16, 'away': 0}
+    home = _rows(db, 'home')
+    assert ('H 5', 55, 'starting_eleven', 0) in home and ('New Guy', 99, 'substitute', 0) in home
+    assert ('H 2', 2, 'starting_eleven', 1) in home and not any(r[0] == 'H 16' for r in home)
+    # Гости и другой матч не тронуты
+    assert len(_rows(db, 'away')) == 16
+    assert db.query(MatchLineupPlayer).filter(MatchLineupPlayer.away == 'C').count() == 1
+
+    # append: без удалений; пустая сторона при replace — очистка
+    stats = lineup_import.apply_lineup(db, MatchLineupPlayer, 'A', 'B', {'away': [make_entry('w 1', 7)]}, mode='append')
+    assert (stats['inserted'], stats['updated'], stats['deleted']) == (0, 1, 0)
+    stats = lineup_import.apply_lineup(db, MatchLineupPlayer, 'A', 'B', {'away': []})
+    db.commit()
+    assert stats['deleted'] == 16 and _rows(db, 'away') == set()
+
+
+def test_diff_drops_legacy_duplicates_and_dedupes_input():
+    class Row:
+        def __init__(self, id, player, team='home'):
+            self.id, self.team, self.player = id, team, player
+            self.jersey_number, self.position, self.is_captain = None, 'starting_eleven', 0
+
+    existing = [Row(1, 'Ivan'), Row(2, 'ivan '), Row(3, 'Petr')]
+    incoming = {'home': [make_entry('Ivan'), make_entry('IVAN', 9), make_entry('Oleg')]}
+    inserts, updates, deletes = lineup_import.diff_lineup(existing, incoming)
+    assert [i['player'] for i in inserts] == ['Oleg']
+    assert updates == []
+    assert sorted(deletes) == [2, 3]
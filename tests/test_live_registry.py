@@ -0,0 +1,48 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from optimizations.live_registry import LiveMatchRegistry
+
+
+def test_timer_transitions_and_etag():
+    clock = {'now': datetime(2025, 9, 1, 17, 0)}
+    pushed = []
+    reg = LiveMatchRegistry(lambda: clock['now'], duration_min=120, soon_min=30, on_change=pushed.extend)
+    reg.reload([
+        {'home': 'A', 'away': 'B', 'datetime': '2025-09-01T17:20:00'},
+        {'home': 'C', 'away': 'D', 'datetime': '2025-09-01T15:30:00'},
+        {'home': 'E', 'away': 'F', 'datetime': '2025-09-02T12:00:00'},
+    ], [])
+    # Первая загрузка без рассылки
+    assert pushed == []
+    snap = reg.read()
+    assert [(m['home'], m['away']) for m in snap['live']] == [('C', 'D')]
+    assert [m['home'] for m in snap['soon']] == ['A']
+    assert reg.next_transition_in() == 20 * 60
+    etag = snap['etag']
+    assert reg.read()['etag'] == etag
+
+    # Граница окна: A начался, C закончился
+    clock['now'] = datetime(2025, 9, 1, 17, 30)
+    snap = reg.read()
+    assert [m['home'] for m in snap['live']] == ['A']
+    assert snap['etag'] != etag
+    assert sorted((p['home'], p['status']) for p in pushed) == [('A', 'live'), ('C', 'ended')]
+
+
+def test_manual_live_from_admin():
+    now = datetime(2025, 9, 1, 12, 0)
+    pushed = []
+    reg = LiveMatchRegistry(lambda: now, on_change=pushed.extend)
+    reg.reload([{'home': 'A', 'away': 'B', 'datetime': (now + timedelta(days=1)).isoformat()}], [('X', 'Y', None)])
+    assert [m['home'] for m in reg.read()['live']] == ['X']
+    reg.set_manual('A', 'B', 'live')
+    reg.set_manual('X', 'Y', 'finished')
+    assert [m['home'] for m in reg.read()['live']] == ['A']
+    assert [(p['home'], p['status']) for p in pushed] == [('A', 'live'), ('X', 'ended')]
@@ -0,0 +1,51 @@
+import sys
+import os
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from optimizations.live_table import LiveTableProjection
+
+
+def _row(payload, team):
+    return next(r for r in payload['values'][1:] if r[1] == team)
+
+
+def test_score_deltas_overlay_finalized_standings():
+    pushed = []
+    proj = LiveTableProjection(on_change=pushed.append)
+    base = {
+        'A': {'P': 1, 'W': 1, 'D': 0, 'L': 0, 'GF': 2, 'GA': 0, 'PTS': 3},
+        'B': {'P': 1, 'W': 0, 'D': 0, 'L': 1, 'GF': 0, 'GA': 2, 'PTS': 0},
+        'C': {'P': 0, 'W': 0, 'D': 0, 'L': 0, 'GF': 0, 'GA': 0, 'PTS': 0},
+    }
+    proj.set_base(base, finished={('A', 'B')}, live={('B', 'C'): None})
+    first = proj.read()
+    assert pushed == [] and first['version'] == 1
+    assert [r[1] for r in first['values'][1:4]] == ['A', 'C', 'B']
+
+    # Гол B: B поднимается над C, прежний вклад не копится
+    assert proj.set_score('B', 'C', 1, 0)
+    assert proj.set_score('B', 'C', 2, 0)
+    payload = proj.read()
+    assert _row(payload, 'B')[2:] == ['2', '1', '0', '1', '0', '3']
+    assert _row(payload, 'C')[2:] == ['1', '0', '0', '1', '-2', '0']
+    assert payload['version'] == 3 and len(pushed) == 2 and pushed[-1]['etag'] == payload['etag']
+    # Тот же счёт, не live и уже завершённый матч — без новой версии
+    assert not proj.set_score('B', 'C', 2, 0)
+    assert not proj.set_score('A', 'C', 5, 0)
+    assert proj.read()['version'] == 3
+
+    # Матч ушёл из live — вклад снят; новый live добавлен со счётом
+    proj.sync_live({('C', 'A')}, {('C', 'A'): (1, 1)})
+    payload = proj.read()
+    assert _row(payload, 'B')[2] == '1' and _row(payload, 'C')[2:] == ['1', '0', '1', '0', '0', '1']
+    assert proj.live_pairs() == {('C', 'A')}
+    # База та же — пересборка не меняет строки
+    proj.set_base(base, finished={('A', 'B')}, live={('C', 'A'): (1, 1)})
+    assert proj.read()['version'] == payload['version']
+    assert not proj.needs_rebuild()
+    proj.request_rebuild()
+    assert proj.needs_rebuild()
@@ -0,0 +1,48 @@
+import sys
+import os
+import gzip
+import json
+
+import pytest
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from optimizations.log_ingest import ClientLogIngestor, IngestError
+
+
+def _ndjson(n, session='s1'):
+    return '\n'.join(json.dumps({'sessionId': session, 'level': 'info', 'message': f'm{i}', 'metadata': {'i': i}})
+                     for i in range(n)).encode('utf-8')
+
+
+def test_gzip_ndjson_quota_and_bulk_write(tmp_path):
+    path = tmp_path / 'client.ndjson'
+    ing = ClientLogIngestor(path=str(path), buffer_size=8, batch_size=100, session_quota=5, quota_window_sec=60)
+    entries = ing.parse(gzip.compress(_ndjson(6) + b'\nnot-json'), 'application/x-ndjson', 'gzip')
+    assert len(entries) == 6 and ing.stats()['dropped_invalid'] == 1
+    # Старый формат {logs: [...]} тоже принимается
+    assert len(ing.parse(json.dumps({'logs': [{'message': 'x'}]}).encode(), 'application/json')) == 1
+
+    assert ing.submit(entries, user_id=1, now=100.0) == (5, 1)
+    # Другая сессия — своя квота, но буфер на 8 записей
+    assert ing.submit(ing.parse(_ndjson(5, 's2')), user_id=1, now=100.0) == (3, 2)
+    stats = ing.stats(now=100.0)
+    assert (stats['dropped_quota'], stats['dropped_full'], stats['queued']) == (1, 2, 8)
+    assert stats['ingest_per_sec'] > 0
+
+    # Одна пачка — одна запись в файл
+    assert ing.flush() == 8
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 8 and json.loads(lines[0])['metadata'] == {'i': 0}
+    assert ing.stats()['batches'] == 1 and ing.stats()['queued'] == 0
+    # Новое окно квоты
+    assert ing.submit(entries, now=200.0) == (5, 1)
+
+
+def test_oversized_compressed_body_rejected():
+    ing = ClientLogIngestor(max_body_bytes=1024)
+    with pytest.raises(IngestError):
+        ing.parse(gzip.compress(b'{}\n' * 5000), 'application/x-ndjson', 'gzip')
@@ -0,0 +1,77 @@
+import sys
+import os
+from datetime import datetime
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, Column, Integer, String, DateTime
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from database.database_models import Base as AdvBase, Team, Match
+from utils import match_status
+
+FlagsBase = declarative_base()
+
+
+class MatchFlags(FlagsBase):
+    __tablename__ = 'match_flags'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    home = Column(String(255))
+    away = Column(String(255))
+    status = Column(String(20))
+    live_started_at = Column(DateTime(timezone=True))
+
+
+def _session():
+    engine = create_engine('sqlite:///:memory:')
+    AdvBase.metadata.create_all(engine, tables=[Team.__table__, Match.__table__])
+    FlagsBase.metadata.create_all(engine)
+    match_status.invalidate_team_ids()
+    return sessionmaker(bind=engine)()
+
+
+def test_load_match_states_latest_match_and_flags():
+    db = _session()
+    a, b, c = Team(name='A'), Team(name='B'), Team(name='C')
+    db.add_all([a, b, c])
+    db.flush()
+    db.add_all([
+        Match(home_team_id=a.id, away_team_id=b.id, match_date=datetime(2026, 9, 1, 18), status='finished'),
+        Match(home_team_id=a.id, away_team_id=b.id, match_date=datetime(2026, 10, 1, 18), status='live'),
+        Match(home_team_id=b.id, away_team_id=a.id, match_date=datetime(2026, 9, 15, 18), status='scheduled'),
+    ])
+    db.add(MatchFlags(home='C', away='A', status='live'))
+    db.commit()
+
+    states = match_status.load_match_states(db, [('A', 'B'), ('B', 'A'), ('C', 'A'), ('X', 'Y')], MatchFlags)
+    assert states[('A', 'B')]['status'] == 'live'
+    assert states[('A', 'B')]['flags_status'] is None
+    assert states[('B', 'A')]['status'] == 'scheduled'
+    assert states[('C', 'A')]['status'] is None
+    assert states[('C', 'A')]['flags_status'] == 'live'
+    assert states[('X', 'Y')]['status'] is None
+    # совпадает с точечным поиском
+    assert match_status.get_match_status_by_names(db, 'A', 'B') == 'live'
+
+
+def test_team_map_picks_up_new_teams():
+    db = _session()
+    a, b = Team(name='A'), Team(name='B')
+    db.add_all([a, b])
+    db.commit()
+    assert set(match_status.team_id_map(db)) == {'A', 'B'}
+
+    d = Team(name='D')
+    db.add(d)
+    db.flush()
+    db.add(Match(home_team_id=d.id, away_team_id=a.id, match_date=datetime(2026, 10, 2, 12), status='scheduled'))
+    db.commit()
+    # карта ещё старая, но новые команды дочитываются одним запросом
+    assert 'D' not in match_status.team_id_map(db)
+    assert match_status.load_match_states(db, [('D', 'A')])[('D', 'A')]['status'] == 'scheduled'
+    assert match_status.get_match_status_by_names(db, 'D', 'A') == 'scheduled'
+    match_status.invalidate_team_ids()
+    assert 'D' in match_status.team_id_map(db)
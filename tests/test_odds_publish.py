@@ -0,0 +1,70 @@
+import sys
+import os
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from services import odds_publish as op
+
+Base = declarative_base()
+
+
+class OddsSnapshot(Base):
+    __tablename__ = 'odds_snapshots'
+    home = Column(String(128), primary_key=True)
+    away = Column(String(128), primary_key=True)
+    date_key = Column(String(10))
+    version = Column(Integer, default=1, nullable=False)
+    payload = Column(Text, nullable=False)
+    payload_hash = Column(String(40))
+    config_hash = Column(String(40))
+    stale = Column(Boolean, default=False, nullable=False)
+    updated_at = Column(DateTime(timezone=True))
+
+
+FIELDS = {'odds': {'home': 2.1, 'draw': 3.2, 'away': 3.4}, 'markets': {'totals': [{'line': 4.5, 'odds': {'over': 1.9, 'under': 1.9}}]}}
+
+
+def _sessions():
+    # Две сессии на одной БД — как два воркера с общим хранилищем
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    return Session(), Session()
+
+
+def test_version_shared_between_workers_and_bumped_only_on_change():
+    w1, w2 = _sessions()
+    cfg = op.config_fingerprint({'BET_MARGIN': '0.06', 'OTHER': 'x'})
+    assert op.publish(w1, OddsSnapshot, 'A', 'B', '2025-10-01', FIELDS, cfg) == (1, True)
+    # тот же payload — версия не растёт
+    assert op.publish(w2, OddsSnapshot, 'A', 'B', '2025-10-01', FIELDS, cfg) == (1, False)
+    changed = {**FIELDS, 'odds': {'home': 2.0, 'draw': 3.2, 'away': 3.6}}
+    assert op.publish(w2, OddsSnapshot, 'A', 'B', '2025-10-01', changed, cfg) == (2, True)
+    w1.expire_all()
+    row = op.get_published(w1, OddsSnapshot, 'A', 'B')
+    assert row.version == 2 and op.row_fields(row)['odds']['home'] == 2.0
+    assert op.is_fresh(row, cfg, '2025-10-01')
+    # смена конфигурации / другая дата матча / stale — требуют пересчёта
+    assert not op.is_fresh(row, op.config_fingerprint({'BET_MARGIN': '0.08'}), '2025-10-01')
+    assert not op.is_fresh(row, cfg, '2025-10-08')
+    assert op.mark_stale(w1, OddsSnapshot, ['B']) == 1
+    w2.expire_all()
+    assert not op.is_fresh(op.get_published(w2, OddsSnapshot, 'A', 'B'), cfg)
+
+
+def test_bump_and_bulk_load():
+    w1, _ = _sessions()
+    assert op.bump(w1, OddsSnapshot, 'C', 'D') == 2  # строки не было: старое поведение 1 -> 2
+    cfg = op.config_fingerprint({})
+    op.publish(w1, OddsSnapshot, 'A', 'B', None, FIELDS, cfg)
+    assert op.bump(w1, OddsSnapshot, 'A', 'B') == 2
+    rows = op.load_published(w1, OddsSnapshot, [('A', 'B'), ('C', 'D'), ('A', 'D')])
+    assert set(rows) == {('A', 'B'), ('C', 'D')}
+    assert rows[('A', 'B')].stale and not op.is_fresh(rows[('A', 'B')], cfg)
@@ -0,0 +1,69 @@
+import sys
+import os
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, event, Column, Integer, String, Text
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from optimizations.multilevel_cache import MultiLevelCache
+from services import public_profiles
+
+Base = declarative_base()
+
+
+class User(Base):
+    __tablename__ = 'users'
+    user_id = Column(Integer, primary_key=True)
+    display_name = Column(String(255))
+    xp = Column(Integer, default=0)
+    level = Column(Integer, default=1)
+    consecutive_days = Column(Integer, default=0)
+
+
+class UserPhoto(Base):
+    __tablename__ = 'user_photos'
+    user_id = Column(Integer, primary_key=True)
+    photo_url = Column(Text, nullable=True)
+
+
+def test_batch_lookup_queries_only_misses_and_invalidates():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    selects = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cur, stmt, params, ctx, many: selects.append(stmt) if stmt.lstrip().upper().startswith('SELECT') else None)
+    db = sessionmaker(bind=engine)()
+    db.add_all([User(user_id=1, display_name='Ann', level=3, xp=40, consecutive_days=2),
+                User(user_id=2, display_name=None), UserPhoto(user_id=1, photo_url='http://a/1.jpg')])
+    db.commit()
+    # Без Redis роль общего уровня играет memory-уровень MultiLevelCache
+    shared = MultiLevelCache()
+    shared.ttl_config['public_profile'] = {'memory': 600, 'redis': 0}
+    public_profiles.configure(max_entries=1, local_ttl=30)
+    selects.clear()
+
+    got = public_profiles.get_public_profiles(db, [1, 2, 2, 99], User, UserPhoto, cache=shared)
+    assert len(selects) == 1
+    assert got[1] == {'user_id': 1, 'display_name': 'Ann', 'level': 3, 'xp': 40, 'consecutive_days': 2, 'photo_url': 'http://a/1.jpg'}
+    assert got[2]['display_name'] == 'Игрок' and got[2]['photo_url'] == ''
+    assert 99 not in got
+
+    # LRU на одну запись — второй пользователь приходит из общего кэша, БД не трогаем
+    got = public_profiles.get_public_profiles(db, [1, 2], User, UserPhoto, cache=shared)
+    assert len(selects) == 1 and set(got) == {1, 2}
+    stats = public_profiles.stats()
+    assert stats['local_entries'] == 1 and stats['shared_hits'] >= 1
+
+    # Смена имени: инвалидация сбрасывает оба уровня, промах читается одним запросом
+    db.get(User, 1).display_name = 'Anna'
+    db.commit()
+    selects.clear()
+    public_profiles.invalidate_public_profile(1, cache=shared)
+    got = public_profiles.get_public_profiles(db, [1, 2], User, UserPhoto, cache=shared)
+    assert got[1]['display_name'] == 'Anna'
+    assert len(selects) == 1 and ' IN ' in selects[0].upper()
+    public_profiles.configure(max_entries=5000, local_ttl=30)
@@ -0,0 +1,35 @@
+import sys
+import os
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from utils.monitoring import QueryProfiler, normalize_statement
+
+
+def test_normalize_statement_collapses_literals():
+    a = normalize_statement("SELECT * FROM teams WHERE name = 'Звезда' AND id = 5")
+    b = normalize_statement("SELECT * FROM teams WHERE name = 'Полет'  AND id = 17")
+    assert a == b
+    assert normalize_statement("SELECT id FROM bets WHERE id IN (?, ?, ?)") == "SELECT id FROM bets WHERE id IN (?)"
+
+
+def test_n1_detection_and_report():
+    qp = QueryProfiler(n1_threshold=3)
+    state = qp.begin()
+    qp.record(state, "SELECT * FROM match_flags WHERE home = ? AND away = ?", 1.0)
+    for i in range(4):
+        qp.record(state, f"SELECT * FROM teams WHERE id = {i}", 0.5)
+    suspects = qp.finish('api_betting_tours', 'GET', state)
+    assert len(suspects) == 1
+    assert suspects[0]['count'] == 4
+
+    report = qp.get_report()
+    assert report['endpoints'][0]['endpoint'] == 'api_betting_tours'
+    assert report['endpoints'][0]['max_queries'] == 5
+    assert report['n1_offenders'][0]['max_repeats'] == 4
+
+    qp.reset()
+    assert qp.get_report()['endpoints'] == []
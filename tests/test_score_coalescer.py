@@ -0,0 +1,47 @@
+import sys
+import os
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from optimizations.score_coalescer import ScoreCoalescer
+
+
+def test_rapid_edits_run_effects_once_with_all_states():
+    applied = []
+    co = ScoreCoalescer(lambda h, a, states: applied.append((h, a, states)), window_sec=2)
+    assert co.record('A', 'B', {'score_home': 1, 'score_away': 0}, now=100.0) == 1
+    co.record('A', 'B', {'score_home': 2, 'score_away': 0}, now=100.5)
+    co.record('C', 'D', {'score_home': 0, 'score_away': 1}, now=101.0)
+    assert co.record('A', 'B', {'score_home': 1, 'score_away': 0}, now=101.5) == 3
+
+    # Окно не продлевается правками: A-B готов к 102, C-D — к 103
+    assert co.next_due_in(now=100.0) == 2.0
+    assert co.flush(now=101.9) == 0
+    assert co.flush(now=102.0) == 1
+    home, away, states = applied[0]
+    assert (home, away) == ('A', 'B')
+    assert [(s['seq'], s['score_home']) for s in states] == [(1, 1), (2, 2), (3, 1)]
+
+    # Новое окно — seq продолжается
+    assert co.record('A', 'B', {'score_home': 2, 'score_away': 0}, now=102.5) == 4
+    assert co.flush(force=True) == 2
+    stats = co.stats()
+    assert stats['recorded'] == 5 and stats['flushes'] == 3 and stats['coalesced'] == 2 and stats['pending'] == 0
+
+
+def test_failed_effects_do_not_block_other_matches():
+    seen = []
+
+    def apply(h, a, states):
+        if h == 'X':
+            raise RuntimeError('boom')
+        seen.append(h)
+
+    co = ScoreCoalescer(apply, window_sec=0)
+    co.record('X', 'Y', {'score_home': 1, 'score_away': 1})
+    co.record('A', 'B', {'score_home': 1, 'score_away': 1})
+    assert co.flush() == 2
+    assert seen == ['A'] and co.stats()['errors'] == 1
@@ -0,0 +1,56 @@
+import sys
+import os
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from config import SettingsRegistry, Setting
+
+SPEC = (
+    Setting('BET_MARGIN', 'float', 0.06, 'betting'),
+    Setting('BET_MAX_GOALS', 'int', 8, 'odds'),
+    Setting('BET_TEAM_STRENGTHS_JSON', 'json', {}, 'odds'),
+    Setting('ENABLE_SCHEDULER', 'bool', True, 'sync'),
+    Setting('DEFAULT_TZ_MINUTES', 'int', 180, 'features', 'DEFAULT_TZ_MIN'),
+)
+
+
+def test_parse_defaults_and_invalid_values():
+    reg = SettingsRegistry(SPEC, env={
+        'BET_MARGIN': '0,08', 'BET_MAX_GOALS': 'ten', 'BET_TEAM_STRENGTHS_JSON': '{"A": 7}',
+        'ENABLE_SCHEDULER': 'no', 'DEFAULT_TZ_MIN': '120',
+    })
+    assert reg.BET_MARGIN == 0.08
+    assert reg.BET_MAX_GOALS == 8  # невалидное -> default
+    assert any(e.startswith('BET_MAX_GOALS') for e in reg.errors)
+    assert reg.BET_TEAM_STRENGTHS_JSON == {'A': 7}
+    assert reg.ENABLE_SCHEDULER is False
+    assert reg.DEFAULT_TZ_MINUTES == 120
+    assert reg.group('odds') == {'BET_MAX_GOALS': 8, 'BET_TEAM_STRENGTHS_JSON': {'A': 7}}
+
+
+def test_reload_bumps_version_only_on_change(tmp_path):
+    reg = SettingsRegistry(SPEC, env={})
+    v1, fp1 = reg.version, reg.fingerprint('BET_')
+    assert reg.reload({}) == []
+    assert reg.version == v1 and reg.fingerprint('BET_') == fp1
+
+    assert reg.reload({'BET_MARGIN': '0.1'}) == ['BET_MARGIN']
+    assert reg.version == v1 + 1
+    assert reg.BET_MARGIN == 0.1
+    assert reg.fingerprint('BET_') != fp1
+
+    env_file = tmp_path / 'settings.env'
+    env_file.write_text('# hot values\nBET_MAX_GOALS=6\n', encoding='utf-8')
+    old = os.environ.get('SETTINGS_ENV_FILE')
+    os.environ['SETTINGS_ENV_FILE'] = str(env_file)
+    try:
+        assert 'BET_MAX_GOALS' in reg.reload()
+        assert reg.BET_MAX_GOALS == 6
+    finally:
+        if old is None:
+            os.environ.pop('SETTINGS_ENV_FILE', None)
+        else:
+            os.environ['SETTINGS_ENV_FILE'] = old
@@ -0,0 +1,127 @@
+import sys
+import os
+import logging
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from services import snapshots
+
+Base = declarative_base()
+
+
+class Snapshot(Base):
+    __tablename__ = 'snapshots'
+    key = Column(String(64), primary_key=True)
+    payload = Column(Text, nullable=False)
+    updated_at = Column(DateTime(timezone=True))
+    content_hash = Column(String(64))
+
+
+class SnapshotVersion(Base):
+    __tablename__ = 'snapshot_versions'
+    key = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    base_version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True))
+
+
+class SnapshotDelta(Base):
+    __tablename__ = 'snapshot_deltas'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    snapshot_key = Column(String(64), nullable=False)
+    version = Column(Integer, nullable=False)
+    entry_key = Column(Text, nullable=False)
+    entry = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+
+
+log = logging.getLogger('test')
+
+
+def _session(retain=200):
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    snapshots.configure_deltas(SnapshotDelta, SnapshotVersion, retain=retain)
+    return sessionmaker(bind=engine)()
+
+
+def _schedule(*tours):
+    return {'tours': [{'tour': t, 'matches': m} for t, m in tours]}
+
+
+def test_schedule_delta_contains_only_changed_tours():
+    db = _session()
+    assert snapshots.snapshot_set(db, Snapshot, 'schedule', _schedule((1, ['a']), (2, ['b'])), log)
+    assert snapshots.snapshot_version(db, 'schedule') == 1
+    assert snapshots.snapshot_set(db, Snapshot, 'schedule', _schedule((2, ['b2']), (3, ['c'])), log)
+    assert snapshots.snapshot_version(db, 'schedule') == 2
+
+    delta = snapshots.snapshot_delta(db, 'schedule', 1)
+    assert delta['snapshot_version'] == 2 and delta['collection'] == 'tours'
+    changes = {c['key']: c['entry'] for c in delta['changes']}
+    assert changes == {
+        '2': {'tour': 2, 'matches': ['b2']},
+        '3': {'tour': 3, 'matches': ['c']},
+        '1': None,
+        '__order__': ['2', '3'],
+    }
+    # Повтор того же payload — версия не растёт, дельта пустая
+    snapshots.snapshot_set(db, Snapshot, 'schedule', _schedule((2, ['b2']), (3, ['c'])), log)
+    assert snapshots.snapshot_delta(db, 'schedule', 2)['changes'] == []
+    # Версия из будущего — только полный payload
+    assert snapshots.snapshot_delta(db, 'schedule', 5) is None
+
+
+def test_compacted_since_falls_back_to_full_payload():
+    db = _session(retain=2)
+    for i in range(5):
+        snapshots.snapshot_set(db, Snapshot, 'results', {'results': [{'home': 'A', 'away': 'B', 'date': '2025-01-01', 'score': i}]}, log)
+    assert snapshots.snapshot_version(db, 'results') == 5
+    assert snapshots.snapshot_delta(db, 'results', 1) is None
+    delta = snapshots.snapshot_delta(db, 'results', 3)
+    assert delta['changes'] == [{'key': 'A|B|2025-01-01', 'entry': {'home': 'A', 'away': 'B', 'date': '2025-01-01', 'score': 4}}]
+    assert db.query(SnapshotDelta).count() == 2
+
+
+def test_unchanged_content_skips_write():
+    db = _session()
+    first = {'results': [{'home': 'A', 'away': 'B', 'date': '2025-01-01'}], 'updated_at': '2025-01-01T00:00:00'}
+    assert snapshots.snapshot_store(db, Snapshot, 'results', first, log) == 'written'
+    row = db.get(Snapshot, 'results')
+    stored_at, digest = row.updated_at, row.content_hash
+    assert digest == snapshots.content_hash(first)
+    # Отличается только updated_at и порядок ключей — строка не трогается, версия та же
+    again = {'updated_at': '2025-02-01T00:00:00', 'results': [{'date': '2025-01-01', 'away': 'B', 'home': 'A'}]}
+    assert snapshots.snapshot_store(db, Snapshot, 'results', again, log) == 'unchanged'
+    assert snapshots.snapshot_set(db, Snapshot, 'results', again, log) is True
+    db.expire_all()
+    row = db.get(Snapshot, 'results')
+    assert (row.updated_at, row.content_hash) == (stored_at, digest)
+    assert '2025-01-01T00:00:00' in row.payload
+    assert snapshots.snapshot_version(db, 'results') == 1
+
+
+def test_reset_forces_full_payload_for_old_versions():
+    db = _session()
+    results = {'results': [{'home': 'A', 'away': 'B', 'date': '2025-01-01'}, {'home': 'C', 'away': 'D', 'date': '2025-01-02'}]}
+    snapshots.snapshot_set(db, Snapshot, 'results', results, log)
+    snapshots.snapshot_set(db, Snapshot, 'results', {'results': results['results'][:1]}, log)
+    assert snapshots.snapshot_version(db, 'results') == 2
+    # Полный сброс: снапшоты и лог удаляются, версия становится базой
+    db.query(Snapshot).delete()
+    assert snapshots.reset_deltas(db) == 3
+    db.commit()
+    assert snapshots.snapshot_version(db, 'results') == 3
+    assert snapshots.snapshot_delta(db, 'results', 2) is None
+    # Первая запись после сброса (без старого payload) тоже сдвигает базу
+    snapshots.snapshot_set(db, Snapshot, 'results', {'results': [{'home': 'E', 'away': 'F', 'date': '2025-02-01'}]}, log)
+    assert snapshots.snapshot_version(db, 'results') == 4
+    assert snapshots.snapshot_delta(db, 'results', 3) is None
+    assert snapshots.snapshot_delta(db, 'results', 4)['changes'] == []
+    assert db.query(SnapshotDelta).count() == 0
@@ -0,0 +1,85 @@
+import sys
+import os
+import threading
+from datetime import datetime, timezone
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, Column, Integer, Date, DateTime
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from services import stake_ledger
+
+Base = declarative_base()
+
+
+class Bet(Base):
+    __tablename__ = 'bets'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer)
+    stake = Column(Integer)
+    placed_at = Column(DateTime(timezone=True))
+
+
+class UserDailyStake(Base):
+    __tablename__ = 'user_daily_stake'
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    total = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True))
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ledger.sqlite3'}", connect_args={'timeout': 30})
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def _place(Session, uid, stake, cap):
+    db = Session()
+    try:
+        if not stake_ledger.reserve_daily_stake(db, UserDailyStake, Bet, uid, stake, cap):
+            db.rollback()
+            return False
+        db.add(Bet(user_id=uid, stake=stake, placed_at=datetime.now(timezone.utc)))
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def test_parallel_bets_never_exceed_daily_cap(tmp_path):
+    Session = sessionmaker(bind=_engine(tmp_path))
+    cap, stake, n = 500, 100, 20
+    results = []
+    barrier = threading.Barrier(n)
+
+    def worker():
+        barrier.wait()
+        results.append(_place(Session, 7, stake, cap))
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    db = Session()
+    placed = sum(b.stake for b in db.query(Bet).filter(Bet.user_id == 7))
+    ledger = db.get(UserDailyStake, (7, datetime.now(timezone.utc).date()))
+    assert results.count(True) == cap // stake
+    assert placed == cap and ledger.total == cap
+
+
+def test_first_bet_of_day_seeds_from_existing_bets(tmp_path):
+    Session = sessionmaker(bind=_engine(tmp_path))
+    db = Session()
+    db.add(Bet(user_id=1, stake=450, placed_at=datetime.now(timezone.utc)))  # сделана до появления ledger'а
+    db.commit()
+    db.close()
+    assert not _place(Session, 1, 100, 500)
+    assert _place(Session, 1, 50, 500)
+    assert not _place(Session, 1, 10, 500)
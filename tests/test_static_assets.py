@@ -0,0 +1,50 @@
+import sys
+import os
+import gzip
+import json
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from flask import Flask, render_template_string
+
+from utils.assets import init_assets
+
+
+def _make_app(tmp_path, built=True):
+    static = tmp_path / 'static'
+    (static / 'dist' / 'js').mkdir(parents=True)
+    (static / 'assets.json').write_text(json.dumps({'bundles': {'css/app.css': ['css/a.css', 'css/b.css']}}), encoding='utf-8')
+    if built:
+        body = b'console.log(1);' * 100
+        (static / 'dist' / 'js' / 'main.abc123.js').write_bytes(body)
+        (static / 'dist' / 'js' / 'main.abc123.js.gz').write_bytes(gzip.compress(body))
+        (static / 'dist' / 'manifest.json').write_text(json.dumps({'js/main.js': 'js/main.abc123.js'}), encoding='utf-8')
+    app = Flask(__name__, static_folder=str(static))
+    init_assets(app, 'v7')
+    return app
+
+
+def test_asset_urls_from_manifest_and_fallback(tmp_path):
+    app = _make_app(tmp_path)
+    with app.test_request_context():
+        html = render_template_string("{{ asset_url('js/main.js') }}|{{ asset_url('js/other.js') }}|{{ asset_bundle('css/app.css')|join(',') }}")
+    assert html == '/static/dist/js/main.abc123.js|/static/js/other.js?v=v7|/static/css/a.css?v=v7,/static/css/b.css?v=v7'
+
+
+def test_serves_precompressed_variant(tmp_path):
+    app = _make_app(tmp_path)
+    c = app.test_client()
+    r = c.get('/static/dist/js/main.abc123.js', headers={'Accept-Encoding': 'br, gzip'})
+    assert r.status_code == 200
+    assert r.headers['Content-Encoding'] == 'gzip'  # .br нет — берём .gz
+    assert r.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert r.mimetype == 'text/javascript'
+    assert gzip.decompress(r.data) == b'console.log(1);' * 100
+
+    r = c.get('/static/dist/js/main.abc123.js', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in r.headers
+    assert r.data == b'console.log(1);' * 100
+    assert c.get('/static/dist/js/main.abc123.js.gz').status_code == 404
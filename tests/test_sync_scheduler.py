@@ -0,0 +1,90 @@
+import sys
+import os
+import time
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, Column, Integer, String
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from optimizations.sync_scheduler import ChangeTracker
+
+Base = declarative_base()
+
+
+class Match(Base):
+    __tablename__ = 'matches'
+    id = Column(Integer, primary_key=True)
+    home = Column(String(64))
+
+
+class User(Base):
+    __tablename__ = 'users'
+    id = Column(Integer, primary_key=True)
+    credits = Column(Integer, default=0)
+
+
+class Snapshot(Base):
+    __tablename__ = 'snapshots'
+    key = Column(String(64), primary_key=True)
+
+
+def test_only_dirty_domains_rebuild_after_coalesce_window():
+    tracker = ChangeTracker(coalesce_sec=2, max_delay_sec=10, sweep_sec=100)
+    t0 = time.time()
+    # Старт — полный проход
+    assert len(tracker.take_due(now=t0)) == 5
+    assert tracker.take_due(now=t0, tick=True) == []
+    assert tracker.stats()['skipped']['schedule'] == 1
+
+    tracker.mark('schedule', 'results')
+    tracker.mark('schedule')
+    t = tracker._dirty['schedule'][1]
+    # Всплеск схлопнут, до окна тишины — ничего
+    assert tracker.take_due(now=t + 1) == []
+    assert sorted(tracker.take_due(now=t + 2)) == ['results', 'schedule']
+    stats = tracker.stats()
+    assert stats['coalesced'] == 1 and stats['seq']['schedule'] == 2
+    assert stats['executed']['schedule'] == 2 and stats['executed']['leaderboards'] == 1
+    # Не чаще min_interval
+    tracker.configure(min_interval={'schedule': 50})
+    tracker.mark('schedule')
+    assert tracker.take_due(now=t + 10) == []
+    assert tracker.next_due_in(now=t + 10) == (t + 2 + 50) - (t + 10)
+    # Страховочный проход по истечении sweep_sec
+    assert len(tracker.take_due(now=t0 + 100)) == 5
+
+
+def test_commits_mark_domains_by_table():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    tracker = ChangeTracker()
+    tracker.install(Session)
+
+    db = Session()
+    db.add(Snapshot(key='schedule'))
+    db.commit()
+    assert tracker.stats()['dirty'] == []
+
+    db.add(User(id=1))
+    db.commit()
+    assert tracker.stats()['dirty'] == ['leaderboards']
+
+    db.add(Match(id=1, home='A'))
+    db.rollback()
+    assert tracker.sequence('schedule') == 0
+
+    # Savepoint не коммитит внешнюю транзакцию
+    with db.begin_nested():
+        db.add(Match(id=1, home='A'))
+    assert tracker.sequence('schedule') == 0
+    db.commit()
+    assert tracker.sequence('schedule') == 1
+
+    db.query(Match).filter(Match.id == 1).update({'home': 'B'})
+    db.commit()
+    assert set(tracker.stats()['dirty']) >= {'schedule', 'results', 'league-table', 'betting-tours'}
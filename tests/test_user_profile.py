@@ -0,0 +1,90 @@
+import sys
+import os
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, event, Column, Integer, String, Text
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from services import user_profile
+
+Base = declarative_base()
+
+
+class User(Base):
+    __tablename__ = 'users'
+    user_id = Column(Integer, primary_key=True)
+    display_name = Column(String(255))
+    credits = Column(Integer, default=0)
+
+
+class UserPhoto(Base):
+    __tablename__ = 'user_photos'
+    user_id = Column(Integer, primary_key=True)
+    photo_url = Column(Text)
+
+
+class UserPref(Base):
+    __tablename__ = 'user_prefs'
+    user_id = Column(Integer, primary_key=True)
+    favorite_team = Column(Text)
+
+
+class UserLimits(Base):
+    __tablename__ = 'user_limits'
+    user_id = Column(Integer, primary_key=True)
+    name_changes_left = Column(Integer, default=1)
+    favorite_changes_left = Column(Integer, default=1)
+
+
+class Referral(Base):
+    __tablename__ = 'referrals'
+    user_id = Column(Integer, primary_key=True)
+    referral_code = Column(String(32))
+
+
+def _serialize(u):
+    return {'user_id': u.user_id, 'display_name': u.display_name, 'credits': u.credits, 'updated_at': 'x'}
+
+
+def test_profile_parts_in_one_query_and_commit_invalidation():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    dropped = []
+    user_profile.install_invalidation(dropped.append, Session)
+    db = Session()
+    db.add_all([User(user_id=1, display_name='Ann', credits=10), UserPref(user_id=1, favorite_team='Team'),
+                Referral(user_id=1, referral_code='abc'), User(user_id=2, display_name='Bob', credits=5)])
+    db.commit()
+    assert set(dropped) == {1, 2}
+    dropped.clear()
+
+    selects = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: selects.append(a[2]))
+    db.expunge_all()
+    parts = user_profile.load_profile_parts(db, 1, User, UserPhoto, UserPref, UserLimits, Referral)
+    assert len(selects) == 1
+    dto = user_profile.compose_profile(_serialize(parts[0]), *parts[1:])
+    assert dto['favorite_team'] == 'Team' and dto['referral_code'] == 'abc' and dto['photo_url'] == ''
+    assert dto['name_changes_left'] == 1 and dto['favorite_changes_left'] == 1
+    assert user_profile.load_profile_parts(db, 99, User, UserPhoto, UserPref, UserLimits, Referral) is None
+    # updated_at не влияет на ETag, кредиты — влияют
+    etag = user_profile.profile_etag(dto)
+    assert user_profile.profile_etag({**dto, 'updated_at': 'y'}) == etag
+    assert user_profile.profile_etag({**dto, 'credits': 11}) != etag
+
+    # Смена любимой команды / фото — сброс после commit; откат и bulk UPDATE — нет
+    parts[2].favorite_team = 'Other'
+    db.add(UserPhoto(user_id=2, photo_url='p'))
+    db.commit()
+    assert sorted(dropped) == [1, 2]
+    dropped.clear()
+    db.get(User, 1).credits = 99
+    db.rollback()
+    db.query(User).filter(User.user_id == 1).update({User.credits: 0})
+    db.commit()
+    assert dropped == []
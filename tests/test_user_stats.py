@@ -0,0 +1,166 @@
+import sys
+import os
+from datetime import date, datetime, timedelta, timezone
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, event, Column, Integer, Date, DateTime
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from services import user_stats
+
+Base = declarative_base()
+
+
+class User(Base):
+    __tablename__ = 'users'
+    user_id = Column(Integer, primary_key=True)
+    last_checkin_date = Column(Date, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+
+
+class Bet(Base):
+    __tablename__ = 'bets'
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer)
+    placed_at = Column(DateTime(timezone=True))
+
+
+class UserStats(Base):
+    __tablename__ = 'user_stats'
+    id = Column(Integer, primary_key=True)
+    stats_day = Column(Date)
+    total_users = Column(Integer, default=0, nullable=False)
+    new_today = Column(Integer, default=0, nullable=False)
+    with_bets = Column(Integer, default=0, nullable=False)
+    with_checkins = Column(Integer, default=0, nullable=False)
+    checkins_today = Column(Integer, default=0, nullable=False)
+    bets_today = Column(Integer, default=0, nullable=False)
+    active_1d = Column(Integer, default=0, nullable=False)
+    active_7d = Column(Integer, default=0, nullable=False)
+    active_30d = Column(Integer, default=0, nullable=False)
+    new_30d = Column(Integer, default=0, nullable=False)
+    online_5m = Column(Integer, default=0, nullable=False)
+    online_15m = Column(Integer, default=0, nullable=False)
+    ev_new_users = Column(Integer, default=0, nullable=False)
+    ev_first_bets = Column(Integer, default=0, nullable=False)
+    ev_first_checkins = Column(Integer, default=0, nullable=False)
+    ev_checkins = Column(Integer, default=0, nullable=False)
+    ev_bets = Column(Integer, default=0, nullable=False)
+    reconciled_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+
+
+class UserStatsCounter(Base):
+    __tablename__ = 'user_stats_counters'
+    day = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    new_users = Column(Integer, default=0, nullable=False)
+    first_bets = Column(Integer, default=0, nullable=False)
+    first_checkins = Column(Integer, default=0, nullable=False)
+    checkins = Column(Integer, default=0, nullable=False)
+    bets = Column(Integer, default=0, nullable=False)
+
+
+class UserStatsDaily(Base):
+    __tablename__ = 'user_stats_daily'
+    day = Column(Date, primary_key=True)
+    total_users = Column(Integer, default=0, nullable=False)
+    new_users = Column(Integer, default=0, nullable=False)
+    active_1d = Column(Integer, default=0, nullable=False)
+    active_7d = Column(Integer, default=0, nullable=False)
+    active_30d = Column(Integer, default=0, nullable=False)
+    with_bets = Column(Integer, default=0, nullable=False)
+    with_checkins = Column(Integer, default=0, nullable=False)
+    checkins = Column(Integer, default=0, nullable=False)
+    bets = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True))
+
+
+NOW = datetime(2025, 9, 10, 12, 0, tzinfo=timezone.utc)
+TODAY = NOW.date()
+
+
+def _stats(db, now):
+    db.expunge_all()
+    return user_stats.read(db, UserStats, UserStatsCounter, User, now)
+
+
+def test_reconcile_then_sharded_events_and_day_rollover():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        User(user_id=1, created_at=NOW - timedelta(days=40), updated_at=NOW - timedelta(minutes=2), last_checkin_date=TODAY),
+        User(user_id=2, created_at=NOW - timedelta(days=10), updated_at=NOW - timedelta(days=3), last_checkin_date=TODAY - timedelta(days=5)),
+        User(user_id=3, created_at=NOW - timedelta(hours=1), updated_at=NOW - timedelta(minutes=10)),
+        Bet(id=1, user_id=1, placed_at=NOW - timedelta(days=2)),
+        Bet(id=2, user_id=1, placed_at=NOW - timedelta(hours=2)),
+        Bet(id=3, user_id=2, placed_at=NOW - timedelta(hours=3)),
+    ])
+    db.commit()
+
+    # Событие до первого reconcile уже учтено точным пересчётом — второй раз не прибавляется
+    user_stats.record(db, UserStatsCounter, TODAY, 3, new_users=1)
+    db.commit()
+    assert user_stats.read(db, UserStats, UserStatsCounter, User, NOW) is None
+
+    counts = user_stats.reconcile(db, UserStats, UserStatsDaily, UserStatsCounter, User, Bet, NOW)
+    db.commit()
+    assert counts == {
+        'total_users': 3, 'new_today': 1, 'new_30d': 2, 'online_5m': 1, 'online_15m': 2,
+        'active_1d': 2, 'active_7d': 3, 'active_30d': 3, 'with_checkins': 2, 'checkins_today': 1,
+        'with_bets': 2, 'bets_today': 2,
+    }
+    stats = _stats(db, NOW)
+    assert stats['total_users'] == 3 and stats['new_today'] == 1 and stats['reconciled_at'].startswith('2025-09-10')
+    assert not user_stats.is_stale(stats, NOW + timedelta(seconds=30), 60)
+    assert user_stats.is_stale(stats, NOW + timedelta(seconds=90), 60)
+
+    # События пишут строки (день, шард), а не общую строку user_stats
+    stmts = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: stmts.append(a[2]))
+    user_stats.record(db, UserStatsCounter, TODAY, 4, new_users=1)
+    user_stats.record(db, UserStatsCounter, TODAY, 1, bets=1)
+    user_stats.record(db, UserStatsCounter, TODAY, 20, bets=1, first_bets=1)
+    user_stats.record(db, UserStatsCounter, TODAY, 3, checkins=1, first_checkins=1)
+    user_stats.record(db, UserStatsCounter, TODAY, 3)
+    db.commit()
+    assert len(stmts) == 4 and not any('user_stats ' in s or 'user_stats\n' in s for s in stmts)
+    # 4 и 20 — один шард: строка накапливает оба события
+    shard4 = db.query(UserStatsCounter).filter(UserStatsCounter.day == TODAY, UserStatsCounter.shard == 4).one()
+    assert (shard4.new_users, shard4.bets, shard4.first_bets) == (1, 1, 1)
+    stats = _stats(db, NOW)
+    assert (stats['total_users'], stats['new_today'], stats['with_bets'], stats['bets_today'],
+            stats['checkins_today'], stats['with_checkins']) == (4, 2, 3, 4, 2, 3)
+
+    # Онлайн — на чтении, без reconcile
+    db.get(User, 2).updated_at = NOW - timedelta(minutes=1)
+    db.commit()
+    stats = _stats(db, NOW)
+    assert (stats['online_5m'], stats['online_15m']) == (2, 3)
+    assert _stats(db, NOW + timedelta(minutes=20))['online_15m'] == 0
+
+    # Новый день до reconcile: суточные — только события дня, накопительные — основа + все события
+    tomorrow = NOW + timedelta(days=1)
+    assert _stats(db, tomorrow)['new_today'] == 0
+    user_stats.record(db, UserStatsCounter, tomorrow.date(), 5, new_users=1)
+    db.commit()
+    stats = _stats(db, tomorrow)
+    assert (stats['total_users'], stats['new_today'], stats['bets_today'], stats['checkins_today']) == (5, 1, 0, 0)
+
+    # История: снимок дня пишется reconcile, повтор в тот же день — обновление строки; старые шарды удаляются
+    user_stats.reconcile(db, UserStats, UserStatsDaily, UserStatsCounter, User, Bet, tomorrow)
+    user_stats.reconcile(db, UserStats, UserStatsDaily, UserStatsCounter, User, Bet, tomorrow + timedelta(hours=1))
+    db.commit()
+    assert {r.day for r in db.query(UserStatsCounter)} == {tomorrow.date()}
+    # Пользователей в таблице 3: основа пересчитана, события дня уже учтены смещением
+    assert _stats(db, tomorrow + timedelta(hours=1))['total_users'] == 3
+    hist = user_stats.history(db, UserStatsDaily, 30)
+    assert [h['day'] for h in hist] == ['2025-09-10', '2025-09-11']
+    assert hist[0]['new_users'] == 1 and hist[0]['bets'] == 2 and hist[1]['total_users'] == 3
+    assert user_stats.history(db, UserStatsDaily, 1)[0]['day'] == '2025-09-11'
@@ -0,0 +1,48 @@
+import sys
+import os
+
+# ensure project root is on path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from optimizations.websocket_manager import WebSocketManager
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.sent = []
+
+    def emit(self, event, data, room=None, namespace=None):
+        self.sent.append((event, data, room))
+
+
+def test_patch_versions_increase_per_stream():
+    sio = FakeSocketIO()
+    ws = WebSocketManager(sio)
+    ws.notify_patch('match', {'home': 'A', 'away': 'B'}, {'score_home': 1})
+    ws.notify_patch('match', {'home': 'A', 'away': 'B'}, {'score_home': 2})
+    ws.notify_patch('match', {'home': 'C', 'away': 'D'}, {'score_home': 0})
+    ws.notify_patch('match', {'home': 'A', 'away': 'B'}, {'score_home': 3}, room='match_A_B')
+
+    msgs = [data for _, data, _ in sio.sent]
+    assert [m['v'] for m in msgs] == [1, 2, 1, 1]
+    assert msgs[0]['stream'] == msgs[1]['stream']
+    # Разные матчи и комнаты — независимые потоки (клиент вне комнаты не видит ложного разрыва)
+    assert len({m['stream'] for m in msgs}) == 3
+    assert all(m['epoch'] == ws.stream_epoch for m in msgs)
+
+
+def test_data_change_versions_by_type_and_match():
+    sio = FakeSocketIO()
+    ws = WebSocketManager(sio)
+    ws.notify_data_change('league_table', {'values': [], 'updated_at': 'x'})
+    ws.notify_data_change('league_table', {'values': [], 'updated_at': 'y'})
+    ws.notify_data_change('lineups_updated', {'home': 'A', 'away': 'B'})
+
+    msgs = [data for _, data, _ in sio.sent]
+    assert [m['v'] for m in msgs] == [1, 2, 1]
+    assert msgs[0]['stream'] == 'data|league_table'
+    assert msgs[2]['stream'] == 'data|lineups_updated|A|B'
+    # Новый процесс — новый epoch
+    assert WebSocketManager(FakeSocketIO()).stream_epoch != ws.stream_epoch
@@ -0,0 +1,105 @@
+"""
+Static assets: URL-ы из манифеста сборки (scripts/build-assets.mjs) и раздача предсжатых файлов.
+
+asset_url('js/predictions.js') -> /static/dist/js/predictions.<hash>.js, если есть static/dist/manifest.json;
+иначе — исходный файл с ?v=STATIC_VERSION (dev-режим без сборки). asset_bundle('css/app.css') — список URL:
+один хешированный бандл или его исходные части из static/assets.json.
+Файлы /static/dist/* отдаются как .br/.gz-сиблинги по Accept-Encoding без сжатия на лету.
+"""
+from __future__ import annotations
+import json
+import mimetypes
+import os
+import threading
+from typing import Dict, List, Optional
+
+from flask import Flask, abort, request, send_from_directory
+
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _accepts(encoding: str) -> bool:
+    """Accept-Encoding содержит encoding без q=0"""
+    for part in (request.headers.get('Accept-Encoding') or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip().lower() != encoding:
+            continue
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def init_assets(app: Flask, static_version: str, out_dir: str = 'dist') -> None:
+    """Регистрирует asset_url/asset_bundle в Jinja и маршрут предсжатой раздачи /static/<out_dir>/"""
+    static_root = app.static_folder or os.path.join(app.root_path, 'static')
+    dist_root = os.path.join(static_root, out_dir)
+    manifest_path = os.path.join(dist_root, 'manifest.json')
+    bundles: Dict[str, List[str]] = _read_json(os.path.join(static_root, 'assets.json')).get('bundles') or {}
+    state: Dict[str, object] = {'manifest': None, 'mtime': None}
+    lock = threading.Lock()
+
+    def manifest() -> dict:
+        # Читаем один раз; в debug — перечитываем при пересборке (смена mtime)
+        cached = state['manifest']
+        if cached is not None and not app.debug:
+            return cached  # type: ignore[return-value]
+        try:
+            mtime: Optional[float] = os.path.getmtime(manifest_path)
+        except OSError:
+            mtime = None
+        if cached is None or mtime != state['mtime']:
+            with lock:
+                state['manifest'] = _read_json(manifest_path) if mtime is not None else {}
+                state['mtime'] = mtime
+        return state['manifest']  # type: ignore[return-value]
+
+    def asset_url(path: str) -> str:
+        path = path.lstrip('/')
+        built = manifest().get(path)
+        if built:
+            return f"/static/{out_dir}/{built}"
+        return f"/static/{path}?v={static_version}"
+
+    def asset_bundle(name: str) -> List[str]:
+        if manifest().get(name):
+            return [asset_url(name)]
+        members = bundles.get(name) or [name]
+        return [asset_url(m) for m in members]
+
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.jinja_env.globals['asset_bundle'] = asset_bundle
+    app.extensions['asset_url'] = asset_url
+
+    @app.route(f'/static/{out_dir}/<path:filename>', endpoint='static_dist')
+    def _static_dist(filename: str):
+        if filename.endswith(('.br', '.gz')):
+            abort(404)
+        full = os.path.join(dist_root, filename)
+        if not os.path.isfile(full):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in _ENCODINGS:
+            if os.path.isfile(full + suffix) and _accepts(encoding):
+                resp = send_from_directory(dist_root, filename + suffix, mimetype=mimetype, max_age=31536000)
+                resp.headers['Content-Encoding'] = encoding
+                break
+        else:
+            resp = send_from_directory(dist_root, filename, mimetype=mimetype, max_age=31536000)
+        resp.headers['Vary'] = 'Accept-Encoding'
+        # Имя содержит хеш содержимого — файл никогда не меняется
+        resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return resp
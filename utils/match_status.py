@@ -1,5 +1,8 @@
 from __future__ import annotations
-from typing import Optional, List, Tuple
+import os
+import threading
+import time
+from typing import Optional, List, Tuple, Dict, Iterable
 from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import text
@@ -9,27 +12,127 @@ from sqlalchemy import text
 
 VALID_STATUSES = {"scheduled", "live", "finished", "cancelled", "postponed"}
 
+# In-memory карта Team.name -> id (per-process). Сбрасывается при изменении команд
+# (invalidate_team_ids из admin CRUD), в остальных воркерах — по TTL.
+_TEAM_IDS: Dict[str, object] = {'map': None, 'ts': 0.0}
+_TEAM_IDS_LOCK = threading.Lock()
+TEAM_ID_MAP_TTL_SEC = int(os.environ.get('TEAM_ID_MAP_TTL_SEC', '300'))
+
+
+def invalidate_team_ids() -> None:
+    with _TEAM_IDS_LOCK:
+        _TEAM_IDS['map'] = None
+        _TEAM_IDS['ts'] = 0.0
+
+
+def team_id_map(db: Session) -> Dict[str, int]:
+    """Team.name -> id (первая по id команда с таким именем, как .first() в старом поиске)"""
+    cached = _TEAM_IDS['map']
+    if cached is not None and (time.time() - float(_TEAM_IDS['ts'])) < TEAM_ID_MAP_TTL_SEC:
+        return cached  # type: ignore[return-value]
+    from database.database_models import Team
+    mapping: Dict[str, int] = {}
+    for tid, name in db.query(Team.id, Team.name).order_by(Team.id.asc()).all():
+        if name and name not in mapping:
+            mapping[name] = tid
+    with _TEAM_IDS_LOCK:
+        _TEAM_IDS['map'] = mapping
+        _TEAM_IDS['ts'] = time.time()
+    return mapping
+
+
+def _team_id(db: Session, name: str) -> Optional[int]:
+    tid = team_id_map(db).get(name)
+    if tid is None:
+        # Команда могла появиться в другом воркере: точечный запрос вместо ожидания TTL
+        from database.database_models import Team
+        row = db.query(Team.id).filter(Team.name == name).order_by(Team.id.asc()).first()
+        tid = row[0] if row else None
+    return tid
+
 
 def _find_match_by_team_names(db: Session, home: str, away: str):
     """Best-effort lookup: find latest match by team names.
-    This uses Team.name -> ids and then picks most recent Match(home_id, away_id).
+    Team.name -> ids comes from the in-memory map, then picks most recent Match(home_id, away_id).
     Returns ORM object Match or None.
     """
-    from database.database_models import Team, Match
+    from database.database_models import Match
     if not home or not away:
         return None
-    h = db.query(Team).filter(Team.name == home).first()
-    a = db.query(Team).filter(Team.name == away).first()
-    if not h or not a:
+    h = _team_id(db, home)
+    a = _team_id(db, away)
+    if h is None or a is None:
         return None
     return (
         db.query(Match)
-        .filter(Match.home_team_id == h.id, Match.away_team_id == a.id)
+        .filter(Match.home_team_id == h, Match.away_team_id == a)
         .order_by(Match.match_date.desc())
         .first()
     )
 
 
+def load_match_states(db: Session, pairs: Iterable[Tuple[str, str]], MatchFlags=None) -> Dict[Tuple[str, str], dict]:
+    """Пакетно: статус из `matches` (последний матч пары) и флаги MatchFlags для списка (home, away).
+
+    Один запрос к matches + один к match_flags вместо трёх-четырёх запросов на пару.
+    Возвращает {(home, away): {'status', 'match_date', 'flags_status', 'live_started_at'}};
+    пары без данных тоже присутствуют (значения None).
+    """
+    from database.database_models import Match
+    keys = {((h or '').strip(), (a or '').strip()) for h, a in (pairs or [])}
+    keys.discard(('', ''))
+    out: Dict[Tuple[str, str], dict] = {
+        k: {'status': None, 'match_date': None, 'flags_status': None, 'live_started_at': None} for k in keys
+    }
+    if not keys:
+        return out
+    ids = dict(team_id_map(db))
+    missing = {n for k in keys for n in k if n and n not in ids}
+    if missing:
+        # Команды, появившиеся в другом воркере после построения карты: один запрос на все
+        from database.database_models import Team
+        for tid, name in db.query(Team.id, Team.name).filter(Team.name.in_(missing)).order_by(Team.id.asc()).all():
+            ids.setdefault(name, tid)
+    by_ids = {}
+    for h, a in keys:
+        hid, aid = ids.get(h), ids.get(a)
+        if hid is not None and aid is not None:
+            by_ids[(hid, aid)] = (h, a)
+    if by_ids:
+        rows = (
+            db.query(Match.home_team_id, Match.away_team_id, Match.status, Match.match_date)
+            .filter(Match.home_team_id.in_({h for h, _ in by_ids}), Match.away_team_id.in_({a for _, a in by_ids}))
+            .all()
+        )
+        for hid, aid, status, match_date in rows:
+            key = by_ids.get((hid, aid))
+            if key is None:
+                continue
+            cur = out[key]
+            # как в _find_match_by_team_names: берём самый поздний матч пары
+            if cur['match_date'] is None or (match_date is not None and match_date > cur['match_date']):
+                cur['status'] = status
+                cur['match_date'] = match_date
+            elif cur['status'] is None and match_date is None:
+                cur['status'] = status
+    if MatchFlags is not None:
+        rows = (
+            db.query(MatchFlags)
+            .filter(MatchFlags.home.in_({h for h, _ in keys}), MatchFlags.away.in_({a for _, a in keys}))
+            .order_by(MatchFlags.id.asc())
+            .all()
+        )
+        seen = set()
+        for row in rows:
+            key = (row.home, row.away)
+            if key not in out or key in seen:
+                continue
+            seen.add(key)
+            out[key]['flags_status'] = row.status
+            out[key]['live_started_at'] = row.live_started_at
+    return out
+
+
 def set_match_status_by_names(db: Session, home: str, away: str, status: str, *, mirror_to_flags: bool = True) -> Tuple[bool, Optional[str]]:
     """Set match status in `matches` by team names. Optionally mirror to MatchFlags.
     Returns (ok, error)."""
@@ -76,10 +179,13 @@ def get_match_status_by_names(db: Session, home: str, away: str) -> Optional[str
 def list_live_matches(db: Session) -> List[Tuple[str, str, Optional[str]]]:
     """Return list of (home_name, away_name, live_started_at_iso) for matches with status='live'."""
     from database.database_models import Team, Match
+    from sqlalchemy.orm import aliased
+    # Две роли одной таблицы teams — нужны алиасы (без них запрос падает на двойном JOIN teams)
+    HomeTeam, AwayTeam = aliased(Team), aliased(Team)
     q = (
-        db.query(Match, Team, Team)
-        .join(Team, Match.home_team_id == Team.id)
-        .join(Team, Match.away_team_id == Team.id)
+        db.query(Match, HomeTeam, AwayTeam)
+        .join(HomeTeam, Match.home_team_id == HomeTeam.id)
+        .join(AwayTeam, Match.away_team_id == AwayTeam.id)
         .filter(Match.status == 'live')
         .order_by(Match.match_date.desc())
     )
@@ -2,11 +2,12 @@
 Middleware for Liga Obninska
 Security, monitoring, and performance middleware
 """
+import os
 import time
-from flask import request, g, jsonify
+from flask import request, g, jsonify, has_request_context
 from functools import wraps
 from utils.security import sql_prevention, rate_limiter
-from utils.monitoring import performance_metrics, db_monitor
+from utils.monitoring import performance_metrics, db_monitor, query_profiler
 
 class SecurityMiddleware:
     """Security middleware for Flask application"""
@@ -78,7 +79,7 @@ class SecurityMiddleware:
         """Validate content type for POST requests"""
         if request.method == 'POST':
             content_type = request.content_type
-            if content_type and not content_type.startswith(('application/json', 'application/x-www-form-urlencoded', 'multipart/form-data')):
+            if content_type and not content_type.startswith(('application/json', 'application/x-ndjson', 'application/x-www-form-urlencoded', 'multipart/form-data')):
                 print(f"Suspicious content type: {content_type}")
     
     def _add_security_headers(self):
@@ -126,15 +127,31 @@ class PerformanceMiddleware:
         return response
 
 class DatabaseMiddleware:
-    """Database monitoring middleware"""
+    """Database monitoring middleware
+
+    Besides global query stats, keeps a per-request query profile (count, DB time,
+    fingerprints) and flags N+1 patterns via utils.monitoring.query_profiler.
+    Debug headers X-DB-* are added when QUERY_PROFILER_HEADERS=1 or app.debug.
+    """
     
-    def __init__(self, app=None):
+    def __init__(self, app=None, profile_requests=None, debug_headers=None):
         self.app = app
+        if profile_requests is None:
+            profile_requests = os.environ.get('QUERY_PROFILER_ENABLED', '1').lower() in ('1', 'true', 'yes')
+        if debug_headers is None:
+            debug_headers = os.environ.get('QUERY_PROFILER_HEADERS', '').lower() in ('1', 'true', 'yes')
+        self.profile_requests = profile_requests
+        self.debug_headers = debug_headers
         if app is not None:
             self.init_app(app)
     
     def init_app(self, app):
         """Initialize middleware with Flask app"""
+        if self.profile_requests:
+            app.before_request(self.before_request)
+            app.after_request(self.after_request)
+        if app.debug:
+            self.debug_headers = True
         # Hook into SQLAlchemy events if available
         try:
             from sqlalchemy import event
@@ -156,10 +173,40 @@ class DatabaseMiddleware:
                     
                     # Record in performance metrics
                     performance_metrics.record_db_query(duration_ms)
+
+                    # Per-request profile (фоновые потоки без request context пропускаем)
+                    if has_request_context():
+                        state = g.get('query_profile')
+                        if state is not None:
+                            query_profiler.record(state, statement, duration_ms)
         
         except ImportError:
             print("SQLAlchemy not available for database monitoring")
 
+    def before_request(self):
+        """Start per-request query profile"""
+        g.query_profile = query_profiler.begin()
+
+    def after_request(self, response):
+        """Fold request profile into aggregates and optionally expose debug headers"""
+        try:
+            state = g.pop('query_profile', None)
+            if state is None:
+                return response
+            suspects = query_profiler.finish(request.endpoint or request.path, request.method, state)
+            if suspects:
+                print(f"N+1 SUSPECT: {request.method} {request.path} "
+                      f"{suspects[0]['count']}x {suspects[0]['fingerprint'][:120]}")
+            if self.debug_headers:
+                response.headers['X-DB-Query-Count'] = str(state['count'])
+                response.headers['X-DB-Time-Ms'] = f"{state['time_ms']:.2f}"
+                response.headers['X-DB-Distinct-Queries'] = str(len(state['fingerprints']))
+                if suspects:
+                    response.headers['X-DB-N1-Suspects'] = str(len(suspects))
+        except Exception:
+            pass
+        return response
+
 class ErrorHandlingMiddleware:
     """Error handling middleware"""
     
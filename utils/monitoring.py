@@ -3,7 +3,9 @@ Performance monitoring and metrics for Liga Obninska
 Tracks application performance, database queries, and API response times
 """
 import time
+import re
 import threading
+from functools import lru_cache
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 from collections import defaultdict, deque
@@ -155,6 +157,138 @@ class DatabaseMonitor:
                 'connection_pool': self.connection_pool_stats
             }
 
+_FP_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_FP_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_FP_PARAM_RE = re.compile(r"(%\(\w+\)s|%s|:\w+|\$\d+|\?)")
+_FP_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_FP_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """Normalize SQL into a fingerprint: literals/params -> ?, IN (...) collapsed, whitespace squashed."""
+    if not statement:
+        return ''
+    s = _FP_STRING_RE.sub('?', statement)
+    s = _FP_PARAM_RE.sub('?', s)
+    s = _FP_NUMBER_RE.sub('?', s)
+    s = _FP_IN_LIST_RE.sub('IN (?)', s)
+    s = _FP_SPACE_RE.sub(' ', s).strip()
+    return s[:500]
+
+
+class QueryProfiler:
+    """Per-request SQL profiler with N+1 detection.
+
+    Per request collects query count, total DB time and statement fingerprints.
+    A fingerprint repeated >= n1_threshold times within one request is flagged as N+1.
+    Aggregates per endpoint are kept in memory (bounded) for the admin endpoint.
+    """
+
+    def __init__(self, n1_threshold: int = 5, max_recent: int = 100, max_offenders: int = 200):
+        self.n1_threshold = n1_threshold
+        self.recent_requests = deque(maxlen=max_recent)
+        self.max_offenders = max_offenders
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+        self.n1_offenders: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def begin(self) -> Dict[str, Any]:
+        """Create per-request state (stored in flask.g by DatabaseMiddleware)"""
+        return {'count': 0, 'time_ms': 0.0, 'fingerprints': {}}
+
+    def record(self, state: Dict[str, Any], statement: str, duration_ms: float):
+        """Record single query into request state (called from cursor event)"""
+        if state is None:
+            return
+        fp = normalize_statement(statement)
+        state['count'] += 1
+        state['time_ms'] += duration_ms
+        entry = state['fingerprints'].get(fp)
+        if entry is None:
+            state['fingerprints'][fp] = [1, duration_ms]
+        else:
+            entry[0] += 1
+            entry[1] += duration_ms
+
+    def suspects(self, state: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fingerprints repeated >= n1_threshold times in the request"""
+        out = []
+        for fp, (cnt, t_ms) in (state or {}).get('fingerprints', {}).items():
+            if cnt >= self.n1_threshold:
+                out.append({'fingerprint': fp, 'count': cnt, 'time_ms': round(t_ms, 2)})
+        out.sort(key=lambda x: x['count'], reverse=True)
+        return out
+
+    def finish(self, endpoint: str, method: str, state: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fold request state into aggregates; returns N+1 suspects of this request"""
+        if not state or not state.get('count'):
+            return []
+        suspects = self.suspects(state)
+        now_iso = datetime.now(timezone.utc).isoformat()
+        with self.lock:
+            agg = self.endpoints.get(endpoint)
+            if agg is None:
+                agg = {'requests': 0, 'queries': 0, 'db_time_ms': 0.0, 'max_queries': 0, 'n1_requests': 0}
+                self.endpoints[endpoint] = agg
+            agg['requests'] += 1
+            agg['queries'] += state['count']
+            agg['db_time_ms'] += state['time_ms']
+            agg['max_queries'] = max(agg['max_queries'], state['count'])
+            if suspects:
+                agg['n1_requests'] += 1
+            for s in suspects:
+                key = f"{endpoint}|{s['fingerprint']}"
+                off = self.n1_offenders.get(key)
+                if off is None:
+                    if len(self.n1_offenders) >= self.max_offenders:
+                        continue
+                    off = {'endpoint': endpoint, 'fingerprint': s['fingerprint'], 'hits': 0, 'max_repeats': 0, 'last_seen': None}
+                    self.n1_offenders[key] = off
+                off['hits'] += 1
+                off['max_repeats'] = max(off['max_repeats'], s['count'])
+                off['last_seen'] = now_iso
+            self.recent_requests.append({
+                'endpoint': endpoint,
+                'method': method,
+                'queries': state['count'],
+                'db_time_ms': round(state['time_ms'], 2),
+                'distinct': len(state['fingerprints']),
+                'n1': suspects[:5],
+                'timestamp': now_iso,
+            })
+        return suspects
+
+    def get_report(self, limit: int = 20) -> Dict[str, Any]:
+        """Snapshot for admin endpoint: worst endpoints, N+1 offenders, recent requests"""
+        with self.lock:
+            endpoints = []
+            for name, agg in self.endpoints.items():
+                req = agg['requests'] or 1
+                endpoints.append({
+                    'endpoint': name,
+                    'requests': agg['requests'],
+                    'avg_queries': round(agg['queries'] / req, 2),
+                    'max_queries': agg['max_queries'],
+                    'avg_db_time_ms': round(agg['db_time_ms'] / req, 2),
+                    'n1_requests': agg['n1_requests'],
+                })
+            endpoints.sort(key=lambda x: x['avg_queries'], reverse=True)
+            offenders = sorted(self.n1_offenders.values(), key=lambda x: (x['max_repeats'], x['hits']), reverse=True)
+            return {
+                'n1_threshold': self.n1_threshold,
+                'endpoints': endpoints[:limit],
+                'n1_offenders': [dict(o) for o in offenders[:limit]],
+                'recent_requests': list(self.recent_requests)[-limit:],
+            }
+
+    def reset(self):
+        """Reset aggregates"""
+        with self.lock:
+            self.endpoints.clear()
+            self.n1_offenders.clear()
+            self.recent_requests.clear()
+
 class CacheMonitor:
     """Monitors cache performance"""
     
@@ -310,3 +444,4 @@ performance_metrics = PerformanceMetrics()
 db_monitor = DatabaseMonitor()
 cache_monitor = CacheMonitor()
 health_check = HealthCheck()
+query_profiler = QueryProfiler(n1_threshold=int(os.environ.get('QUERY_PROFILER_N1_THRESHOLD', '5') or 5))